@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of executing a Watchdog code block in an IPython shell, as a
+formatted cell and as a precompiled code.
+"""
+
+from harness import benchmark
+from IPython.core.interactiveshell import InteractiveShell
+
+from jaffle.app.base.code import CompiledCode
+
+CODE = 'handle_watchdog_event({event})'
+
+EVENT = {
+    'event_type': 'modified',
+    'src_path': 'jaffle/app/watchdog/handler.py',
+    'is_directory': False,
+    'trace_id': '8f3a2c1d9e7b4a60'
+}
+
+
+def _shell():
+    """
+    Creates an IPython shell with ``handle_watchdog_event()`` in the user
+    namespace.
+
+    Returns
+    -------
+    shell : IPython.core.interactiveshell.InteractiveShell
+        IPython shell.
+    """
+    shell = InteractiveShell.instance()
+    shell.user_ns['handle_watchdog_event'] = lambda event: None
+    return shell
+
+
+@benchmark('code.run_cell')
+def code_run_cell():
+    shell = _shell()
+
+    def run():
+        shell.run_cell(CODE.format(event=EVENT))
+
+    yield run
+
+
+@benchmark('code.compiled')
+def code_compiled():
+    compiled = CompiledCode(CODE, ['event'], _shell().user_ns)
+
+    def run():
+        compiled(event=EVENT)
+
+    yield run
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of configuration values and variables.
+"""
+
+import re
+
+from fixtures import load_example_config
+from harness import benchmark
+
+from jaffle.config import ConfigDict
+from jaffle.config.template_string import TemplateString
+from jaffle.variables import VariablesNamespace
+
+VAR_DEFS = {
+    'watchdog_log_level': {'default': 'info'},
+    'tornado_threaded': {'default': False},
+    'port': {'type': 'int', 'default': 8080},
+    'ratio': {'default': 0.5},
+    'paths': {'type': 'list', 'default': ['src', 'tests']},
+    'options': {'type': 'dict', 'default': {'debug': True}},
+}
+
+RUNTIME_VARIABLES = {'watchdog_log_level': 'debug', 'tornado_threaded': 'true', 'port': '9000'}
+
+
+@benchmark('config.template_string.render')
+def template_string_render():
+    conf = load_example_config()
+    tstr = TemplateString('${var.tornado_log_level}', conf.namespace)
+    yield tstr.render
+
+
+@benchmark('config.template_string.render_match')
+def template_string_render_match():
+    conf = load_example_config()
+    tstr = TemplateString("${fg('cyan')}\\1${reset()}::${fg('magenta')}\\2${reset()}",
+                          conf.namespace)
+    match = re.match('(.*)::(.*)', 'tests/test_main.py::test_get_index PASSED')
+    yield lambda: tstr.render(match=match)
+
+
+@benchmark('config.config_dict.get_raw')
+def config_dict_get_raw():
+    conf = load_example_config()
+    # app options are passed to the kernel as raw values
+    app = conf.app['pytest']
+    yield lambda: app.get_raw('options')
+
+
+@benchmark('config.config_dict.get_raw_deep')
+def config_dict_get_raw_deep():
+    conf = load_example_config()
+    data = ConfigDict({'app': conf.app.raw()}, namespace=conf.namespace)
+    yield lambda: data.get_raw('app')
+
+
+@benchmark('variables.namespace.init')
+def variables_namespace_init():
+    yield lambda: VariablesNamespace(VAR_DEFS, vars=RUNTIME_VARIABLES)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the log handler and the formatter of ``jaffle start``.
+"""
+
+import io
+
+from fixtures import OUTPUT_LINES, load_example_config, make_records
+from harness import benchmark
+
+from jaffle.logging import LOG_FORMAT, JaffleCommandLogHandler, LogFormatter
+
+
+@benchmark('logging.command_handler.emit', ops=len(OUTPUT_LINES))
+def command_handler_emit():
+    handler = JaffleCommandLogHandler(load_example_config())
+    handler.setFormatter(LogFormatter(fmt=LOG_FORMAT))
+    handler.stream = io.StringIO()
+
+    def emit():
+        handler.stream.seek(0)
+        handler.stream.truncate()
+        # emit() overwrites the message, so the records are made every time.
+        for record in make_records():
+            handler.emit(record)
+
+    yield emit
+
+
+@benchmark('logging.formatter.format', ops=len(OUTPUT_LINES))
+def formatter_format():
+    formatter = LogFormatter(fmt=LOG_FORMAT)
+    records = make_records()
+
+    def format_records():
+        for record in records:
+            formatter.format(record)
+
+    yield format_records
+
+
+@benchmark('logging.formatter.format_no_color', ops=len(OUTPUT_LINES))
+def formatter_format_no_color():
+    formatter = LogFormatter(fmt=LOG_FORMAT, enable_color=False)
+    records = make_records()
+
+    def format_records():
+        for record in records:
+            formatter.format(record)
+
+    yield format_records
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of saving and loading the server status file.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from harness import benchmark
+
+from jaffle.status import JaffleStatus
+
+
+def make_status():
+    """
+    Makes a status with two kernels and five apps.
+
+    Returns
+    -------
+    status : JaffleStatus
+        Jaffle server status.
+    """
+    status = JaffleStatus(
+        pid=os.getpid(),
+        raw_namespace={'HOME': '/home/user', 'TERM': 'xterm-256color'},
+        runtime_variables={'watchdog_log_level': 'debug'},
+        control_url='ipc:///home/user/.jaffle/control.sock'
+    )
+    for i in range(2):
+        status.add_session(
+            'session-id-{}'.format(i), 'kernel_{}'.format(i),
+            kernel={'id': 'kernel-id-{}'.format(i), 'name': 'python3'}
+        )
+    for i in range(5):
+        status.add_app(
+            'app_{}'.format(i), 'kernel_{}'.format(i % 2), 'jaffle.app.pytest.PyTestRunnerApp',
+            'yes', {'args': ['-s', '-v'], 'auto_test': ['tests/test_*.py']}
+        )
+    return status
+
+
+@benchmark('status.save')
+def status_save():
+    tmp_dir = tempfile.mkdtemp()
+    status = make_status()
+    file_path = Path(tmp_dir) / 'jaffle.json'
+    yield lambda: status.save(file_path)
+    shutil.rmtree(tmp_dir)
+
+
+@benchmark('status.load')
+def status_load():
+    tmp_dir = tempfile.mkdtemp()
+    file_path = Path(tmp_dir) / 'jaffle.json'
+    make_status().save(file_path)
+    yield lambda: JaffleStatus.load(file_path)
+    shutil.rmtree(tmp_dir)
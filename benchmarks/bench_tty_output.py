@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of filtering TTY output.
+
+It compares the former regex filter of ``jaffle tty`` with the streaming
+filters of ``jaffle.ansi`` on a session resembling ``yarn install`` and
+``webpack --progress`` output, which redraws progress bars with carriage
+returns and cursor movements. The session is written in chunks of random
+sizes as pexpect or a PTY reader receives it.
+
+Usage::
+
+    python benchmarks/bench_tty_output.py [--repeat=N]
+
+The filters are also included in the suite run by ``benchmarks/run.py``.
+"""
+
+import argparse
+import random
+import re
+import time
+
+from harness import benchmark
+
+from jaffle.ansi import EscapeSequenceFilter, TerminalOutputFilter
+
+_ESC_PATTERN = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -/]*[@-ln-~]')
+
+
+def yarn_webpack_session(steps=2000, seed=0):
+    """
+    Generates a terminal session with progress redraws.
+
+    Parameters
+    ----------
+    steps : int
+        Number of progress redraws of each progress bar.
+    seed : int
+        Random seed.
+
+    Returns
+    -------
+    chunks : list[str]
+        Output chunks.
+    """
+    rand = random.Random(seed)
+    out = ['\x1b[2m$ yarn install\x1b[22m\r\n', '\x1b[1myarn install v1.22.19\x1b[22m\r\n']
+    for phase, name in enumerate(['Resolving', 'Fetching', 'Linking', 'Building']):
+        out.append('\x1b[2m[{}/4]\x1b[22m {} packages...\r\n'.format(phase + 1, name))
+        for i in range(steps):
+            done = i * 40 // steps
+            bar = '#' * done + '-' * (40 - done)
+            out.append('\x1b[?25l\x1b[2K\r[{}] {}/{}'.format(bar, i, steps))
+        out.append('\x1b[2K\r\x1b[?25h')
+    for i in range(steps):
+        percent = i * 100 // steps
+        out.append('\x1b[1G\x1b[0K\x1b[32m{:>3}%\x1b[39m building {}/{} modules '
+                   '{} active ./src/components/Module{}.js\x1b[1A\r\n'.format(
+                       percent, i, steps, rand.randint(1, 8), i))
+    out.append('\x1b[1G\x1b[0K\x1b[32m\x1b[1mCompiled successfully.\x1b[22m\x1b[39m\r\n')
+    session = ''.join(out)
+
+    chunks = []
+    pos = 0
+    while pos < len(session):
+        size = rand.randint(64, 4096)
+        chunks.append(session[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def regex_filter(chunks):
+    return ''.join(_ESC_PATTERN.sub('', c) for c in chunks)
+
+
+def escape_filter(chunks):
+    f = EscapeSequenceFilter()
+    return ''.join(f.feed(c) for c in chunks) + f.flush()
+
+
+def terminal_filter(chunks):
+    f = TerminalOutputFilter()
+    return ''.join(f.feed(c) for c in chunks) + f.flush()
+
+
+@benchmark('ansi.escape_sequence_filter')
+def escape_sequence_filter():
+    chunks = yarn_webpack_session(steps=200)
+    yield lambda: escape_filter(chunks)
+
+
+@benchmark('ansi.terminal_output_filter')
+def terminal_output_filter():
+    chunks = yarn_webpack_session(steps=200)
+    yield lambda: terminal_filter(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of filtering TTY output.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of repeats')
+    args = parser.parse_args()
+
+    chunks = yarn_webpack_session()
+    size = sum(len(c) for c in chunks)
+    print('session: {} chunks, {} chars'.format(len(chunks), size))
+
+    for name, func in [('regex (former jaffle tty)', regex_filter),
+                       ('EscapeSequenceFilter', escape_filter),
+                       ('TerminalOutputFilter', terminal_filter)]:
+        best = None
+        for _ in range(args.repeat):
+            started_at = time.perf_counter()
+            output = func(chunks)
+            elapsed = time.perf_counter() - started_at
+            best = elapsed if best is None else min(best, elapsed)
+        print('{:<28} {:8.2f} ms {:8.1f} MB/s  output: {} chars, {} lines'.format(
+            name, best * 1000, size / best / 1e6, len(output), output.count('\n')))
+
+
+if __name__ == '__main__':
+    main()
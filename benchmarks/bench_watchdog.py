@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the event throughput of WatchdogHandler and the pattern
+matching of SharedWatcher.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from harness import benchmark
+from tornado import gen, ioloop
+from watchdog.events import FileModifiedEvent
+from watchdog.observers import Observer
+
+from jaffle.app.watchdog.handler import WatchdogHandler
+from jaffle.app.watchdog.matcher import PatternMatcher
+from jaffle.app.watchdog.polling import DirectoryScanner
+from jaffle.app.watchdog.watch import DirectoryPruner, SharedWatcher
+from jaffle.metrics import MetricsRegistry
+from jaffle.tracing import Tracer
+
+EVENTS_PER_CALL = 200
+
+
+def _watchdog_handler(tracer=None):
+    """
+    Creates a function to dispatch filesystem events to a WatchdogHandler
+    through SharedWatcher from an observer thread and wait for all code
+    blocks to be executed in the IO loop.
+
+    Parameters
+    ----------
+    tracer : Tracer or None
+        Tracer of the handler.
+
+    Yields
+    ------
+    func : function
+        Function to be timed.
+    """
+    io_loop = ioloop.IOLoop()
+    state = {'count': 0, 'done': None}
+
+    def execute_code(code, event=None):
+        state['count'] += 1
+        if state['count'] == EVENTS_PER_CALL:
+            state['done'].set_result(None)
+        return gen.maybe_future(None)
+
+    handler = WatchdogHandler(
+        io_loop,
+        execute_code,
+        lambda job, trace_id=None: gen.maybe_future(None),
+        logging.getLogger('benchmark.watchdog'),
+        metrics=MetricsRegistry(),
+        tracer=tracer,
+        patterns=['*.py'],
+        ignore_patterns=['*/tests/*.py'],
+        ignore_directories=True,
+        code_blocks=['pytest.handle_watchdog_event({event})']
+    )
+    root = str(Path.cwd())
+    # not started, the events are dispatched directly
+    watcher = SharedWatcher(Observer(), logging.getLogger('benchmark.watchdog'))
+    watcher.add_handler(handler, root, DirectoryPruner(root, ['node_modules']))
+    events = [
+        FileModifiedEvent(str(Path.cwd() / 'src' / 'module_{}.py'.format(i)))
+        for i in range(EVENTS_PER_CALL)
+    ]
+
+    def observe():
+        for event in events:
+            watcher.dispatch(event)
+
+    def run():
+        state['count'] = 0
+        state['done'] = gen.Future()
+        observer = threading.Thread(target=observe)
+        observer.start()
+        io_loop.run_sync(lambda: state['done'])
+        observer.join()
+
+    yield run
+    io_loop.close(all_fds=True)
+
+
+@benchmark('watchdog.handler.events', ops=EVENTS_PER_CALL)
+def watchdog_handler_events():
+    yield from _watchdog_handler()
+
+
+@benchmark('watchdog.handler.events_traced', ops=EVENTS_PER_CALL)
+def watchdog_handler_events_traced():
+    spans = deque(maxlen=1000)
+    yield from _watchdog_handler(Tracer(spans.append))
+
+
+@benchmark('watchdog.matcher.match', ops=8)
+def watchdog_matcher_match():
+    root = str(Path.cwd())
+    matcher = PatternMatcher()
+    for patterns, ignore_patterns, watch_path in [
+        (['*.py'], ['*/tests/*.py'], '.'),
+        (['*/tests/*.py'], [], '.'),
+        (['*.js', '*.jsx', '*.css'], ['*/node_modules/*'], 'frontend'),
+        (['*.py', '*.html'], [], 'templates'),
+        (['*.rst'], ['*/_build/*'], 'docs'),
+    ]:
+        handler = WatchdogHandler(
+            None, None, None, None, patterns=patterns, ignore_patterns=ignore_patterns
+        )
+        matcher.add(handler, str(Path(root) / watch_path))
+    events = [
+        FileModifiedEvent(str(Path(root) / p)) for p in [
+            'app/main.py', 'app/tests/test_main.py', 'app/__pycache__/main.cpython-36.pyc',
+            'frontend/src/App.jsx', 'frontend/node_modules/react/index.js',
+            'docs/index.rst', 'app/.main.py.swp', '.git/index'
+        ]
+    ]
+
+    def match():
+        for event in events:
+            matcher.match(event)
+
+    yield match
+
+
+@benchmark('watchdog.scanner.scan', ops=1)
+def watchdog_scanner_scan():
+    tmp_dir = tempfile.TemporaryDirectory()
+    for i in range(20):
+        dir_path = Path(tmp_dir.name) / 'package_{}'.format(i) / 'module'
+        dir_path.mkdir(parents=True)
+        for j in range(50):
+            (dir_path / 'file_{}.py'.format(j)).write_text('')
+    # steady state: no directory has been modified recently
+    mtime = time.time() - 60
+    for dir_path, _, _ in os.walk(tmp_dir.name):
+        os.utime(dir_path, (mtime, mtime))
+    scanner = DirectoryScanner(tmp_dir.name)
+    scanner.scan()
+
+    yield scanner.scan
+
+    tmp_dir.cleanup()
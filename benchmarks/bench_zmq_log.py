@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the log path from an app in a kernel to ``jaffle start``
+through the ZeroMQ channel.
+"""
+
+import logging
+
+import zmq
+from fixtures import OUTPUT_LINES, make_records
+from harness import benchmark
+from tornado import gen, ioloop
+from zmq.eventloop import zmqstream
+
+from jaffle.app.base.logging import JaffleAppLogHandler
+from jaffle.command.start import JaffleStartCommand
+
+RECORDS_PER_CALL = 10 * len(OUTPUT_LINES)
+
+
+class _CountingHandler(logging.Handler):
+    """
+    Log handler which counts records and resolves a future on reaching the
+    expected number of records.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+        self.expected = 0
+        self.done = None
+
+    def emit(self, record):
+        self.count += 1
+        if self.count == self.expected:
+            self.done.set_result(None)
+
+
+@benchmark('zmq_log.app_to_server', ops=RECORDS_PER_CALL)
+def zmq_log_app_to_server():
+    io_loop = ioloop.IOLoop()
+
+    # server side: the same receiver as ``jaffle start``
+    command = JaffleStartCommand()
+    command.log = logging.getLogger('benchmark.command')
+    socket = zmq.Context.instance().socket(zmq.PULL)
+    port = socket.bind_to_random_port('tcp://127.0.0.1')
+    stream = zmqstream.ZMQStream(socket, io_loop)
+    stream.on_recv(command._on_recv_msg)
+
+    counter = _CountingHandler()
+    lines = [('benchmark.' + name, msg) for name, msg in OUTPUT_LINES] * 10
+    loggers = [logging.getLogger(n) for n in set(n for n, _ in lines)]
+    for logger in loggers:
+        logger.setLevel(logging.INFO)
+        logger.addHandler(counter)
+        logger.propagate = False
+
+    # app side
+    app_handler = JaffleAppLogHandler('benchmark_app', port, main_io_loop=io_loop)
+    records = make_records(lines)
+
+    @gen.coroutine
+    def send():
+        for record in records:
+            app_handler.emit(record)
+        yield counter.done
+
+    def run():
+        counter.count = 0
+        counter.expected = len(records)
+        counter.done = gen.Future()
+        io_loop.run_sync(send)
+
+    yield run
+
+    for logger in loggers:
+        logger.removeHandler(counter)
+    app_handler.stream.close(linger=0)
+    stream.close(linger=0)
+    io_loop.close()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures of the Jaffle benchmark suite.
+"""
+
+import logging
+from pathlib import Path
+
+from jaffle.config import JaffleConfig
+
+EXAMPLE_CONFIG = (
+    Path(__file__).resolve().parent.parent / 'examples' / 'tornado_spa_advanced' / 'jaffle.hcl'
+)
+
+# Output lines of the processes and apps of the example configuration
+OUTPUT_LINES = [
+    ('pytest', 'platform linux -- Python 3.6.15, pytest-7.0.1, pluggy-1.0.0'),
+    ('pytest', 'rootdir: /home/user/tornado_spa_advanced'),
+    ('pytest', 'collecting ... collected 12 items'),
+    ('pytest', 'tornado_spa_advanced/tests/handlers/test_main.py::test_get_index PASSED'),
+    ('pytest', 'tornado_spa_advanced/tests/handlers/test_main.py::test_post_item FAILED'),
+    ('pytest', ''),
+    ('tornado', '200 GET /api/items (127.0.0.1) 1.52ms'),
+    ('tornado', '304 GET /static/main.js (127.0.0.1) 0.81ms'),
+    ('tornado', '404 GET /favicon.ico (127.0.0.1) 0.64ms'),
+    ('frontend', 'Compiling...'),
+    ('frontend', '$ yarn run start'),
+    ('frontend', 'Compiled successfully!'),
+    ('jest', ' Press w to show more.'),
+    ('jest', 'PASS  src/App.test.js'),
+]
+
+
+def load_example_config():
+    """
+    Loads the configuration of the ``tornado_spa_advanced`` example, which
+    has loggers with realistic ``suppress_regex`` and ``replace_regex``.
+
+    Returns
+    -------
+    conf : JaffleConfig
+        Jaffle configuration.
+    """
+    return JaffleConfig.load([EXAMPLE_CONFIG], {}, {})
+
+
+def make_records(lines=OUTPUT_LINES):
+    """
+    Makes log records of output lines.
+
+    Parameters
+    ----------
+    lines : list[tuple(str, str)]
+        Logger names and messages.
+
+    Returns
+    -------
+    records : list[logging.LogRecord]
+        Log records.
+    """
+    return [
+        logging.makeLogRecord({
+            'name': name,
+            'levelno': logging.INFO,
+            'levelname': 'INFO',
+            'msg': msg
+        }) for name, msg in lines
+    ]
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal benchmark harness of the Jaffle benchmark suite.
+
+A benchmark is a generator function registered by ``@benchmark``. It sets up
+the target, yields a function to be timed and tears the target down after
+the yield::
+
+    @benchmark('template_string.render')
+    def template_string_render():
+        tstr = TemplateString('${var.name}', namespace)
+        yield tstr.render
+
+The timed function is called repeatedly and the time per call (or per
+operation if ``ops`` is given) is reported.
+"""
+
+import datetime
+import json
+import math
+import platform
+import statistics
+import time
+from collections import OrderedDict
+
+RESULT_FORMAT_VERSION = 1
+
+_benchmarks = OrderedDict()
+
+
+class Benchmark(object):
+    """
+    Registered benchmark.
+    """
+
+    def __init__(self, name, setup, ops=1):
+        """
+        Initializes Benchmark.
+
+        Parameters
+        ----------
+        name : str
+            Benchmark name (e.g. ``logging.command_handler.emit``).
+        setup : function
+            Generator function which yields the function to be timed.
+        ops : int
+            Number of operations performed by a call of the timed function.
+        """
+        self.name = name
+        self.setup = setup
+        self.ops = ops
+
+    def __repr__(self):
+        """
+        Returns string representation of Benchmark.
+
+        Returns
+        -------
+        repr : str
+            String representation of Benchmark.
+        """
+        return '<%s {name: %r ops: %d}>' % (type(self).__name__, self.name, self.ops)
+
+    def run(self, rounds=7, min_round_time=0.05):
+        """
+        Runs the benchmark.
+        The number of calls in a round is calibrated so that a round takes at
+        least ``min_round_time`` seconds.
+
+        Parameters
+        ----------
+        rounds : int
+            Number of rounds to be measured.
+        min_round_time : float
+            Minimum time in seconds of a round.
+
+        Returns
+        -------
+        result : dict
+            Benchmark result (times are in seconds per operation).
+        """
+        gen = self.setup()
+        func = next(gen)
+        try:
+            func()  # warm up caches and lazy imports
+            loops = self._calibrate(func, min_round_time)
+            times = [self._time(func, loops) / (loops * self.ops) for _ in range(rounds)]
+        finally:
+            next(gen, None)  # tear down
+
+        return OrderedDict([
+            ('min', min(times)),
+            ('median', statistics.median(times)),
+            ('mean', statistics.mean(times)),
+            ('stdev', statistics.stdev(times) if len(times) > 1 else 0.0),
+            ('rounds', rounds),
+            ('loops', loops),
+            ('ops', self.ops),
+        ])
+
+    def _calibrate(self, func, min_round_time):
+        """
+        Returns the number of calls which takes at least ``min_round_time``.
+
+        Parameters
+        ----------
+        func : function
+            Function to be timed.
+        min_round_time : float
+            Minimum time in seconds of a round.
+
+        Returns
+        -------
+        loops : int
+            Number of calls in a round.
+        """
+        loops = 1
+        while True:
+            elapsed = self._time(func, loops)
+            if elapsed >= min_round_time:
+                return loops
+            if elapsed <= 0:
+                loops *= 10
+            else:
+                loops = max(loops + 1, int(math.ceil(loops * min_round_time / elapsed)))
+
+    @staticmethod
+    def _time(func, loops):
+        """
+        Times calls of a function.
+
+        Parameters
+        ----------
+        func : function
+            Function to be timed.
+        loops : int
+            Number of calls.
+
+        Returns
+        -------
+        elapsed : float
+            Elapsed time in seconds.
+        """
+        started_at = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - started_at
+
+
+def benchmark(name, ops=1):
+    """
+    Decorator to register a benchmark.
+
+    Parameters
+    ----------
+    name : str
+        Benchmark name.
+    ops : int
+        Number of operations performed by a call of the timed function.
+
+    Returns
+    -------
+    decorator : function
+        Decorator which registers a generator function as a benchmark.
+    """
+
+    def decorator(setup):
+        if name in _benchmarks:
+            raise ValueError('Duplicate benchmark name: {!r}'.format(name))
+        _benchmarks[name] = Benchmark(name, setup, ops=ops)
+        return setup
+
+    return decorator
+
+
+def get_benchmarks():
+    """
+    Returns the registered benchmarks.
+
+    Returns
+    -------
+    benchmarks : list[Benchmark]
+        Registered benchmarks in the registration order.
+    """
+    return list(_benchmarks.values())
+
+
+def make_report(results):
+    """
+    Makes a machine-readable report of benchmark results.
+
+    Parameters
+    ----------
+    results : dict{str: dict}
+        Benchmark results by name.
+
+    Returns
+    -------
+    report : dict
+        Report including the environment information.
+    """
+    from jaffle import __version__
+
+    return OrderedDict([
+        ('version', RESULT_FORMAT_VERSION),
+        ('created', datetime.datetime.now().replace(microsecond=0).isoformat()),
+        ('jaffle', __version__),
+        ('python', platform.python_version()),
+        ('implementation', platform.python_implementation()),
+        ('machine', platform.machine()),
+        ('system', platform.system()),
+        ('benchmarks', results),
+    ])
+
+
+def load_report(file_path):
+    """
+    Loads a report saved by ``run.py --output``.
+
+    Parameters
+    ----------
+    file_path : str
+        Report file path.
+
+    Returns
+    -------
+    report : dict
+        Benchmark report.
+
+    Raises
+    ------
+    ValueError
+        If the report format is not supported.
+    """
+    with open(file_path, encoding='utf-8') as f:
+        report = json.load(f)
+    if report.get('version') != RESULT_FORMAT_VERSION:
+        raise ValueError(
+            'Unsupported benchmark report version: {!r}'.format(report.get('version'))
+        )
+    return report
+
+
+def compare(baseline, results, threshold=0.2, key='min'):
+    """
+    Compares benchmark results with a baseline.
+
+    Parameters
+    ----------
+    baseline : dict
+        Baseline report.
+    results : dict{str: dict}
+        Benchmark results by name.
+    threshold : float
+        Allowed slowdown ratio (0.2: 20% slower than the baseline).
+    key : str
+        Statistic to be compared (``'min'`` is the least noisy).
+
+    Returns
+    -------
+    comparisons : list[tuple(str, float or None, float, float or None, bool)]
+        Name, baseline time, current time, ratio and whether it has regressed
+        for each result. The baseline and the ratio are None for a new
+        benchmark.
+    """
+    comparisons = []
+    for name, result in results.items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            comparisons.append((name, None, result[key], None, False))
+            continue
+        ratio = result[key] / base[key] if base[key] > 0 else float('inf')
+        comparisons.append((name, base[key], result[key], ratio, ratio > 1.0 + threshold))
+    return comparisons
+
+
+def format_time(seconds):
+    """
+    Formats a time in a human-readable unit.
+
+    Parameters
+    ----------
+    seconds : float
+        Time in seconds.
+
+    Returns
+    -------
+    text : str
+        Formatted time (e.g. ``12.3 us``).
+    """
+    for unit, scale in [('s', 1.0), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return '{:.3g} {}'.format(seconds / scale, unit)
+    return '{:.3g} ns'.format(seconds / 1e-9)
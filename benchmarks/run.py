@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the Jaffle benchmark suite.
+
+Benchmarks are collected from ``bench_*.py`` in this directory. The results
+can be saved as JSON and compared with a baseline saved before. The exit
+status is 1 if any benchmark is slower than the baseline by more than the
+threshold, so that CI can fail on performance regressions.
+
+Usage::
+
+    python benchmarks/run.py [-k PATTERN] [--output=FILE] [--compare=BASELINE]
+
+Example::
+
+    $ git checkout master
+    $ python benchmarks/run.py --output=baseline.json
+    $ git checkout my-branch
+    $ python benchmarks/run.py --compare=baseline.json --threshold=0.2
+"""
+
+import argparse
+import fnmatch
+import importlib
+import json
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+from harness import compare, format_time, get_benchmarks, load_report, make_report
+
+
+def collect():
+    """
+    Imports ``bench_*.py`` to register benchmarks.
+
+    Returns
+    -------
+    benchmarks : list[Benchmark]
+        Registered benchmarks.
+    """
+    for path in sorted(Path(__file__).resolve().parent.glob('bench_*.py')):
+        importlib.import_module(path.stem)
+    return get_benchmarks()
+
+
+def parse_args(argv):
+    """
+    Parses command line arguments.
+
+    Parameters
+    ----------
+    argv : list[str]
+        Command line arguments.
+
+    Returns
+    -------
+    args : argparse.Namespace
+        Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Runs the Jaffle benchmark suite.')
+    parser.add_argument(
+        '-k', dest='patterns', action='append', default=[],
+        help='run only benchmarks whose names match the glob pattern (e.g. "logging.*")'
+    )
+    parser.add_argument('--list', action='store_true', help='list benchmarks and exit')
+    parser.add_argument('--rounds', type=int, default=7, help='number of rounds (default: 7)')
+    parser.add_argument(
+        '--min-round-time', type=float, default=0.05,
+        help='minimum time in seconds of a round (default: 0.05)'
+    )
+    parser.add_argument('--output', help='save the results as JSON to the file')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare with a saved baseline')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='allowed slowdown ratio on comparison (default: 0.2 = 20%%)'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Runs benchmarks and reports the results.
+
+    Parameters
+    ----------
+    argv : list[str] or None
+        Command line arguments.
+
+    Returns
+    -------
+    status : int
+        Exit status (1 if there is a regression).
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    # The table goes to stderr if stdout is used for JSON.
+    out = sys.stderr if args.json else sys.stdout
+
+    benchmarks = [
+        b for b in collect()
+        if not args.patterns or any(fnmatch.fnmatch(b.name, p) for p in args.patterns)
+    ]
+    if args.list:
+        for bench in benchmarks:
+            print(bench.name)
+        return 0
+
+    baseline = load_report(args.compare) if args.compare else None
+
+    results = OrderedDict()
+    width = max([len(b.name) for b in benchmarks] + [0])
+    for bench in benchmarks:
+        result = results[bench.name] = bench.run(args.rounds, args.min_round_time)
+        print(
+            '{:<{}}  min {:>9}  median {:>9}  stdev {:>9}  {:>12,.0f} ops/s'.format(
+                bench.name, width, format_time(result['min']), format_time(result['median']),
+                format_time(result['stdev']), 1.0 / result['min']
+            ),
+            file=out
+        )
+        out.flush()
+
+    report = make_report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if baseline is None:
+        return 0
+
+    print('\nComparison with {} (threshold: +{:.0%}):'.format(args.compare, args.threshold),
+          file=out)
+    regressions = 0
+    for name, base, current, ratio, regressed in compare(baseline, results, args.threshold):
+        if ratio is None:
+            print('{:<{}}  {:>9} (new)'.format(name, width, format_time(current)), file=out)
+            continue
+        regressions += regressed
+        print(
+            '{:<{}}  {:>9} -> {:>9}  {:>+7.1%}{}'.format(
+                name, width, format_time(base), format_time(current), ratio - 1.0,
+                '  REGRESSED' if regressed else ''
+            ),
+            file=out
+        )
+    if regressions:
+        print('\n{} benchmark(s) regressed.'.format(regressions), file=out)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
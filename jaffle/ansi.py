@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+import re
+import time
+
+# CSI sequence: (ESC '[' | CSI) parameter bytes, intermediate bytes and a final byte
+_CSI_PATTERN = re.compile(r'(?:\x1b\[|\x9b)[0-?]*[ -/]*[@-~]')
+# CSI sequence other than SGR (final byte 'm')
+_NON_SGR_CSI_PATTERN = re.compile(r'(?:\x1b\[|\x9b)[0-?]*[ -/]*[@-ln-~]')
+# CSI sequence which is not terminated yet
+_PARTIAL_CSI_PATTERN = re.compile(r'(?:\x1b\[?|\x9b)[0-?]*[ -/]*')
+
+
+class EscapeSequenceFilter(object):
+    """
+    EscapeSequenceFilter drops control sequences (CSI) from a text stream
+    incrementally. A sequence split across chunks is held until the rest of
+    it is fed, so that it never leaks into the output.
+
+    SGR sequences (font styles and colors) are kept if ``color`` is True.
+    Other escape sequences than CSI are passed through as is.
+    """
+
+    def __init__(self, color=True):
+        """
+        Initializes EscapeSequenceFilter.
+
+        Parameters
+        ----------
+        color : bool
+            Whether to keep SGR sequences.
+        """
+        self.color = color
+
+        self._pattern = _NON_SGR_CSI_PATTERN if color else _CSI_PATTERN
+        self._pending = ''
+
+    def __repr__(self):
+        """
+        Returns string representation of EscapeSequenceFilter.
+
+        Returns
+        -------
+        repr : str
+            String representation of EscapeSequenceFilter.
+        """
+        return '<%s {color: %s pending: %r}>' % (type(self).__name__, self.color, self._pending)
+
+    def feed(self, text):
+        """
+        Feeds a chunk of text and returns the filtered text which is complete
+        so far.
+
+        Parameters
+        ----------
+        text : str
+            Chunk of text.
+
+        Returns
+        -------
+        filtered : str
+            Filtered text.
+        """
+        if self._pending:
+            text = self._pending + text
+            self._pending = ''
+
+        # A sequence cannot contain ESC or CSI, so only the last one can be incomplete.
+        start = max(text.rfind('\x1b'), text.rfind('\x9b'))
+        if start >= 0 and _PARTIAL_CSI_PATTERN.fullmatch(text, start):
+            self._pending = text[start:]
+            text = text[:start]
+
+        return self._pattern.sub('', text)
+
+    def flush(self):
+        """
+        Returns the incomplete sequence held in the filter as is and resets
+        the state.
+
+        Returns
+        -------
+        pending : str
+            Incomplete sequence.
+        """
+        pending = self._pending
+        self._pending = ''
+        return pending
+
+
+def strip_escape_sequences(text):
+    """
+    Drops all CSI sequences including SGR sequences from a text.
+
+    Parameters
+    ----------
+    text : str
+        Target text.
+
+    Returns
+    -------
+    text : str
+        Text without escape sequences.
+    """
+    return _CSI_PATTERN.sub('', text)
+
+
+class TerminalOutputFilter(object):
+    """
+    TerminalOutputFilter converts a terminal output stream into plain lines.
+
+    Escape sequences are dropped by EscapeSequenceFilter. Progress redraws
+    using carriage returns are collapsed into the final state of the line and
+    the intermediate states are emitted as lines at most once per
+    ``redraw_interval`` seconds only if they have changed.
+    """
+
+    def __init__(self, color=True, collapse_cr=True, redraw_interval=1.0):
+        """
+        Initializes TerminalOutputFilter.
+
+        Parameters
+        ----------
+        color : bool
+            Whether to keep SGR sequences.
+        collapse_cr : bool
+            Whether to collapse carriage return redraws.
+        redraw_interval : float
+            Minimum interval in seconds to emit an intermediate redraw.
+            Intermediate redraws are not emitted if it is negative.
+        """
+        self.escape_filter = EscapeSequenceFilter(color)
+        self.collapse_cr = collapse_cr
+        self.redraw_interval = redraw_interval
+
+        self._line = ''
+        self._redrawn = None
+        self._redrawn_at = None
+
+    def __repr__(self):
+        """
+        Returns string representation of TerminalOutputFilter.
+
+        Returns
+        -------
+        repr : str
+            String representation of TerminalOutputFilter.
+        """
+        return '<%s {color: %s collapse_cr: %s redraw_interval: %s}>' % (
+            type(self).__name__, self.escape_filter.color, self.collapse_cr, self.redraw_interval
+        )
+
+    def feed(self, text):
+        """
+        Feeds a chunk of terminal output and returns the filtered lines which
+        are complete so far.
+
+        Parameters
+        ----------
+        text : str
+            Chunk of terminal output.
+
+        Returns
+        -------
+        filtered : str
+            Filtered lines terminated by ``'\\n'``.
+        """
+        text = self.escape_filter.feed(text)
+        if not self.collapse_cr:
+            return text
+
+        lines = (self._line + text).split('\n')
+        self._line = lines.pop()
+
+        output = []
+        for line in lines:
+            line = self._collapse(line)
+            if line != self._redrawn:
+                output.append(line + '\n')
+            self._redrawn = None
+
+        if '\r' in self._line:
+            segments = self._line.split('\r')
+            redraw = next((s for s in reversed(segments[:-1]) if s), '')
+            # keep only the last complete redraw and the one being written
+            self._line = redraw + '\r' + segments[-1]
+            if redraw and redraw != self._redrawn and self._is_redraw_due():
+                output.append(redraw + '\n')
+                self._redrawn = redraw
+                self._redrawn_at = time.monotonic()
+
+        return ''.join(output)
+
+    def flush(self):
+        """
+        Returns the incomplete line held in the filter and resets the state.
+
+        Returns
+        -------
+        pending : str
+            Incomplete line (not terminated by ``'\\n'``).
+        """
+        line = self._line + self.escape_filter.flush()
+        redrawn = self._redrawn
+        self._line = ''
+        self._redrawn = None
+        if not self.collapse_cr:
+            return line
+        line = self._collapse(line)
+        return '' if line == redrawn else line
+
+    @staticmethod
+    def _collapse(line):
+        """
+        Returns the final state of a line redrawn by carriage returns.
+
+        Parameters
+        ----------
+        line : str
+            Line including carriage returns.
+
+        Returns
+        -------
+        line : str
+            Final state of the line.
+        """
+        return line.rstrip('\r').rsplit('\r', 1)[-1]
+
+    def _is_redraw_due(self):
+        """
+        Returns whether an intermediate redraw can be emitted.
+
+        Returns
+        -------
+        is_due : bool
+            Whether ``redraw_interval`` has passed since the last redraw.
+        """
+        if self.redraw_interval < 0:
+            return False
+        return (
+            self._redrawn_at is None or
+            time.monotonic() - self._redrawn_at >= self.redraw_interval
+        )
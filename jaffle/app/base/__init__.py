@@ -2,6 +2,6 @@
 # flake8: noqa
 
 from .app import BaseJaffleApp
-from .cache import clear_module_cache_once
+from .cache import clear_module_cache_once, find_root_packages
 from .logging import JaffleAppLogHandler
 from .output import capture_method_output
@@ -3,15 +3,20 @@
 import logging
 import shlex
 import sys
+import time
+from functools import partial
 
-from tornado import gen
+from tornado import gen, ioloop
 from tornado.escape import to_unicode
 from tornado.iostream import StreamClosedError
 from tornado.process import Subprocess
 
 from ...config import ConfigDict
 from ...job import Job
+from ...metrics import MetricsRegistry
+from ...tracing import TraceIdFilter, Tracer, trace_context
 from ...utils import str_value
+from .code import CompiledCode
 from .config import AppConfig
 from .logging import JaffleAppLogHandler
 
@@ -25,6 +30,7 @@ class BaseJaffleApp(object):
     lexer_class = None
     app_conf = None
     jobs = None
+    metrics_interval = 5.0
 
     def __init__(self, app_conf_data):
         """
@@ -32,10 +38,13 @@ class BaseJaffleApp(object):
 
         Parameters
         ----------
-        app_conf_data : dict
-            App configuration data.
+        app_conf_data : AppConfig or dict
+            App configuration or its dict representation.
         """
-        self.app_conf = AppConfig.from_dict(app_conf_data)
+        if isinstance(app_conf_data, AppConfig):
+            self.app_conf = app_conf_data
+        else:
+            self.app_conf = AppConfig.from_dict(app_conf_data)
         self.ipython = get_ipython()  # noqa
 
         logging.getLogger().handlers = []
@@ -43,9 +52,20 @@ class BaseJaffleApp(object):
         self.log = logging.getLogger(self.app_name)
         level = str_value(self.conf.get('logger', {}).get('level', 'info'))
         self.log.setLevel(getattr(logging, level.upper()))
-        self.log.handlers = [JaffleAppLogHandler(self.app_name, self.jaffle_port)]
+        self.log_handler = JaffleAppLogHandler(self.app_name, self.jaffle_port)
+        self.log_handler.addFilter(TraceIdFilter())
+        self.log.handlers = [self.log_handler]
         self.log.propagate = False
 
+        self.metrics = MetricsRegistry()
+        self.sent_metrics = None
+        self.metrics_callback = ioloop.PeriodicCallback(
+            self.send_metrics, self.metrics_interval * 1000
+        )
+        self.metrics_callback.start()
+
+        self.tracer = Tracer(partial(self.log_handler.send, 'trace'), enabled=self.app_conf.trace)
+
         self.jobs = {}
         for job_name, job_data in self.jobs_conf.items():
             logger = logging.getLogger(job_name)
@@ -53,6 +73,14 @@ class BaseJaffleApp(object):
             logger.setLevel(self.log.level)
             self.jobs[job_name] = Job(logger, job_name, job_data.get('command'))
 
+        self.subscriptions = {}
+        self.published = {}
+        for topic, code_blocks in self.conf.get_raw('subscribe', {}).items():
+            if isinstance(code_blocks, str):
+                code_blocks = [code_blocks]
+            for code in code_blocks:
+                self.subscribe(topic, self.compile_code(code, ['event']))
+
     @property
     def app_name(self):
         """
@@ -126,6 +154,18 @@ class BaseJaffleApp(object):
         """
         return self.app_conf.jaffle_port
 
+    @property
+    def runtime_dir(self):
+        """
+        Returns the runtime directory.
+
+        Returns
+        -------
+        runtime_dir : str or None
+            Absolute path of the runtime directory.
+        """
+        return self.app_conf.runtime_dir
+
     @property
     def jobs_conf(self):
         """
@@ -138,6 +178,25 @@ class BaseJaffleApp(object):
         """
         return self.app_conf.jobs_conf
 
+    def shutdown(self):
+        """
+        Releases the resources of the app before it is removed from the kernel
+        on reloading the configuration. Subclasses should override this method
+        to stop threads or servers started by the app and call it.
+        """
+        self.metrics_callback.stop()
+        self.send_metrics()
+
+    def send_metrics(self):
+        """
+        Sends the metrics of the app to the Jaffle server if they have been
+        updated since the last time.
+        """
+        snapshot = self.metrics.snapshot()
+        if snapshot != self.sent_metrics:
+            self.log_handler.send('metrics', snapshot)
+            self.sent_metrics = snapshot
+
     def execute_code(self, code, *args, **kwargs):
         """
         Executes a code.
@@ -162,8 +221,141 @@ class BaseJaffleApp(object):
         future.set_result(result.result)
         return future
 
+    def compile_code(self, code, argnames=()):
+        """
+        Compiles a code to be executed repeatedly.
+        The returned function executes the compiled code in the IPython user
+        namespace with the arguments passed as objects instead of formatting
+        the code and running it as a cell. If the code cannot be compiled as
+        Python code (e.g. IPython magics), the function falls back to
+        ``execute_code()``.
+
+        Parameters
+        ----------
+        code : str
+            Code to be compiled.
+            It may have interpolation keywords of ``argnames`` (e.g. ``{event}``).
+        argnames : list[str]
+            Names of the arguments to the code.
+
+        Returns
+        -------
+        execute : function
+            Function which takes the arguments as keyword arguments and
+            returns a future which will have the execution result.
+        """
+        try:
+            compiled = CompiledCode(
+                code, argnames, self.ipython.user_ns, '<{} code>'.format(self.app_name)
+            )
+        except (SyntaxError, ValueError) as e:
+            self.log.debug('Code will be executed as a cell: %r (%s)', code, e)
+            return partial(self.execute_code, code)
+
+        def execute(**kwargs):
+            future = gen.Future()
+            try:
+                future.set_result(compiled(**kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        return execute
+
+    def subscribe(self, topic, callback):
+        """
+        Subscribes to a topic of the event bus. The callback will be called
+        with each message published to the topic by any app in any kernel.
+
+        Parameters
+        ----------
+        topic : str
+            Topic name.
+        callback : function
+            Function which takes a message as the ``event`` keyword argument.
+            It may return a future.
+        """
+        if topic not in self.subscriptions:
+            self.log_handler.send('subscribe', {'topic': topic})
+        self.subscriptions.setdefault(topic, []).append(callback)
+
+    def publish(self, topic, message):
+        """
+        Publishes a message to a topic of the event bus. Messages published
+        in the same IO loop iteration are sent to the Jaffle server as a
+        batch. It must be called in the main IO loop.
+
+        Parameters
+        ----------
+        topic : str
+            Topic name.
+        message : object
+            JSON serializable message (e.g. a Watchdog event dict).
+        """
+        if not self.published:
+            ioloop.IOLoop.current().add_callback(self._send_published)
+        self.published.setdefault(topic, (time.time(), []))[1].append(message)
+        self.metrics.counter(
+            'jaffle_bus_published_total', 'Messages published to the event bus.', ['topic']
+        ).inc(topic=topic)
+
+    def _send_published(self):
+        """
+        Sends the batches of published messages to the Jaffle server.
+        """
+        published, self.published = self.published, {}
+        for topic, (published_at, messages) in published.items():
+            self.log_handler.send(
+                'publish', {'topic': topic, 'messages': messages, 'published_at': published_at}
+            )
+
     @gen.coroutine
-    def execute_command(self, command, logger=None):
+    def _receive_messages(self, topic, messages, published_at):
+        """
+        Calls the callbacks of a topic with messages delivered by the Jaffle
+        server. The delivery latency is recorded as a metric and as trace
+        spans of the messages which have ``trace_id``.
+
+        Parameters
+        ----------
+        topic : str
+            Topic name.
+        messages : list
+            Delivered messages.
+        published_at : float
+            UNIX time when the messages were published.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of calling all callbacks.
+        """
+        received_at = time.time()
+        self.metrics.histogram(
+            'jaffle_bus_delivery_latency_seconds',
+            'Time in seconds from publishing messages to receiving them.', ['topic']
+        ).observe(received_at - published_at, topic=topic)
+
+        for message in messages:
+            trace_id = message.get('trace_id') if isinstance(message, dict) else None
+            if trace_id:
+                self.tracer.add_span(
+                    'bus.deliver', published_at, received_at, trace_id=trace_id, topic=topic
+                )
+            for callback in self.subscriptions.get(topic, []):
+                try:
+                    # The trace ID must not be current while yielding.
+                    with trace_context(trace_id):
+                        future = callback(event=message)
+                    if future is not None:
+                        yield future
+                except Exception as e:
+                    self.log.exception(
+                        'Subscriber error on %s: %s', topic, e, extra={'trace_id': trace_id}
+                    )
+
+    @gen.coroutine
+    def execute_command(self, command, logger=None, trace_id=None):
         """
         Executes a command.
 
@@ -173,6 +365,8 @@ class BaseJaffleApp(object):
             Command to be executed.
         logger : logging.Logger
             Logger.
+        trace_id : str or None
+            Trace ID to be attached to the output log records.
 
         Returns
         -------
@@ -180,18 +374,19 @@ class BaseJaffleApp(object):
             Future which will have the execution result.
         """
         log = logger or self.log
-        log.debug('Executing command: %s', command)
+        extra = {'trace_id': trace_id} if trace_id else None
+        log.debug('Executing command: %s', command, extra=extra)
         proc = Subprocess(shlex.split(command), stdout=Subprocess.STREAM, stderr=Subprocess.STREAM)
         try:
             while True:
                 line_bytes = yield proc.stdout.read_until(b'\n')
                 line = to_unicode(line_bytes).strip('\r\n')
-                log.info(line)
+                log.info(line, extra=extra)
         except StreamClosedError:
             pass
 
     @gen.coroutine
-    def execute_job(self, job_name):
+    def execute_job(self, job_name, trace_id=None):
         """
         Executes a job.
 
@@ -199,6 +394,8 @@ class BaseJaffleApp(object):
         ----------
         job_name : str
             Job to be executed.
+        trace_id : str or None
+            Trace ID to be attached to the output log records.
 
         Returns
         -------
@@ -206,7 +403,18 @@ class BaseJaffleApp(object):
             Future which will have the execution result.
         """
         job = self.jobs[job_name]
-        result = yield self.execute_command(job.command, logger=job.log)
+        started_at = time.time()
+        try:
+            result = yield self.execute_command(job.command, logger=job.log, trace_id=trace_id)
+        except Exception:
+            self.metrics.counter(
+                'jaffle_job_errors_total', 'Job execution errors.', ['job']
+            ).inc(job=job_name)
+            raise
+        finally:
+            self.metrics.histogram(
+                'jaffle_job_duration_seconds', 'Job execution time in seconds.', ['job']
+            ).observe(time.time() - started_at, job=job_name)
         return result
 
     def clear_module_cache(self, modules):
@@ -227,10 +435,11 @@ class BaseJaffleApp(object):
         def match(mod):
             return any([mod == m or mod.startswith('{}.'.format(m)) for m in modules])
 
-        self.log.debug('clearing module cache: %s', modules)
-        for mod in [mod for mod in sys.modules if match(mod)]:
-            self.log.debug('  clear: %s', mod)
-            del sys.modules[mod]
+        with self.tracer.span('clear_module_cache'):
+            self.log.debug('clearing module cache: %s', modules)
+            for mod in [mod for mod in sys.modules if match(mod)]:
+                self.log.debug('  clear: %s', mod)
+                del sys.modules[mod]
 
     @classmethod
     def command_to_code(self, app_name, command):
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
 from functools import wraps
+from pathlib import Path
 from unittest.mock import patch
 
+_root_packages_cache = {}  # root directory -> (mtime_ns, packages)
+
 
 def clear_module_cache_once(method):
     """
@@ -37,3 +40,37 @@ def clear_module_cache_once(method):
             return method(self, *args, **kwargs)
 
     return wrapper
+
+
+def find_root_packages(root='.'):
+    """
+    Finds the top-level packages in a project root directory.
+
+    Only the top-level packages are needed to clear the module cache because
+    ``BaseJaffleApp.clear_module_cache()`` also clears their subpackages, so
+    this lists only the root directory instead of walking the whole tree like
+    ``setuptools.find_packages()``. The result is cached per root directory
+    until the directory is modified.
+
+    Parameters
+    ----------
+    root : str
+        Project root directory.
+
+    Returns
+    -------
+    packages : list[str]
+        Top-level package names.
+    """
+    root = Path(root).resolve()
+    mtime = root.stat().st_mtime_ns
+    cached = _root_packages_cache.get(root)
+    if cached and cached[0] == mtime:
+        return list(cached[1])
+
+    packages = sorted(
+        p.name for p in root.iterdir()
+        if '.' not in p.name and (p / '__init__.py').is_file()
+    )
+    _root_packages_cache[root] = (mtime, packages)
+    return list(packages)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import io
+import tokenize
+from string import Formatter
+
+_MISSING = object()
+
+
+class CompiledCode(object):
+    """
+    Code block compiled once and executed in a namespace with arguments.
+
+    The interpolation keywords in the code (e.g. ``{event}``) are replaced
+    with variables, so that the arguments are passed as objects instead of
+    their repr spliced into the source code. Keywords in string literals
+    (e.g. ``print("changed: {event}")``) are not supported, because they are
+    formatted into the string rather than replaced with objects. The code is
+    executed with
+    ``eval()`` if it is an expression and ``exec()`` otherwise, without
+    IPython's input transformation, history and display hooks.
+    """
+
+    def __init__(self, code, argnames, namespace, filename='<jaffle>'):
+        """
+        Initializes CompiledCode.
+
+        Parameters
+        ----------
+        code : str
+            Code with interpolation keywords (e.g. ``pytest.run({event})``).
+        argnames : list[str]
+            Names of the arguments which are available as interpolation
+            keywords.
+        namespace : dict
+            Namespace to execute the code (e.g. ``get_ipython().user_ns``).
+        filename : str
+            File name shown in tracebacks.
+
+        Raises
+        ------
+        SyntaxError
+            If the code cannot be compiled as Python code (e.g. IPython magics).
+        ValueError
+            If the code has interpolation keywords which are not argument
+            names, have a conversion, a format spec or an index, or are in
+            string literals.
+        """
+        self.code = code
+        self.namespace = namespace
+        self.variables = {}
+        self._check_string_literals(code)
+
+        source = []
+        for literal, field, format_spec, conversion in Formatter().parse(code):
+            source.append(literal)
+            if field is None:
+                continue
+            if field not in argnames or format_spec or conversion:
+                raise ValueError('Unsupported interpolation: {{{}}}'.format(field))
+            self.variables[field] = '__jaffle_{}__'.format(field)
+            source.append(self.variables[field])
+        self.source = ''.join(source)
+
+        try:
+            self.compiled = compile(self.source, filename, 'eval')
+            self.is_expression = True
+        except SyntaxError:
+            self.compiled = compile(self.source, filename, 'exec')
+            self.is_expression = False
+
+    @staticmethod
+    def _check_string_literals(code):
+        """
+        Checks that the string literals in the code have no interpolation
+        keywords.
+
+        Parameters
+        ----------
+        code : str
+            Code with interpolation keywords.
+
+        Raises
+        ------
+        SyntaxError
+            If the code cannot be tokenized.
+        ValueError
+            If a string literal has an interpolation keyword.
+        """
+        try:
+            tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+        except (tokenize.TokenError, IndentationError) as e:
+            raise SyntaxError(str(e))
+        for token in tokens:
+            if tokenize.tok_name[token.type].startswith('FSTRING'):
+                # f-strings are split into tokens on Python 3.12+
+                raise ValueError('Unsupported f-string: {}'.format(token.line.strip()))
+            if token.type == tokenize.STRING and any(
+                field is not None for _, field, _, _ in Formatter().parse(token.string)
+            ):
+                raise ValueError('Interpolation in a string literal: {}'.format(token.string))
+
+    def __repr__(self):
+        """
+        Returns string representation of CompiledCode.
+
+        Returns
+        -------
+        repr : str
+            String representation of CompiledCode.
+        """
+        return '<%s {code: %r is_expression: %r}>' % (
+            type(self).__name__, self.code, self.is_expression
+        )
+
+    def __call__(self, **kwargs):
+        """
+        Executes the code with arguments.
+        The arguments are set to the namespace only while executing the code.
+
+        Parameters
+        ----------
+        kwargs : dict
+            Arguments for the interpolation keywords.
+
+        Returns
+        -------
+        result : object
+            Value of the expression or None if the code is not an expression.
+        """
+        saved = {}
+        for name, variable in self.variables.items():
+            saved[variable] = self.namespace.get(variable, _MISSING)
+            self.namespace[variable] = kwargs[name]
+        try:
+            if self.is_expression:
+                return eval(self.compiled, self.namespace)
+            exec(self.compiled, self.namespace)
+        finally:
+            for variable, value in saved.items():
+                if value is _MISSING:
+                    self.namespace.pop(variable, None)
+                else:
+                    self.namespace[variable] = value
@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import json
+import os
+from pathlib import Path
+
 from ...config import ConfigDict
 from ...functions import functions
+from ...runtime import APP_CONFIG_PREFIX
 from ...variables import VariablesNamespace
 
+_loaded_configs = {}  # path -> (data, namespace, jobs_conf)
+
 
 class AppConfig(object):
     """
@@ -12,7 +20,7 @@ class AppConfig(object):
 
     def __init__(
         self, app_name, conf, raw_namespace, runtime_variables, variables_conf, jaffle_port,
-        jobs_conf
+        jobs_conf, trace=False, runtime_dir=None, namespace=None
     ):
         """
         Initializes AppConfig.
@@ -31,23 +39,31 @@ class AppConfig(object):
             Variables config.
         jaffle_port : int
             Jaffle port.
-        jobs_conf : ConfigDict
-            Jobs config.
+        jobs_conf : dict or ConfigDict
+            Jobs config. A ConfigDict is shared as it is.
+        trace : bool
+            Whether to send trace spans to the Jaffle server.
+        runtime_dir : str or None
+            Absolute path of the runtime directory.
+        namespace : dict or None
+            Namespace for string interpolation shared by apps. It is created
+            from ``raw_namespace``, ``runtime_variables`` and
+            ``variables_conf`` if None.
         """
-        namespace = dict(
-            raw_namespace,
-            var=VariablesNamespace(variables_conf, vars=runtime_variables),
-            **{f.__name__: f
-               for f in functions}
-        )
+        if namespace is None:
+            namespace = self.create_namespace(raw_namespace, runtime_variables, variables_conf)
 
         self.app_name = app_name
         self.conf = ConfigDict(conf, namespace)
         self.raw_namespace = raw_namespace
         self.runtime_variables = runtime_variables
         self.jaffle_port = jaffle_port
-        self.jobs_conf = ConfigDict(jobs_conf, namespace)
+        self.jobs_conf = (
+            jobs_conf if isinstance(jobs_conf, ConfigDict) else ConfigDict(jobs_conf, namespace)
+        )
         self.variables_conf = variables_conf
+        self.trace = trace
+        self.runtime_dir = runtime_dir
 
     def __repr__(self):
         """
@@ -71,6 +87,69 @@ class AppConfig(object):
         """
         return dict(self.__dict__, conf=self.conf.raw(), jobs_conf=self.jobs_conf.raw())
 
+    @staticmethod
+    def create_namespace(raw_namespace, runtime_variables, variables_conf):
+        """
+        Creates a namespace for string interpolation.
+
+        Parameters
+        ----------
+        raw_namespace : dict
+            Raw namespace for string interpolation.
+        runtime_variables : dict
+            Runtime variables.
+        variables_conf : dict
+            Variables config.
+
+        Returns
+        -------
+        namespace : dict
+            Namespace including variables and functions.
+        """
+        return dict(
+            raw_namespace,
+            var=VariablesNamespace(variables_conf, vars=runtime_variables),
+            **{f.__name__: f
+               for f in functions}
+        )
+
+    @classmethod
+    def load(cls, path, app_name):
+        """
+        Loads AppConfig from a file written by AppConfigStore.
+        The file is read and the namespace and the jobs config are created
+        only once per file, and they are shared by all apps in the process.
+
+        Parameters
+        ----------
+        path : str
+            JSON file path.
+        app_name : str
+            App name.
+
+        Returns
+        -------
+        app_conf : AppConfig
+            App configuration.
+        """
+        loaded = _loaded_configs.get(path)
+        if loaded is None:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            shared = data['shared']
+            namespace = cls.create_namespace(
+                shared['raw_namespace'], shared['runtime_variables'], shared['variables_conf']
+            )
+            loaded = _loaded_configs[path] = (
+                data, namespace, ConfigDict(shared['jobs_conf'], namespace)
+            )
+
+        data, namespace, jobs_conf = loaded
+        return cls(
+            app_name, data['apps'][app_name], namespace=namespace,
+            **dict(data['shared'], jobs_conf=jobs_conf)
+        )
+
     @classmethod
     def from_dict(cls, data):
         """
@@ -82,3 +161,94 @@ class AppConfig(object):
             Dict object to construct AppConfig.
         """
         return cls(**data)
+
+
+class AppConfigStore(object):
+    """
+    AppConfigStore writes the configs of apps to JSON files in the runtime
+    directory, so that a kernel reads them by ``AppConfig.load()`` instead of
+    parsing them embedded in the code to initialize the apps.
+
+    The file name contains the hash of the content. A file is never modified
+    once written, so that a kernel can keep what it has created from the file.
+    """
+
+    version = 1
+
+    def __init__(self, directory):
+        """
+        Initializes AppConfigStore.
+
+        Parameters
+        ----------
+        directory : str or pathlib.Path
+            Directory to write files (e.g. the runtime directory).
+        """
+        self.directory = Path(directory)
+
+    def __repr__(self):
+        """
+        Returns string representation of AppConfigStore.
+
+        Returns
+        -------
+        repr : str
+            String representation of AppConfigStore.
+        """
+        return '<%s {directory: %r}>' % (type(self).__name__, str(self.directory))
+
+    def write(self, apps, **shared):
+        """
+        Writes the configs of apps to a file.
+
+        Parameters
+        ----------
+        apps : dict{str: dict}
+            App configs by app name.
+        shared : dict
+            Arguments of AppConfig shared by the apps
+            (e.g. ``raw_namespace``, ``jobs_conf``).
+
+        Returns
+        -------
+        path : str
+            Absolute path of the file.
+        """
+        content = json.dumps(
+            {'version': self.version, 'shared': shared, 'apps': apps}, sort_keys=True
+        )
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+        # Path.resolve() of a file not existing raises FileNotFoundError on Python < 3.6.
+        path = self.directory.resolve() / '{}{}.json'.format(APP_CONFIG_PREFIX, digest)
+        if not path.exists():
+            tmp_path = path.with_name(path.name + '.tmp')
+            # readable only by the owner since the namespace has environment variables
+            fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(str(tmp_path), str(path))
+        return str(path)
+
+    def remove_unused(self, used_paths):
+        """
+        Removes the files which are no longer used.
+
+        Parameters
+        ----------
+        used_paths : list[str]
+            Paths of the files used by apps.
+        """
+        used_paths = set(used_paths)
+        directory = self.directory.resolve()
+        for path in directory.glob('{}*'.format(APP_CONFIG_PREFIX)):
+            if str(path) not in used_paths:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass  # removed already
+
+    def remove_all(self):
+        """
+        Removes all the files on shutdown.
+        """
+        self.remove_unused([])
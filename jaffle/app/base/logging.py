@@ -6,6 +6,8 @@ import zmq
 from tornado import ioloop
 from zmq.eventloop import zmqstream
 
+from ...logging import record_to_dict
+
 
 class JaffleAppLogHandler(logging.StreamHandler):
     """
@@ -39,22 +41,50 @@ class JaffleAppLogHandler(logging.StreamHandler):
     def emit(self, record):
         """
         Sends a log record to the Jaffle servers' ZeroMQ channel.
+        The record is sent as structured data with its original creation time,
+        arguments, exception and extra fields, and rendered on the server side.
 
         Parameters
         ----------
         record : logging.LogRecord
             Log record.
         """
+        self.send('log', record_to_dict(record, self.formatter))
+
+    def send(self, msg_type, payload):
+        """
+        Sends a message to the Jaffle servers' ZeroMQ channel.
+        It can be called from any thread.
+
+        Parameters
+        ----------
+        msg_type : str
+            Message type (``'log'`` or ``'metrics'``).
+        payload : object
+            JSON serializable payload.
+        """
 
-        def emit_log_record():
+        def send_message():
             self.stream.send_json({
                 'app_name': self.app_name,
-                'type': 'log',
-                'payload': {
-                    'logger': record.name,
-                    'levelname': record.levelname,
-                    'message': self.format(record)
-                }
+                'type': msg_type,
+                'payload': payload
             })
 
-        self.main_io_loop.add_callback(emit_log_record)  # emit in the main thread
+        self.main_io_loop.add_callback(send_message)  # send in the main thread
+
+    def send_now(self, msg_type, payload):
+        """
+        Sends a message to the Jaffle servers' ZeroMQ channel immediately.
+        It must be called in the main thread and is used to report progress
+        while a blocking call (e.g. ``pytest.main()``) keeps the IO loop busy.
+
+        Parameters
+        ----------
+        msg_type : str
+            Message type (e.g. ``'test_result'``).
+        payload : object
+            JSON serializable payload.
+        """
+        self.stream.send_json({'app_name': self.app_name, 'type': msg_type, 'payload': payload})
+        self.stream.flush(zmq.POLLOUT)
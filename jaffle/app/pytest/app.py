@@ -1,17 +1,18 @@
 # -*- coding: utf-8 -*-
 
 import re
-from importlib import import_module
+import time
 from pathlib import Path
 
-import pkg_resources
-import pytest
-from setuptools import find_packages
-
-from ..base import BaseJaffleApp, capture_method_output, clear_module_cache_once
+from ...utils import bool_value
+from ..base import (
+    BaseJaffleApp, capture_method_output, clear_module_cache_once, find_root_packages
+)
 from .collect import collect_test_items as _collect_test_items
 from .completer import PyTestCompleter
 from .lexer import PyTestLexer
+from .results import ResultReporter, RunHistory
+from .session import PHASES, PyTestSession
 
 
 class PyTestRunnerApp(BaseJaffleApp):
@@ -36,13 +37,23 @@ class PyTestRunnerApp(BaseJaffleApp):
         self.args = self.options.get_raw('args', ['-s', '-v'])
         self.plugins = self.options.get_raw('plugins', [])
         self.auto_test = self.options.get_raw('auto_test', [])
-        self.auto_test_map = self.options.get_raw('auto_test_map', [])
-        self.clear_cache = self.options.get_raw('clear_cache', find_packages())
-
-        # Suppress pytest warning for plugin: 'Module already imported'
-        for plugin in pkg_resources.iter_entry_points('pytest11'):
-            mod = import_module(plugin.module_name.split('.')[0])
-            mod.__doc__ = 'PYTEST_DONT_REWRITE'
+        self.auto_test_map = self.options.get_raw('auto_test_map', {})
+        self.clear_cache = self.options.get_raw('clear_cache', None)
+        if self.clear_cache is None:
+            self.clear_cache = find_root_packages()
+        self.failed_first = bool_value(self.options.get('failed_first', True))
+        if bool_value(self.options.get('stop_on_failure', False)):
+            self.args = self.args + ['-x']
+        self.session = PyTestSession(
+            self.args,
+            autoload=not bool_value(self.options.get('reuse_session', True)),
+            cache_path=Path(self.runtime_dir) / 'pytest-entry-points.json'
+            if self.runtime_dir else None
+        )
+        self.history = RunHistory(
+            Path(self.runtime_dir) / 'pytest-{}.json'.format(self.app_name)
+            if self.runtime_dir else None
+        )
 
     @capture_method_output
     @clear_module_cache_once
@@ -50,6 +61,18 @@ class PyTestRunnerApp(BaseJaffleApp):
         """
         WatchdogApp callback to be executed on filessystem update.
 
+        Parameters
+        ----------
+        event : dict
+            Watdhdog event.
+        """
+        with self.tracer.span('pytest.handle_watchdog_event', trace_id=event.get('trace_id')):
+            self._handle_watchdog_event(event)
+
+    def _handle_watchdog_event(self, event):
+        """
+        Runs the tests corresponding to the updated file.
+
         Parameters
         ----------
         event : dict
@@ -98,7 +121,74 @@ class PyTestRunnerApp(BaseJaffleApp):
             (e.g. ``example/tests/text_example.py::test_example``).
         """
         self.log.debug('pytest.main %s', self.args + [target])
-        pytest.main(self.args + [target])
+        started_at = time.time()
+        self.log_handler.send_now('test_run', {
+            'event': 'start', 'target': target, 'started_at': started_at
+        })
+        reporter = ResultReporter(self.history, self._send_test_result, self.failed_first)
+        with self.tracer.span('pytest.main', target=target):
+            try:
+                exit_code = self.session.run(target, [reporter])
+            finally:
+                self.history.save()
+            self._record_timings(started_at)
+        self.log_handler.send_now('test_run', {
+            'event': 'finish', 'target': target, 'exit_code': exit_code,
+            'finished_at': time.time()
+        })
+        self.metrics.histogram(
+            'jaffle_pytest_duration_seconds', 'Time in seconds to run pytest.'
+        ).observe(time.time() - started_at)
+        self.metrics.counter(
+            'jaffle_pytest_runs_total', 'pytest runs by exit code.', ['exit_code']
+        ).inc(exit_code=exit_code)
+
+    def _send_test_result(self, nodeid, outcome, duration):
+        """
+        Sends the result of a test to the Jaffle server as soon as it finishes.
+
+        Parameters
+        ----------
+        nodeid : str
+            Node ID of the test.
+        outcome : str
+            Outcome of the test (e.g. ``passed`` or ``failed``).
+        duration : float
+            Time in seconds to run the test.
+        """
+        self.log_handler.send_now('test_result', {
+            'nodeid': nodeid, 'outcome': outcome, 'duration': duration
+        })
+        self.metrics.counter(
+            'jaffle_pytest_tests_total', 'Test results by outcome.', ['outcome']
+        ).inc(outcome=outcome)
+
+    def _record_timings(self, started_at):
+        """
+        Records the time of each phase of the last pytest run as metrics and
+        trace spans.
+
+        Parameters
+        ----------
+        started_at : float
+            UNIX time when the run was started.
+        """
+        timings = self.session.timings
+        self.log.debug(
+            'pytest timings: %s', ' '.join(
+                '{}: {:.3f}s'.format(p, timings[p]) for p in PHASES if p in timings
+            )
+        )
+        histogram = self.metrics.histogram(
+            'jaffle_pytest_phase_duration_seconds',
+            'Time in seconds of each phase of pytest runs.', ['phase']
+        )
+        for phase in PHASES:
+            if phase not in timings:
+                break
+            histogram.observe(timings[phase], phase=phase)
+            self.tracer.add_span('pytest.' + phase, started_at, started_at + timings[phase])
+            started_at += timings[phase]
 
     def glob_to_regex(self, glob):
         """
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+from pathlib import Path
+
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    # Python < 3.8
+    try:
+        import importlib_metadata
+    except ImportError:
+        importlib_metadata = None
+
+_CACHE_VERSION = 1
+
+_entry_points_cache = {}  # (group, environment key) -> entry points
+
+
+def environment_key():
+    """
+    Returns the key which changes when distributions are installed to or
+    removed from the directories in ``sys.path``, i.e. their modification
+    times.
+
+    Returns
+    -------
+    key : list[list]
+        Pairs of the directory and its modification time in nanoseconds.
+    """
+    key = []
+    for path in sys.path:
+        try:
+            key.append([path, os.stat(path or '.').st_mtime_ns])
+        except OSError:
+            pass  # not exist or zip file in sys.path
+    return key
+
+
+def find_entry_points(group, cache_path=None):
+    """
+    Finds the entry points of a group without importing them.
+    The entry points are cached in memory and optionally in a JSON file
+    until the environment key is changed.
+
+    Parameters
+    ----------
+    group : str
+        Entry point group (e.g. ``pytest11``).
+    cache_path : str or pathlib.Path or None
+        JSON file path to cache the entry points across processes.
+
+    Returns
+    -------
+    entry_points : list[tuple(str, str)]
+        Names and module names of the entry points.
+    """
+    key = environment_key()
+    memory_key = (group, json.dumps(key))
+    if memory_key in _entry_points_cache:
+        return _entry_points_cache[memory_key]
+
+    entry_points = None
+    cache_path = Path(cache_path) if cache_path else None
+    if cache_path:
+        try:
+            with cache_path.open(encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == _CACHE_VERSION and data.get('key') == key:
+                entry_points = [tuple(e) for e in data['groups'][group]]
+        except (OSError, ValueError, KeyError):
+            pass  # not saved yet, broken or another group
+
+    if entry_points is None:
+        entry_points = _scan_entry_points(group)
+        if cache_path:
+            tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump({
+                    'version': _CACHE_VERSION, 'key': key, 'groups': {group: entry_points}
+                }, f)
+            os.replace(str(tmp_path), str(cache_path))
+
+    _entry_points_cache[memory_key] = entry_points
+    return entry_points
+
+
+def _scan_entry_points(group):
+    """
+    Scans the entry points of a group in the installed distributions.
+    The first one is taken if two or more entry points have the same name,
+    as pytest does.
+
+    Parameters
+    ----------
+    group : str
+        Entry point group.
+
+    Returns
+    -------
+    entry_points : list[tuple(str, str)]
+        Names and module names of the entry points.
+    """
+    if importlib_metadata is None:
+        import pkg_resources
+        found = [(e.name, e.module_name) for e in pkg_resources.iter_entry_points(group)]
+    else:
+        found = [
+            (e.name, e.value.split(':')[0].strip())
+            for dist in importlib_metadata.distributions()
+            for e in dist.entry_points if e.group == group
+        ]
+
+    entry_points = []
+    names = set()
+    for name, module_name in found:
+        if name not in names:
+            names.add(name)
+            entry_points.append((name, module_name))
+    return entry_points
+
+
+def mark_dont_rewrite(module_names):
+    """
+    Disables pytest's assertion rewriting of the top-level modules which have
+    already been imported to suppress pytest warning: 'Module already
+    imported so cannot be rewritten'. Modules not imported yet are not
+    imported.
+
+    Parameters
+    ----------
+    module_names : list[str]
+        Module names (e.g. ``pytest_cov.plugin``).
+    """
+    for module_name in module_names:
+        module = sys.modules.get(module_name.split('.')[0])
+        if module is not None and 'PYTEST_DONT_REWRITE' not in (module.__doc__ or ''):
+            module.__doc__ = 'PYTEST_DONT_REWRITE'
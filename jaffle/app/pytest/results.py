@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+from pathlib import Path
+
+FAILED_OUTCOMES = ('failed', 'error')
+
+
+class RunHistory(object):
+    """
+    RunHistory keeps the last outcome of each test by node ID and orders tests
+    so that the ones which failed last time run first, followed by new tests
+    and tests whose files have been edited since they ran last time.
+    """
+
+    version = 1
+
+    max_size = 10000
+
+    def __init__(self, path=None):
+        """
+        Initializes RunHistory and loads the saved history.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path or None
+            JSON file path. The history is not saved if None.
+        """
+        self.path = Path(path) if path else None
+        self.tests = {}  # node ID -> {'outcome': str, 'duration': float, 'ran_at': float}
+
+        if self.path is None:
+            return
+        try:
+            with self.path.open(encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.version:
+                self.tests = data['tests']
+        except (OSError, ValueError, KeyError):
+            pass  # not saved yet or broken
+
+    def __repr__(self):
+        """
+        Returns string representation of RunHistory.
+
+        Returns
+        -------
+        repr : str
+            String representation of RunHistory.
+        """
+        return '<%s {path: %r #tests: %d #failed: %d}>' % (
+            type(self).__name__, str(self.path) if self.path else None, len(self.tests),
+            len(self.failed)
+        )
+
+    @property
+    def failed(self):
+        """
+        Returns the node IDs of the tests which failed last time.
+
+        Returns
+        -------
+        failed : list[str]
+            Node IDs of the failed tests.
+        """
+        return sorted(n for n, t in self.tests.items() if t['outcome'] in FAILED_OUTCOMES)
+
+    def record(self, nodeid, outcome, duration, ran_at=None):
+        """
+        Records the outcome of a test.
+
+        Parameters
+        ----------
+        nodeid : str
+            Node ID of the test (e.g. ``example/tests/test_example.py::test_example``).
+        outcome : str
+            Outcome of the test (e.g. ``passed`` or ``failed``).
+        duration : float
+            Time in seconds to run the test.
+        ran_at : float or None
+            UNIX time when the test finished (default: now).
+        """
+        self.tests[nodeid] = {
+            'outcome': outcome,
+            'duration': duration,
+            'ran_at': time.time() if ran_at is None else ran_at
+        }
+
+    def priority(self, nodeid, path, mtimes=None):
+        """
+        Returns the priority of a test. Tests with lower values run first.
+
+        Parameters
+        ----------
+        nodeid : str
+            Node ID of the test.
+        path : str
+            Path of the test file.
+        mtimes : dict{str: float} or None
+            Cache of modification times of the test files.
+
+        Returns
+        -------
+        priority : int
+            ``0`` if the test failed last time, ``1`` if the test is new or its
+            file has been edited since it ran last time, ``2`` otherwise.
+        """
+        test = self.tests.get(nodeid)
+        if test is None:
+            return 1
+        if test['outcome'] in FAILED_OUTCOMES:
+            return 0
+        mtimes = {} if mtimes is None else mtimes
+        if path not in mtimes:
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[path] = 0.0
+        return 1 if mtimes[path] > test['ran_at'] else 2
+
+    def sort(self, items):
+        """
+        Sorts pytest items by priority keeping the collected order within
+        the same priority.
+
+        Parameters
+        ----------
+        items : list[pytest.Item]
+            Collected pytest items.
+
+        Returns
+        -------
+        items : list[pytest.Item]
+            Sorted pytest items.
+        """
+        mtimes = {}
+        return sorted(items, key=lambda i: self.priority(i.nodeid, str(i.fspath), mtimes))
+
+    def save(self):
+        """
+        Saves the history to the JSON file, dropping the oldest tests if
+        there are more than ``max_size`` tests.
+        """
+        if len(self.tests) > self.max_size:
+            nodeids = sorted(self.tests, key=lambda n: self.tests[n]['ran_at'])
+            for nodeid in nodeids[:len(self.tests) - self.max_size]:
+                del self.tests[nodeid]
+        if self.path is None:
+            return
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'tests': self.tests}, f)
+        os.replace(str(tmp_path), str(self.path))
+
+
+class ResultReporter(object):
+    """
+    pytest plugin which reports the result of each test as soon as it
+    finishes, records it to RunHistory and optionally runs the tests in the
+    order of RunHistory.
+    """
+
+    def __init__(self, history, callback=None, failed_first=True):
+        """
+        Initializes ResultReporter.
+
+        Parameters
+        ----------
+        history : RunHistory
+            History to record outcomes.
+        callback : function or None
+            Function called with ``nodeid``, ``outcome`` and ``duration`` of
+            each finished test.
+        failed_first : bool
+            Whether to run failed and edited tests first.
+        """
+        self.history = history
+        self.callback = callback
+        self.failed_first = failed_first
+        self.pending = {}  # node ID -> [outcome, duration]
+        self.outcomes = {}  # outcome -> count
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        if self.failed_first:
+            items[:] = self.history.sort(items)
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self._report(report.nodeid, 'error', 0.0)
+        elif report.nodeid in self.history.tests:
+            self.history.record(report.nodeid, 'passed', 0.0)  # collected again
+
+    def pytest_runtest_logreport(self, report):
+        outcome, duration = self.pending.setdefault(report.nodeid, ['passed', 0.0])
+        if outcome == 'passed':
+            outcome = self._outcome(report)
+        self.pending[report.nodeid] = [outcome, duration + report.duration]
+        if report.when == 'teardown':
+            self._report(report.nodeid, *self.pending.pop(report.nodeid))
+
+    def _outcome(self, report):
+        """
+        Returns the outcome of a phase of a test.
+
+        Parameters
+        ----------
+        report : _pytest.reports.TestReport
+            Report of ``setup``, ``call`` or ``teardown`` phase.
+
+        Returns
+        -------
+        outcome : str
+            ``passed``, ``failed``, ``error``, ``skipped``, ``xfailed`` or
+            ``xpassed``.
+        """
+        if report.failed:
+            return 'failed' if report.when == 'call' else 'error'
+        if report.skipped:
+            return 'xfailed' if hasattr(report, 'wasxfail') else 'skipped'
+        return 'xpassed' if hasattr(report, 'wasxfail') else 'passed'
+
+    def _report(self, nodeid, outcome, duration):
+        """
+        Records and reports the result of a test.
+
+        Parameters
+        ----------
+        nodeid : str
+            Node ID of the test.
+        outcome : str
+            Outcome of the test.
+        duration : float
+            Time in seconds to run the test.
+        """
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.history.record(nodeid, outcome, duration)
+        if self.callback:
+            self.callback(nodeid, outcome, duration)
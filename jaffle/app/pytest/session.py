@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+from importlib import import_module
+
+import pytest
+
+from .plugins import find_entry_points, mark_dont_rewrite
+
+AUTOLOAD_ENV = 'PYTEST_DISABLE_PLUGIN_AUTOLOAD'
+
+PHASES = ('setup', 'collection', 'run')
+
+
+class PyTestSession(object):
+    """
+    PyTestSession runs pytest repeatedly in a kernel and keeps the setup which
+    does not change between runs.
+
+    pytest creates a new ``Config`` on every ``pytest.main()`` call and the
+    ``Config`` cannot be used again once its session has finished. So
+    PyTestSession keeps the results of the expensive steps instead:
+
+    - The ``pytest11`` entry points are found on the first run and imported
+      only once. pytest's own entry point loading, which scans all the
+      installed distributions on every run, is disabled.
+    - ``conftest.py`` modules stay in the module cache and are reloaded only
+      when the files have been changed since the last run.
+
+    Each run also records the time of the setup, collection and test run
+    phases as ``timings``.
+    """
+
+    def __init__(self, args, entry_points=None, autoload=False, cache_path=None):
+        """
+        Initializes PyTestSession.
+
+        Parameters
+        ----------
+        args : list[str]
+            pytest arguments.
+        entry_points : list[tuple(str, str)] or None
+            Names and module names of the ``pytest11`` entry points.
+            They are found on the first run if None.
+        autoload : bool
+            Whether pytest loads the entry points by itself on every run.
+        cache_path : str or pathlib.Path or None
+            JSON file path to cache the found entry points.
+        """
+        self.args = list(args)
+        self.entry_points = entry_points
+        self.autoload = autoload
+        self.cache_path = cache_path
+        self.plugins = None  # list of (name, module) loaded on the first run
+        self.conftests = {}  # path -> (module name, mtime_ns)
+        self.runs = 0
+        self.timings = None
+
+    def __repr__(self):
+        """
+        Returns string representation of PyTestSession.
+
+        Returns
+        -------
+        repr : str
+            String representation of PyTestSession.
+        """
+        return '<%s {args: %r runs: %d #conftests: %d}>' % (
+            type(self).__name__, self.args, self.runs, len(self.conftests)
+        )
+
+    def run(self, target, plugins=()):
+        """
+        Runs pytest.
+
+        Parameters
+        ----------
+        target : str
+            pytest target
+            (e.g. ``example/tests/text_example.py::test_example``).
+        plugins : list[object]
+            Additional plugin objects for the run.
+
+        Returns
+        -------
+        exit_code : int
+            pytest exit code.
+        """
+        self.invalidate_conftests()
+        mark_dont_rewrite(m for _, m in self.find_entry_points())
+        recorder = SessionRecorder(self.load_plugins())
+        autoload = os.environ.get(AUTOLOAD_ENV)
+        if not self.autoload:
+            os.environ[AUTOLOAD_ENV] = '1'
+        started_at = time.time()
+        try:
+            exit_code = pytest.main(self.args + [target], plugins=[recorder] + list(plugins))
+        finally:
+            finished_at = time.time()
+            if autoload is None:
+                os.environ.pop(AUTOLOAD_ENV, None)
+            else:
+                os.environ[AUTOLOAD_ENV] = autoload
+
+        self.runs += 1
+        self.timings = recorder.timings(started_at, finished_at)
+        self.conftests = {}
+        for module in recorder.conftest_modules:
+            mtime = _mtime(module.__file__)
+            if mtime is not None:
+                self.conftests[module.__file__] = (module.__name__, mtime)
+        return int(exit_code)
+
+    def find_entry_points(self):
+        """
+        Finds the ``pytest11`` entry points on the first call.
+
+        Returns
+        -------
+        entry_points : list[tuple(str, str)]
+            Names and module names of the entry points.
+        """
+        if self.entry_points is None:
+            self.entry_points = find_entry_points('pytest11', self.cache_path)
+        return self.entry_points
+
+    def load_plugins(self):
+        """
+        Imports the entry point plugins on the first call.
+
+        Returns
+        -------
+        plugins : list[tuple(str, module)]
+            Names and modules of the entry point plugins or an empty list if
+            pytest loads them by itself.
+        """
+        if self.autoload:
+            return []
+        if self.plugins is None:
+            self.plugins = [
+                (name, import_module(module_name))
+                for name, module_name in self.find_entry_points()
+            ]
+        return self.plugins
+
+    def invalidate_conftests(self):
+        """
+        Removes the ``conftest.py`` modules which have been changed or removed
+        since the last run from the module cache.
+
+        Returns
+        -------
+        paths : list[str]
+            Paths of the invalidated ``conftest.py`` files.
+        """
+        paths = []
+        for path, (module_name, mtime) in sorted(self.conftests.items()):
+            if _mtime(path) != mtime:
+                sys.modules.pop(module_name, None)
+                paths.append(path)
+        return paths
+
+
+class SessionRecorder(object):
+    """
+    pytest plugin which registers the entry point plugins loaded beforehand and
+    records the time of each phase of a session.
+    """
+
+    def __init__(self, plugins):
+        """
+        Initializes SessionRecorder.
+
+        Parameters
+        ----------
+        plugins : list[tuple(str, module)]
+            Names and modules of the entry point plugins.
+        """
+        self.plugins = plugins
+        self.configured_at = None
+        self.collected_at = None
+        self.finished_at = None
+        self.conftest_modules = []
+
+    def pytest_addhooks(self, pluginmanager):
+        # Registered under the entry point names as pytest does, so that
+        # `-p no:<name>` unregisters them while parsing the arguments.
+        for name, module in self.plugins:
+            if pluginmanager.get_plugin(name) is None and not pluginmanager.is_blocked(name):
+                pluginmanager.register(module, name)
+
+    def pytest_configure(self, config):
+        self.configured_at = time.time()
+
+    def pytest_collection_finish(self, session):
+        self.collected_at = time.time()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionfinish(self, session):
+        self.finished_at = time.time()
+        self.conftest_modules = [
+            p for p in session.config.pluginmanager.get_plugins()
+            if os.path.basename(getattr(p, '__file__', None) or '') == 'conftest.py'
+        ]
+
+    def timings(self, started_at, finished_at):
+        """
+        Returns the time of each phase of the session.
+
+        Parameters
+        ----------
+        started_at : float
+            UNIX time when ``pytest.main()`` was called.
+        finished_at : float
+            UNIX time when ``pytest.main()`` returned.
+
+        Returns
+        -------
+        timings : dict{str: float}
+            Time in seconds of ``setup``, ``collection`` and ``run`` phases.
+            Phases which have not been reached are omitted.
+        """
+        timings = {}
+        last = started_at
+        for phase, reached_at in zip(
+            PHASES, (self.configured_at, self.collected_at, self.finished_at)
+        ):
+            if reached_at is None:
+                break
+            timings[phase] = reached_at - last
+            last = reached_at
+        return timings
+
+
+def _mtime(path):
+    """
+    Returns the modification time of a file.
+
+    Parameters
+    ----------
+    path : str
+        File path.
+
+    Returns
+    -------
+    mtime : int or None
+        Modification time in nanoseconds or None if the file does not exist.
+    """
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -7,11 +7,10 @@ from unittest.mock import patch
 
 import jupyter_client
 from jupyter_client.threaded import IOLoopThread
-from setuptools import find_packages
 from tornado import ioloop
 
 from ...utils import bool_value
-from ..base import BaseJaffleApp, capture_method_output
+from ..base import BaseJaffleApp, capture_method_output, find_root_packages
 
 
 class TornadoBridgeApp(BaseJaffleApp):
@@ -58,7 +57,9 @@ class TornadoBridgeApp(BaseJaffleApp):
 
         self.app_class = self.options.get_raw('app_class')
         self.args = self.options.get_raw('args', [])
-        self.clear_cache = self.options.get_raw('clear_cache', find_packages())
+        self.clear_cache = self.options.get_raw('clear_cache', None)
+        if self.clear_cache is None:
+            self.clear_cache = find_root_packages()
         self.threaded = bool_value(self.options.get_raw('threaded', False))
 
         self.thread = None
@@ -170,6 +171,14 @@ class TornadoBridgeApp(BaseJaffleApp):
         with patch.object(app_io_loop, 'add_callback', add_callback):
             self.app.stop()
 
+    def shutdown(self):
+        """
+        Stops the Tornado app if it is running.
+        """
+        if getattr(self, 'app', None):
+            self.stop()
+        super().shutdown()
+
     def restart(self):
         """
         Restarts the tornado app.
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import time
 from functools import partial
 from pathlib import Path
 
 from tornado import ioloop
 from watchdog.observers import Observer
 
-from ...utils import bool_value
+from ...utils import bool_value, str_value
 from ..base import BaseJaffleApp
 from .handler import WatchdogHandler
+from .polling import ScanningObserver
+from .watch import DirectoryPruner, SharedWatcher
 
 
 class WatchdogApp(BaseJaffleApp):
@@ -27,33 +30,121 @@ class WatchdogApp(BaseJaffleApp):
         """
         super().__init__(app_conf_data)
 
-        self.observer = Observer()
+        self.observer = self._create_observer()
+        self.watcher = SharedWatcher(self.observer, self.log)
+        watch_paths = []
 
         for handler in self.options.get_raw('handlers', []):
+            watch_path = handler.get('watch_path', '.')
+            if Path(watch_path).is_absolute():
+                observe_path = str(watch_path)
+            else:
+                observe_path = str(Path.cwd() / watch_path)
+            case_sensitive = bool_value(handler.get('case_sensitive', False))
+            pruner = DirectoryPruner(
+                observe_path, handler.get('ignore_dirs', []), case_sensitive=case_sensitive
+            )
+
             wh = WatchdogHandler(
                 ioloop.IOLoop.current(),
                 self.execute_code,
                 self.execute_job,
                 self.log,
+                compile_code=(
+                    self.compile_code if bool_value(handler.get('precompile', True)) else None
+                ),
+                publish=self.publish,
+                metrics=self.metrics,
+                tracer=self.tracer,
+                pruner=pruner,
                 patterns=handler.get('patterns', []),
                 ignore_patterns=handler.get('ignore_patterns', []),
                 ignore_directories=bool_value(handler.get('ignore_directories', False)),
-                case_sensitive=bool_value(handler.get('case_sensitive', False)),
+                case_sensitive=case_sensitive,
+                skip_unchanged=bool_value(handler.get('skip_unchanged', False)),
                 clear_module_cache=partial(
                     self.clear_module_cache, handler.get('clear_cache', [])
                 ),
                 code_blocks=handler.get('code_blocks', []),
                 jobs=handler.get('jobs', []),
+                topics=handler.get('publish', []),
                 debounce=handler.get('debounce', 0.0),
                 throttle=handler.get('throttle', 0.0)
             )
 
-            watch_path = handler.get('watch_path', '.')
-            if Path(watch_path).is_absolute():
-                observe_path = str(watch_path)
-            else:
-                observe_path = str(Path.cwd() / watch_path)
-
-            self.observer.schedule(wh, observe_path, recursive=True)
+            self.watcher.add_handler(wh, observe_path, pruner)
+            watch_paths.append(watch_path)
 
+        self._schedule(watch_paths)
         self.observer.start()
+
+    def _create_observer(self):
+        """
+        Creates a Watchdog observer of the ``backend`` option.
+
+        Returns
+        -------
+        observer : watchdog.observers.api.BaseObserver
+            Watchdog observer.
+        """
+        backend = str_value(self.options.get('backend', 'native'))
+        if backend == 'native':
+            return Observer()
+        if backend != 'poll':
+            raise ValueError('Unknown Watchdog backend: {!r}'.format(backend))
+
+        index_path = None
+        if self.runtime_dir:
+            index_path = Path(self.runtime_dir) / 'watchdog-{}.json'.format(self.app_name)
+        interval = float(self.options.get('poll_interval', 1.0))
+        max_interval = float(self.options.get('poll_max_interval', 10.0))
+        self.log.info(
+            'Polling every %.1f-%.1fs (index: %s)', interval, max(interval, max_interval),
+            index_path
+        )
+        return ScanningObserver(interval, max_interval, index_path=index_path)
+
+    def _schedule(self, watch_paths):
+        """
+        Schedules the watches of all handlers and reports the number of them.
+
+        Parameters
+        ----------
+        watch_paths : list[str]
+            Watch paths of the handlers in the configuration, which are used
+            as labels.
+        """
+        started_at = time.time()
+        plans = self.watcher.schedule()
+        for watch_path, plan in zip(watch_paths, plans):
+            if plan.directories is None:
+                self.log.info('Watching %s recursively', watch_path)
+                continue  # not walked without ignore_dirs
+            self.log.info(
+                'Watching %s: %d directories (%d subtrees pruned)', watch_path, plan.directories,
+                len(plan.pruned)
+            )
+            self.log.debug('Pruned directories: %s', plan.pruned)
+            self.metrics.gauge(
+                'jaffle_watchdog_watched_directories', 'Directories watched by a handler.',
+                ['path']
+            ).set(plan.directories, path=watch_path)
+            self.metrics.gauge(
+                'jaffle_watchdog_pruned_directories', 'Directory subtrees pruned from a handler.',
+                ['path']
+            ).set(len(plan.pruned), path=watch_path)
+        self.log.info(
+            'Scheduled %d watches for %d handlers in %.2fs', len(self.watcher.watches),
+            len(plans), time.time() - started_at
+        )
+        self.metrics.gauge(
+            'jaffle_watchdog_watches', 'Watchdog watches shared by the handlers.'
+        ).set(len(self.watcher.watches))
+
+    def shutdown(self):
+        """
+        Stops the Watchdog observer.
+        """
+        self.observer.stop()
+        self.observer.join()
+        super().shutdown()
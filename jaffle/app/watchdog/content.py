@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import zlib
+from collections import OrderedDict
+
+from .polling import RACY_NS
+
+
+class ContentCache(object):
+    """
+    ContentCache detects filesystem events which did not change the content
+    of a file (e.g. ``touch`` or an editor saving a file atomically without
+    any modification).
+
+    It keeps ``(size, mtime, hash)`` of recently seen files up to ``max_size``
+    entries. An event is regarded as unchanged only if the content hash is
+    the same. The hash is skipped only if the size and the mtime are the same
+    and the mtime was older than ``RACY_NS`` when the hash was taken, because
+    a file may be modified again within the same tick of a coarse mtime
+    (e.g. 1 or 2 seconds on some filesystems). The first event of a file is
+    always regarded as a change because the previous content is unknown.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, max_size=10000):
+        """
+        Initializes ContentCache.
+
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of files to be cached.
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()  # path -> (size, mtime_ns, hash, hashed_at_ns)
+
+    def __repr__(self):
+        """
+        Returns string representation of ContentCache.
+
+        Returns
+        -------
+        repr : str
+            String representation of ContentCache.
+        """
+        return '<%s {#entries: %d max_size: %d}>' % (
+            type(self).__name__, len(self.entries), self.max_size
+        )
+
+    def __len__(self):
+        """
+        Returns the number of cached files.
+
+        Returns
+        -------
+        len : int
+            Number of cached files.
+        """
+        return len(self.entries)
+
+    def is_unchanged(self, event):
+        """
+        Returns whether a filesystem event did not change the content of the
+        file and updates the cache.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileSystemEvent
+            Watchdog filesystem event.
+
+        Returns
+        -------
+        is_unchanged : bool
+            Whether the content of the file is the same as the last event.
+        """
+        if event.is_directory:
+            return False
+        if event.event_type == 'deleted':
+            self.entries.pop(event.src_path, None)
+            return False
+        if event.event_type == 'moved':
+            # The file replaced by an atomic save is compared with the destination.
+            self.entries.pop(event.src_path, None)
+            return self._update(event.dest_path)
+        return self._update(event.src_path)
+
+    def _update(self, path):
+        """
+        Updates the cache entry of a file.
+
+        Parameters
+        ----------
+        path : str
+            File path.
+
+        Returns
+        -------
+        is_unchanged : bool
+            Whether the content of the file is the same as the cached one.
+        """
+        last = self.entries.pop(path, None)
+        try:
+            hashed_at = int(time.time() * 10 ** 9)
+            stat = os.stat(path)
+            if (last and last[:2] == (stat.st_size, stat.st_mtime_ns) and
+                    last[3] - stat.st_mtime_ns >= RACY_NS):
+                self.entries[path] = last
+                return True
+            digest = self._hash(path)
+        except OSError:
+            return False  # removed or inaccessible already
+
+        self.entries[path] = (stat.st_size, stat.st_mtime_ns, digest, hashed_at)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return bool(last) and (last[0], last[2]) == (stat.st_size, digest)
+
+    def _hash(self, path):
+        """
+        Calculates the hash of the content of a file.
+
+        Parameters
+        ----------
+        path : str
+            File path.
+
+        Returns
+        -------
+        hash : int
+            CRC-32 of the content.
+        """
+        crc = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                crc = zlib.crc32(chunk, crc)
+        return crc
@@ -1,10 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import threading
+import time
+from functools import partial
 from pathlib import Path
 
 from tornado import gen
 from watchdog.events import PatternMatchingEventHandler
 
+from ...tracing import Tracer, new_trace_id, trace_context
+from .content import ContentCache
+
 
 def _event_to_dict(event):
     """
@@ -30,6 +36,9 @@ def _event_to_dict(event):
 class WatchdogHandler(PatternMatchingEventHandler):
     """
     Watchdog event handler for Jaffle.
+    It is not scheduled on an observer directly. SharedWatcher matches events
+    against the patterns of all handlers at once and calls ``on_any_event()``
+    of the matched handlers.
     """
 
     def __init__(
@@ -38,13 +47,20 @@ class WatchdogHandler(PatternMatchingEventHandler):
         execute_code,
         execute_job,
         log,
+        compile_code=None,
+        publish=None,
+        metrics=None,
+        tracer=None,
+        pruner=None,
         patterns=None,
         ignore_patterns=None,
         ignore_directories=False,
         case_sensitive=False,
+        skip_unchanged=False,
         clear_module_cache=None,
         code_blocks=[],
         jobs=[],
+        topics=[],
         debounce=0.0,
         throttle=0.0
     ):
@@ -59,6 +75,18 @@ class WatchdogHandler(PatternMatchingEventHandler):
             Function to execute a job.
         log : logging.Logger
             Logger.
+        compile_code : function or None
+            Function to compile a code block into a function which takes
+            ``event`` as a keyword argument. If it is None, code blocks are
+            executed by ``execute_code`` each time.
+        publish : function or None
+            Function to publish a message to a topic of the event bus.
+        metrics : MetricsRegistry or None
+            Registry to record the metrics of events and callbacks.
+        tracer : Tracer or None
+            Tracer to record the spans of handling events.
+        pruner : DirectoryPruner or None
+            Pruner of ignored directory subtrees.
         patterns : list[str]
             File path pattern to be watched (glob pattern for ``fnmatch``).
         ignore_patterns : list[str]
@@ -67,12 +95,16 @@ class WatchdogHandler(PatternMatchingEventHandler):
             Whether to ignore directories.
         case_sensitive : bool
             Case sensitive or not.
+        skip_unchanged : bool
+            Whether to ignore events which did not change the file content.
         clear_module_cache : function or None
             Cache invalidation function.
         code_blocks : list[str]
             Code blocks to be executed on receiving filesystem events.
         jobs : list[str]
             Jobs to be executed on receiving filesystem events.
+        topics : list[str]
+            Topics of the event bus to publish filesystem events to.
         debounce : float
             Debounce time in seconds. If it is 0.0, debounce is disabled.
         throttle : float
@@ -89,9 +121,19 @@ class WatchdogHandler(PatternMatchingEventHandler):
         self.execute_code = execute_code
         self.execute_job = execute_job
         self.log = log
+        self.metrics = metrics
+        self.tracer = tracer or Tracer(enabled=False)
+        self.pruner = pruner
+        self.content_cache = ContentCache() if skip_unchanged else None
         self.clear_module_cache = clear_module_cache
         self.code_blocks = code_blocks
+        self.code_funcs = [
+            compile_code(code, ['event']) if compile_code else partial(execute_code, code)
+            for code in code_blocks
+        ]
         self.jobs = jobs
+        self.publish = publish
+        self.topics = topics
         self.debounce = debounce
         self.throttle = throttle
 
@@ -103,32 +145,108 @@ class WatchdogHandler(PatternMatchingEventHandler):
         Event handler for Watchdog filesystem events.
         Executes the handling in the main ioloop.
 
+        A trace ID is attached to each event as ``event['trace_id']`` if
+        tracing is enabled, and it is made current while code blocks are
+        executed so that app methods and log records can carry it.
+
         Parameters
         ----------
         event : watchdog.events.FileSystemEvent
             Watchdog filesystem event.
         """
+        # recent Watchdog versions give an empty dest_path to the events other than moved
+        paths = [event.src_path] + ([event.dest_path] if event.event_type == 'moved' else [])
+        if self.pruner and all(self.pruner.is_ignored(p, event.is_directory) for p in paths):
+            return  # delivered by a watch of the parent directory of a pruned subtree
+
+        if self.metrics:
+            self.metrics.counter(
+                'jaffle_watchdog_events_total', 'Watchdog filesystem events.', ['event_type']
+            ).inc(event_type=event.event_type)
+
+        if self.content_cache is not None and self.content_cache.is_unchanged(event):
+            self.log.debug('Skipped unchanged: %s', event.src_path)
+            if self.metrics:
+                self.metrics.counter(
+                    'jaffle_watchdog_unchanged_events_total',
+                    'Watchdog filesystem events skipped because the file content is unchanged.',
+                    ['event_type']
+                ).inc(event_type=event.event_type)
+            return
+
+        trace_id = new_trace_id()
+        observed_at = time.time()
+        observer_tid = threading.get_ident()
 
         def handle_event():
+            self.tracer.add_span(
+                'watchdog.dispatch', observed_at, time.time(), trace_id=trace_id,
+                tid=observer_tid, event_type=event.event_type, src_path=event.src_path
+            )
+
             if self.clear_module_cache:
-                self.clear_module_cache()
+                with self.tracer.span('watchdog.clear_module_cache', trace_id=trace_id):
+                    self.clear_module_cache()
 
             event_dict = _event_to_dict(event)
-            self.log.debug('event: %s', event_dict)
+            if self.tracer.enabled:
+                event_dict['trace_id'] = trace_id
+            self.log.debug('event: %s', event_dict, extra={'trace_id': trace_id})
+
+            scheduled_at = time.time()
 
             @gen.coroutine
             def execute_callbacks():
-                for code in self.code_blocks:
+                started_at = time.time()
+                if self.debounce > 0.0:
+                    self.tracer.add_span(
+                        'watchdog.debounce', scheduled_at, started_at, trace_id=trace_id
+                    )
+
+                # Subscribers in other kernels do not wait for the code blocks.
+                for topic in self.topics:
+                    self.publish(topic, event_dict)
+
+                for code, code_func in zip(self.code_blocks, self.code_funcs):
+                    code_started_at = time.time()
                     try:
-                        yield self.execute_code(code, event=event_dict)
+                        # The trace ID must not be current while yielding.
+                        with trace_context(trace_id):
+                            future = code_func(event=event_dict)
+                        yield future
                     except Exception as e:
-                        self.log.exception('Code execution error: %s', e)
+                        self.log.exception(
+                            'Code execution error: %s', e, extra={'trace_id': trace_id}
+                        )
+                    finally:
+                        self.tracer.add_span(
+                            'watchdog.code_block', code_started_at, time.time(),
+                            trace_id=trace_id, code=code
+                        )
 
                 for job in self.jobs:
+                    job_started_at = time.time()
                     try:
-                        yield self.execute_job(job)
+                        yield self.execute_job(job, trace_id=trace_id)
                     except Exception as e:
-                        self.log.exception('Job execution error: %s', e)
+                        self.log.exception(
+                            'Job execution error: %s', e, extra={'trace_id': trace_id}
+                        )
+                    finally:
+                        self.tracer.add_span(
+                            'watchdog.job', job_started_at, time.time(), trace_id=trace_id,
+                            job=job
+                        )
+
+                if self.metrics:
+                    self.metrics.histogram(
+                        'jaffle_watchdog_callback_duration_seconds',
+                        'Time in seconds to execute code blocks and jobs for an event.'
+                    ).observe(time.time() - started_at)
+                self.tracer.add_span(
+                    'watchdog.event', observed_at, time.time(), trace_id=trace_id,
+                    tid=observer_tid, event_type=event.event_type, src_path=event.src_path
+                )
 
             if self.debounce > 0.0:
                 if self._timeout:
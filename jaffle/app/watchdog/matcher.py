@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+from collections import OrderedDict
+from fnmatch import translate
+
+
+class PatternMatcher(object):
+    """
+    PatternMatcher matches Watchdog events against the patterns of multiple
+    handlers at once.
+
+    Each unique pattern is compiled only once and evaluated at most once for
+    each path of an event. The results are kept as a bit mask and every
+    handler is tested by its include and ignore masks. A combined regular
+    expression of all include patterns rejects the events which no handler
+    is interested in (e.g. ``*.pyc`` or editor swap files) without
+    evaluating patterns one by one.
+
+    A path matches a handler if it is under the watch path of the handler,
+    matches one of ``patterns`` and does not match any of
+    ``ignore_patterns``. The pattern syntax is the same as Python's fnmatch.
+    """
+
+    def __init__(self):
+        """
+        Initializes PatternMatcher.
+        """
+        self.targets = []
+        self.patterns = OrderedDict()  # (pattern, case_sensitive) -> bit index
+        self.regexes = []
+        self.include_regexes = []
+
+    def __repr__(self):
+        """
+        Returns string representation of PatternMatcher.
+
+        Returns
+        -------
+        repr : str
+            String representation of PatternMatcher.
+        """
+        return '<%s {#targets: %d #patterns: %d}>' % (
+            type(self).__name__, len(self.targets), len(self.patterns)
+        )
+
+    def add(self, handler, root):
+        """
+        Adds a handler to be matched.
+
+        Parameters
+        ----------
+        handler : watchdog.events.PatternMatchingEventHandler
+            Event handler which has ``patterns``, ``ignore_patterns``,
+            ``ignore_directories`` and ``case_sensitive``.
+        root : str
+            Absolute path of the directory watched by the handler.
+        """
+        case_sensitive = handler.case_sensitive
+        include_mask = self._add_patterns(handler.patterns, case_sensitive)
+        ignore_mask = self._add_patterns(handler.ignore_patterns, case_sensitive)
+        self.targets.append(
+            (handler, root.rstrip(os.sep) + os.sep, include_mask, ignore_mask,
+             handler.ignore_directories)
+        )
+
+        self._compile_include_regexes()
+
+    def match(self, event):
+        """
+        Returns the handlers which match an event.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileSystemEvent
+            Watchdog filesystem event.
+
+        Returns
+        -------
+        handlers : list[watchdog.events.FileSystemEventHandler]
+            Matched handlers in the order of addition.
+        """
+        paths = [os.fsdecode(event.src_path)] if event.src_path else []
+        if getattr(event, 'dest_path', None):
+            paths.insert(0, os.fsdecode(event.dest_path))
+        masks = [(path, self._mask(path)) for path in paths if self._is_candidate(path)]
+        if not masks:
+            return []
+
+        return [
+            handler for handler, prefix, include_mask, ignore_mask, ignore_directories
+            in self.targets
+            if not (ignore_directories and event.is_directory) and any(
+                (path.startswith(prefix) or path + os.sep == prefix) and
+                mask & include_mask and not mask & ignore_mask
+                for path, mask in masks
+            )
+        ]
+
+    def _add_patterns(self, patterns, case_sensitive):
+        """
+        Registers patterns and returns the bit mask of them.
+
+        Parameters
+        ----------
+        patterns : list[str] or None
+            Patterns.
+        case_sensitive : bool
+            Whether to match the patterns case-sensitively.
+
+        Returns
+        -------
+        mask : int
+            Bit mask of the patterns.
+        """
+        mask = 0
+        for pattern in patterns or []:
+            key = (pattern, bool(case_sensitive))
+            if key not in self.patterns:
+                self.patterns[key] = len(self.regexes)
+                self.regexes.append(
+                    re.compile(translate(pattern), 0 if case_sensitive else re.IGNORECASE)
+                )
+            mask |= 1 << self.patterns[key]
+        return mask
+
+    def _compile_include_regexes(self):
+        """
+        Compiles the combined regular expressions of the include patterns of
+        all handlers (case-sensitive ones and case-insensitive ones).
+        """
+        include_mask = 0
+        for _, _, mask, _, _ in self.targets:
+            include_mask |= mask
+        self.include_regexes = []
+        for case_sensitive in [True, False]:
+            patterns = [
+                '(?:{})'.format(self.regexes[i].pattern)
+                for (_, cs), i in self.patterns.items()
+                if cs == case_sensitive and (1 << i) & include_mask
+            ]
+            if patterns:
+                self.include_regexes.append(
+                    re.compile('|'.join(patterns), 0 if case_sensitive else re.IGNORECASE)
+                )
+
+    def _is_candidate(self, path):
+        """
+        Returns whether a path may match any handler.
+
+        Parameters
+        ----------
+        path : str
+            Absolute path.
+
+        Returns
+        -------
+        is_candidate : bool
+            Whether any include pattern matches the path.
+        """
+        return any(r.match(path) for r in self.include_regexes)
+
+    def _mask(self, path):
+        """
+        Evaluates all patterns against a path.
+
+        Parameters
+        ----------
+        path : str
+            Absolute path.
+
+        Returns
+        -------
+        mask : int
+            Bit mask of the matched patterns.
+        """
+        mask = 0
+        for i, regex in enumerate(self.regexes):
+            if regex.match(path):
+                mask |= 1 << i
+        return mask
@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import stat
+import threading
+import time
+from pathlib import Path
+
+from watchdog.events import (
+    DirCreatedEvent, DirDeletedEvent, DirModifiedEvent, DirMovedEvent, FileCreatedEvent,
+    FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+)
+from watchdog.observers.api import DEFAULT_EMITTER_TIMEOUT, BaseObserver, EventEmitter
+
+RACY_NS = 2 * 10 ** 9
+"""
+Directories modified within this period before a scan are listed again on
+the next scan, because a coarse mtime (e.g. 1 second on some NFS servers)
+may not change on another modification.
+"""
+
+
+def _list_dir(path):
+    """
+    Lists the entries of a directory with their stats without following
+    symbolic links.
+
+    Parameters
+    ----------
+    path : str
+        Directory path.
+
+    Returns
+    -------
+    entries : list[tuple(str, os.stat_result)]
+        Entry names and their stats.
+    """
+    if not hasattr(os, 'scandir'):  # Python 3.4
+        return [(n, os.lstat(os.path.join(path, n))) for n in os.listdir(path)]
+    entries = []
+    for entry in os.scandir(path):
+        try:
+            entries.append((entry.name, entry.stat(follow_symlinks=False)))
+        except OSError:
+            pass  # removed while listing
+    return entries
+
+
+class DirectoryScanner(object):
+    """
+    DirectoryScanner detects changes in a directory tree by comparing stats
+    with the previous scan.
+
+    A directory is listed again only if its mtime has changed, because
+    adding, removing or renaming an entry updates the mtime of the directory.
+    The entries of the other directories are checked with ``lstat()`` only.
+    Every entry of the tree is still checked on each scan, because
+    modifying a file does not update the mtime of any directory, so a scan
+    saves the listings of unchanged directories but not the stats.
+    Moves are detected by inode numbers.
+    """
+
+    def __init__(self, root, recursive=True, snapshot=None):
+        """
+        Initializes DirectoryScanner.
+
+        Parameters
+        ----------
+        root : str
+            Absolute directory path.
+        recursive : bool
+            Whether to scan the subdirectories.
+        snapshot : dict or None
+            Snapshot of the previous scan (e.g. restored from ScanIndex).
+        """
+        self.root = str(root)
+        self.recursive = recursive
+        self.snapshot = snapshot
+
+    def __repr__(self):
+        """
+        Returns string representation of DirectoryScanner.
+
+        Returns
+        -------
+        repr : str
+            String representation of DirectoryScanner.
+        """
+        return '<%s {root: %r recursive: %r #entries: %d}>' % (
+            type(self).__name__, self.root, self.recursive,
+            len(self.snapshot['entries']) if self.snapshot else 0
+        )
+
+    def scan(self):
+        """
+        Scans the directory tree and returns the changes since the previous
+        scan. The first scan without a snapshot returns no events.
+
+        Returns
+        -------
+        events : list[watchdog.events.FileSystemEvent]
+            Filesystem events.
+
+        Raises
+        ------
+        OSError
+            If the root directory cannot be scanned.
+        """
+        scanned_at = int(time.time() * 10 ** 9)
+        old = self.snapshot
+        old_listings = old['listings'] if old else {}
+        entries = {}  # path -> [is_dir, size, mtime_ns, inode]
+        listings = {}  # path -> [mtime_ns, inode, names]
+
+        root_stat = os.stat(self.root)
+        entries[self.root] = self._entry(root_stat)
+        stack = [(self.root, root_stat)]
+        while stack:
+            dir_path, dir_stat = stack.pop()
+            listing = old_listings.get(dir_path)
+            children = None
+            if (listing and listing[:2] == [dir_stat.st_mtime_ns, dir_stat.st_ino] and
+                    old['scanned_at'] - dir_stat.st_mtime_ns >= RACY_NS):
+                try:
+                    children = [(n, os.lstat(os.path.join(dir_path, n))) for n in listing[2]]
+                except OSError:
+                    pass  # changed without updating the mtime
+            if children is None:
+                try:
+                    children = _list_dir(dir_path)
+                except OSError:
+                    if dir_path == self.root:
+                        raise
+                    continue  # removed while scanning
+            listings[dir_path] = [
+                dir_stat.st_mtime_ns, dir_stat.st_ino, sorted(n for n, _ in children)
+            ]
+
+            for name, child_stat in children:
+                path = os.path.join(dir_path, name)
+                entries[path] = self._entry(child_stat)
+                if self.recursive and stat.S_ISDIR(child_stat.st_mode):
+                    stack.append((path, child_stat))
+
+        self.snapshot = {'scanned_at': scanned_at, 'entries': entries, 'listings': listings}
+        return self._diff(old, self.snapshot) if old else []
+
+    def _entry(self, st):
+        """
+        Returns the snapshot entry of a stat.
+
+        Parameters
+        ----------
+        st : os.stat_result
+            Stat of a file or a directory.
+
+        Returns
+        -------
+        entry : list
+            ``[is_dir, size, mtime_ns, inode]``.
+        """
+        return [stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def _diff(self, old, new):
+        """
+        Returns the events between two snapshots in the same order as
+        Watchdog's PollingEmitter.
+
+        Parameters
+        ----------
+        old : dict
+            Previous snapshot.
+        new : dict
+            Current snapshot.
+
+        Returns
+        -------
+        events : list[watchdog.events.FileSystemEvent]
+            Filesystem events.
+        """
+        old_entries, new_entries = old['entries'], new['entries']
+        deleted = set(p for p in old_entries
+                      if p not in new_entries or new_entries[p][0] != old_entries[p][0])
+        created = set(p for p in new_entries
+                      if p not in old_entries or new_entries[p][0] != old_entries[p][0])
+        modified = set(
+            p for p in new_entries if p not in created and p in old_entries and (
+                (not new_entries[p][0] and new_entries[p][1:] != old_entries[p][1:]) or
+                (p in new['listings'] and p in old['listings'] and
+                 new_entries[p][2] != old_entries[p][2])
+            )
+        )
+
+        deleted_inodes = dict(((old_entries[p][0], old_entries[p][3]), p) for p in deleted)
+        moved = []
+        for dest_path in sorted(created):
+            src_path = deleted_inodes.pop(
+                (new_entries[dest_path][0], new_entries[dest_path][3]), None
+            )
+            if src_path is not None:
+                moved.append((src_path, dest_path))
+                deleted.discard(src_path)
+                created.discard(dest_path)
+
+        events = []
+        for is_dir, classes in [
+            (False, (FileDeletedEvent, FileModifiedEvent, FileCreatedEvent, FileMovedEvent)),
+            (True, (DirDeletedEvent, DirModifiedEvent, DirCreatedEvent, DirMovedEvent)),
+        ]:
+            deleted_class, modified_class, created_class, moved_class = classes
+            events.extend(deleted_class(p) for p in sorted(deleted) if old_entries[p][0] == is_dir)
+            events.extend(
+                modified_class(p) for p in sorted(modified) if new_entries[p][0] == is_dir
+            )
+            events.extend(created_class(p) for p in sorted(created) if new_entries[p][0] == is_dir)
+            events.extend(
+                moved_class(s, d) for s, d in moved if new_entries[d][0] == is_dir
+            )
+        return events
+
+
+class ScanIndex(object):
+    """
+    ScanIndex persists the snapshots of DirectoryScanner to a JSON file, so
+    that the first scan after restarting can skip listing the unchanged
+    directories. Only the snapshots of the current watches are saved.
+
+    A stale index never causes wrong events; a directory is listed again
+    unless its mtime matches the saved one.
+    """
+
+    version = 1
+
+    def __init__(self, path):
+        """
+        Initializes ScanIndex and loads the saved snapshots.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            JSON file path.
+        """
+        self.path = Path(path)
+        self.saved = {}
+        self.snapshots = {}
+        self.saved_at = 0.0
+        self.lock = threading.Lock()
+
+        try:
+            with self.path.open(encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.version:
+                self.saved = data['watches']
+        except (OSError, ValueError, KeyError):
+            pass  # not saved yet or broken
+
+    def __repr__(self):
+        """
+        Returns string representation of ScanIndex.
+
+        Returns
+        -------
+        repr : str
+            String representation of ScanIndex.
+        """
+        return '<%s {path: %r #saved: %d #snapshots: %d}>' % (
+            type(self).__name__, str(self.path), len(self.saved), len(self.snapshots)
+        )
+
+    @staticmethod
+    def key(path, recursive):
+        """
+        Returns the key of a watch.
+
+        Parameters
+        ----------
+        path : str
+            Watched directory path.
+        recursive : bool
+            Whether the directory is watched recursively.
+
+        Returns
+        -------
+        key : str
+            Key of the watch.
+        """
+        return '{}:{}'.format('r' if recursive else 'n', path)
+
+    def get(self, key):
+        """
+        Returns the saved snapshot of a watch.
+
+        Parameters
+        ----------
+        key : str
+            Key of the watch.
+
+        Returns
+        -------
+        snapshot : dict or None
+            Saved snapshot.
+        """
+        return self.saved.get(key)
+
+    def update(self, key, snapshot):
+        """
+        Updates the snapshot of a watch to be saved.
+
+        Parameters
+        ----------
+        key : str
+            Key of the watch.
+        snapshot : dict
+            Snapshot of DirectoryScanner.
+        """
+        with self.lock:
+            self.snapshots[key] = snapshot
+
+    def save(self, min_interval=0.0):
+        """
+        Saves the snapshots to the JSON file.
+
+        Parameters
+        ----------
+        min_interval : float
+            Minimum interval in seconds since the last save. The snapshots
+            are not saved if they were saved more recently.
+        """
+        with self.lock:
+            if time.time() - self.saved_at < min_interval:
+                return
+            self.saved_at = time.time()
+            data = {'version': self.version, 'watches': dict(self.snapshots)}
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(str(tmp_path), str(self.path))
+
+
+class ScanningEmitter(EventEmitter):
+    """
+    Watchdog event emitter which polls a directory with DirectoryScanner.
+
+    The polling interval starts from the observer timeout and grows up to
+    ``max_interval`` while nothing changes. It is also kept several times
+    longer than a scan takes, so that scanning a huge tree does not occupy
+    a CPU core.
+    """
+
+    SAVE_INTERVAL = 30.0
+
+    def __init__(
+        self, event_queue, watch, timeout=DEFAULT_EMITTER_TIMEOUT, index=None, max_interval=None,
+        **kwargs
+    ):
+        """
+        Initializes ScanningEmitter.
+
+        Parameters
+        ----------
+        event_queue : watchdog.observers.api.EventQueue
+            Event queue.
+        watch : watchdog.observers.api.ObservedWatch
+            Watch.
+        timeout : float
+            Minimum polling interval in seconds.
+        index : ScanIndex or None
+            Index to persist the snapshot.
+        max_interval : float or None
+            Maximum polling interval in seconds.
+        kwargs : dict
+            Other arguments of the Watchdog version (e.g. ``event_filter``).
+        """
+        super().__init__(event_queue, watch, timeout=timeout, **kwargs)
+        self.index = index
+        self.key = ScanIndex.key(watch.path, watch.is_recursive)
+        self.min_interval = timeout
+        self.max_interval = max(max_interval or timeout, timeout)
+        self.interval = timeout
+        self.scanned = False
+        self.scanner = DirectoryScanner(
+            watch.path, watch.is_recursive, index.get(self.key) if index else None
+        )
+
+    def queue_events(self, timeout):
+        """
+        Scans the directory and queues the detected events.
+
+        Parameters
+        ----------
+        timeout : float
+            Ignored. The adaptive interval is used instead.
+        """
+        first = not self.scanned
+        if not first and self.stopped_event.wait(self.interval):
+            return
+
+        started_at = time.time()
+        try:
+            events = self.scanner.scan()
+        except OSError:
+            self.queue_event(DirDeletedEvent(self.watch.path))
+            self.stop()
+            return
+        elapsed = time.time() - started_at
+
+        if first:
+            # The first scan is done in the emitter thread, and changes while
+            # not watching are not reported.
+            self.scanned = True
+            events = []
+        for event in events:
+            self.queue_event(event)
+
+        if events:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 1.5, self.max_interval)
+        self.interval = max(self.interval, elapsed * 4)
+
+        if self.index and (first or events):
+            # The kernel may be shut down without stopping the observer.
+            self.index.update(self.key, self.scanner.snapshot)
+            try:
+                self.index.save(0.0 if first else self.SAVE_INTERVAL)
+            except OSError:
+                pass  # the runtime directory has been removed
+
+
+class ScanningObserver(BaseObserver):
+    """
+    Watchdog observer which polls directories with an incremental scanner
+    instead of OS notifications, for filesystems where notifications are not
+    delivered (e.g. Docker bind mounts and NFS).
+    """
+
+    def __init__(self, interval=1.0, max_interval=10.0, index_path=None):
+        """
+        Initializes ScanningObserver.
+
+        Parameters
+        ----------
+        interval : float
+            Minimum polling interval in seconds.
+        max_interval : float
+            Maximum polling interval in seconds.
+        index_path : str or pathlib.Path or None
+            JSON file path to persist the scan index.
+        """
+        self.index = ScanIndex(index_path) if index_path else None
+
+        def emitter_class(event_queue, watch, timeout=interval, **kwargs):
+            return ScanningEmitter(
+                event_queue, watch, timeout, index=self.index, max_interval=max_interval,
+                **kwargs
+            )
+
+        super().__init__(emitter_class=emitter_class, timeout=interval)
+
+    def on_thread_stop(self):
+        """
+        Stops the emitters and saves the scan index.
+        """
+        super().on_thread_stop()
+        if self.index:
+            try:
+                self.index.save()
+            except OSError:
+                pass  # the runtime directory has been removed
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+
+import os
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from watchdog.events import FileSystemEventHandler
+
+from .matcher import PatternMatcher
+
+
+class DirectoryPruner(object):
+    """
+    DirectoryPruner decides which directory subtrees are excluded from
+    watching. A pattern without ``/`` is matched against directory names
+    (e.g. ``node_modules``) and a pattern with ``/`` is matched against
+    directory paths relative to the watch path (e.g. ``docs/_build``).
+    The pattern syntax is the same as Python's fnmatch.
+    """
+
+    def __init__(self, root, patterns=None, case_sensitive=False):
+        """
+        Initializes DirectoryPruner.
+
+        Parameters
+        ----------
+        root : str
+            Absolute path of the watched directory.
+        patterns : list[str] or None
+            Directory patterns to be pruned.
+        case_sensitive : bool
+            Whether to match patterns case-sensitively.
+        """
+        self.root = str(root)
+        self.case_sensitive = case_sensitive
+
+        normalize = self._normalize
+        patterns = [normalize(p.rstrip('/')) for p in patterns or []]
+        self.name_patterns = [p for p in patterns if '/' not in p]
+        self.path_patterns = [p for p in patterns if '/' in p]
+
+    def __repr__(self):
+        """
+        Returns string representation of DirectoryPruner.
+
+        Returns
+        -------
+        repr : str
+            String representation of DirectoryPruner.
+        """
+        return '<%s {root: %r patterns: %r}>' % (
+            type(self).__name__, self.root, self.name_patterns + self.path_patterns
+        )
+
+    def __bool__(self):
+        """
+        Returns whether any pattern is given.
+
+        Returns
+        -------
+        enabled : bool
+            Whether any pattern is given.
+        """
+        return bool(self.name_patterns or self.path_patterns)
+
+    def is_pruned(self, dir_path):
+        """
+        Returns whether a directory is pruned by the patterns.
+
+        Parameters
+        ----------
+        dir_path : str
+            Absolute directory path.
+
+        Returns
+        -------
+        is_pruned : bool
+            Whether the directory is pruned.
+        """
+        name = self._normalize(os.path.basename(dir_path))
+        if any(fnmatchcase(name, p) for p in self.name_patterns):
+            return True
+        if not self.path_patterns:
+            return False
+        relative = os.path.relpath(dir_path, self.root)
+        if relative.startswith('..'):
+            return False
+        relative = self._normalize(relative.replace(os.sep, '/'))
+        return any(fnmatchcase(relative, p) for p in self.path_patterns)
+
+    def is_ignored(self, path, is_directory=False):
+        """
+        Returns whether a path is in a pruned subtree.
+
+        Parameters
+        ----------
+        path : str
+            Absolute path of a file or a directory.
+        is_directory : bool
+            Whether the path is a directory (a pruned directory itself is
+            also ignored).
+
+        Returns
+        -------
+        is_ignored : bool
+            Whether the path is in a pruned subtree.
+        """
+        if not self:
+            return False
+        try:
+            parts = Path(path).relative_to(self.root).parts
+        except ValueError:
+            return False
+        end = len(parts) if is_directory else len(parts) - 1
+        return any(self.is_pruned(os.path.join(self.root, *parts[:i + 1])) for i in range(end))
+
+    def _normalize(self, text):
+        """
+        Normalizes the case of a pattern or a path.
+
+        Parameters
+        ----------
+        text : str
+            Pattern or path.
+
+        Returns
+        -------
+        normalized : str
+            Normalized text.
+        """
+        return text if self.case_sensitive else text.lower()
+
+
+class WatchPlan(object):
+    """
+    Set of watches to cover a directory tree except pruned subtrees.
+    A subtree without any pruned directory is watched recursively and the
+    ancestors of pruned directories are watched non-recursively.
+    """
+
+    def __init__(self, recursive, non_recursive, directories, pruned):
+        """
+        Initializes WatchPlan.
+
+        Parameters
+        ----------
+        recursive : list[str]
+            Directories to be watched recursively.
+        non_recursive : list[str]
+            Directories to be watched non-recursively.
+        directories : int or None
+            Number of directories covered by the watches (the number of
+            inotify watches on Linux) or None if they are not counted.
+        pruned : list[str]
+            Pruned directories.
+        """
+        self.recursive = recursive
+        self.non_recursive = non_recursive
+        self.directories = directories
+        self.pruned = pruned
+
+    def __repr__(self):
+        """
+        Returns string representation of WatchPlan.
+
+        Returns
+        -------
+        repr : str
+            String representation of WatchPlan.
+        """
+        return '<%s {#recursive: %d #non_recursive: %d directories: %r #pruned: %d}>' % (
+            type(self).__name__, len(self.recursive), len(self.non_recursive), self.directories,
+            len(self.pruned)
+        )
+
+    @classmethod
+    def create(cls, root, pruner):
+        """
+        Walks a directory tree without descending into pruned directories and
+        creates a plan to watch it. The tree is not walked and the directories
+        are not counted if the pruner has no patterns, because the whole tree
+        is watched recursively.
+
+        Parameters
+        ----------
+        root : str
+            Absolute directory path.
+        pruner : DirectoryPruner
+            Pruner of the directory tree.
+
+        Returns
+        -------
+        plan : WatchPlan
+            Plan to watch the tree.
+        """
+        if not pruner:
+            return cls([root], [], None, [])
+
+        children = {}
+        dirty = set()  # ancestors of pruned directories
+        pruned = []
+        directories = 0
+        for dir_path, dir_names, _ in os.walk(root):
+            directories += 1
+            kept = []
+            for name in dir_names:
+                path = os.path.join(dir_path, name)
+                if os.path.islink(path):
+                    continue  # symbolic links are not followed by watches either
+                if pruner.is_pruned(path):
+                    pruned.append(path)
+                    parent = dir_path
+                    while parent not in dirty:
+                        dirty.add(parent)
+                        if parent == root:
+                            break
+                        parent = os.path.dirname(parent)
+                else:
+                    kept.append(name)
+            dir_names[:] = kept
+            children[dir_path] = [os.path.join(dir_path, n) for n in kept]
+
+        if root not in dirty:
+            return cls([root], [], directories, pruned)
+        non_recursive = sorted(dirty)
+        recursive = [c for d in non_recursive for c in children[d] if c not in dirty]
+        return cls(recursive, non_recursive, directories, pruned)
+
+
+def merge_watches(plans):
+    """
+    Merges watch plans into unique watches. A watch covered by a recursive
+    watch of its ancestor is dropped and a directory watched both
+    recursively and non-recursively is watched recursively.
+
+    Parameters
+    ----------
+    plans : list[WatchPlan]
+        Watch plans.
+
+    Returns
+    -------
+    watches : list[tuple(str, bool)]
+        Directory paths and whether to watch them recursively.
+    """
+    recursive = set(p for plan in plans for p in plan.recursive)
+    non_recursive = set(p for plan in plans for p in plan.non_recursive) - recursive
+
+    def is_covered(path):
+        parent = os.path.dirname(path)
+        while parent != path:
+            if parent in recursive:
+                return True
+            path, parent = parent, os.path.dirname(parent)
+        return False
+
+    return sorted(
+        [(p, True) for p in recursive if not is_covered(p)] +
+        [(p, False) for p in non_recursive if not is_covered(p)]
+    )
+
+
+class SharedWatcher(FileSystemEventHandler):
+    """
+    SharedWatcher is the only event handler scheduled on a Watchdog observer
+    for multiple handlers. The watch plans of the handlers are merged so that
+    each directory is watched once, and each event is matched against the
+    patterns of all handlers at once by PatternMatcher and dispatched only to
+    the matched handlers.
+
+    New directories created in directories watched non-recursively are
+    scheduled as they appear, because they are not covered by the existing
+    watches.
+    """
+
+    def __init__(self, observer, log):
+        """
+        Initializes SharedWatcher.
+
+        Parameters
+        ----------
+        observer : watchdog.observers.api.BaseObserver
+            Watchdog observer.
+        log : logging.Logger
+            Logger.
+        """
+        self.observer = observer
+        self.log = log
+
+        self.handlers = []
+        self.matcher = PatternMatcher()
+        self.watches = {}
+
+    def __repr__(self):
+        """
+        Returns string representation of SharedWatcher.
+
+        Returns
+        -------
+        repr : str
+            String representation of SharedWatcher.
+        """
+        return '<%s {#handlers: %d #watches: %d}>' % (
+            type(self).__name__, len(self.handlers), len(self.watches)
+        )
+
+    def add_handler(self, handler, root, pruner):
+        """
+        Adds an event handler.
+
+        Parameters
+        ----------
+        handler : WatchdogHandler
+            Event handler.
+        root : str
+            Absolute path of the directory watched by the handler.
+        pruner : DirectoryPruner
+            Pruner of the directory tree of the handler.
+        """
+        self.handlers.append((handler, root, pruner))
+        self.matcher.add(handler, root)
+
+    def schedule(self):
+        """
+        Plans the watches of all handlers and schedules the unique ones.
+
+        Returns
+        -------
+        plans : list[WatchPlan]
+            Watch plans of the handlers.
+        """
+        plans = [WatchPlan.create(root, pruner) for _, root, pruner in self.handlers]
+        for path, recursive in merge_watches(plans):
+            self._schedule_watch(path, recursive)
+        return plans
+
+    def dispatch(self, event):
+        """
+        Updates the watches on directory events and dispatches an event to the
+        matched handlers. It is called in the observer thread.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileSystemEvent
+            Watchdog filesystem event.
+        """
+        if event.is_directory:
+            if event.event_type in ['deleted', 'moved']:
+                self._unschedule_directory(event.src_path)
+            if event.event_type in ['created', 'moved']:
+                # recent Watchdog versions give an empty dest_path to the events other than moved
+                self._schedule_new_directory(
+                    event.dest_path if event.event_type == 'moved' else event.src_path
+                )
+
+        for handler in self.matcher.match(event):
+            handler.on_any_event(event)
+
+    def _schedule_watch(self, path, recursive):
+        """
+        Schedules a watch.
+
+        Parameters
+        ----------
+        path : str
+            Absolute directory path.
+        recursive : bool
+            Whether to watch the directory recursively.
+        """
+        self.watches[path] = self.observer.schedule(self, path, recursive=recursive)
+
+    def _schedule_new_directory(self, path):
+        """
+        Schedules a new directory if it is not covered by the watches.
+
+        Parameters
+        ----------
+        path : str
+            Absolute path of the new directory.
+        """
+        if path in self.watches:
+            return
+        parent = self.watches.get(os.path.dirname(path))
+        if parent is None or parent.is_recursive or not os.path.isdir(path):
+            return  # covered, not watched or removed already
+        plans = [
+            WatchPlan.create(path, pruner) for _, root, pruner in self.handlers
+            if path.startswith(root.rstrip(os.sep) + os.sep) and
+            not pruner.is_ignored(path, is_directory=True)
+        ]
+        for dir_path, recursive in merge_watches(plans):
+            self._schedule_watch(dir_path, recursive)
+        if plans:
+            self.log.debug('New directory %s is watched: %s', path, plans)
+
+    def _unschedule_directory(self, path):
+        """
+        Unschedules the watches of a directory which has been removed.
+        A watch of a removed directory does not receive any event even if
+        the directory is created again.
+
+        Parameters
+        ----------
+        path : str
+            Absolute path of the removed directory.
+        """
+        prefix = path + os.sep
+        for dir_path in [p for p in self.watches if p == path or p.startswith(prefix)]:
+            try:
+                self.observer.unschedule(self.watches.pop(dir_path))
+            except KeyError:
+                pass  # already unscheduled
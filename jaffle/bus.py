@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+
+class EventBus(object):
+    """
+    EventBus routes messages published by Jaffle apps to the apps which
+    subscribe to the topic, including apps in other kernels.
+
+    Apps send ``subscribe`` and ``publish`` messages to the Jaffle server
+    through the ZeroMQ channel, and the server delivers each batch of
+    published messages to every kernel which has subscribers by executing a
+    code in the kernel. Subscriptions of an app are removed when the app is
+    removed and sent again when the app is initialized.
+    """
+
+    def __init__(self):
+        """
+        Initializes EventBus.
+        """
+        self.subscriptions = {}  # topic -> set of app names
+
+    def __repr__(self):
+        """
+        Returns string representation of EventBus.
+
+        Returns
+        -------
+        repr : str
+            String representation of EventBus.
+        """
+        return '<%s {subscriptions: %r}>' % (
+            type(self).__name__, {t: sorted(a) for t, a in sorted(self.subscriptions.items())}
+        )
+
+    def subscribe(self, topic, app_name):
+        """
+        Subscribes an app to a topic.
+
+        Parameters
+        ----------
+        topic : str
+            Topic name.
+        app_name : str
+            App name.
+        """
+        self.subscriptions.setdefault(topic, set()).add(app_name)
+
+    def remove_app(self, app_name):
+        """
+        Removes all subscriptions of an app.
+
+        Parameters
+        ----------
+        app_name : str
+            App name.
+        """
+        for topic, app_names in list(self.subscriptions.items()):
+            app_names.discard(app_name)
+            if not app_names:
+                del self.subscriptions[topic]
+
+    def route(self, topic, messages, published_at, session_of):
+        """
+        Returns the codes to deliver published messages to the subscribers
+        grouped by kernels.
+
+        Parameters
+        ----------
+        topic : str
+            Topic name.
+        messages : list
+            JSON serializable messages.
+        published_at : float
+            UNIX time when the messages were published.
+        session_of : function
+            Function which returns the session name of an app or None if the
+            app is not running.
+
+        Returns
+        -------
+        deliveries : list[tuple(str, str)]
+            Session names and codes to be executed in the kernels.
+        """
+        app_names_by_session = {}
+        for app_name in sorted(self.subscriptions.get(topic, [])):
+            session_name = session_of(app_name)
+            if session_name is not None:
+                app_names_by_session.setdefault(session_name, []).append(app_name)
+
+        if not app_names_by_session:
+            return []
+        data = json.dumps(messages)
+        return [
+            (session_name, '\n'.join(
+                '{}._receive_messages({!r}, __import__("json").loads({!r}), {!r})'.format(
+                    app_name, topic, data, published_at
+                ) for app_name in app_names
+            ))
+            for session_name, app_names in sorted(app_names_by_session.items())
+        ]
@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 
-# Install the pyzmq ioloop. This has to be done before anything else from
-# tornado is imported.
-from zmq.eventloop import ioloop
-ioloop.install()
-
-from jupyter_core.paths import SYSTEM_JUPYTER_PATH  # noqa
-from pathlib import Path  # noqa
-from .main import JaffleMainCommand  # noqa
+from jupyter_core.paths import SYSTEM_JUPYTER_PATH
+from pathlib import Path
+from .main import JaffleMainCommand
+
+
+def install_ioloop():
+    """
+    Installs the pyzmq ioloop. This has to be done before anything else from
+    tornado is imported, so it is called by the subcommands which require
+    tornado before importing their command modules.
+    """
+    from zmq.eventloop import ioloop
+    ioloop.install()
+
 
 SYSTEM_JUPYTER_PATH.insert(0, str(Path(__file__).parent.parent / 'data'))
 
@@ -6,7 +6,6 @@ import re
 import sys
 from pathlib import Path
 
-from IPython.core import ultratb
 from traitlets import Bool, Dict, List, Unicode, default
 from traitlets.config.application import Application, catch_config_error
 
@@ -39,6 +38,25 @@ flags = {
 }
 
 
+def _color_excepthook(etype, value, tb):
+    """
+    Prints an uncaught exception with colors.
+    IPython is imported only when an exception is raised because it takes
+    a significant part of the command startup time.
+
+    Parameters
+    ----------
+    etype : type
+        Exception type.
+    value : BaseException
+        Exception.
+    tb : traceback
+        Traceback.
+    """
+    from IPython.core import ultratb
+    ultratb.ColorTB()(etype, value, tb)
+
+
 class BaseJaffleCommand(Application):
     """
     Base class for Jaffle commands.
@@ -114,7 +132,7 @@ class BaseJaffleCommand(Application):
         """
         super().initialize(argv)
 
-        sys.excepthook = ultratb.ColorTB()
+        sys.excepthook = _color_excepthook
 
         self.raw_namespace = {
             k: v
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa
+
+from .command import JaffleLogsCommand
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import sys
+from pathlib import Path
+
+from traitlets import Bool, Int, Unicode, default
+
+from ...log_archive import LOG_ARCHIVE_DIR_NAME, LogArchiveReader, level_number, parse_time
+from ...logging import LOG_FORMAT
+from ..base import BaseJaffleCommand
+
+
+class JaffleLogsCommand(BaseJaffleCommand):
+    """
+    Shows the log archive of Jaffle server.
+    """
+
+    description = __doc__
+
+    examples = '''
+jaffle logs --lines=100
+jaffle logs --follow --logger=pytest,tornado_app --level=warning
+jaffle logs --since=2h --until=30m
+jaffle logs --since=2018-03-01T12:00 --until=2018-03-01T13:00 --json
+    '''
+
+    aliases = {
+        'log-datefmt': 'Application.log_datefmt',
+        'log-format': 'Application.log_format',
+        'runtime-dir': 'BaseJaffleCommand.runtime_dir',
+        'archive-dir': 'JaffleLogsCommand.archive_dir',
+        'logger': 'JaffleLogsCommand.logger',
+        'level': 'JaffleLogsCommand.level',
+        'since': 'JaffleLogsCommand.since',
+        'until': 'JaffleLogsCommand.until',
+        'lines': 'JaffleLogsCommand.lines'
+    }
+
+    flags = {
+        'follow': ({
+            'JaffleLogsCommand': {
+                'follow': True
+            }
+        }, 'Wait for new log records and show them.'),
+        'json': ({
+            'JaffleLogsCommand': {
+                'json_lines': True
+            }
+        }, 'Show log records as JSON lines.'),
+        'disable-color': ({
+            'BaseJaffleCommand': {
+                'color': False
+            }
+        }, 'Disable color output.')
+    }
+
+    archive_dir = Unicode(
+        '', config=True, help='Log archive directory (default: <runtime_dir>/logs).'
+    )
+    logger = Unicode('', config=True, help='Comma-separated logger names to be shown.')
+    level = Unicode('', config=True, help='Minimum log level to be shown (e.g. warning).')
+    since = Unicode(
+        '', config=True, help='Show records since the time (e.g. 10m, 2h, 2018-03-01T12:00).'
+    )
+    until = Unicode(
+        '', config=True, help='Show records until the time (e.g. 10m, 2h, 2018-03-01T13:00).'
+    )
+    lines = Int(0, config=True, help='Number of the last records to be shown (0: all).')
+    follow = Bool(False, config=True, help='Wait for new log records and show them.')
+    json_lines = Bool(False, config=True, help='Show log records as JSON lines.')
+
+    @default('log_format')
+    def _log_format_default(self):
+        return LOG_FORMAT
+
+    @default('log_datefmt')
+    def _default_log_datefmt(self):
+        return '%Y-%m-%d %H:%M:%S'
+
+    def start(self):
+        """
+        Shows log records in the archive.
+        """
+        archive_dir = Path(self.archive_dir or Path(self.runtime_dir) / LOG_ARCHIVE_DIR_NAME)
+        if not archive_dir.exists():
+            print('Log archive not found: {!r}'.format(str(archive_dir)), file=sys.stderr)
+            sys.exit(1)
+
+        try:
+            since = parse_time(self.since) if self.since else None
+            until = parse_time(self.until) if self.until else None
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+
+        if self.level and not level_number(self.level):
+            print('Invalid level: {!r}'.format(self.level), file=sys.stderr)
+            sys.exit(1)
+
+        query = dict(
+            since=since,
+            until=until,
+            loggers=[n.strip() for n in self.logger.split(',') if n.strip()] or None,
+            min_level=level_number(self.level) if self.level else 0
+        )
+        formatter = self._log_formatter_cls(
+            fmt=self.log_format, datefmt=self.log_datefmt, enable_color=self.color
+        )
+        reader = LogArchiveReader(archive_dir)
+
+        try:
+            last_block_key = reader.last_block_key()
+            if self.lines > 0:
+                records = reader.tail(self.lines, **query)
+            else:
+                records = reader.records(**query)
+            for record in records:
+                self._print_record(record, formatter)
+
+            if self.follow and until is None:
+                for record in reader.follow(
+                    loggers=query['loggers'], min_level=query['min_level'], after=last_block_key
+                ):
+                    self._print_record(record, formatter)
+        except KeyboardInterrupt:
+            pass
+        except BrokenPipeError:  # e.g. piped to head
+            sys.stderr.close()
+
+    def _print_record(self, record, formatter):
+        """
+        Prints a log record.
+
+        Parameters
+        ----------
+        record : dict
+            Log record in the archive.
+        formatter : LogFormatter
+            Log formatter.
+        """
+        if self.json_lines:
+            line = json.dumps(record, ensure_ascii=False)
+        else:
+            created = record['created']
+            line = formatter.format(
+                logging.makeLogRecord({
+                    'name': record['logger'],
+                    'levelno': level_number(record['levelname']),
+                    'levelname': record['levelname'],
+                    'msg': record['message'],
+                    'created': created,
+                    'msecs': (created - int(created)) * 1000,
+                    'exc_text': record.get('exc_text')
+                })
+            )
+        print(line, flush=True)
@@ -1,11 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from .attach import JaffleAttachCommand  # noqa
 from .base import BaseJaffleCommand
-from .console import JaffleConsoleCommand  # noqa
-from .start import JaffleStartCommand  # noqa
-from .stop import JaffleStopCommand  # noqa
-from .tty import JaffleTTYCommand  # noqa
 
 
 class JaffleMainCommand(BaseJaffleCommand):
@@ -14,10 +9,14 @@ class JaffleMainCommand(BaseJaffleCommand):
     """
     description = __doc__
 
+    # Subcommands are registered by dotted paths and imported only when they
+    # are chosen because they depend on heavy libraries such as notebook,
+    # jupyter_console and prompt_toolkit.
     subcommands = dict(
-        start=(JaffleStartCommand, JaffleStartCommand.description.splitlines()[0]),
-        stop=(JaffleStopCommand, JaffleStopCommand.description.splitlines()[0]),
-        console=(JaffleConsoleCommand, JaffleConsoleCommand.description.splitlines()[0]),
-        attach=(JaffleAttachCommand, JaffleAttachCommand.description.splitlines()[0]),
-        tty=(JaffleTTYCommand, JaffleTTYCommand.description.splitlines()[0])
+        start=('jaffle.command.start.JaffleStartCommand', 'Starts jaffle server.'),
+        stop=('jaffle.command.stop.JaffleStopCommand', 'Stops Jaffle server.'),
+        console=('jaffle.command.console.JaffleConsoleCommand', 'Console for a jaffle kernel.'),
+        attach=('jaffle.command.attach.JaffleAttachCommand', 'Attach to a jaffle app.'),
+        tty=('jaffle.command.tty.JaffleTTYCommand', 'Process executor with TTY support.'),
+        logs=('jaffle.command.logs.JaffleLogsCommand', 'Shows the log archive of Jaffle server.')
     )
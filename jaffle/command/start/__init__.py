@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
 # flake8: noqa
 
+from .. import install_ioloop
+
+install_ioloop()
+
 from .command import JaffleStartCommand
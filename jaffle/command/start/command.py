@@ -8,10 +8,6 @@
 # Copyright (c) Jupyter Development Team.
 # Distributed under the terms of the Modified BSD License.
 
-try:
-    from notebook.transutils import _  # noqa: required to import notebook classes
-except ImportError:
-    pass
 import json
 import logging
 import os
@@ -19,27 +15,37 @@ import select
 import signal
 import sys
 import threading
+import time
+from datetime import timedelta
 from functools import partial
 from pathlib import Path
+from textwrap import indent
 
 import zmq
-from jupyter_client.kernelspec import KernelSpecManager
-from notebook.services.contents.manager import ContentsManager
-from notebook.services.kernels.kernelmanager import MappingKernelManager
 from tornado import gen, ioloop
 from tornado.escape import to_unicode
-from traitlets import Dict, Instance, Int, List, default
+from traitlets import Bool, Dict, Enum, Float, Instance, Int, List, Unicode, default
 from traitlets.config.application import catch_config_error
 from zmq.eventloop import zmqstream
 
-from ...app.base.config import AppConfig
+from ...app.base.config import AppConfigStore
+from ...bus import EventBus
 from ...config import ConfigDict, JaffleConfig
+from ...control import JaffleControlError, JaffleControlServer
+from ...job import Job
 from ...kernel_client import JaffleKernelClient
-from ...logging import JaffleCommandLogHandler
-from ...process import Process
-from ...session import JaffleSessionManager
+from ...kernel_monitor import KernelMonitor
+from ...log_archive import COMPRESSIONS, LOG_ARCHIVE_DIR_NAME, LogArchiveHandler
+from ...logging import (
+    JSON_LOG_NAME, LOG_FORMAT, JaffleCommandLogHandler, JSONLinesLogHandler, record_from_dict
+)
+from ...metrics import MetricsLogHandler, MetricsRegistry, MetricsServer, render_text
+from ...process import Process, ProcessSupervisor, check_dependencies
+from ...results import ResultSummary
+from ...runtime import CONTROL_SOCKET_NAME
 from ...status import JaffleStatus
-from ...utils import bool_value
+from ...tracing import TRACE_FILE_NAME, TraceFileWriter, Tracer
+from ...utils import bool_value, int_value, str_value
 from ..base import BaseJaffleCommand
 
 
@@ -50,32 +56,164 @@ class JaffleStartCommand(BaseJaffleCommand):
 
     description = __doc__
 
-    aliases = dict(BaseJaffleCommand.aliases, variables='BaseJaffleCommand.variables')
+    aliases = dict(
+        BaseJaffleCommand.aliases,
+        variables='BaseJaffleCommand.variables',
+        **{
+            'reload-interval': 'JaffleStartCommand.reload_interval',
+            'shutdown-timeout': 'JaffleStartCommand.shutdown_timeout',
+            'log-archive-dir': 'JaffleStartCommand.log_archive_dir',
+            'log-archive-compression': 'JaffleStartCommand.log_archive_compression',
+            'log-archive-max-bytes': 'JaffleStartCommand.log_archive_max_bytes',
+            'log-archive-rotate-interval': 'JaffleStartCommand.log_archive_rotate_interval',
+            'log-archive-max-segments': 'JaffleStartCommand.log_archive_max_segments',
+            'metrics-port': 'JaffleStartCommand.metrics_port',
+            'metrics-host': 'JaffleStartCommand.metrics_host',
+            'metrics-socket': 'JaffleStartCommand.metrics_socket'
+        }
+    )
+
+    flags = dict(
+        BaseJaffleCommand.flags, **{
+            'no-reload': ({
+                'JaffleStartCommand': {
+                    'reload': False
+                }
+            }, 'Disable reloading the configuration on modification.'),
+            'json-log': ({
+                'JaffleStartCommand': {
+                    'json_log': True
+                }
+            }, 'Write log records to the runtime directory as JSON lines.'),
+            'log-archive': ({
+                'JaffleStartCommand': {
+                    'log_archive': True
+                }
+            }, 'Archive log records in rotated and compressed segments.'),
+            'trace': ({
+                'JaffleStartCommand': {
+                    'trace': True
+                }
+            }, 'Write trace spans from file events to test results as Chrome trace events.')
+        }
+    )
 
     @default('log_format')
     def _log_format_default(self):
-        return (
-            '%(time_color)s%(asctime)s.%(msecs).03d%(time_color_end)s '
-            '%(name_color)s%(name)14s%(name_color_end)s '
-            '%(level_color)s %(levelname)1.1s %(level_color_end)s %(message)s'
-        )
+        return LOG_FORMAT
 
     conf_files = List(Instance(Path))
 
+    reload = Bool(True, config=True, help='Reload the configuration on modification.')
+
+    reload_interval = Float(
+        1.0, config=True, help='Interval in seconds to check the config files for modification.'
+    )
+
+    json_log = Bool(
+        False,
+        config=True,
+        help='Write log records to {} in the runtime directory as JSON lines.'.format(
+            JSON_LOG_NAME
+        )
+    )
+
+    log_archive = Bool(
+        False, config=True, help='Archive log records in rotated and compressed segments.'
+    )
+
+    log_archive_dir = Unicode(
+        '', config=True, help='Log archive directory (default: <runtime_dir>/logs).'
+    )
+
+    log_archive_compression = Enum(
+        COMPRESSIONS, 'gzip', config=True, help='Compression method of the log archive.'
+    )
+
+    log_archive_max_bytes = Int(
+        10 * 1024 * 1024,
+        config=True,
+        help='Maximum compressed size in bytes of a log archive segment.'
+    )
+
+    log_archive_rotate_interval = Float(
+        0.0,
+        config=True,
+        help='Interval in seconds to rotate a log archive segment (0: size-based only).'
+    )
+
+    log_archive_max_segments = Int(
+        50, config=True, help='Maximum number of log archive segments to be kept.'
+    )
+
+    shutdown_timeout = Float(
+        10.0,
+        config=True,
+        help='Timeout in seconds to wait for kernels and processes to exit on shutdown.'
+    )
+
+    trace = Bool(
+        False,
+        config=True,
+        help='Write trace spans from file events to test results to {} in the runtime '
+        'directory as Chrome trace events.'.format(TRACE_FILE_NAME)
+    )
+
+    metrics_port = Int(
+        0, config=True, help='TCP port of the Prometheus metrics endpoint (0: disabled).'
+    )
+
+    metrics_host = Unicode(
+        '127.0.0.1', config=True, help='Host address of the Prometheus metrics endpoint.'
+    )
+
+    metrics_socket = Unicode(
+        '', config=True, help='Unix socket path of the Prometheus metrics endpoint.'
+    )
+
     parsed_variables = Dict(default_value={})
     conf = Instance(JaffleConfig, allow_none=True)
     status = Instance(JaffleStatus, allow_none=True)
     clients = Dict(default_value={})
     procs = Dict(default_value={})
+    supervisors = Dict(default_value={})
     jobs = Dict(default_value={})
+    monitors = Dict(default_value={})
     socket = Instance('zmq.Socket', allow_none=True)
     port = Int(allow_none=True)
     io_loop = Instance(ioloop.IOLoop, allow_none=True)
-
-    kernel_spec_manager = Instance(KernelSpecManager, allow_none=True)
-    kernel_manager = Instance(MappingKernelManager, allow_none=True)
-    contents_manager = Instance(ContentsManager, allow_none=True)
-    session_manager = Instance(JaffleSessionManager, allow_none=True)
+    control = Instance(JaffleControlServer, allow_none=True)
+    app_init_codes = Dict(default_value={})
+    app_config_paths = Dict(default_value={})
+    app_config_store = Instance(AppConfigStore)
+    execute_futures = Dict(default_value={})
+    started_at = Float(allow_none=True)
+    conf_mtimes = Dict(default_value={})
+    conf_watcher = Instance(ioloop.PeriodicCallback, allow_none=True)
+    log_summary_callback = Instance(ioloop.PeriodicCallback, allow_none=True)
+    metrics = Instance(MetricsRegistry, args=())
+    app_metrics = Dict(default_value={})
+    bus = Instance(EventBus, args=())
+    test_results = Instance(ResultSummary, args=())
+    metrics_server = Instance(MetricsServer, allow_none=True)
+    trace_writer = Instance(TraceFileWriter, allow_none=True)
+    tracer = Instance(Tracer, args=(None, False))
+    reloading = Bool(False)
+
+    @default('app_config_store')
+    def _app_config_store_default(self):
+        return AppConfigStore(self.runtime_dir)
+
+    kernel_spec_manager = Instance(
+        'jupyter_client.kernelspec.KernelSpecManager', allow_none=True
+    )
+    kernel_manager = Instance(
+        'notebook.services.kernels.kernelmanager.MappingKernelManager', allow_none=True
+    )
+    contents_manager = Instance(
+        'notebook.services.contents.manager.ContentsManager', allow_none=True
+    )
+    session_manager = Instance('jaffle.session.JaffleSessionManager', allow_none=True)
 
     def parse_command_line(self, argv):
         """
@@ -120,6 +258,17 @@ class JaffleStartCommand(BaseJaffleCommand):
 
         self.init_dir()
 
+        # Jupyter classes are imported here to start up quickly when
+        # the command exits early (e.g. ``--help``, already running).
+        try:
+            from notebook.transutils import _  # noqa: required to import notebook classes
+        except ImportError:
+            pass
+        from jupyter_client.kernelspec import KernelSpecManager
+        from notebook.services.contents.manager import ContentsManager
+        from notebook.services.kernels.kernelmanager import MappingKernelManager
+        from ...session import JaffleSessionManager
+
         self.kernel_spec_manager = KernelSpecManager(parent=self)
         self.kernel_manager = MappingKernelManager(
             parent=self,
@@ -142,7 +291,21 @@ class JaffleStartCommand(BaseJaffleCommand):
 
         self.init_logger_handler()
 
-        self.status = JaffleStatus(os.getpid(), self.raw_namespace, self.runtime_variables)
+        self.status = JaffleStatus(
+            os.getpid(), self.raw_namespace, self.runtime_variables, control_url=self.control_url
+        )
+
+    @property
+    def control_url(self):
+        """
+        Returns the ZeroMQ endpoint of the control channel.
+
+        Returns
+        -------
+        control_url : str
+            ZeroMQ endpoint of the control channel.
+        """
+        return 'ipc://{}'.format(Path(self.runtime_dir) / CONTROL_SOCKET_NAME)
 
     def check_running(self):
         """
@@ -179,7 +342,8 @@ class JaffleStartCommand(BaseJaffleCommand):
 
     def init_logger_handler(self):
         """
-        Initializes the log handler.
+        Initializes the log handler, the JSON-lines sink and the log archive
+        if they are enabled.
         """
         handler = JaffleCommandLogHandler(self.conf)
         handler.setFormatter(
@@ -187,7 +351,27 @@ class JaffleStartCommand(BaseJaffleCommand):
                 fmt=self.log_format, datefmt=self.log_datefmt, enable_color=self.color
             )
         )
-        self.log.handlers = [handler]
+        self.log.handlers = [MetricsLogHandler(self.metrics), handler]
+
+        if self.json_log:
+            # The JSON-lines sink receives records before suppression and replacement.
+            json_handler = JSONLinesLogHandler(Path(self.runtime_dir) / JSON_LOG_NAME)
+            self.log.handlers.insert(0, json_handler)
+
+        if self.log_archive:
+            try:
+                archive_handler = LogArchiveHandler(
+                    self.log_archive_dir or Path(self.runtime_dir) / LOG_ARCHIVE_DIR_NAME,
+                    compression=self.log_archive_compression,
+                    max_bytes=self.log_archive_max_bytes,
+                    rotate_interval=self.log_archive_rotate_interval,
+                    max_segments=self.log_archive_max_segments
+                )
+            except ValueError as e:
+                print('Log archive error: {}'.format(e), file=sys.stderr)
+                sys.exit(1)
+            # The archive receives records before suppression and replacement.
+            self.log.handlers.insert(0, archive_handler)
 
     def load_conf(self):
         """
@@ -195,7 +379,10 @@ class JaffleStartCommand(BaseJaffleCommand):
         """
         try:
             self.conf = JaffleConfig.load(
-                self.conf_files, self.raw_namespace, self.runtime_variables
+                self.conf_files,
+                self.raw_namespace,
+                self.runtime_variables,
+                cache_dir=self.runtime_dir
             )
         except Exception as e:
             print('Configuration error: {}'.format(e), file=sys.stderr)
@@ -209,6 +396,7 @@ class JaffleStartCommand(BaseJaffleCommand):
         self.log.debug('Starting jaffle')
 
         try:
+            self.started_at = time.time()
             self.io_loop = ioloop.IOLoop.current()
             self.io_loop.add_callback(self._start_sessions)
             self.io_loop.add_callback(self._start_processes)
@@ -223,8 +411,21 @@ class JaffleStartCommand(BaseJaffleCommand):
             stream = zmqstream.ZMQStream(self.socket, self.io_loop)
             stream.on_recv(self._on_recv_msg)
 
+            self.init_control()
+
+            self.init_metrics_server()
+
+            self.init_tracer()
+
+            self.init_conf_watcher()
+
+            self.init_log_summaries()
+
             self.io_loop.start()
 
+            if self.control:
+                self.control.close()
+
         except KeyboardInterrupt:
             self.log.info('Interrupted...')
 
@@ -235,6 +436,239 @@ class JaffleStartCommand(BaseJaffleCommand):
                 self.log.error(e)
             sys.exit(1)
 
+    def init_control(self):
+        """
+        Starts the control channel which accepts requests from
+        ``jaffle stop`` and other clients.
+        """
+        self.control = JaffleControlServer(
+            self.control_url, {
+                'status': self._control_status,
+                'stop': self._control_stop,
+                'restart': self._control_restart,
+                'run_job': self._control_run_job,
+                'reload': self._control_reload,
+                'metrics': self._control_metrics
+            }, self.log, self.io_loop
+        )
+        self.control.start()
+        self.log.debug('Control channel: %s', self.control_url)
+
+    def init_metrics_server(self):
+        """
+        Starts the Prometheus metrics endpoint if it is enabled.
+        """
+        if not self.metrics_port and not self.metrics_socket:
+            return
+        self.metrics_server = MetricsServer(
+            self.render_metrics,
+            self.log,
+            port=self.metrics_port,
+            host=self.metrics_host,
+            socket_path=self.metrics_socket or None
+        )
+        try:
+            self.metrics_server.start()
+        except OSError as e:
+            self.log.error('Failed to start the metrics endpoint: %s', e)
+            self.metrics_server = None
+            return
+        endpoints = []
+        if self.metrics_port:
+            endpoints.append('http://{}:{}/metrics'.format(self.metrics_host, self.metrics_port))
+        if self.metrics_socket:
+            endpoints.append('unix:{}'.format(self.metrics_socket))
+        self.log.info('Metrics endpoint: %s', ', '.join(endpoints))
+
+    def init_tracer(self):
+        """
+        Opens the trace file if tracing is enabled.
+        """
+        if not self.trace:
+            return
+        self.trace_writer = TraceFileWriter(Path(self.runtime_dir) / TRACE_FILE_NAME)
+        self.tracer = Tracer(partial(self.trace_writer.write, process_name='jaffle'))
+        self.log.info('Trace file: %s', self.trace_writer.file_path)
+
+    def render_metrics(self):
+        """
+        Renders the metrics of the server and the apps in the Prometheus text
+        format. The metrics of an app have the ``app`` label.
+
+        Returns
+        -------
+        text : str
+            Metrics in the Prometheus text format.
+        """
+        server_metrics = self._control_metrics()
+        for name, key, help in [
+            ('jaffle_uptime_seconds', 'uptime', 'Uptime of the Jaffle server in seconds.'),
+            ('jaffle_kernels', 'kernels', 'Running kernels.'),
+            ('jaffle_apps', 'apps', 'Running apps.'),
+            ('jaffle_processes', 'processes', 'Supervised external processes.'),
+            ('jaffle_running_processes', 'running_processes', 'Running external processes.')
+        ]:
+            self.metrics.gauge(name, help).set(server_metrics[key])
+        return render_text([(self.metrics.snapshot(), {})] + [
+            (s, {'app': n}) for n, s in sorted(self.app_metrics.items()) if n in self.status.apps
+        ])
+
+    def init_conf_watcher(self):
+        """
+        Starts watching the config files to reload the configuration on
+        modification.
+        """
+        if not self.reload:
+            return
+        self.conf_mtimes = self._get_conf_mtimes()
+        self.conf_watcher = ioloop.PeriodicCallback(
+            self._check_conf_files, self.reload_interval * 1000
+        )
+        self.conf_watcher.start()
+
+    def init_log_summaries(self):
+        """
+        Starts emitting the summaries of repeated and rate-limited log
+        messages periodically.
+        """
+        self.log_summary_callback = ioloop.PeriodicCallback(self._emit_log_summaries, 1000)
+        self.log_summary_callback.start()
+
+    @gen.coroutine
+    def reload_conf(self):
+        """
+        Reloads the configuration and applies only the difference.
+
+        Kernels, apps and processes are restarted only if their blocks are
+        changed. Changes of a ``logger`` block are applied in place and the
+        rest keeps running. All apps and processes are restarted if the
+        variables are changed, and all apps are restarted if the jobs are
+        changed because apps receive the job configuration on initialization.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the names of restarted kernels, apps and
+            processes.
+        """
+        try:
+            conf = JaffleConfig.load(
+                self.conf_files,
+                self.raw_namespace,
+                self.runtime_variables,
+                cache_dir=self.runtime_dir
+            )
+        except Exception as e:
+            raise JaffleControlError('Configuration error: {}'.format(e))
+
+        old_conf, self.conf = self.conf, conf
+        diff = old_conf.diff(conf)
+
+        stop_kernels = diff['kernel']['removed'] | diff['kernel']['changed']
+        start_kernels = diff['kernel']['added'] | diff['kernel']['changed']
+
+        # The raw blocks are not rendered, so they are the same when only the
+        # variables or the jobs are changed.
+        variables_changed = self._has_changes(diff['variable'])
+        old_apps, new_apps = old_conf.app.raw(), conf.app.raw()
+        changed_apps = diff['app']['changed']
+        if variables_changed or self._has_changes(diff['job']):
+            restart_apps = set(old_apps) & set(new_apps)
+        else:
+            restart_apps = {
+                n
+                for n in changed_apps
+                if self._without_logger(old_apps[n]) != self._without_logger(new_apps[n])
+            }
+        relog_apps = changed_apps - restart_apps
+        remove_apps = {
+            n
+            for n in diff['app']['removed'] | restart_apps
+            if n in self.status.apps and self.status.apps[n].session_name not in stop_kernels
+        }
+        add_apps = diff['app']['added'] | restart_apps | {
+            n
+            for n, d in new_apps.items() if d.get('kernel') in start_kernels
+        }
+        relog_apps -= add_apps
+
+        old_procs, new_procs = old_conf.process.raw(), conf.process.raw()
+        changed_procs = diff['process']['changed']
+        if variables_changed:
+            restart_procs = set(old_procs) & set(new_procs)
+        else:
+            restart_procs = {
+                n
+                for n in changed_procs
+                if self._without_logger(old_procs[n]) != self._without_logger(new_procs[n])
+            }
+        relog_procs = changed_procs - restart_procs
+
+        for session_name, app_names in self._group_apps_by_session(remove_apps).items():
+            yield self._stop_apps(session_name, app_names)
+
+        yield [self._stop_session(n) for n in stop_kernels]
+
+        stop_futures = []
+        for proc_name in diff['process']['removed'] | restart_procs:
+            self.procs.pop(proc_name, None)
+            supervisor = self.supervisors.pop(proc_name, None)
+            if supervisor:
+                stop_futures.append(supervisor.stop())
+        yield stop_futures
+
+        for session_name in start_kernels:
+            yield self._start_session(session_name, conf.kernel[session_name])
+
+        for session_name in set(new_apps[n].get('kernel') for n in add_apps):
+            session = self.status.sessions.get(session_name)
+            if session is None:
+                self.log.error('Kernel %s is not defined', session_name)
+                continue
+            self._init_apps(
+                session, {n: d
+                          for n, d in new_apps.items() if n in add_apps and d.get('kernel') ==
+                          session_name}
+            )
+
+        for app_name in relog_apps:
+            if app_name in self.status.apps:
+                self._set_app_log_level(app_name)
+
+        start_procs = [
+            n for n in diff['process']['added'] | restart_procs
+            if self._create_supervisor(n, conf.process[n])
+        ]
+        for proc_name in start_procs:
+            self.io_loop.add_callback(self.supervisors[proc_name].run, self.supervisors)
+
+        for proc_name in relog_procs:
+            if proc_name in self.procs:
+                logger_data = conf.process[proc_name].get('logger', ConfigDict())
+                self.procs[proc_name].log.setLevel(
+                    getattr(logging, logger_data.get('level', 'info').upper())
+                )
+
+        self._init_job_loggers()
+
+        for handler in self.log.handlers:
+            if isinstance(handler, JaffleCommandLogHandler):
+                handler.conf = conf
+
+        self.status.save(self.status_file_path)
+
+        result = {
+            'kernels': sorted(start_kernels | diff['kernel']['removed']),
+            'apps': sorted(remove_apps | add_apps),
+            'processes': sorted(diff['process']['added'] | diff['process']['removed'] |
+                                restart_procs)
+        }
+        self.log.info(
+            'Configuration reloaded - kernels: %s apps: %s processes: %s',
+            result['kernels'] or '-', result['apps'] or '-', result['processes'] or '-'
+        )
+        return result
+
     @gen.coroutine
     def shutdown(self):
         """
@@ -247,25 +681,144 @@ class JaffleStartCommand(BaseJaffleCommand):
         """
         self.socket.close()
 
+        if self.conf_watcher:
+            self.conf_watcher.stop()
+
+        for monitor in self.monitors.values():
+            monitor.stop()
+
         for client in self.clients.values():
             client.stop_channels()
 
+        started_at = time.time()
+        # SIGKILL is sent at 80% of the timeout to leave time to reap the children.
+        kill_timeout = self.shutdown_timeout * 0.8
+        futures = {}
+
         for jupyter_sess in self.session_manager.list_sessions():
             self.log.info('Deleting jupyter_sess: %s %s', jupyter_sess['name'], jupyter_sess['id'])
-            yield self.session_manager.delete_session(jupyter_sess['id'])
+            futures['kernel ' + jupyter_sess['name']] = self._timed(
+                self._delete_jupyter_session(
+                    jupyter_sess['id'], jupyter_sess['kernel']['id'], jupyter_sess['name'],
+                    kill_timeout
+                )
+            )
+
+        for proc_name, supervisor in self.supervisors.items():
+            futures['process ' + proc_name] = self._timed(supervisor.stop(timeout=kill_timeout))
+
+        try:
+            yield gen.with_timeout(timedelta(seconds=self.shutdown_timeout), gen.multi(futures))
+        except gen.TimeoutError:
+            pending = sorted(n for n, f in futures.items() if not f.done())
+            self.log.error(
+                'Shutdown timed out after %.1f seconds: %s', self.shutdown_timeout,
+                ', '.join(pending)
+            )
+        except Exception as e:
+            self.log.error('Shutdown failed: %s', e)
+
+        timings = ', '.join(
+            '{} {:.2f}s'.format(n, f.result()) for n, f in sorted(futures.items())
+            if f.done() and not f.exception()
+        )
+        self.log.info(
+            'Shut down in %.2f seconds%s', time.time() - started_at,
+            ' ({})'.format(timings) if timings else ''
+        )
 
         for jaffle_sess in self.status.sessions.values():
             conn_file = self.kernel_connection_file_path(jaffle_sess.kernel.id)
             if conn_file.exists():
                 conn_file.unlink()
+        self.app_config_store.remove_all()
+
+        if self.metrics_server:
+            self.metrics_server.close()
+
+        if self.trace_writer:
+            self.trace_writer.close()
+            self.trace_writer = None
 
-        for proc in self.procs.values():
-            proc.stop()
+        self._emit_log_summaries()
+        for handler in self.log.handlers:
+            if isinstance(handler, LogArchiveHandler):
+                handler.close()  # write the queued records
 
         self.status.destroy(self.status_file_path)
 
         self.io_loop.stop()
 
+    def _emit_log_summaries(self):
+        """
+        Emits the summaries of repeated and rate-limited log messages.
+        """
+        for handler in self.log.handlers:
+            if isinstance(handler, JaffleCommandLogHandler):
+                handler.emit_summaries()
+
+    @gen.coroutine
+    def _timed(self, future):
+        """
+        Measures the time to resolve a Future.
+
+        Parameters
+        ----------
+        future : tornado.gen.Future
+            Future to be measured.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the elapsed time in seconds.
+        """
+        started_at = time.time()
+        yield future
+        return time.time() - started_at
+
+    @gen.coroutine
+    def _delete_jupyter_session(self, session_id, kernel_id, name, timeout):
+        """
+        Shuts down the kernel of a Jupyter session without blocking the IO loop
+        and deletes the session. The kernel is killed with SIGKILL if it does
+        not exit within the timeout.
+
+        Parameters
+        ----------
+        session_id : str
+            Jupyter session ID.
+        kernel_id : str
+            Kernel ID of the session.
+        name : str
+            Session name.
+        timeout : float
+            Timeout in seconds to wait for the kernel to exit.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of deleting the session.
+        """
+        km = self.kernel_manager.get_kernel(kernel_id)
+        km.request_shutdown()
+
+        deadline = time.time() + timeout
+        while km.is_alive() and time.time() < deadline:
+            yield gen.sleep(0.05)
+
+        if km.is_alive():
+            self.log.warning(
+                'Kernel %s did not shut down in %.1f seconds, killing it with SIGKILL',
+                name, timeout
+            )
+            km.signal_kernel(signal.SIGKILL)
+            deadline = time.time() + 1.0
+            while km.is_alive() and time.time() < deadline:
+                yield gen.sleep(0.05)
+
+        # The kernel has exited so shutdown_kernel() in delete_session() does not wait.
+        yield self.session_manager.delete_session(session_id)
+
     @gen.coroutine
     def _start_sessions(self):
         """
@@ -279,72 +832,10 @@ class JaffleStartCommand(BaseJaffleCommand):
         try:
             # session_name == kernel instance name
             for session_name, data in self.conf.kernel.items():
-                self.log.info('Starting kernel: %s', session_name)
-                startup = str(Path(__file__).parent.parent.parent / 'startup.py')
-                session_model = yield self.session_manager.create_session(
-                    name=session_name,
-                    kernel_name=data.get('kernel_name'),
-                    env={'PYTHONSTARTUP': startup}
-                )
-                self.status.add_session(session_model['id'], session_name, session_model['kernel'])
+                yield self._start_session(session_name, data)
 
             for session in self.status.sessions.values():
-                kernel_id = session.kernel.id
-                apps = self._get_apps_for_session(session.name)
-                if len(apps) == 0:
-                    continue
-
-                kernel_manager = self.kernel_manager.get_kernel(kernel_id)
-                kernel_manager.client_factory = JaffleKernelClient
-                client = self.clients[session.name] = kernel_manager.client()
-                client.start_channels()
-                client.shell_channel.add_handler(
-                    partial(self._handle_shell_msg, session, kernel_manager)
-                )
-
-                code_lines = []
-
-                env = {
-                    e: os.getenv(e, '')
-                    for e in self.conf.kernel.get(session.name, {}).get('pass_env', [])
-                }
-                if len(env) > 0:
-                    code_lines.append('import os')
-                    code_lines.append(
-                        '\n'.join(['os.environ[{!r}] = {!r}'.format(k, v) for k, v in env.items()])
-                    )
-
-                for app_name, app_data in apps.items():
-                    if bool_value(app_data.get('disabled', False)):
-                        continue
-                    logger = logging.getLogger(app_name)
-                    logger.parent = self.log
-                    logger.setLevel(logging.DEBUG)
-                    # app's log level in the jaffle server process is always DEBUG,
-                    # whereas it varies in the kernel instance depending on the
-                    # configuration
-
-                    if 'class' in app_data:
-                        mod, cls = app_data['class'].rsplit('.', 1)
-                        app_conf = AppConfig(
-                            app_name, app_data, self.raw_namespace, self.runtime_variables,
-                            self.conf.variable, self.port, self.conf.job.raw()
-                        )
-                        self.log.info('Initializing %s.%s on %s', mod, cls, session.name)
-                        code_lines.append('from {} import {}'.format(mod, cls))
-                        code_lines.append(
-                            '{app_name} = {cls}({app_conf})'
-                            .format(cls=cls, app_name=app_name, app_conf=app_conf)
-                        )
-                        if 'start' in app_data:
-                            code_lines.append(app_data['start'])
-
-                    self.status.add_app(
-                        app_name, session_name, app_data['class'], app_data.get('start'),
-                        app_data.get('options', {})
-                    )
-
-                client.execute('\n'.join(code_lines), silent=True)
+                self._init_apps(session, self._get_apps_for_session(session.name))
 
             self.status.save(self.status_file_path)
 
@@ -355,6 +846,423 @@ class JaffleStartCommand(BaseJaffleCommand):
                 self.log.error(e)
             sys.exit(1)
 
+    @gen.coroutine
+    def _start_session(self, session_name, data):
+        """
+        Starts a kernel and a session.
+
+        Parameters
+        ----------
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+        data : ConfigDict
+            Kernel configuration.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of starting the session.
+        """
+        self.log.info('Starting kernel: %s', session_name)
+        startup = str(Path(__file__).parent.parent.parent / 'startup.py')
+        session_model = yield self.session_manager.create_session(
+            name=session_name, kernel_name=data.get('kernel_name'), env={'PYTHONSTARTUP': startup}
+        )
+        self.status.add_session(session_model['id'], session_name, session_model['kernel'])
+        self._start_monitor(session_name, data)
+
+    def _start_monitor(self, session_name, data):
+        """
+        Starts monitoring a kernel to restart it automatically when it dies.
+
+        Parameters
+        ----------
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+        data : ConfigDict
+            Kernel configuration.
+        """
+        session = self.status.sessions[session_name]
+        monitor = self.monitors[session_name] = KernelMonitor(
+            self.log,
+            session_name,
+            self.kernel_manager.get_kernel(session.kernel.id),
+            partial(self._restart_kernel, session_name),
+            restart_limit=int_value(data.get('restart_limit', 5))
+        )
+        monitor.client = self.clients.get(session_name)
+        monitor.start()
+
+    @gen.coroutine
+    def _restart_kernel(self, session_name, died_at):
+        """
+        Restarts a dead kernel and replays the initialization code of the apps
+        running in it.
+
+        Parameters
+        ----------
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+        died_at : float
+            Time when the kernel is found dead.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of restarting the kernel.
+        """
+        session = self.status.sessions[session_name]
+        kernel_manager = self.kernel_manager.get_kernel(session.kernel.id)
+        kernel_manager.is_ready = False
+
+        self.log.info('Restarting kernel: %s', session_name)
+        kernel_manager.restart_kernel(now=True)
+
+        app_names = [n for n, a in self.status.apps.items() if a.session_name == session_name]
+        code_lines = self._get_env_code_lines(session_name) + [
+            self.app_init_codes[n] for n in app_names if n in self.app_init_codes
+        ]
+        if session_name in self.clients and code_lines:
+            reply = yield self._execute_in_kernel(session_name, '\n'.join(code_lines))
+            if reply.get('status') != 'ok':
+                self.log.error(
+                    'Failed to initialize apps on %s: %s: %s', session_name,
+                    reply.get('ename', 'Error'), reply.get('evalue', '')
+                )
+
+        session.restart_count += 1
+        self.metrics.counter(
+            'jaffle_kernel_restarts_total', 'Kernel restarts.', ['kernel']
+        ).inc(kernel=session_name)
+        session.downtime += time.time() - died_at
+        self.status.save(self.status_file_path)
+        self.log.info(
+            'Kernel %s restarted (downtime: %.1f seconds)', session_name, time.time() - died_at
+        )
+
+    @gen.coroutine
+    def _stop_session(self, session_name):
+        """
+        Stops a kernel and a session including apps running in it.
+
+        Parameters
+        ----------
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of stopping the session.
+        """
+        session = self.status.sessions.get(session_name)
+        if session is None:
+            return
+
+        monitor = self.monitors.pop(session_name, None)
+        if monitor:
+            monitor.stop()
+
+        self.log.info('Stopping kernel: %s', session_name)
+        client = self.clients.pop(session_name, None)
+        if client:
+            client.stop_channels()
+
+        yield self._delete_jupyter_session(
+            session.id, session.kernel.id, session_name, self.shutdown_timeout * 0.8
+        )
+
+        conn_file = self.kernel_connection_file_path(session.kernel.id)
+        if conn_file.exists():
+            conn_file.unlink()
+
+        for app_name in [n for n, a in self.status.apps.items() if a.session_name == session_name]:
+            self.status.remove_app(app_name)
+            self.app_init_codes.pop(app_name, None)
+            self.app_config_paths.pop(app_name, None)
+            self.bus.remove_app(app_name)
+            self.test_results.remove_app(app_name)
+        self.status.remove_session(session_name)
+
+    def _get_client(self, session):
+        """
+        Returns the kernel client of a session. The client is created and
+        started on the first call.
+
+        Parameters
+        ----------
+        session : JaffleSession
+            Jaffle session.
+
+        Returns
+        -------
+        client : JaffleKernelClient
+            Kernel client.
+        """
+        client = self.clients.get(session.name)
+        if client is None:
+            kernel_manager = self.kernel_manager.get_kernel(session.kernel.id)
+            kernel_manager.client_factory = JaffleKernelClient
+            client = self.clients[session.name] = kernel_manager.client()
+            client.start_channels()
+            client.shell_channel.add_handler(
+                partial(self._handle_shell_msg, session, kernel_manager)
+            )
+            if session.name in self.monitors:
+                self.monitors[session.name].client = client
+        return client
+
+    def _init_apps(self, session, apps):
+        """
+        Initializes apps in a kernel.
+
+        Parameters
+        ----------
+        session : JaffleSession
+            Jaffle session.
+        apps : dict{str: dict}
+            App data.
+        """
+        if len(apps) == 0:
+            return
+
+        client = self._get_client(session)
+
+        code_lines = self._get_env_code_lines(session.name)
+
+        apps = {n: d for n, d in apps.items() if not bool_value(d.get('disabled', False))}
+        config_path = self._write_app_configs({n: d for n, d in apps.items() if 'class' in d})
+
+        for app_name, app_data in apps.items():
+            logger = logging.getLogger(app_name)
+            logger.parent = self.log
+            logger.setLevel(logging.DEBUG)
+            # app's log level in the jaffle server process is always DEBUG,
+            # whereas it varies in the kernel instance depending on the
+            # configuration
+
+            if 'class' in app_data:
+                mod, cls = app_data['class'].rsplit('.', 1)
+                self.log.info('Initializing %s.%s on %s', mod, cls, session.name)
+                app_lines = [
+                    'from jaffle.app.base.config import AppConfig',
+                    'from {} import {}'.format(mod, cls),
+                    '{} = {}(AppConfig.load({!r}, {!r}))'.format(
+                        app_name, cls, config_path, app_name
+                    )
+                ]
+                if 'start' in app_data:
+                    app_lines.append(app_data['start'])
+                self.app_init_codes[app_name] = '\n'.join(app_lines)
+                self.app_config_paths[app_name] = config_path
+                code_lines.extend(app_lines)
+
+            self.status.add_app(
+                app_name, session.name, app_data['class'], app_data.get('start'),
+                app_data.get('options', {})
+            )
+
+        self.app_config_store.remove_unused(self.app_config_paths.values())
+        client.execute('\n'.join(code_lines), silent=True)
+
+    def _write_app_configs(self, apps):
+        """
+        Writes the configs of apps to a file in the runtime directory to be
+        loaded by the kernel.
+
+        Parameters
+        ----------
+        apps : dict{str: dict}
+            App data.
+
+        Returns
+        -------
+        path : str or None
+            Path of the file or None if there are no apps.
+        """
+        if not apps:
+            return None
+        return self.app_config_store.write(
+            apps,
+            raw_namespace=self.raw_namespace,
+            runtime_variables=self.runtime_variables,
+            variables_conf=self.conf.variable.raw(),
+            jaffle_port=self.port,
+            jobs_conf=self.conf.job.raw(),
+            trace=self.trace,
+            runtime_dir=str(Path(self.runtime_dir).resolve())
+        )
+
+    def _get_env_code_lines(self, session_name):
+        """
+        Returns the code lines to pass the environment variables to a kernel.
+
+        Parameters
+        ----------
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+
+        Returns
+        -------
+        code_lines : list[str]
+            Code lines which set ``pass_env`` environment variables.
+        """
+        env = {
+            e: os.getenv(e, '')
+            for e in self.conf.kernel.get(session_name, {}).get('pass_env', [])
+        }
+        if len(env) == 0:
+            return []
+        return [
+            'import os',
+            '\n'.join(['os.environ[{!r}] = {!r}'.format(k, v) for k, v in env.items()])
+        ]
+
+    @gen.coroutine
+    def _stop_apps(self, session_name, app_names):
+        """
+        Stops apps in a kernel. ``shutdown()`` of each app is called if it
+        exists and the app is removed from the kernel namespace.
+
+        Parameters
+        ----------
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+        app_names : list[str]
+            App names.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of stopping the apps.
+        """
+        self.log.info('Stopping %s on %s', ', '.join(sorted(app_names)), session_name)
+        code = '\n'.join([
+            'for _jaffle_app_name in {!r}:'.format(sorted(app_names)),
+            '    _jaffle_app = globals().pop(_jaffle_app_name, None)',
+            '    if hasattr(_jaffle_app, "shutdown"):',
+            '        _jaffle_app.shutdown()',
+            'del _jaffle_app_name, _jaffle_app'
+        ])
+        for app_name in app_names:
+            self.status.remove_app(app_name)
+            self.app_init_codes.pop(app_name, None)
+            self.app_config_paths.pop(app_name, None)
+            self.bus.remove_app(app_name)
+            self.test_results.remove_app(app_name)
+        reply = yield self._execute_in_kernel(session_name, code)
+        if reply.get('status') != 'ok':
+            self.log.error(
+                'Failed to stop apps on %s: %s: %s', session_name, reply.get('ename', 'Error'),
+                reply.get('evalue', '')
+            )
+
+    def _set_app_log_level(self, app_name):
+        """
+        Updates the log level of an app in its kernel.
+
+        Parameters
+        ----------
+        app_name : str
+            App name.
+        """
+        logger_data = self.conf.app[app_name].get('logger', ConfigDict())
+        level = str_value(logger_data.get('level', 'info')).upper()
+        self.clients[self.status.apps[app_name].session_name].execute(
+            '__import__("logging").getLogger({!r}).setLevel({!r})'.format(app_name, level),
+            silent=True
+        )
+
+    def _group_apps_by_session(self, app_names):
+        """
+        Groups running apps by their sessions.
+
+        Parameters
+        ----------
+        app_names : set[str]
+            App names.
+
+        Returns
+        -------
+        apps : dict{str: list[str]}
+            App names for each Jaffle session name.
+        """
+        apps = {}
+        for app_name in sorted(app_names):
+            apps.setdefault(self.status.apps[app_name].session_name, []).append(app_name)
+        return apps
+
+    def _get_conf_mtimes(self):
+        """
+        Returns the modification times of the config files.
+
+        Returns
+        -------
+        mtimes : dict{str: float}
+            Modification times of the existing config files.
+        """
+        return {str(f): f.stat().st_mtime for f in self.conf_files if f.exists()}
+
+    @gen.coroutine
+    def _check_conf_files(self):
+        """
+        Reloads the configuration if the config files are modified.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of reloading the configuration.
+        """
+        if self.reloading:
+            return
+        mtimes = self._get_conf_mtimes()
+        if mtimes == self.conf_mtimes:
+            return
+        self.conf_mtimes = mtimes
+
+        self.log.info('Config files modified, reloading')
+        self.reloading = True
+        try:
+            yield self.reload_conf()
+        except Exception as e:
+            self.log.error('%s (the previous configuration is kept)', e)
+        finally:
+            self.reloading = False
+
+    @staticmethod
+    def _has_changes(section_diff):
+        """
+        Returns whether a section of the config diff has any changes.
+
+        Parameters
+        ----------
+        section_diff : dict{str: set[str]}
+            Names of added, removed and changed blocks.
+
+        Returns
+        -------
+        has_changes : bool
+            Whether any block is added, removed or changed.
+        """
+        return any(section_diff.values())
+
+    @staticmethod
+    def _without_logger(data):
+        """
+        Returns a block data excluding the ``logger`` block.
+
+        Parameters
+        ----------
+        data : dict
+            App or process data.
+
+        Returns
+        -------
+        data : dict
+            Data without the ``logger`` block.
+        """
+        return {k: v for k, v in data.items() if k != 'logger'}
+
     def _on_recv_msg(self, msg):
         """
         Handles a ZeroMQ message from Jaffle apps.
@@ -366,40 +1274,165 @@ class JaffleStartCommand(BaseJaffleCommand):
         """
         data = json.loads(to_unicode(msg[0]))
         self.log.debug('Receive message: %s', data)
-        if data['type'] == 'log':
+        self.metrics.counter(
+            'jaffle_messages_received_total', 'Messages received from apps.', ['app', 'type']
+        ).inc(app=data['app_name'], type=data['type'])
+        if data['type'] == 'metrics':
+            # Metrics of an app are cumulative, so the latest snapshot replaces the old one.
+            self.app_metrics[data['app_name']] = data['payload']
+        elif data['type'] == 'trace':
+            if self.trace_writer:
+                app = self.status.apps.get(data['app_name'])
+                self.trace_writer.write(
+                    data['payload'],
+                    process_name='kernel {}'.format(app.session_name) if app else None
+                )
+        elif data['type'] == 'subscribe':
+            self.log.debug('%s subscribes to %s', data['app_name'], data['payload']['topic'])
+            self.bus.subscribe(data['payload']['topic'], data['app_name'])
+        elif data['type'] == 'publish':
+            self._deliver_messages(**data['payload'])
+        elif data['type'] in ('test_run', 'test_result'):
+            self._on_test_progress(data['app_name'], data['type'], data['payload'])
+        elif data['type'] == 'log':
             app_name = data['app_name']
             payload = data['payload']
             logger_name = payload.get('logger') or app_name
-            logging.getLogger(logger_name).log(
-                getattr(logging, payload['levelname'].upper()), payload.get('message', '')
+            logger = logging.getLogger(logger_name)
+            if 'msg' not in payload:  # pre-formatted message
+                logger.log(
+                    getattr(logging, payload['levelname'].upper()), payload.get('message', '')
+                )
+                return
+            record = record_from_dict(dict(payload, logger=logger_name))
+            trace_id = getattr(record, 'trace_id', None)
+            if trace_id:
+                # log round trip from the app to the server
+                self.tracer.add_span(
+                    'log', record.created, time.time(), trace_id=trace_id, logger=logger_name
+                )
+            if logger.isEnabledFor(record.levelno):
+                logger.handle(record)
+
+    def _on_test_progress(self, app_name, msg_type, payload):
+        """
+        Updates the live summary of the tests run by an app.
+
+        Parameters
+        ----------
+        app_name : str
+            App name.
+        msg_type : str
+            ``test_run`` on starting or finishing a run or ``test_result`` on
+            finishing a test.
+        payload : dict
+            Message payload.
+        """
+        logger = logging.getLogger(app_name)
+        if msg_type == 'test_result':
+            run = self.test_results.add(app_name, **payload)
+            logger.debug(
+                '%s %s (%.3fs): %s', payload['nodeid'], payload['outcome'],
+                payload['duration'], self.test_results.format(run)
             )
+        elif payload['event'] == 'start':
+            self.test_results.start(app_name, payload['target'], payload['started_at'])
+        else:
+            run = self.test_results.finish(app_name, payload['exit_code'], payload['finished_at'])
+            logger.info('Test summary: %s', self.test_results.format(run))
+            if run['failed']:
+                logger.warning('Failed tests: %s', ' '.join(run['failed']))
+
+    def _deliver_messages(self, topic, messages, published_at):
+        """
+        Delivers messages published by an app to the kernels of the
+        subscribers of the topic.
+
+        Parameters
+        ----------
+        topic : str
+            Topic name.
+        messages : list
+            Published messages.
+        published_at : float
+            UNIX time when the messages were published.
+        """
+
+        def session_of(app_name):
+            app = self.status.apps.get(app_name)
+            return app.session_name if app and app.session_name in self.clients else None
+
+        for session_name, code in self.bus.route(topic, messages, published_at, session_of):
+            self.clients[session_name].execute(code, silent=True)
+            self.metrics.counter(
+                'jaffle_bus_deliveries_total', 'Message batches delivered to kernels.',
+                ['topic', 'kernel']
+            ).inc(topic=topic, kernel=session_name)
 
     @gen.coroutine
     def _start_processes(self):
         """
-        Starts external processes.
+        Starts external processes. A process which depends on other processes
+        is started after they become ready.
 
         Returns
         -------
         future : tornado.gen.Future
             Future of starting all external processes.
         """
-        processes = []
-        for proc_name, proc_data in self.conf.process.items():
-            if bool_value(proc_data.get_raw('disabled', False)):
-                continue
-            logger = logging.getLogger(proc_name)
-            logger.parent = self.log
-            logger_data = proc_data.get('logger', ConfigDict())
-            logger.setLevel(getattr(logging, logger_data.get('level', 'info').upper()))
-            proc = self.procs[proc_name] = Process(
-                logger, proc_name,
-                proc_data.get('command'), bool_value(proc_data.get('tty', False)),
-                proc_data.get('env', {}), logger_data.get('suppress_regex', []),
-                logger_data.get('replace_regex', []), self.color
-            )
-            processes.append(proc.start())
-        yield processes
+        try:
+            for proc_name, proc_data in self.conf.process.items():
+                self._create_supervisor(proc_name, proc_data)
+            check_dependencies({n: s.depends_on for n, s in self.supervisors.items()})
+        except ValueError as e:
+            self.log.error(e)
+            sys.exit(1)
+
+        yield [s.run(self.supervisors) for s in list(self.supervisors.values())]
+
+    def _create_supervisor(self, proc_name, proc_data):
+        """
+        Creates an external process and its supervisor.
+
+        Parameters
+        ----------
+        proc_name : str
+            Process name.
+        proc_data : ConfigDict
+            Process configuration.
+
+        Returns
+        -------
+        supervisor : ProcessSupervisor or None
+            Process supervisor or None if the process is disabled.
+        """
+        if bool_value(proc_data.get_raw('disabled', False)):
+            return None
+        logger = logging.getLogger(proc_name)
+        logger.parent = self.log
+        logger_data = proc_data.get('logger', ConfigDict())
+        logger.setLevel(getattr(logging, logger_data.get('level', 'info').upper()))
+        proc = self.procs[proc_name] = Process(
+            logger, proc_name,
+            proc_data.get('command'), bool_value(proc_data.get('tty', False)),
+            proc_data.get('env', {}), logger_data.get('suppress_regex', []),
+            logger_data.get('replace_regex', []), self.color, self.metrics
+        )
+        ready_data = proc_data.get('ready', ConfigDict())
+        ready_port = ready_data.get('port')
+        supervisor = self.supervisors[proc_name] = ProcessSupervisor(
+            logger,
+            proc,
+            restart=str_value(proc_data.get('restart', 'never')),
+            restart_limit=int_value(proc_data.get('restart_limit', 5)),
+            ready_pattern=ready_data.get_raw('pattern', None),
+            ready_port=None if ready_port is None else int_value(ready_port),
+            ready_host=str_value(ready_data.get('host', '127.0.0.1')),
+            ready_timeout=float(str_value(ready_data.get('timeout', 60.0))),
+            depends_on=[str_value(d) for d in proc_data.get('depends_on', [])],
+            report_interval=float(str_value(proc_data.get('report_interval', 0.0)))
+        )
+        return supervisor
 
     def _init_job_loggers(self):
         """
@@ -515,9 +1548,191 @@ class JaffleStartCommand(BaseJaffleCommand):
         msg : dict
             Shell message.
         """
+        future = self.execute_futures.pop(msg['parent_header'].get('msg_id'), None)
+        if future:
+            future.set_result(msg['content'])
+
         if kernel_manager.is_ready:
             return
 
         if msg['msg_type'] == 'execute_reply' and msg['content'].get('status') == 'ok':
             kernel_manager.is_ready = True
             self.log.info('Kernel %s (%s) is ready', session.name, session.kernel.id)
+
+    def _execute_in_kernel(self, session_name, code):
+        """
+        Executes a code in a kernel.
+
+        Parameters
+        ----------
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+        code : str
+            Code to be executed.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the content of the ``execute_reply``.
+        """
+        future = gen.Future()
+        msg_id = self.clients[session_name].execute(code, silent=True)
+        self.execute_futures[msg_id] = future
+        return future
+
+    def _control_status(self):
+        """
+        Control command which returns the server status.
+
+        Returns
+        -------
+        status : dict
+            Server status including kernels and processes.
+        """
+        status = self.status.to_dict()
+        status['kernels'] = {
+            name: {
+                'id': session.kernel.id,
+                'ready': self.kernel_manager.get_kernel(session.kernel.id).is_ready,
+                'restart_count': session.restart_count,
+                'downtime': session.downtime
+            }
+            for name, session in self.status.sessions.items()
+        }
+        status['processes'] = {
+            name: {
+                'running': supervisor.process.is_running,
+                'ready': supervisor.ready.is_set(),
+                'restart_count': supervisor.restart_count,
+                'returncode': supervisor.last_returncode,
+                # the last sample of the periodic report not to reset its CPU window
+                'usage': supervisor.usage if supervisor.process.is_running else None
+            }
+            for name, supervisor in self.supervisors.items()
+        }
+        status['tests'] = self.test_results.to_dict()
+        return status
+
+    def _control_stop(self):
+        """
+        Control command which shuts down the server.
+        The reply is sent after the shutdown is completed.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of shutting down ``jaffle start``.
+        """
+        self.log.critical('Received stop request, stopping')
+        return self.shutdown()
+
+    @gen.coroutine
+    def _control_restart(self, name):
+        """
+        Control command which restarts an app or a process.
+
+        An app is restarted by its ``restart()`` method if it exists. Otherwise
+        the app is shut down by its ``shutdown()`` method if it exists and
+        re-initialized by the init code executed on starting the kernel.
+
+        Parameters
+        ----------
+        name : str
+            App name or process name.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of restarting the app or the process.
+        """
+        if name in self.supervisors:
+            self.supervisors[name].restart()
+            return 'Process {} restarted'.format(name)
+
+        if name not in self.app_init_codes:
+            raise JaffleControlError('App or process {!r} is not running'.format(name))
+
+        self.log.info('Restarting %s', name)
+        code = '\n'.join([
+            'if hasattr({}, "restart"):'.format(name),
+            '    {}.restart()'.format(name),
+            'else:',
+            '    if hasattr({}, "shutdown"):'.format(name),
+            '        {}.shutdown()'.format(name),
+            indent(self.app_init_codes[name], '    ')
+        ])
+        reply = yield self._execute_in_kernel(self.status.apps[name].session_name, code)
+        if reply.get('status') != 'ok':
+            raise JaffleControlError(
+                '{}: {}'.format(reply.get('ename', 'Error'), reply.get('evalue', ''))
+            )
+        return 'App {} restarted'.format(name)
+
+    @gen.coroutine
+    def _control_reload(self):
+        """
+        Control command which reloads the configuration. It is rejected while
+        the configuration is being reloaded on modification of the files.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the names of restarted kernels, apps and
+            processes.
+        """
+        if self.reloading:
+            raise JaffleControlError('Configuration is being reloaded')
+        self.conf_mtimes = self._get_conf_mtimes()  # not to reload again on the next check
+        self.reloading = True
+        try:
+            result = yield self.reload_conf()
+        finally:
+            self.reloading = False
+        return result
+
+    @gen.coroutine
+    def _control_run_job(self, name):
+        """
+        Control command which executes a job in the server.
+
+        Parameters
+        ----------
+        name : str
+            Job name.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the exit status of the job.
+        """
+        job_data = self.conf.job.get(name)
+        if job_data is None:
+            raise JaffleControlError('Job {!r} is not defined'.format(name))
+        logger_data = job_data.get('logger', ConfigDict())
+        job = Job(
+            logging.getLogger(logger_data.get('name', name)), name,
+            str_value(job_data.get('command'))
+        )
+        returncode = yield job.run()
+        return {'job': name, 'returncode': returncode}
+
+    def _control_metrics(self):
+        """
+        Control command which returns the server metrics.
+
+        Returns
+        -------
+        metrics : dict
+            Server metrics.
+        """
+        return {
+            'uptime': time.time() - self.started_at,
+            'kernels': len(self.status.sessions),
+            'kernel_restarts': sum(s.restart_count for s in self.status.sessions.values()),
+            'apps': len(self.status.apps),
+            'processes': len(self.supervisors),
+            'running_processes': len([
+                s for s in self.supervisors.values() if s.process.is_running
+            ]),
+            'process_restarts': sum(s.restart_count for s in self.supervisors.values())
+        }
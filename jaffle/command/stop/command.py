@@ -6,9 +6,11 @@ import sys
 import time
 from pathlib import Path
 
-from notebook.utils import check_pid
+from traitlets import Float
 
+from ...runtime import APP_CONFIG_PREFIX, CONTROL_SOCKET_NAME
 from ...status import JaffleStatus
+from ...utils import check_pid
 from ..base import BaseJaffleCommand
 
 
@@ -23,33 +25,40 @@ class JaffleStopCommand(BaseJaffleCommand):
 jaffle stop
     '''
 
-    aliases = {'runtime-dir': 'BaseJaffleCommand.runtime_dir'}
+    aliases = {
+        'runtime-dir': 'BaseJaffleCommand.runtime_dir',
+        'timeout': 'JaffleStopCommand.timeout'
+    }
     flags = {}
 
+    timeout = Float(60.0, config=True, help='Timeout in seconds to wait for the shutdown.')
+
     def start(self):
         """
         Executes the stop command.
+
+        The stop request is sent through the control channel of the server and
+        the command returns as soon as the shutdown is completed. If the
+        control channel is not available, the server is stopped by signals.
         """
         try:
             status = JaffleStatus.load(self.status_file_path)
             print('Stopping Jaffle - PID: {}'.format(status.pid))
-            os.kill(status.pid, signal.SIGTERM)
 
-            for _ in range(50000):
-                if check_pid(status.pid):
-                    print("PID {} has finished".format(status.pid))
-                    self._cleanup_runtime_dir(status)
-                    sys.exit(0)
-                time.sleep(0.1)
+            if not check_pid(status.pid):
+                raise ProcessLookupError()
 
-            os.kill(status.pid, signal.SIGKILL)
+            if status.control_url and self._request_stop(status):
+                print("PID {} has finished".format(status.pid))
+                self._cleanup_runtime_dir(status)
+                sys.exit(0)
 
-            for _ in range(50000):
-                if check_pid(status.pid):
+            for sig in (signal.SIGTERM, signal.SIGKILL):
+                os.kill(status.pid, sig)
+                if self._wait_for_exit(status.pid):
                     print("PID {} has finished".format(status.pid))
                     self._cleanup_runtime_dir(status)
                     sys.exit(0)
-                time.sleep(0.1)
 
             print('Failed to stop Jaffle - PID: {}'.format(status.pid))
 
@@ -65,6 +74,51 @@ jaffle stop
             self._cleanup_runtime_dir(status)
             self.exit(1)
 
+    def _request_stop(self, status):
+        """
+        Sends the stop request through the control channel.
+
+        Parameters
+        ----------
+        status : JaffleStatus
+            Jaffle server status.
+
+        Returns
+        -------
+        stopped : bool
+            Whether the server has completed the shutdown.
+        """
+        import zmq
+        from ...control import JaffleControlClient, JaffleControlError
+
+        try:
+            JaffleControlClient(status.control_url, timeout=self.timeout).request('stop')
+        except (JaffleControlError, TimeoutError, zmq.ZMQError) as e:
+            print('Control channel is not available: {}'.format(e), file=sys.stderr)
+            return False
+        return True
+
+    def _wait_for_exit(self, pid):
+        """
+        Waits for the process to exit.
+
+        Parameters
+        ----------
+        pid : int
+            Process ID.
+
+        Returns
+        -------
+        exited : bool
+            Whether the process has exited within the timeout.
+        """
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            if not check_pid(pid):
+                return True
+            time.sleep(0.1)
+        return False
+
     def _cleanup_runtime_dir(self, status):
         """
         Cleans up the runtime directory.
@@ -81,6 +135,9 @@ jaffle stop
         try:
             for conn_file in runtime_dir.glob('kernel-*.json'):
                 self._unlink(conn_file)
+            for config_file in runtime_dir.glob(APP_CONFIG_PREFIX + '*'):
+                self._unlink(config_file)
+            self._unlink(runtime_dir / CONTROL_SOCKET_NAME)
             status.destroy(runtime_dir / 'jaffle.json')
         except FileNotFoundError:
             pass
@@ -1,22 +1,20 @@
 # -*- coding: utf-8 -*-
 
 import io
-import re
 import sys
 
 import pexpect
 
+from ...ansi import TerminalOutputFilter
 from ..base import BaseJaffleCommand
 
 
 class OutputStream(io.StringIO):
     """
-    Output stream for JaffleTTYCommand which drops escape sequences.
+    Output stream for JaffleTTYCommand which drops escape sequences and
+    collapses carriage return redraws.
     """
 
-    _ESC_PATTERN = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -/]*[@-ln-~]')
-    _ESC_PATTERN_NOCOLOR = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]')
-
     def __init__(self, color=True):
         """
         Initializes OutputStream.
@@ -29,25 +27,7 @@ class OutputStream(io.StringIO):
         super().__init__()
 
         self.color = color
-
-    def _drop_escape_sequences(self, buf):
-        """
-        Drops escape sequences from the string except for ANSI colors.
-
-        Parameters
-        ----------
-        buf : str
-            Target string.
-
-        Returns
-        -------
-        buf : str
-            Result string.
-        """
-        if self.color:
-            return self._ESC_PATTERN.sub('', buf)
-        else:
-            return self._ESC_PATTERN_NOCOLOR.sub('', buf)
+        self.output_filter = TerminalOutputFilter(color)
 
     def write(self, buf):
         """
@@ -58,7 +38,7 @@ class OutputStream(io.StringIO):
         buf : str
             String buffer to be written.
         """
-        sys.stdout.write(self._drop_escape_sequences(buf))
+        sys.stdout.write(self.output_filter.feed(buf))
 
     def flush(self):
         """
@@ -66,6 +46,14 @@ class OutputStream(io.StringIO):
         """
         sys.stdout.flush()
 
+    def close(self):
+        """
+        Writes the incomplete line held in the filter and closes the stream.
+        """
+        sys.stdout.write(self.output_filter.flush())
+        sys.stdout.flush()
+        super().close()
+
 
 class JaffleTTYCommand(BaseJaffleCommand):
     """
@@ -96,4 +84,7 @@ jaffle tty "yarn test"
         """
         proc = pexpect.spawn(self.command, encoding='utf-8')
         proc.logfile = OutputStream(self.color)
-        proc.expect(pexpect.EOF, timeout=None)
+        try:
+            proc.expect(pexpect.EOF, timeout=None)
+        finally:
+            proc.logfile.close()
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import copy
+import hashlib
 import json
 import re
 from pathlib import Path
@@ -8,10 +10,14 @@ import hcl
 import jsonschema
 
 from ..functions import functions
-from ..utils import deep_merge, str_value
+from ..utils import bool_value, deep_merge, float_value, str_value
 from ..variables import VariablesNamespace
 from .value import ConfigDict, ConfigList, ConfigValue
 
+SCHEMA_PATH = Path(__file__).parent.parent / 'schema' / 'config_schema.json'
+
+CONFIG_CACHE_NAME = 'config_cache.json'
+
 
 class JaffleConfig(object):
     """
@@ -83,6 +89,18 @@ class JaffleConfig(object):
             str_value(r['from'])
         ), r['to']) for r in self.logger.get('replace_regex', default=ConfigList())]
 
+        self.log_limits = {}
+        for block_name, block in [('app', self.app), ('process', self.process),
+                                  ('job', self.job)]:
+            for name, data in block.items():
+                logger_data = data.get('logger', ConfigDict())
+                if 'rate_limit' in logger_data or 'collapse_repeats' in logger_data:
+                    logger_name = name
+                    if block_name == 'job':
+                        logger_name = str_value(logger_data.get('name', name))
+                    self.log_limits[logger_name] = self._get_log_limit(logger_data)
+        self.global_log_limit = self._get_log_limit(self.logger)
+
     def __repr__(self):
         """
         Returns string representation of JaffleConfig.
@@ -94,6 +112,27 @@ class JaffleConfig(object):
         """
         return repr(self.raw())
 
+    @staticmethod
+    def _get_log_limit(logger_data):
+        """
+        Returns the rate limit and the repeat collapsing setting of a logger.
+
+        Parameters
+        ----------
+        logger_data : ConfigDict
+            Logger configuration.
+
+        Returns
+        -------
+        log_limit : tuple(float, bool)
+            Maximum number of records per second (0: unlimited) and whether
+            to collapse repeated messages.
+        """
+        return (
+            float_value(logger_data.get('rate_limit', 0)),
+            bool_value(logger_data.get('collapse_repeats', False))
+        )
+
     def raw(self):
         """
         Returns the raw contents of the configuration.
@@ -113,11 +152,52 @@ class JaffleConfig(object):
             'logger': self.logger.raw()
         }
 
+    def diff(self, other):
+        """
+        Compares the configuration with another one block by block.
+
+        Parameters
+        ----------
+        other : JaffleConfig
+            Configuration to be compared (e.g. reloaded one).
+
+        Returns
+        -------
+        diff : dict{str: dict{str: set[str]}}
+            Names of ``added``, ``removed`` and ``changed`` blocks for each
+            section (``variable``, ``kernel``, ``app``, ``process``, ``job``
+            and ``logger``).
+        """
+        diff = {}
+        for section in ['variable', 'kernel', 'app', 'process', 'job', 'logger']:
+            old = getattr(self, section).raw()
+            new = getattr(other, section).raw()
+            diff[section] = {
+                'added': set(new) - set(old),
+                'removed': set(old) - set(new),
+                'changed': {n for n in set(old) & set(new) if old[n] != new[n]}
+            }
+        return diff
+
+    # Validator compiled from the schema (shared in the process)
+    _validator = None
+
+    # SHA-256 digest of the schema file
+    _schema_digest = None
+
+    # Parsed and validated config data keyed by ``_cache_key()``
+    _data_cache = {}
+
     @classmethod
-    def load(cls, file_paths, raw_namespace, runtime_variables):
+    def load(cls, file_paths, raw_namespace, runtime_variables, cache_dir=None):
         """
         Loads JaffleConfig from files with given namespace and variables.
 
+        If ``cache_dir`` is given, the parsed and validated config data are
+        cached in memory and in ``cache_dir`` with the key computed from the
+        file contents, the schema and the runtime variables. Loading the same
+        files again skips both HCL parsing and schema validation.
+
         Parameters
         ----------
         file_paths : list[pathlib.Path]
@@ -126,15 +206,141 @@ class JaffleConfig(object):
             Raw namespace for string interpolation.
         runtime_variables : dict
             Runtime variables.
+        cache_dir : pathlib.Path or str or None
+            Directory to store the config cache file (e.g. runtime_dir).
         """
-        data = deep_merge(*(cls._load_file(f) for f in file_paths))
+        if cache_dir is None:
+            data = cls._load_data(file_paths)
+            return cls.create(data, raw_namespace, runtime_variables)
 
-        with (Path(__file__).parent.parent / 'schema' / 'config_schema.json').open() as sf:
-            schema = json.load(sf)
-        jsonschema.validate(data, schema)
+        key = cls._cache_key(file_paths, runtime_variables)
+        data = copy.deepcopy(cls._data_cache.get(key))
+        if data is None:
+            data = cls._read_cache(cache_dir, key)
+        if data is None:
+            data = cls._load_data(file_paths)
+            cls._write_cache(cache_dir, key, data)
+        cls._data_cache = {key: copy.deepcopy(data)}
 
         return cls.create(data, raw_namespace, runtime_variables)
 
+    @classmethod
+    def _load_data(cls, file_paths):
+        """
+        Loads config data from files and validates it.
+
+        Parameters
+        ----------
+        file_paths : list[pathlib.Path]
+            List of file paths.
+
+        Returns
+        -------
+        data : dict
+            Config data merged from all files.
+        """
+        data = deep_merge(*(cls._load_file(f) for f in file_paths))
+        cls._get_validator().validate(data)
+        return data
+
+    @classmethod
+    def _get_validator(cls):
+        """
+        Returns the validator of the config schema.
+        The schema is read and checked only once per process.
+
+        Returns
+        -------
+        validator : jsonschema.IValidator
+            Validator of the config schema.
+        """
+        if cls._validator is None:
+            with open(str(SCHEMA_PATH), 'rb') as f:
+                schema_bytes = f.read()
+            schema = json.loads(schema_bytes.decode('utf-8'))
+            validator_cls = jsonschema.validators.validator_for(schema)
+            validator_cls.check_schema(schema)
+            cls._schema_digest = hashlib.sha256(schema_bytes).hexdigest()
+            cls._validator = validator_cls(schema)
+        return cls._validator
+
+    @classmethod
+    def _cache_key(cls, file_paths, runtime_variables):
+        """
+        Computes the cache key of config data.
+
+        Parameters
+        ----------
+        file_paths : list[pathlib.Path]
+            List of file paths.
+        runtime_variables : dict
+            Runtime variables.
+
+        Returns
+        -------
+        key : str
+            SHA-256 digest of the file contents, the schema and the runtime
+            variables.
+        """
+        cls._get_validator()
+        digest = hashlib.sha256(cls._schema_digest.encode('utf-8'))
+        for file_path in file_paths:
+            digest.update(str(file_path).encode('utf-8') + b'\0')
+            with open(str(file_path), 'rb') as f:
+                digest.update(f.read() + b'\0')
+        digest.update(json.dumps(runtime_variables, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    @classmethod
+    def _read_cache(cls, cache_dir, key):
+        """
+        Reads config data from the cache file.
+
+        Parameters
+        ----------
+        cache_dir : pathlib.Path or str
+            Directory of the cache file.
+        key : str
+            Cache key.
+
+        Returns
+        -------
+        data : dict or None
+            Cached config data or None if the cache does not match the key.
+        """
+        try:
+            with (Path(cache_dir) / CONFIG_CACHE_NAME).open() as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cache, dict) or cache.get('key') != key:
+            return None
+        return cache.get('data')
+
+    @classmethod
+    def _write_cache(cls, cache_dir, key, data):
+        """
+        Writes config data to the cache file.
+        The cache is skipped silently if the file cannot be written.
+
+        Parameters
+        ----------
+        cache_dir : pathlib.Path or str
+            Directory of the cache file.
+        key : str
+            Cache key.
+        data : dict
+            Config data.
+        """
+        cache_path = Path(cache_dir) / CONFIG_CACHE_NAME
+        tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+        try:
+            with tmp_path.open('w') as f:
+                json.dump({'key': key, 'data': data}, f)
+            tmp_path.replace(cache_path)
+        except (OSError, TypeError, ValueError):
+            pass
+
     @classmethod
     def create(cls, data_dict, raw_namespace, runtime_variables):
         """
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+import json
+from functools import partial
+from pathlib import Path
+
+import zmq
+from tornado import gen
+from tornado.escape import to_unicode
+from zmq.eventloop import zmqstream
+
+
+class JaffleControlError(Exception):
+    """
+    Error returned from the Jaffle server's control channel.
+    """
+
+
+class JaffleControlServer(object):
+    """
+    Request/reply control channel of the Jaffle server.
+
+    The server binds a ZeroMQ ROUTER socket (usually an ``ipc://`` endpoint
+    under the runtime directory) and receives JSON requests such as
+    ``{"command": "restart", "args": {"name": "tornado_app"}}``. Each command is
+    dispatched to a handler function. If a handler returns a Future, the reply
+    is sent when the Future is resolved.
+
+    Replies are ``{"status": "ok", "result": ...}`` on success and
+    ``{"status": "error", "message": ...}`` on failure.
+    """
+
+    def __init__(self, url, handlers, log, io_loop):
+        """
+        Initializes JaffleControlServer.
+
+        Parameters
+        ----------
+        url : str
+            ZeroMQ endpoint to be bound (e.g. ``ipc://.jaffle/control.sock``).
+        handlers : dict{str: function}
+            Command handlers. The request args are passed as keyword arguments.
+        log : logging.Logger
+            Logger.
+        io_loop : tornado.ioloop.IOLoop
+            IO loop to receive requests.
+        """
+        self.url = url
+        self.handlers = handlers
+        self.log = log
+        self.io_loop = io_loop
+
+        self.socket = None
+        self.stream = None
+
+    def __repr__(self):
+        """
+        Returns string representation of JaffleControlServer.
+
+        Returns
+        -------
+        repr : str
+            String representation of JaffleControlServer.
+        """
+        return '<%s {url: %s commands: %s}>' % (
+            type(self).__name__, self.url, sorted(self.handlers)
+        )
+
+    def start(self):
+        """
+        Binds the control socket and starts receiving requests.
+        """
+        ctx = zmq.Context.instance()
+        self.socket = ctx.socket(zmq.ROUTER)
+        self.socket.bind(self.url)
+        self.stream = zmqstream.ZMQStream(self.socket, self.io_loop)
+        self.stream.on_recv(self._on_recv_request)
+
+    def close(self):
+        """
+        Closes the control socket and removes the socket file of an ``ipc://``
+        endpoint. Replies which have already been sent are flushed within
+        1 second.
+        """
+        if self.stream:
+            self.stream.close(linger=1000)
+        self.stream = None
+        self.socket = None
+
+        if self.url.startswith('ipc://'):
+            try:
+                Path(self.url[len('ipc://'):]).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _on_recv_request(self, frames):
+        """
+        Handles a request received from a control client.
+
+        Parameters
+        ----------
+        frames : list[bytes]
+            ZeroMQ message frames (routing envelope followed by the JSON
+            encoded request).
+        """
+        envelope, body = frames[:-1], frames[-1]
+        try:
+            request = json.loads(to_unicode(body))
+            command = request['command']
+            handler = self.handlers[command]
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(envelope, {'status': 'error', 'message': 'Invalid request: {}'.format(e)})
+            return
+
+        self.log.debug('Control request: %s', request)
+
+        try:
+            result = handler(**request.get('args', {}))
+        except Exception as e:
+            self._reply_error(envelope, command, e)
+            return
+
+        if gen.is_future(result):
+            result.add_done_callback(partial(self._reply_future, envelope, command))
+        else:
+            self._reply(envelope, {'status': 'ok', 'result': result})
+
+    def _reply_future(self, envelope, command, future):
+        """
+        Sends a reply with the result of a Future.
+
+        Parameters
+        ----------
+        envelope : list[bytes]
+            ZeroMQ routing envelope.
+        command : str
+            Command name.
+        future : tornado.gen.Future
+            Resolved Future.
+        """
+        try:
+            result = future.result()
+        except Exception as e:
+            self._reply_error(envelope, command, e)
+        else:
+            self._reply(envelope, {'status': 'ok', 'result': result})
+
+    def _reply_error(self, envelope, command, error):
+        """
+        Sends an error reply.
+
+        Parameters
+        ----------
+        envelope : list[bytes]
+            ZeroMQ routing envelope.
+        command : str
+            Command name.
+        error : Exception
+            Error raised by the command handler.
+        """
+        self.log.error('Control command %s failed: %s', command, error)
+        self._reply(envelope, {'status': 'error', 'message': str(error)})
+
+    def _reply(self, envelope, data):
+        """
+        Sends a reply to the client.
+        The socket is used directly instead of the stream so that the reply
+        is sent even when the IO loop is stopping.
+
+        Parameters
+        ----------
+        envelope : list[bytes]
+            ZeroMQ routing envelope.
+        data : dict
+            Reply data.
+        """
+        if self.socket is None or self.socket.closed:
+            return
+        self.socket.send_multipart(envelope + [json.dumps(data, default=str).encode('utf-8')])
+
+
+class JaffleControlClient(object):
+    """
+    Client for the Jaffle server's control channel.
+    """
+
+    def __init__(self, url, timeout=10.0):
+        """
+        Initializes JaffleControlClient.
+
+        Parameters
+        ----------
+        url : str
+            ZeroMQ endpoint of the control channel.
+        timeout : float
+            Timeout in seconds to wait for a reply.
+        """
+        self.url = url
+        self.timeout = timeout
+
+    def __repr__(self):
+        """
+        Returns string representation of JaffleControlClient.
+
+        Returns
+        -------
+        repr : str
+            String representation of JaffleControlClient.
+        """
+        return '<%s {url: %s timeout: %s}>' % (type(self).__name__, self.url, self.timeout)
+
+    def request(self, command, timeout=None, **args):
+        """
+        Sends a request and waits for the reply.
+
+        Parameters
+        ----------
+        command : str
+            Command name (e.g. ``'status'``).
+        timeout : float or None
+            Timeout in seconds. If it is None, ``self.timeout`` is used.
+        args : dict
+            Command arguments.
+
+        Returns
+        -------
+        result : object
+            Result of the command.
+
+        Raises
+        ------
+        JaffleControlError
+            When the server returns an error.
+        TimeoutError
+            When the server does not reply within the timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        ctx = zmq.Context()
+        socket = ctx.socket(zmq.REQ)
+        socket.setsockopt(zmq.LINGER, 0)
+        try:
+            socket.connect(self.url)
+            socket.send_string(json.dumps({'command': command, 'args': args}))
+            if not socket.poll(int(timeout * 1000)):
+                raise TimeoutError(
+                    'No reply from {} within {} seconds'.format(self.url, timeout)
+                )
+            reply = json.loads(socket.recv_string())
+        finally:
+            socket.close()
+            ctx.term()
+
+        if reply.get('status') != 'ok':
+            raise JaffleControlError(reply.get('message', 'Unknown error'))
+        return reply.get('result')
@@ -5,8 +5,6 @@ import os
 import shlex
 import subprocess
 
-import pyjq
-import yaml
 from tornado.escape import to_unicode
 
 from .display import Color, background_color, display_reset, foreground_color
@@ -137,6 +135,8 @@ def jq_all(query, data_str, *args, **kwargs):
     result : str
         String representation of the result list.
     """
+    import pyjq
+    import yaml
     try:
         return json.dumps(pyjq.all(query, yaml.loads(data_str)), *args, **kwargs)
     except Exception as e:
@@ -158,6 +158,8 @@ def jq_first(query, data_str, *args, **kwargs):
     result : str
         String representation of the result object.
     """
+    import pyjq
+    import yaml
     try:
         return json.dumps(pyjq.first(query, yaml.safe_load(data_str)), *args, **kwargs)
     except Exception as e:
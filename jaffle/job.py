@@ -1,5 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import shlex
+import subprocess
+
+from tornado import gen
+from tornado.escape import to_unicode
+from tornado.iostream import StreamClosedError
+from tornado.process import Subprocess
+
 
 class Job(object):
     """
@@ -33,3 +41,26 @@ class Job(object):
             String representation of Job.
         """
         return '<%s {name: %s command: %s}>' % (self.__class__.__name__, self.name, self.command)
+
+    @gen.coroutine
+    def run(self):
+        """
+        Executes the job command and redirects its output to the logger.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the exit status of the command.
+        """
+        self.log.debug('Executing job %s: %s', self.name, self.command)
+        proc = Subprocess(
+            shlex.split(self.command), stdout=Subprocess.STREAM, stderr=subprocess.STDOUT
+        )
+        try:
+            while True:
+                line_bytes = yield proc.stdout.read_until(b'\n')
+                self.log.info(to_unicode(line_bytes).strip('\r\n'))
+        except StreamClosedError:
+            pass
+        returncode = yield proc.wait_for_exit(raise_error=False)
+        return returncode
@@ -14,6 +14,9 @@ class JaffleKernelManager(IOLoopKernelManager):
 
     If jupyter_client version is smaller than 5.1.0, it clones the session
     to avoid duplicated digest error on getting the connection info.
+
+    The auto-restarter of jupyter_client is disabled because Jaffle restarts
+    dead kernels by ``KernelMonitor`` to replay the apps' initialization.
     """
 
     is_ready = Bool(False)
@@ -22,6 +25,10 @@ class JaffleKernelManager(IOLoopKernelManager):
     def _client_class_default(self):
         return 'jaffle.kernel_client.JaffleKernelClient'
 
+    @default('autorestart')
+    def _autorestart_default(self):
+        return False
+
     def get_connection_info(self, session=False):  # pragma: no cover
         """
         Gets the connection info as a dict
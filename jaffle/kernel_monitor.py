@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from tornado import gen, ioloop
+
+
+class KernelMonitor(object):
+    """
+    KernelMonitor checks the liveness of a kernel periodically and restarts it
+    with exponential backoff when it dies.
+
+    A kernel is regarded as dead when its process has exited or its heartbeat
+    has been missed ``max_missed`` times in a row. The number of consecutive
+    restarts is limited by ``restart_limit`` and it is reset after the kernel
+    keeps alive for ``max_backoff`` seconds.
+    """
+
+    def __init__(
+        self,
+        log,
+        session_name,
+        kernel_manager,
+        restart,
+        restart_limit=5,
+        interval=3.0,
+        max_missed=3,
+        backoff=1.0,
+        max_backoff=60.0
+    ):
+        """
+        Initializes KernelMonitor.
+
+        Parameters
+        ----------
+        log : logging.Logger
+            Logger.
+        session_name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+        kernel_manager : JaffleKernelManager
+            Kernel manager of the kernel.
+        restart : function
+            Coroutine function to restart the kernel, which will be called with
+            the time when the kernel is found dead.
+        restart_limit : int
+            Maximum number of consecutive restarts.
+        interval : float
+            Interval in seconds to check the kernel.
+        max_missed : int
+            Number of missed heartbeats in a row to regard the kernel as dead.
+        backoff : float
+            Delay in seconds before the first restart, which will be doubled
+            for each consecutive restart.
+        max_backoff : float
+            Maximum delay in seconds before a restart.
+        """
+        self.log = log
+        self.session_name = session_name
+        self.kernel_manager = kernel_manager
+        self.restart = restart
+        self.restart_limit = restart_limit
+        self.interval = interval
+        self.max_missed = max_missed
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.client = None
+        self.missed = 0
+        self.restarts = 0
+        self.restarting = False
+        self.last_restarted_at = None
+        self.periodic_callback = None
+
+    def __repr__(self):
+        """
+        Returns string representation of KernelMonitor.
+
+        Returns
+        -------
+        repr : str
+            String representation of KernelMonitor.
+        """
+        return '<%s {session_name: %s restarts: %s restart_limit: %s}>' % (
+            type(self).__name__, self.session_name, self.restarts, self.restart_limit
+        )
+
+    def start(self):
+        """
+        Starts checking the kernel periodically.
+        """
+        self.periodic_callback = ioloop.PeriodicCallback(self.check, self.interval * 1000)
+        self.periodic_callback.start()
+
+    def stop(self):
+        """
+        Stops checking the kernel.
+        """
+        if self.periodic_callback:
+            self.periodic_callback.stop()
+        self.periodic_callback = None
+
+    def is_alive(self):
+        """
+        Returns whether the kernel is alive.
+        The heartbeat is checked only if a kernel client is attached.
+
+        Returns
+        -------
+        is_alive : bool
+            Whether the kernel process is running and the heartbeat is beating.
+        """
+        if not self.kernel_manager.is_alive():
+            return False
+
+        if self.client is None or self.client.hb_channel.is_beating():
+            self.missed = 0
+        else:
+            self.missed += 1
+
+        return self.missed < self.max_missed
+
+    @gen.coroutine
+    def check(self):
+        """
+        Checks the kernel and restarts it if it is dead.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of checking (and restarting) the kernel.
+        """
+        if self.restarting:
+            return
+
+        if self.is_alive():
+            if (
+                self.last_restarted_at is not None and
+                time.time() - self.last_restarted_at > self.max_backoff
+            ):
+                self.restarts = 0
+                self.last_restarted_at = None
+            return
+
+        died_at = time.time()
+
+        if self.restarts >= self.restart_limit:
+            self.log.error(
+                'Kernel %s is dead and reached the restart limit (%s)', self.session_name,
+                self.restart_limit
+            )
+            self.stop()
+            return
+
+        delay = min(self.backoff * 2**self.restarts, self.max_backoff)
+        self.restarts += 1
+        self.restarting = True
+        self.log.warning(
+            'Kernel %s is dead, restarting in %.1f seconds (%s/%s)', self.session_name, delay,
+            self.restarts, self.restart_limit
+        )
+        try:
+            yield gen.sleep(delay)
+            if self.periodic_callback is None:  # stopped while waiting
+                return
+            yield self.restart(died_at)
+        except Exception as e:
+            self.log.error('Failed to restart kernel %s: %s', self.session_name, e)
+        finally:
+            self.missed = 0
+            self.last_restarted_at = time.time()
+            self.restarting = False
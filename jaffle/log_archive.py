@@ -0,0 +1,647 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+from pathlib import Path
+
+from .logging import JSONLogFormatter
+
+LOG_ARCHIVE_DIR_NAME = 'logs'
+INDEX_NAME = 'index.jsonl'
+COMPRESSIONS = ['gzip', 'zstd']
+
+_SEGMENT_PATTERN = re.compile(r'^segment-(\d+)-')
+_RELATIVE_TIME_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)([smhd])$')
+_TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_DATETIME_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+    '%H:%M:%S', '%H:%M'
+]
+
+
+class LogArchiveHandler(logging.Handler):
+    """
+    Log handler which archives log records as compressed JSON lines.
+
+    Records are written by a background thread in blocks. Each block is an
+    independent gzip member (or zstd frame) appended to the current segment
+    file and registered to the index with its offset, time range, loggers and
+    maximum level, so that a reader can seek the blocks it needs without
+    decompressing the whole archive. A segment is rotated when it exceeds
+    ``max_bytes`` or ``rotate_interval`` seconds have passed, and the oldest
+    segments are removed when the number of segments exceeds ``max_segments``.
+    """
+
+    def __init__(
+        self,
+        archive_dir,
+        compression='gzip',
+        max_bytes=10 * 1024 * 1024,
+        rotate_interval=0.0,
+        max_segments=50,
+        flush_interval=1.0,
+        block_records=1000
+    ):
+        """
+        Initializes LogArchiveHandler and starts the writer thread.
+
+        Parameters
+        ----------
+        archive_dir : str or pathlib.Path
+            Archive directory.
+        compression : str
+            Compression method (``'gzip'`` or ``'zstd'``).
+        max_bytes : int
+            Maximum compressed size of a segment in bytes.
+        rotate_interval : float
+            Interval in seconds to rotate a segment.
+            Time-based rotation is disabled if it is 0.
+        max_segments : int
+            Maximum number of segments to be kept.
+        flush_interval : float
+            Maximum delay in seconds to write a record.
+        block_records : int
+            Maximum number of records in a block.
+        """
+        super().__init__()
+
+        self.codec = get_codec(compression)
+        self.archive_dir = Path(archive_dir)
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.block_records = block_records
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.formatter = JSONLogFormatter()
+        self.queue = queue.Queue()
+        self.segment = None
+        self.segment_started_at = None
+        self.segment_seq = max([_segment_seq(p.name) for p in self._segment_paths()] or [0])
+        self.thread = threading.Thread(target=self._run, name='jaffle-log-archive', daemon=True)
+        self.thread.start()
+
+    def __repr__(self):
+        """
+        Returns string representation of LogArchiveHandler.
+
+        Returns
+        -------
+        repr : str
+            String representation of LogArchiveHandler.
+        """
+        return '<%s {archive_dir: %s compression: %s max_bytes: %s}>' % (
+            type(self).__name__, self.archive_dir, self.compression, self.max_bytes
+        )
+
+    def emit(self, record):
+        """
+        Queues a log record to be archived. The record is converted into
+        a dict here because it may be modified by other handlers afterwards.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Log record.
+        """
+        try:
+            self.queue.put((record.levelno, self.formatter.to_dict(record)))
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        """
+        Writes the queued records and stops the writer thread.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        super().close()
+
+    def _run(self):
+        """
+        Writes queued records in blocks until the handler is closed.
+        """
+        block = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # flush interval expired
+
+            if item:
+                if not block:
+                    deadline = time.time() + self.flush_interval
+                block.append(item)
+
+            if block and (item is None or item is False or len(block) >= self.block_records):
+                try:
+                    self._write_block(block)
+                except Exception as e:
+                    # not logged to avoid a loop through this handler
+                    print('Failed to archive log records: {}'.format(e), file=sys.stderr)
+                block = []
+                deadline = None
+
+            if item is None:
+                return
+
+    def _write_block(self, block):
+        """
+        Writes a block of records to the current segment and registers it to
+        the index.
+
+        Parameters
+        ----------
+        block : list[tuple(int, dict)]
+            Level numbers and records.
+        """
+        now = time.time()
+        if self.segment is not None and (
+            self.segment.stat().st_size >= self.max_bytes or (
+                self.rotate_interval > 0 and
+                now - self.segment_started_at >= self.rotate_interval
+            )
+        ):
+            self.segment = None
+
+        if self.segment is None:
+            self.segment_seq += 1
+            self.segment = self.archive_dir / 'segment-{:06d}-{}.jsonl.{}'.format(
+                self.segment_seq, time.strftime('%Y%m%dT%H%M%S', time.localtime(now)),
+                self.codec.extension
+            )
+            self.segment_started_at = now
+            self._remove_old_segments()
+
+        data = self.codec.compress(
+            ''.join(json.dumps(r, ensure_ascii=False) + '\n' for _, r in block).encode('utf-8')
+        )
+        with self.segment.open('ab') as f:
+            offset = f.tell()
+            f.write(data)
+
+        entry = {
+            'segment': self.segment.name,
+            'offset': offset,
+            'length': len(data),
+            # app records keep their creation time so they may be out of order
+            'start': min(r['created'] for _, r in block),
+            'end': max(r['created'] for _, r in block),
+            'count': len(block),
+            'loggers': sorted({r['logger'] for _, r in block}),
+            'max_level': max(levelno for levelno, _ in block)
+        }
+        with (self.archive_dir / INDEX_NAME).open('a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def _remove_old_segments(self):
+        """
+        Removes the oldest segments exceeding ``max_segments`` including
+        the new segment and removes them from the index.
+        """
+        paths = sorted(self._segment_paths(), key=lambda p: _segment_seq(p.name))
+        removed = paths[:max(len(paths) + 1 - self.max_segments, 0)]
+        if not removed:
+            return
+
+        for path in removed:
+            path.unlink()
+
+        removed_names = {p.name for p in removed}
+        index_path = self.archive_dir / INDEX_NAME
+        entries = [e for e in read_index(index_path) if e['segment'] not in removed_names]
+        tmp_path = index_path.with_name(index_path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            f.writelines(json.dumps(e) + '\n' for e in entries)
+        os.replace(str(tmp_path), str(index_path))
+
+    def _segment_paths(self):
+        """
+        Returns the paths of the existing segments.
+
+        Returns
+        -------
+        paths : list[pathlib.Path]
+            Segment paths.
+        """
+        return [p for p in self.archive_dir.glob('segment-*') if _SEGMENT_PATTERN.match(p.name)]
+
+
+class LogArchiveReader(object):
+    """
+    Reader of the log archive written by LogArchiveHandler.
+    It decompresses only the blocks whose time range, loggers and level match
+    the query according to the index.
+    """
+
+    def __init__(self, archive_dir):
+        """
+        Initializes LogArchiveReader.
+
+        Parameters
+        ----------
+        archive_dir : str or pathlib.Path
+            Archive directory.
+        """
+        self.archive_dir = Path(archive_dir)
+
+    def __repr__(self):
+        """
+        Returns string representation of LogArchiveReader.
+
+        Returns
+        -------
+        repr : str
+            String representation of LogArchiveReader.
+        """
+        return '<%s {archive_dir: %s}>' % (type(self).__name__, self.archive_dir)
+
+    def blocks(self, since=None, until=None, loggers=None, min_level=0):
+        """
+        Returns the index entries of the blocks which may contain matching
+        records.
+
+        Parameters
+        ----------
+        since : float or None
+            Start time (UNIX time).
+        until : float or None
+            End time (UNIX time).
+        loggers : list[str] or None
+            Logger names.
+        min_level : int
+            Minimum level number.
+
+        Returns
+        -------
+        blocks : list[dict]
+            Index entries of the blocks in chronological order.
+        """
+        return [
+            e for e in read_index(self.archive_dir / INDEX_NAME)
+            if _match_block(e, since, until, loggers, min_level)
+        ]
+
+    def records(self, since=None, until=None, loggers=None, min_level=0):
+        """
+        Yields matching records in chronological order.
+
+        Parameters
+        ----------
+        since : float or None
+            Start time (UNIX time).
+        until : float or None
+            End time (UNIX time).
+        loggers : list[str] or None
+            Logger names.
+        min_level : int
+            Minimum level number.
+
+        Yields
+        ------
+        record : dict
+            Log record.
+        """
+        for entry in self.blocks(since, until, loggers, min_level):
+            for record in self.read_block(entry):
+                if _match_record(record, since, until, loggers, min_level):
+                    yield record
+
+    def tail(self, num_records, since=None, until=None, loggers=None, min_level=0):
+        """
+        Returns the last matching records reading the blocks backwards.
+
+        Parameters
+        ----------
+        num_records : int
+            Number of records.
+        since : float or None
+            Start time (UNIX time).
+        until : float or None
+            End time (UNIX time).
+        loggers : list[str] or None
+            Logger names.
+        min_level : int
+            Minimum level number.
+
+        Returns
+        -------
+        records : list[dict]
+            Log records in chronological order.
+        """
+        records = deque()
+        for entry in reversed(self.blocks(since, until, loggers, min_level)):
+            matched = [
+                r for r in self.read_block(entry)
+                if _match_record(r, since, until, loggers, min_level)
+            ]
+            records.extendleft(reversed(matched))
+            if len(records) >= num_records:
+                break
+        return list(records)[-num_records:] if num_records > 0 else []
+
+    def follow(self, loggers=None, min_level=0, interval=0.5, after=None):
+        """
+        Yields matching records as they are archived.
+
+        Parameters
+        ----------
+        loggers : list[str] or None
+            Logger names.
+        min_level : int
+            Minimum level number.
+        interval : float
+            Polling interval in seconds.
+        after : tuple(str, int) or None
+            Segment name and offset of the last block which has been read.
+            Blocks after it are yielded. If it is None, only new blocks are
+            yielded.
+
+        Yields
+        ------
+        record : dict
+            Log record.
+        """
+        if after is None:
+            after = self.last_block_key()
+
+        while True:
+            for entry in read_index(self.archive_dir / INDEX_NAME):
+                if _block_key(entry) <= after:
+                    continue
+                after = _block_key(entry)
+                if not _match_block(entry, None, None, loggers, min_level):
+                    continue
+                for record in self.read_block(entry):
+                    if _match_record(record, None, None, loggers, min_level):
+                        yield record
+            time.sleep(interval)
+
+    def last_block_key(self):
+        """
+        Returns the key of the last block, which can be passed to
+        ``follow()`` as ``after``.
+
+        Returns
+        -------
+        key : tuple(str, int)
+            Segment name and offset of the last block.
+        """
+        entries = read_index(self.archive_dir / INDEX_NAME)
+        return _block_key(entries[-1]) if entries else ('', -1)
+
+    def read_block(self, entry):
+        """
+        Reads the records of a block.
+
+        Parameters
+        ----------
+        entry : dict
+            Index entry of the block.
+
+        Returns
+        -------
+        records : list[dict]
+            Log records. It is empty if the segment has been removed.
+        """
+        path = self.archive_dir / entry['segment']
+        try:
+            with path.open('rb') as f:
+                f.seek(entry['offset'])
+                data = f.read(entry['length'])
+        except FileNotFoundError:
+            return []
+        codec = get_codec('zstd' if path.suffix == '.zst' else 'gzip')
+        return [json.loads(line) for line in codec.decompress(data).decode('utf-8').splitlines()]
+
+
+_Codec = namedtuple('_Codec', ['extension', 'compress', 'decompress'])
+
+
+def get_codec(compression):
+    """
+    Returns the codec of a compression method.
+    ``zstd`` requires the optional ``zstandard`` package.
+
+    Parameters
+    ----------
+    compression : str
+        Compression method (``'gzip'`` or ``'zstd'``).
+
+    Returns
+    -------
+    codec : _Codec
+        Codec which has ``extension``, ``compress()`` and ``decompress()``.
+
+    Raises
+    ------
+    ValueError
+        If the compression method is not supported or available.
+    """
+    if compression == 'gzip':
+        return _Codec('gz', lambda d: gzip.compress(d, compresslevel=6), gzip.decompress)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires 'zstandard' (pip install zstandard)")
+        return _Codec(
+            'zst',
+            zstandard.ZstdCompressor().compress,
+            lambda d: zstandard.ZstdDecompressor().decompress(d, max_output_size=1 << 30)
+        )
+    raise ValueError(
+        'Invalid compression: {!r} (must be one of {})'.format(
+            compression, ', '.join(COMPRESSIONS)
+        )
+    )
+
+
+def parse_time(value, now=None):
+    """
+    Parses a time given by a command line option.
+
+    Parameters
+    ----------
+    value : str
+        Relative time (e.g. ``'30s'``, ``'10m'``, ``'2h'``, ``'1d'``) or local
+        date and/or time (e.g. ``'2018-03-01T12:00'``, ``'2018-03-01'``,
+        ``'12:00:30'``). A time without date is regarded as today.
+    now : float or None
+        Current time (UNIX time).
+
+    Returns
+    -------
+    time : float
+        UNIX time.
+
+    Raises
+    ------
+    ValueError
+        If the value is not a valid time.
+    """
+    now = time.time() if now is None else now
+    match = _RELATIVE_TIME_PATTERN.match(value.strip())
+    if match:
+        return now - float(match.group(1)) * _TIME_UNITS[match.group(2)]
+
+    for fmt in _DATETIME_FORMATS:
+        try:
+            parsed = datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+        if '%Y' not in fmt:
+            today = datetime.fromtimestamp(now)
+            parsed = parsed.replace(year=today.year, month=today.month, day=today.day)
+        return parsed.timestamp()
+
+    raise ValueError('Invalid time: {!r}'.format(value))
+
+
+def read_index(index_path):
+    """
+    Reads the index of the log archive.
+    A line which is being written is ignored.
+
+    Parameters
+    ----------
+    index_path : pathlib.Path
+        Index file path.
+
+    Returns
+    -------
+    entries : list[dict]
+        Index entries.
+    """
+    try:
+        with index_path.open(encoding='utf-8') as f:
+            lines = f.read().split('\n')
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in lines[:-1] if line]
+
+
+def _segment_seq(name):
+    """
+    Returns the sequence number of a segment.
+
+    Parameters
+    ----------
+    name : str
+        Segment file name.
+
+    Returns
+    -------
+    seq : int
+        Sequence number.
+    """
+    match = _SEGMENT_PATTERN.match(name)
+    return int(match.group(1)) if match else 0
+
+
+def _block_key(entry):
+    """
+    Returns the key to order blocks.
+
+    Parameters
+    ----------
+    entry : dict
+        Index entry.
+
+    Returns
+    -------
+    key : tuple(str, int)
+        Segment name and offset.
+    """
+    return entry['segment'], entry['offset']
+
+
+def _match_block(entry, since, until, loggers, min_level):
+    """
+    Returns whether a block may contain matching records.
+
+    Parameters
+    ----------
+    entry : dict
+        Index entry.
+    since : float or None
+        Start time (UNIX time).
+    until : float or None
+        End time (UNIX time).
+    loggers : list[str] or None
+        Logger names.
+    min_level : int
+        Minimum level number.
+
+    Returns
+    -------
+    match : bool
+        Whether the block may contain matching records.
+    """
+    return not (
+        (since is not None and entry['end'] < since) or
+        (until is not None and entry['start'] > until) or
+        (loggers and not set(loggers) & set(entry['loggers'])) or entry['max_level'] < min_level
+    )
+
+
+def _match_record(record, since, until, loggers, min_level):
+    """
+    Returns whether a record matches the query.
+
+    Parameters
+    ----------
+    record : dict
+        Log record.
+    since : float or None
+        Start time (UNIX time).
+    until : float or None
+        End time (UNIX time).
+    loggers : list[str] or None
+        Logger names.
+    min_level : int
+        Minimum level number.
+
+    Returns
+    -------
+    match : bool
+        Whether the record matches the query.
+    """
+    return not (
+        (since is not None and record['created'] < since) or
+        (until is not None and record['created'] > until) or
+        (loggers and record['logger'] not in loggers) or
+        level_number(record['levelname']) < min_level
+    )
+
+
+def level_number(levelname):
+    """
+    Returns the level number of a level name.
+
+    Parameters
+    ----------
+    levelname : str
+        Level name (e.g. ``'INFO'``).
+
+    Returns
+    -------
+    levelno : int
+        Level number (0 if it is unknown).
+    """
+    levelno = logging.getLevelName(levelname.upper())
+    return levelno if isinstance(levelno, int) else 0
@@ -1,10 +1,30 @@
 # -*- coding: utf-8 -*-
 
+import json
 import logging
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
 
+from .ansi import strip_escape_sequences
 from .display import Color, background_color, display_reset, foreground_color
 from .utils import str_value
 
+JSON_LOG_NAME = 'log.jsonl'
+
+LOG_FORMAT = (
+    '%(time_color)s%(asctime)s.%(msecs).03d%(time_color_end)s '
+    '%(name_color)s%(name)14s%(name_color_end)s '
+    '%(level_color)s %(levelname)1.1s %(level_color_end)s %(message)s'
+)
+
+# Attributes of LogRecord which are not passed by ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime'
+}
+
+_JSON_PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
 
 class LogFormatter(logging.Formatter):
     """
@@ -78,6 +98,7 @@ class LogFormatter(logging.Formatter):
             Formatted text.
         """
         rec = logging.getLogRecordFactory()(level=record.levelno, **record.__dict__)
+        rec.__dict__.update(record.__dict__)  # keep the creation time and extra fields
 
         try:
             rec.message = rec.getMessage()
@@ -171,6 +192,7 @@ class JaffleCommandLogHandler(logging.StreamHandler):
         super().__init__()
 
         self.conf = conf
+        self.limiters = {}
 
     def emit(self, record):
         """
@@ -181,16 +203,19 @@ class JaffleCommandLogHandler(logging.StreamHandler):
         record : logging.LogRecord
             Log record.
         """
+        try:
+            msg = record.getMessage()
+        except Exception as e:
+            msg = 'Bad message (%r): %r' % (e, record.msg)
+
         if any([
-            r.search(record.msg)
+            r.search(msg)
             for r in self.conf.app_log_suppress_patterns.get(record.name, []) +
             self.conf.process_log_suppress_patterns.get(record.name, []) +
             self.conf.global_log_suppress_patterns
         ]):
             return
 
-        msg = record.msg
-
         for pattern, replace in (
             self.conf.app_log_replace_patterns.get(record.name, []) +
             self.conf.process_log_replace_patterns.get(record.name,
@@ -205,5 +230,469 @@ class JaffleCommandLogHandler(logging.StreamHandler):
 
             msg = pattern.sub(subtract, msg)
 
+        # The message is rendered only once here.
         record.msg = msg
-        super().emit(record)
+        record.args = None
+
+        limiter = self._get_limiter(record.name)
+        if limiter is None:
+            super().emit(record)
+            return
+
+        for rec in limiter.filter(record):
+            super().emit(rec)
+
+    def emit_summaries(self):
+        """
+        Emits the summaries of repeated and rate-limited messages which have
+        not been reported yet. It should be called periodically.
+        """
+        self.acquire()
+        try:
+            for limiter in list(self.limiters.values()):
+                for rec in limiter.summarize():
+                    super().emit(rec)
+        finally:
+            self.release()
+
+    def _get_limiter(self, logger_name):
+        """
+        Returns the limiter of a logger. The limiter is recreated if the
+        configuration has been changed.
+
+        Parameters
+        ----------
+        logger_name : str
+            Logger name.
+
+        Returns
+        -------
+        limiter : LogLimiter or None
+            Limiter of the logger or None if the logger is not limited.
+        """
+        rate_limit, collapse_repeats = self.conf.log_limits.get(
+            logger_name, self.conf.global_log_limit
+        )
+        limiter = self.limiters.get(logger_name)
+        if limiter and (limiter.rate_limit, limiter.collapse_repeats) == (
+            rate_limit, collapse_repeats
+        ):
+            return limiter
+
+        if limiter:
+            for rec in limiter.summarize():
+                super().emit(rec)
+        if rate_limit <= 0 and not collapse_repeats:
+            self.limiters.pop(logger_name, None)
+            return None
+        limiter = LogLimiter(logger_name, rate_limit, collapse_repeats)
+        self.limiters[logger_name] = limiter
+        return limiter
+
+
+class LogLimiter(object):
+    """
+    LogLimiter limits the log records of a logger by a token bucket and
+    collapses repeated messages into a "last message repeated N times"
+    summary. The number of dropped records is reported as a summary record.
+    """
+
+    def __init__(self, name, rate_limit=0.0, collapse_repeats=False, burst=None):
+        """
+        Initializes LogLimiter.
+
+        Parameters
+        ----------
+        name : str
+            Logger name.
+        rate_limit : float
+            Maximum number of records per second (0: unlimited).
+        collapse_repeats : bool
+            Whether to collapse repeated messages.
+        burst : float or None
+            Capacity of the token bucket (default: ``max(rate_limit, 1)``).
+        """
+        self.name = name
+        self.rate_limit = rate_limit
+        self.collapse_repeats = collapse_repeats
+        self.burst = burst or max(rate_limit, 1.0)
+
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.last_record = None
+        self.repeats = 0
+        self.suppressed = 0
+
+    def __repr__(self):
+        """
+        Returns string representation of LogLimiter.
+
+        Returns
+        -------
+        repr : str
+            String representation of LogLimiter.
+        """
+        return '<%s {name: %s rate_limit: %s collapse_repeats: %s}>' % (
+            type(self).__name__, self.name, self.rate_limit, self.collapse_repeats
+        )
+
+    def filter(self, record):
+        """
+        Filters a log record whose message has been rendered.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Log record.
+
+        Returns
+        -------
+        records : list[logging.LogRecord]
+            Records to be emitted including the pending summaries.
+        """
+        last = self.last_record
+        if (
+            self.collapse_repeats and last is not None and record.levelno == last.levelno and
+            record.msg == last.msg and not record.exc_text and not record.exc_info
+        ):
+            self.repeats += 1
+            return []
+
+        records = self._summarize_repeats()
+        if self.rate_limit > 0 and not self._consume():
+            self.suppressed += 1
+            self.last_record = None  # the last shown message is not the last one any more
+            return records
+
+        records.extend(self._summarize_suppressed())
+        if self.collapse_repeats:
+            self.last_record = record
+        records.append(record)
+        return records
+
+    def summarize(self):
+        """
+        Returns the summary records of the repeated and suppressed messages
+        and resets the counts.
+
+        Returns
+        -------
+        records : list[logging.LogRecord]
+            Summary records.
+        """
+        return self._summarize_repeats() + self._summarize_suppressed()
+
+    def _summarize_repeats(self):
+        """
+        Returns the summary record of the repeated messages if any and resets
+        the count.
+
+        Returns
+        -------
+        records : list[logging.LogRecord]
+            Summary record.
+        """
+        if not self.repeats:
+            return []
+        record = self._make_summary(
+            self.last_record.levelno, 'Last message repeated %d times', self.repeats
+        )
+        self.repeats = 0
+        return [record]
+
+    def _summarize_suppressed(self):
+        """
+        Returns the summary record of the rate-limited messages if any and
+        resets the count.
+
+        Returns
+        -------
+        records : list[logging.LogRecord]
+            Summary record.
+        """
+        if not self.suppressed:
+            return []
+        record = self._make_summary(
+            logging.WARNING, 'Suppressed %d messages (rate limit: %g/s)', self.suppressed,
+            self.rate_limit
+        )
+        self.suppressed = 0
+        return [record]
+
+    def _consume(self):
+        """
+        Takes a token from the bucket if available.
+
+        Returns
+        -------
+        consumed : bool
+            Whether a token has been taken.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate_limit)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def _make_summary(self, levelno, msg, *args):
+        """
+        Creates a summary record.
+
+        Parameters
+        ----------
+        levelno : int
+            Log level.
+        msg : str
+            Message format.
+        args : tuple
+            Message arguments.
+
+        Returns
+        -------
+        record : logging.LogRecord
+            Summary record.
+        """
+        return logging.LogRecord(self.name, levelno, '', 0, msg % args, None, None)
+
+
+class JSONLogFormatter(logging.Formatter):
+    """
+    Log formatter which formats a log record as a JSON line.
+    Escape sequences are dropped from the message.
+    """
+
+    def format(self, record):
+        """
+        Formats the log record as a JSON line.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Log record.
+
+        Returns
+        -------
+        formatted : str
+            JSON encoded log record.
+        """
+        return json.dumps(self.to_dict(record), ensure_ascii=False)
+
+    def to_dict(self, record):
+        """
+        Converts the log record into a dict to be encoded as JSON.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Log record.
+
+        Returns
+        -------
+        data : dict
+            JSON serializable log record.
+        """
+        try:
+            message = record.getMessage()
+        except Exception as e:
+            message = 'Bad message (%r): %r' % (e, record.msg)
+
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'created': record.created,
+            'logger': record.name,
+            'levelname': record.levelname,
+            'message': strip_escape_sequences(message)
+        }
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = self.formatException(record.exc_info)
+        if exc_text:
+            data['exc_text'] = exc_text
+        if record.stack_info:
+            data['stack_info'] = record.stack_info
+        extra = _record_extra(record)
+        if extra:
+            data['extra'] = extra
+        return data
+
+
+class JSONLinesLogHandler(logging.FileHandler):
+    """
+    Log handler which appends log records to a JSON-lines file.
+    """
+
+    def __init__(self, file_path):
+        """
+        Initializes JSONLinesLogHandler.
+
+        Parameters
+        ----------
+        file_path : str or pathlib.Path
+            JSON-lines file path.
+        """
+        super().__init__(str(file_path), mode='a', encoding='utf-8')
+
+        self.setFormatter(JSONLogFormatter())
+
+
+def record_to_dict(record, formatter=None):
+    """
+    Converts a log record into a JSON serializable dict to be sent to the
+    Jaffle server. The message is not rendered if the arguments are JSON
+    primitives so that it is rendered only once on the server side.
+
+    Parameters
+    ----------
+    record : logging.LogRecord
+        Log record.
+    formatter : logging.Formatter or None
+        Formatter to format the exception.
+
+    Returns
+    -------
+    data : dict
+        JSON serializable log record.
+    """
+    msg, args = record.msg, record.args
+    if not isinstance(msg, str) or not _is_json_primitive_args(args):
+        msg, args = record.getMessage(), None
+
+    exc_text = record.exc_text
+    if record.exc_info and not exc_text:
+        exc_text = (formatter or logging.Formatter()).formatException(record.exc_info)
+
+    return {
+        'logger': record.name,
+        'levelname': record.levelname,
+        'msg': msg,
+        'args': args,
+        'created': record.created,
+        'msecs': record.msecs,
+        'pathname': record.pathname,
+        'lineno': record.lineno,
+        'funcName': record.funcName,
+        'processName': record.processName,
+        'threadName': record.threadName,
+        'exc_text': exc_text,
+        'stack_info': record.stack_info,
+        'extra': _record_extra(record)
+    }
+
+
+def record_from_dict(data):
+    """
+    Creates a log record from a dict created by ``record_to_dict()``
+    keeping its original creation time.
+
+    Parameters
+    ----------
+    data : dict
+        Log record data.
+
+    Returns
+    -------
+    record : logging.LogRecord
+        Log record.
+    """
+    args = data.get('args')
+    if isinstance(args, list):
+        args = tuple(args)
+    elif isinstance(args, dict):
+        args = (args, )  # LogRecord unwraps a single mapping
+
+    record = logging.LogRecord(
+        data['logger'],
+        logging.getLevelName(data['levelname'].upper()),
+        data.get('pathname') or '',
+        data.get('lineno') or 0,
+        data['msg'],
+        args,
+        None,
+        func=data.get('funcName'),
+        sinfo=data.get('stack_info')
+    )
+    if data.get('created') is not None:
+        record.created = data['created']
+        if data.get('msecs') is not None:
+            record.msecs = data['msecs']  # computed differently across Python versions
+        else:
+            record.msecs = (record.created - int(record.created)) * 1000
+        record.relativeCreated = (record.created - logging._startTime) * 1000
+    record.exc_text = data.get('exc_text')
+    record.processName = data.get('processName', record.processName)
+    record.threadName = data.get('threadName', record.threadName)
+    for key, value in (data.get('extra') or {}).items():
+        if key not in _RECORD_ATTRS:
+            setattr(record, key, value)
+    return record
+
+
+def _is_json_primitive_args(args):
+    """
+    Returns whether the log arguments consist of JSON primitives, which are
+    rendered in the same way after JSON serialization.
+
+    Parameters
+    ----------
+    args : tuple or dict or None
+        Log arguments.
+
+    Returns
+    -------
+    is_primitive : bool
+        Whether the arguments consist of JSON primitives.
+    """
+    if not args:
+        return True
+    if isinstance(args, Mapping):
+        return all(
+            isinstance(k, str) and type(v) in _JSON_PRIMITIVE_TYPES for k, v in args.items()
+        )
+    return isinstance(args, tuple) and all(type(a) in _JSON_PRIMITIVE_TYPES for a in args)
+
+
+def _record_extra(record):
+    """
+    Returns the extra fields of a log record converted to JSON serializable
+    values.
+
+    Parameters
+    ----------
+    record : logging.LogRecord
+        Log record.
+
+    Returns
+    -------
+    extra : dict
+        Extra fields.
+    """
+    return {
+        k: _json_value(v)
+        for k, v in vars(record).items() if k not in _RECORD_ATTRS and not k.startswith('_')
+    }
+
+
+def _json_value(value):
+    """
+    Converts a value to a JSON serializable value.
+    Non-serializable values are converted by ``repr()``.
+
+    Parameters
+    ----------
+    value : object
+        Value.
+
+    Returns
+    -------
+    value : object
+        JSON serializable value.
+    """
+    if type(value) in _JSON_PRIMITIVE_TYPES:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    if isinstance(value, Mapping):
+        return {str(k): _json_value(v) for k, v in value.items()}
+    return repr(value)
@@ -0,0 +1,743 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_unix_socket
+from tornado.web import Application, RequestHandler
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_NAME_PATTERN = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*$')
+_LABEL_NAME_PATTERN = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+
+
+class Metric(object):
+    """
+    Base class of metrics. A metric has a value for each combination of the
+    label values. Updating a value is thread-safe.
+    """
+
+    metric_type = None
+
+    def __init__(self, name, help='', labelnames=()):
+        """
+        Initializes Metric.
+
+        Parameters
+        ----------
+        name : str
+            Metric name (e.g. ``jaffle_watchdog_events_total``).
+        help : str
+            Description of the metric.
+        labelnames : list[str]
+            Label names.
+        """
+        if not _NAME_PATTERN.match(name):
+            raise ValueError('Invalid metric name: {!r}'.format(name))
+        for label_name in labelnames:
+            if not _LABEL_NAME_PATTERN.match(label_name):
+                raise ValueError('Invalid label name of {}: {!r}'.format(name, label_name))
+
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """
+        Returns string representation of Metric.
+
+        Returns
+        -------
+        repr : str
+            String representation of Metric.
+        """
+        return '<%s {name: %s labelnames: %s}>' % (
+            type(self).__name__, self.name, list(self.labelnames)
+        )
+
+    def get(self, **labels):
+        """
+        Returns the current value for the labels.
+
+        Parameters
+        ----------
+        labels : dict{str: object}
+            Label values.
+
+        Returns
+        -------
+        value : object
+            Current value or None if it has not been updated yet.
+        """
+        with self._lock:
+            return self._copy_value(self._values.get(self._key(labels)))
+
+    def snapshot(self):
+        """
+        Returns the metric and all values as JSON serializable data.
+
+        Returns
+        -------
+        data : dict
+            Snapshot of the metric.
+        """
+        with self._lock:
+            samples = [{
+                'labels': dict(zip(self.labelnames, key)),
+                'value': self._copy_value(value)
+            } for key, value in sorted(self._values.items())]
+        return {
+            'name': self.name,
+            'type': self.metric_type,
+            'help': self.help,
+            'samples': samples
+        }
+
+    def _key(self, labels):
+        """
+        Returns the key of the values for the labels.
+
+        Parameters
+        ----------
+        labels : dict{str: object}
+            Label values.
+
+        Returns
+        -------
+        key : tuple(str)
+            Label values in the order of ``labelnames``.
+
+        Raises
+        ------
+        ValueError
+            If the label names do not match ``labelnames``.
+        """
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                'Invalid labels of {}: {} (must be {})'.format(
+                    self.name, sorted(labels), list(self.labelnames)
+                )
+            )
+        try:
+            return tuple(str(labels[n]) for n in self.labelnames)
+        except KeyError:
+            raise ValueError(
+                'Invalid labels of {}: {} (must be {})'.format(
+                    self.name, sorted(labels), list(self.labelnames)
+                )
+            )
+
+    @staticmethod
+    def _copy_value(value):
+        """
+        Returns a copy of a value which is not shared with the metric.
+
+        Parameters
+        ----------
+        value : object
+            Value.
+
+        Returns
+        -------
+        value : object
+            Copied value.
+        """
+        return value
+
+
+class Counter(Metric):
+    """
+    Counter is a metric which only increases.
+    """
+
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Increases the value for the labels.
+
+        Parameters
+        ----------
+        amount : int or float
+            Amount to be added (must not be negative).
+        labels : dict{str: object}
+            Label values.
+        """
+        if amount < 0:
+            raise ValueError('Counter {} cannot be decreased: {}'.format(self.name, amount))
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Gauge is a metric which can go up and down.
+    """
+
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        """
+        Sets the value for the labels.
+
+        Parameters
+        ----------
+        value : int or float
+            Value.
+        labels : dict{str: object}
+            Label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        """
+        Increases the value for the labels.
+
+        Parameters
+        ----------
+        amount : int or float
+            Amount to be added.
+        labels : dict{str: object}
+            Label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """
+        Decreases the value for the labels.
+
+        Parameters
+        ----------
+        amount : int or float
+            Amount to be subtracted.
+        labels : dict{str: object}
+            Label values.
+        """
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    Histogram counts observed values in fixed buckets and keeps their sum.
+    The value for each set of labels is a dict of the non-cumulative bucket
+    counts (``buckets``), ``sum`` and ``count``.
+    """
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, help='', labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Initializes Histogram.
+
+        Parameters
+        ----------
+        name : str
+            Metric name (e.g. ``jaffle_job_duration_seconds``).
+        help : str
+            Description of the metric.
+        labelnames : list[str]
+            Label names.
+        buckets : list[float]
+            Upper bounds of the buckets. The ``+Inf`` bucket is implicit.
+        """
+        super().__init__(name, help, labelnames)
+
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def observe(self, value, **labels):
+        """
+        Observes a value for the labels.
+
+        Parameters
+        ----------
+        value : int or float
+            Observed value.
+        labels : dict{str: object}
+            Label values.
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    'buckets': [0] * len(self.buckets),
+                    'sum': 0.0,
+                    'count': 0
+                }
+            if index < len(self.buckets):
+                state['buckets'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def snapshot(self):
+        """
+        Returns the metric and all values as JSON serializable data.
+
+        Returns
+        -------
+        data : dict
+            Snapshot of the metric.
+        """
+        return dict(super().snapshot(), buckets=list(self.buckets))
+
+    @staticmethod
+    def _copy_value(value):
+        """
+        Returns a copy of a value which is not shared with the metric.
+
+        Parameters
+        ----------
+        value : dict or None
+            Value.
+
+        Returns
+        -------
+        value : dict or None
+            Copied value.
+        """
+        if value is None:
+            return None
+        return dict(value, buckets=list(value['buckets']))
+
+
+class MetricsRegistry(object):
+    """
+    MetricsRegistry holds the metrics of a Jaffle server or a Jaffle app.
+    A metric is created on the first access and the same instance is
+    returned afterwards.
+    """
+
+    def __init__(self):
+        """
+        Initializes MetricsRegistry.
+        """
+        self.metrics = OrderedDict()
+
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """
+        Returns string representation of MetricsRegistry.
+
+        Returns
+        -------
+        repr : str
+            String representation of MetricsRegistry.
+        """
+        return '<%s {metrics: %s}>' % (type(self).__name__, list(self.metrics))
+
+    def counter(self, name, help='', labelnames=()):
+        """
+        Returns a counter.
+
+        Parameters
+        ----------
+        name : str
+            Metric name.
+        help : str
+            Description of the metric.
+        labelnames : list[str]
+            Label names.
+
+        Returns
+        -------
+        counter : Counter
+            Counter.
+        """
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name, help='', labelnames=()):
+        """
+        Returns a gauge.
+
+        Parameters
+        ----------
+        name : str
+            Metric name.
+        help : str
+            Description of the metric.
+        labelnames : list[str]
+            Label names.
+
+        Returns
+        -------
+        gauge : Gauge
+            Gauge.
+        """
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help='', labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Returns a histogram.
+
+        Parameters
+        ----------
+        name : str
+            Metric name.
+        help : str
+            Description of the metric.
+        labelnames : list[str]
+            Label names.
+        buckets : list[float]
+            Upper bounds of the buckets.
+
+        Returns
+        -------
+        histogram : Histogram
+            Histogram.
+        """
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def snapshot(self):
+        """
+        Returns all metrics as JSON serializable data, which can be sent to
+        the Jaffle server.
+
+        Returns
+        -------
+        data : list[dict]
+            Snapshots of the metrics.
+        """
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return [m.snapshot() for m in metrics]
+
+    def _get_or_create(self, metric_cls, name, help, labelnames, **kwargs):
+        """
+        Returns a metric creating it if it does not exist.
+
+        Parameters
+        ----------
+        metric_cls : type
+            Metric class.
+        name : str
+            Metric name.
+        help : str
+            Description of the metric.
+        labelnames : list[str]
+            Label names.
+        kwargs : dict
+            Additional arguments to the metric class.
+
+        Returns
+        -------
+        metric : Metric
+            Metric.
+
+        Raises
+        ------
+        ValueError
+            If a metric of another type or labels has the same name.
+        """
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = self.metrics[name] = metric_cls(name, help, labelnames, **kwargs)
+        if type(metric) is not metric_cls or metric.labelnames != tuple(labelnames):
+            raise ValueError(
+                'Metric {} is already registered as a {} with labels {}'.format(
+                    name, metric.metric_type, list(metric.labelnames)
+                )
+            )
+        return metric
+
+
+class MetricsLogHandler(logging.Handler):
+    """
+    Log handler which counts log records by logger and level.
+    """
+
+    def __init__(self, registry):
+        """
+        Initializes MetricsLogHandler.
+
+        Parameters
+        ----------
+        registry : MetricsRegistry
+            Registry to hold the counter.
+        """
+        super().__init__()
+
+        self.counter = registry.counter(
+            'jaffle_log_records_total', 'Log records by logger and level.', ['logger', 'level']
+        )
+
+    def emit(self, record):
+        """
+        Counts a log record.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Log record.
+        """
+        self.counter.inc(logger=record.name, level=record.levelname.lower())
+
+
+class MetricsServer(object):
+    """
+    HTTP server which exposes metrics in the Prometheus text format at
+    ``/metrics`` on a local TCP port and/or a Unix socket.
+    """
+
+    def __init__(self, render, log, port=0, host='127.0.0.1', socket_path=None):
+        """
+        Initializes MetricsServer.
+
+        Parameters
+        ----------
+        render : function
+            Function which returns the metrics in the Prometheus text format.
+        log : logging.Logger
+            Logger.
+        port : int
+            TCP port to listen on (0: disabled).
+        host : str
+            Host address to listen on.
+        socket_path : str or None
+            Unix socket path to listen on.
+        """
+        self.render = render
+        self.log = log
+        self.port = port
+        self.host = host
+        self.socket_path = socket_path
+
+        self.server = None
+
+    def __repr__(self):
+        """
+        Returns string representation of MetricsServer.
+
+        Returns
+        -------
+        repr : str
+            String representation of MetricsServer.
+        """
+        return '<%s {host: %s port: %s socket_path: %s}>' % (
+            type(self).__name__, self.host, self.port, self.socket_path
+        )
+
+    def start(self):
+        """
+        Starts listening.
+        """
+        app = Application([(r'/metrics', MetricsHandler, {'render': self.render})])
+        self.server = HTTPServer(app)
+        if self.port:
+            self.server.listen(self.port, address=self.host)
+        if self.socket_path:
+            self.server.add_socket(bind_unix_socket(self.socket_path, mode=0o600))
+
+    def close(self):
+        """
+        Stops listening and removes the Unix socket file.
+        """
+        if self.server:
+            self.server.stop()
+        self.server = None
+
+        if self.socket_path:
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+
+class MetricsHandler(RequestHandler):
+    """
+    Request handler which returns the metrics in the Prometheus text format.
+    """
+
+    def initialize(self, render):
+        """
+        Initializes MetricsHandler.
+
+        Parameters
+        ----------
+        render : function
+            Function which returns the metrics in the Prometheus text format.
+        """
+        self.render_metrics = render
+
+    def get(self):
+        """
+        Returns the metrics.
+        """
+        self.set_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.finish(self.render_metrics())
+
+
+def render_text(snapshots):
+    """
+    Renders metric snapshots in the Prometheus text format. Metrics having the
+    same name in multiple snapshots are merged into one metric family.
+
+    Parameters
+    ----------
+    snapshots : list[tuple(list[dict], dict{str: str})]
+        Pairs of metric snapshots (``MetricsRegistry.snapshot()``) and labels
+        to be added to their samples (e.g. ``{'app': 'pytest'}``).
+
+    Returns
+    -------
+    text : str
+        Metrics in the Prometheus text format.
+    """
+    families = OrderedDict()
+    for metrics, extra_labels in snapshots:
+        for metric in metrics:
+            family = families.setdefault(metric['name'], (metric, []))
+            if family[0]['type'] != metric['type']:
+                continue  # conflicting type
+            family[1].extend(
+                (metric, dict(sample['labels'], **extra_labels), sample['value'])
+                for sample in metric['samples']
+            )
+
+    lines = []
+    for name, (metric, samples) in families.items():
+        if metric['help']:
+            lines.append('# HELP {} {}'.format(name, _escape_help(metric['help'])))
+        lines.append('# TYPE {} {}'.format(name, metric['type']))
+        for sample_metric, labels, value in samples:
+            if metric['type'] == 'histogram':
+                lines.extend(_render_histogram(name, sample_metric['buckets'], labels, value))
+            else:
+                lines.append(_render_sample(name, labels, value))
+    return ''.join(line + '\n' for line in lines)
+
+
+def _render_histogram(name, buckets, labels, value):
+    """
+    Renders the samples of a histogram.
+
+    Parameters
+    ----------
+    name : str
+        Metric name.
+    buckets : list[float]
+        Upper bounds of the buckets.
+    labels : dict{str: str}
+        Labels.
+    value : dict
+        Non-cumulative bucket counts, sum and count.
+
+    Returns
+    -------
+    lines : list[str]
+        Sample lines.
+    """
+    lines = []
+    cumulative = 0
+    for bound, count in zip(buckets, value['buckets']):
+        cumulative += count
+        lines.append(
+            _render_sample(name + '_bucket', dict(labels, le=_format_value(bound)), cumulative)
+        )
+    lines.append(_render_sample(name + '_bucket', dict(labels, le='+Inf'), value['count']))
+    lines.append(_render_sample(name + '_sum', labels, value['sum']))
+    lines.append(_render_sample(name + '_count', labels, value['count']))
+    return lines
+
+
+def _render_sample(name, labels, value):
+    """
+    Renders a sample line.
+
+    Parameters
+    ----------
+    name : str
+        Sample name.
+    labels : dict{str: str}
+        Labels.
+    value : int or float
+        Sample value.
+
+    Returns
+    -------
+    line : str
+        Sample line.
+    """
+    if labels:
+        label_text = ','.join(
+            '{}="{}"'.format(k, _escape_label_value(str(v))) for k, v in labels.items()
+        )
+        return '{}{{{}}} {}'.format(name, label_text, _format_value(value))
+    return '{} {}'.format(name, _format_value(value))
+
+
+def _format_value(value):
+    """
+    Formats a sample value.
+
+    Parameters
+    ----------
+    value : int or float
+        Sample value.
+
+    Returns
+    -------
+    text : str
+        Formatted value.
+    """
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def _escape_help(text):
+    """
+    Escapes a help text.
+
+    Parameters
+    ----------
+    text : str
+        Help text.
+
+    Returns
+    -------
+    text : str
+        Escaped help text.
+    """
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label_value(text):
+    """
+    Escapes a label value.
+
+    Parameters
+    ----------
+    text : str
+        Label value.
+
+    Returns
+    -------
+    text : str
+        Escaped label value.
+    """
+    return text.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
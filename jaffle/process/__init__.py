@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 
 from .process import Process  # noqa
+from .supervisor import ProcessSupervisor, check_dependencies  # noqa
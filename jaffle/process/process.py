@@ -1,14 +1,51 @@
 # -*- coding: utf-8 -*-
 
+import codecs
+import errno
+import fcntl
 import os
+import pty
 import shlex
 import signal
-from subprocess import TimeoutExpired
+import struct
+import termios
+import time
 
 from tornado import gen
 from tornado.escape import to_unicode
-from tornado.iostream import StreamClosedError
+from tornado.iostream import PipeIOStream, StreamClosedError
 from tornado.process import Subprocess
+from tornado.util import errno_from_exception
+
+from ..ansi import TerminalOutputFilter
+
+READ_CHUNK_SIZE = 65536
+# Number of lines to be handled before yielding to the IO loop
+LINES_PER_YIELD = 100
+
+
+class PTYStream(PipeIOStream):
+    """
+    Stream of a PTY master, which regards EIO as the end of the stream.
+    Reading the PTY master fails with EIO after all slave fds are closed.
+    """
+
+    def read_from_fd(self):
+        """
+        Reads a chunk from the PTY master.
+
+        Returns
+        -------
+        chunk : bytes or None
+            Chunk read from the PTY master or None if no data is available.
+        """
+        try:
+            return super().read_from_fd()
+        except (IOError, OSError) as e:
+            if errno_from_exception(e) != errno.EIO:
+                raise
+            self.close()
+            return None
 
 
 class Process(object):
@@ -25,7 +62,8 @@ class Process(object):
         env=None,
         log_suppress_regex=None,
         log_replace_regex=None,
-        color=True
+        color=True,
+        metrics=None
     ):
         """
         Initializes Process.
@@ -48,6 +86,8 @@ class Process(object):
             Log replace patterns.
         color : bool
             Whether to enable color output.
+        metrics : MetricsRegistry or None
+            Registry to record the metrics of the process.
         """
         self.log = log
         self.proc_name = proc_name
@@ -55,8 +95,10 @@ class Process(object):
         self.tty = tty
         self.env = env or {}
         self.color = color
+        self.metrics = metrics
 
         self.proc = None
+        self.line_handlers = []
 
     def __repr__(self):
         """
@@ -71,10 +113,27 @@ class Process(object):
             self.__class__.__name__, self.proc_name, self.command, self.tty, self.env
         )
 
+    @property
+    def is_running(self):
+        """
+        Returns whether the process is running.
+
+        Returns
+        -------
+        is_running : bool
+            Whether the process is running.
+        """
+        return self.proc is not None and self.proc.proc.poll() is None
+
     @gen.coroutine
     def start(self):
         """
-        Starts the process.
+        Starts the process and redirects its output to the logger.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the exit status of the process.
         """
         self.log.info('Starting %s: %r', self.proc_name, self.command)
 
@@ -82,47 +141,207 @@ class Process(object):
         env.update(**self.env)
 
         if self.tty:
-            command = 'jaffle tty {} {!r}'.format(
-                '' if self.color else '--disable-color', self.command
-            )
+            master_fd, slave_fd = self._open_pty()
+            try:
+                proc = self.proc = Subprocess(
+                    shlex.split(self.command),
+                    env=env,
+                    stdin=slave_fd,
+                    stdout=slave_fd,
+                    stderr=slave_fd,
+                    preexec_fn=self._set_controlling_tty
+                )
+            except Exception:
+                os.close(master_fd)
+                raise
+            finally:
+                os.close(slave_fd)
+            stream = PTYStream(master_fd)
         else:
-            command = self.command
-
-        # os.setpgrp() is required to prevent SIGINT propagation
-        self.proc = Subprocess(
-            shlex.split(command),
-            env=env,
-            stdin=None,
-            stdout=Subprocess.STREAM,
-            stderr=Subprocess.STREAM,
-            preexec_fn=os.setpgrp
-        )
+            # os.setpgrp() is required to prevent SIGINT propagation
+            proc = self.proc = Subprocess(
+                shlex.split(self.command),
+                env=env,
+                stdin=None,
+                stdout=Subprocess.STREAM,
+                stderr=Subprocess.STREAM,
+                preexec_fn=os.setpgrp
+            )
+            stream = proc.stdout
         self.log.debug('proc: %s', self.proc)
+        if self.metrics:
+            self.metrics.counter(
+                'jaffle_process_starts_total', 'External process starts.', ['process']
+            ).inc(process=self.proc_name)
 
         try:
-            while True:
-                line_bytes = yield self.proc.stdout.read_until(b'\n')
-                line = to_unicode(line_bytes).strip('\r\n')
-                self.log.info(line)
+            if self.tty:
+                yield self._read_tty(stream)
+            else:
+                count = 0
+                while True:
+                    line_bytes = yield stream.read_until(b'\n')
+                    self._handle_line(to_unicode(line_bytes))
+                    count += 1
+                    if count % LINES_PER_YIELD == 0:
+                        # A buffered read resolves immediately, which would
+                        # starve the IO loop while the process floods output.
+                        yield gen.moment
         except StreamClosedError:
             self.log.warning('Process %s finished', self.proc_name)
         except Exception as e:
             self.log.error(str(e))
+            return None
+        finally:
+            if self.tty:
+                stream.close()
+
+        # Popen.poll() is used instead of Subprocess.wait_for_exit() because
+        # the process may be reaped by stop().
+        while proc.proc.poll() is None:
+            yield gen.sleep(0.1)
+        if self.metrics:
+            self.metrics.counter(
+                'jaffle_process_exits_total', 'External process exits by exit status.',
+                ['process', 'returncode']
+            ).inc(process=self.proc_name, returncode=proc.proc.returncode)
+        return proc.proc.returncode
+
+    @gen.coroutine
+    def _read_tty(self, stream):
+        """
+        Reads the output of the PTY master until the process closes the PTY.
+        Escape sequences are dropped incrementally even if they are split
+        across reads and carriage return redraws are collapsed.
+
+        Parameters
+        ----------
+        stream : tornado.iostream.PipeIOStream
+            Stream of the PTY master.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of reading the output.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        output_filter = TerminalOutputFilter(self.color)
+        buf = ''
+        try:
+            while True:
+                chunk = yield stream.read_bytes(READ_CHUNK_SIZE, partial=True)
+                buf += output_filter.feed(decoder.decode(chunk))
+                lines = buf.split('\n')
+                buf = lines.pop()
+                for line in lines:
+                    self._handle_line(line)
+                yield gen.moment  # do not starve the IO loop
+        except StreamClosedError:
+            buf += output_filter.feed(decoder.decode(b'', final=True)) + output_filter.flush()
+            if buf:
+                self._handle_line(buf)
+            raise
+
+    def _handle_line(self, line):
+        """
+        Logs an output line and passes it to the line handlers.
 
-    def stop(self):
+        Parameters
+        ----------
+        line : str
+            Output line including the line terminator.
+        """
+        line = line.strip('\r\n')
+        self.log.info(line)
+        for handler in self.line_handlers:
+            handler(line)
+
+    @staticmethod
+    def _open_pty():
+        """
+        Opens a PTY with the default window size (80x24).
+
+        Returns
+        -------
+        fds : tuple(int, int)
+            File descriptors of the PTY master and slave.
+        """
+        master_fd, slave_fd = pty.openpty()
+        fcntl.ioctl(slave_fd, termios.TIOCSWINSZ, struct.pack('HHHH', 24, 80, 0, 0))
+        return master_fd, slave_fd
+
+    @staticmethod
+    def _set_controlling_tty():
+        """
+        Starts a new session and makes the PTY slave (stdin) the controlling
+        terminal. It is called in the child process before exec.
+        The new session also prevents SIGINT propagation.
+        """
+        os.setsid()
+        fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+    @gen.coroutine
+    def stop(self, timeout=5.0):
         """
-        Stops the process.
+        Stops the process without blocking the IO loop.
+        SIGTERM is sent to the process group first and SIGKILL is sent if the
+        process does not exit within ``timeout`` seconds.
+
+        Parameters
+        ----------
+        timeout : float
+            Timeout in seconds to wait for the process to exit after SIGTERM.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have the exit status of the process
+            (None if the process is not started).
         """
+        proc = self.proc
+        if proc is None:
+            return None
+
         try:
             self.log.warning('Terminating %s', self.proc_name)
-            os.killpg(os.getpgid(self.proc.proc.pid), signal.SIGTERM)
+            pgid = os.getpgid(proc.proc.pid)
+            os.killpg(pgid, signal.SIGTERM)
         except OSError:
             pass  # already dead
         else:
-            try:
-                self.proc.proc.wait(5)
-            except TimeoutExpired:
+            exited = yield self._wait_for_exit(proc, timeout)
+            if not exited:
                 self.log.warning("Failed to terminate %s, killing it with SIGKILL", self.proc_name)
-                os.killpg(os.getpgid(self.proc.proc.pid), signal.SIGKILL)
+                try:
+                    os.killpg(pgid, signal.SIGKILL)
+                except OSError:
+                    pass  # exited just now
+                yield self._wait_for_exit(proc, 1.0)
 
-        self.proc = None
+        if self.proc is proc:
+            self.proc = None
+        return proc.proc.poll()
+
+    @gen.coroutine
+    def _wait_for_exit(self, proc, timeout):
+        """
+        Polls the process until it exits or the timeout expires.
+
+        Parameters
+        ----------
+        proc : tornado.process.Subprocess
+            Subprocess to be waited for.
+        timeout : float
+            Timeout in seconds.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future which will have whether the process has exited.
+        """
+        deadline = time.time() + timeout
+        while proc.proc.poll() is None:
+            if time.time() >= deadline:
+                return False
+            yield gen.sleep(0.05)
+        return True
@@ -0,0 +1,457 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import time
+
+from tornado import gen, ioloop, locks
+from tornado.tcpclient import TCPClient
+
+RESTART_POLICIES = ['always', 'on-failure', 'never']
+
+
+class ProcessSupervisor(object):
+    """
+    ProcessSupervisor runs a Process with a restart policy, a readiness probe,
+    dependencies on other processes and resource accounting.
+    """
+
+    def __init__(
+        self,
+        log,
+        process,
+        restart='never',
+        restart_limit=5,
+        ready_pattern=None,
+        ready_port=None,
+        ready_host='127.0.0.1',
+        ready_timeout=60.0,
+        depends_on=None,
+        report_interval=0.0,
+        backoff=1.0,
+        max_backoff=60.0
+    ):
+        """
+        Initializes ProcessSupervisor.
+
+        Parameters
+        ----------
+        log : logging.Logger
+            Logger.
+        process : Process
+            Process to be supervised.
+        restart : str
+            Restart policy (``'always'``, ``'on-failure'`` or ``'never'``).
+        restart_limit : int
+            Maximum number of consecutive restarts.
+        ready_pattern : str or None
+            Regular expression which matches an output line when the process
+            becomes ready.
+        ready_port : int or None
+            TCP port which accepts a connection when the process becomes ready.
+        ready_host : str
+            Host of ``ready_port``.
+        ready_timeout : float
+            Timeout in seconds to wait for the process to become ready.
+        depends_on : list[str] or None
+            Names of the processes which must be ready before starting.
+        report_interval : float
+            Interval in seconds to log the CPU and RSS usage.
+            The report is disabled if it is 0.
+        backoff : float
+            Delay in seconds before the first restart, which will be doubled
+            for each consecutive restart.
+        max_backoff : float
+            Maximum delay in seconds before a restart.
+        """
+        if restart not in RESTART_POLICIES:
+            raise ValueError(
+                'Invalid restart policy of {}: {!r} (must be one of {})'.format(
+                    process.proc_name, restart, ', '.join(RESTART_POLICIES)
+                )
+            )
+
+        self.log = log
+        self.process = process
+        self.restart_policy = restart
+        self.restart_limit = restart_limit
+        self.ready_regex = re.compile(ready_pattern) if ready_pattern else None
+        self.ready_port = ready_port
+        self.ready_host = ready_host
+        self.ready_timeout = ready_timeout
+        self.depends_on = depends_on or []
+        self.report_interval = report_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.ready = locks.Event()
+        self.supervisors = {}
+        self.finished = False
+        self.stopping = False
+        self.restart_requested = False
+        self.restarts = 0
+        self.restart_count = 0
+        self.last_returncode = None
+        self.last_started_at = None
+        self.last_usage = None
+        self.usage = None
+
+    def __repr__(self):
+        """
+        Returns string representation of ProcessSupervisor.
+
+        Returns
+        -------
+        repr : str
+            String representation of ProcessSupervisor.
+        """
+        return '<%s {proc_name: %s restart: %s depends_on: %s}>' % (
+            type(self).__name__, self.proc_name, self.restart_policy, self.depends_on
+        )
+
+    @property
+    def proc_name(self):
+        """
+        Returns the process name.
+
+        Returns
+        -------
+        proc_name : str
+            Process name.
+        """
+        return self.process.proc_name
+
+    @gen.coroutine
+    def run(self, supervisors):
+        """
+        Waits for the dependencies and runs the process until it finishes
+        according to the restart policy.
+
+        Parameters
+        ----------
+        supervisors : dict{str: ProcessSupervisor}
+            Supervisors of all processes to resolve the dependencies.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of running the process.
+        """
+        self.supervisors = supervisors
+        self.finished = False
+        try:
+            yield self._run()
+        finally:
+            self.finished = True
+
+    @gen.coroutine
+    def _run(self):
+        """
+        Waits for the dependencies and runs the process.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of running the process.
+        """
+        for dep_name in self.depends_on:
+            dep = self.supervisors.get(dep_name)
+            if dep is None:
+                self.log.warning('%s depends on unknown process %s', self.proc_name, dep_name)
+                continue
+            if not dep.ready.is_set():
+                self.log.info('%s is waiting for %s to be ready', self.proc_name, dep_name)
+            yield dep.ready.wait()
+            if self.stopping:
+                return
+
+        while not self.stopping:
+            self.ready.clear()
+            self.last_started_at = time.time()
+            self.last_usage = None
+            self.usage = None
+            if self.ready_regex:
+                self.process.line_handlers.append(self._check_ready_line)
+            future = self.process.start()
+            io_loop = ioloop.IOLoop.current()
+            if self.ready_regex is None and self.ready_port is None:
+                self.ready.set()
+            else:
+                io_loop.spawn_callback(self._probe)
+            io_loop.spawn_callback(self._report, self.process.proc)
+            self.last_returncode = yield future
+            if self.ready_regex:
+                self.process.line_handlers.remove(self._check_ready_line)
+
+            if self.stopping:
+                break
+
+            if self.restart_requested:
+                self.restart_requested = False
+                continue
+
+            if not self._should_restart(self.last_returncode):
+                self.log.info(
+                    '%s exited with %s (restart: %s)', self.proc_name, self.last_returncode,
+                    self.restart_policy
+                )
+                break
+
+            if time.time() - self.last_started_at > self.max_backoff:
+                self.restarts = 0
+
+            if self.restarts >= self.restart_limit:
+                self.log.error(
+                    '%s exited with %s and reached the restart limit (%s)', self.proc_name,
+                    self.last_returncode, self.restart_limit
+                )
+                break
+
+            delay = min(self.backoff * 2**self.restarts, self.max_backoff)
+            self.restarts += 1
+            self.restart_count += 1
+            self.log.warning(
+                '%s exited with %s, restarting in %.1f seconds (%s/%s)', self.proc_name,
+                self.last_returncode, delay, self.restarts, self.restart_limit
+            )
+            yield gen.sleep(delay)
+
+    @gen.coroutine
+    def stop(self, timeout=5.0):
+        """
+        Stops the process without restarting it.
+
+        Parameters
+        ----------
+        timeout : float
+            Timeout in seconds to wait for the process to exit after SIGTERM
+            before killing it with SIGKILL.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of stopping the process.
+        """
+        self.stopping = True
+        self.restart_requested = False
+        if self.process.is_running:
+            yield self.process.stop(timeout=timeout)
+
+    def restart(self):
+        """
+        Restarts the process immediately regardless of the restart policy.
+        If the process has finished, it is started again.
+        """
+        if self.process.is_running:
+            self.restart_requested = True
+            self.process.stop()
+        elif self.finished:
+            self.restarts = 0
+            ioloop.IOLoop.current().spawn_callback(self.run, self.supervisors)
+
+    def sample_usage(self):
+        """
+        Samples the CPU and RSS usage of the process group.
+
+        Returns
+        -------
+        usage : dict or None
+            ``cpu_percent`` (since the last sample) and ``rss`` (in bytes),
+            or None if the process is not running or ``/proc`` is not available.
+        """
+        if not self.process.is_running:
+            return None
+
+        try:
+            pgid = os.getpgid(self.process.proc.proc.pid)
+        except ProcessLookupError:
+            return None  # exited after checking is_running
+        sample = sample_process_group(pgid)
+        if sample is None:
+            return None
+
+        cpu_time, rss = sample
+        now = time.time()
+        if self.last_usage:
+            last_time, last_cpu_time = self.last_usage
+            cpu_percent = 100.0 * (cpu_time - last_cpu_time) / max(now - last_time, 1e-6)
+        else:
+            cpu_percent = 100.0 * cpu_time / max(now - self.last_started_at, 1e-6)
+        self.last_usage = (now, cpu_time)
+        self.usage = {'cpu_percent': cpu_percent, 'rss': rss}
+        return self.usage
+
+    def _should_restart(self, returncode):
+        """
+        Returns whether the process should be restarted.
+
+        Parameters
+        ----------
+        returncode : int or None
+            Exit status of the process.
+
+        Returns
+        -------
+        should_restart : bool
+            Whether the process should be restarted.
+        """
+        if self.restart_policy == 'always':
+            return True
+        if self.restart_policy == 'on-failure':
+            return returncode != 0
+        return False
+
+    def _check_ready_line(self, line):
+        """
+        Sets the process ready if the output line matches the ready pattern.
+
+        Parameters
+        ----------
+        line : str
+            Output line of the process.
+        """
+        if not self.ready.is_set() and self.ready_regex.search(line):
+            self._set_ready()
+
+    def _set_ready(self):
+        """
+        Sets the process ready.
+        """
+        self.ready.set()
+        self.log.info(
+            '%s is ready (%.1f seconds)', self.proc_name,
+            time.time() - self.last_started_at
+        )
+
+    @gen.coroutine
+    def _probe(self):
+        """
+        Waits for the process to become ready.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of the readiness probe.
+        """
+        deadline = time.time() + self.ready_timeout
+        while not self.ready.is_set():
+            if not self.process.is_running or self.stopping:
+                return
+            if time.time() > deadline:
+                self.log.warning(
+                    '%s is not ready within %s seconds', self.proc_name, self.ready_timeout
+                )
+                self.ready.set()
+                return
+            if self.ready_port is not None:
+                try:
+                    stream = yield TCPClient().connect(self.ready_host, self.ready_port)
+                except (IOError, OSError):
+                    pass
+                else:
+                    stream.close()
+                    self._set_ready()
+                    return
+            yield gen.sleep(0.5)
+
+    @gen.coroutine
+    def _report(self, proc):
+        """
+        Logs the CPU and RSS usage periodically while the process is running.
+
+        Parameters
+        ----------
+        proc : tornado.process.Subprocess
+            Subprocess to be reported. The report stops when the process is
+            restarted.
+
+        Returns
+        -------
+        future : tornado.gen.Future
+            Future of reporting the usage.
+        """
+        if not self.report_interval:
+            return
+
+        while True:
+            yield gen.sleep(self.report_interval)
+            if self.process.proc is not proc:
+                return
+            usage = self.sample_usage()
+            if usage is None:
+                return
+            self.log.info(
+                '%s cpu: %.1f%% rss: %.1f MiB', self.proc_name, usage['cpu_percent'],
+                usage['rss'] / 1024 / 1024
+            )
+
+
+def sample_process_group(pgid):
+    """
+    Samples the total CPU time and RSS of the processes in a process group
+    from ``/proc``.
+
+    Parameters
+    ----------
+    pgid : int
+        Process group ID.
+
+    Returns
+    -------
+    sample : tuple(float, int) or None
+        Total CPU time in seconds and total RSS in bytes, or None if ``/proc``
+        is not available.
+    """
+    try:
+        pids = [p for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return None
+
+    ticks = os.sysconf('SC_CLK_TCK')
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    cpu_time = 0.0
+    rss = 0
+    for pid in pids:
+        try:
+            with open('/proc/{}/stat'.format(pid)) as f:
+                stat = f.read()
+        except OSError:  # the process has exited
+            continue
+        # The command name can contain spaces and parentheses.
+        fields = stat[stat.rindex(')') + 2:].split()
+        if int(fields[2]) != pgid:
+            continue
+        cpu_time += (int(fields[11]) + int(fields[12])) / ticks
+        rss += int(fields[21]) * page_size
+    return cpu_time, rss
+
+
+def check_dependencies(depends_on):
+    """
+    Checks circular dependencies between processes.
+
+    Parameters
+    ----------
+    depends_on : dict{str: list[str]}
+        Names of the dependencies for each process.
+
+    Raises
+    ------
+    ValueError
+        If the dependencies have a cycle.
+    """
+    resolved = set()
+
+    def visit(name, path):
+        if name in path:
+            raise ValueError(
+                'Circular process dependency: {}'.format(' -> '.join(path + [name]))
+            )
+        if name in resolved or name not in depends_on:
+            return
+        for dep_name in depends_on[name]:
+            visit(dep_name, path + [name])
+        resolved.add(name)
+
+    for name in sorted(depends_on):
+        visit(name, [])
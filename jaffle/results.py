@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+OUTCOMES = ('failed', 'error', 'passed', 'skipped', 'xfailed', 'xpassed')
+
+
+class ResultSummary(object):
+    """
+    ResultSummary aggregates the test results streamed from the apps running
+    pytest while the tests are running, so that the Jaffle server can show
+    the progress and the failed tests without waiting for the run to finish.
+    Only the last run of each app is kept.
+    """
+
+    def __init__(self):
+        """
+        Initializes ResultSummary.
+        """
+        self.runs = {}  # app name -> run summary
+
+    def __repr__(self):
+        """
+        Returns string representation of ResultSummary.
+
+        Returns
+        -------
+        repr : str
+            String representation of ResultSummary.
+        """
+        return '<%s {apps: %r}>' % (type(self).__name__, sorted(self.runs))
+
+    def start(self, app_name, target, started_at=None):
+        """
+        Starts a new run of an app.
+
+        Parameters
+        ----------
+        app_name : str
+            App name.
+        target : str
+            pytest target.
+        started_at : float or None
+            UNIX time when the run was started (default: now).
+
+        Returns
+        -------
+        run : dict
+            Summary of the run.
+        """
+        self.runs[app_name] = {
+            'target': target,
+            'started_at': time.time() if started_at is None else started_at,
+            'finished_at': None,
+            'exit_code': None,
+            'outcomes': {},
+            'failed': [],
+            'duration': 0.0
+        }
+        return self.runs[app_name]
+
+    def add(self, app_name, nodeid, outcome, duration):
+        """
+        Adds the result of a test to the current run of an app.
+
+        Parameters
+        ----------
+        app_name : str
+            App name.
+        nodeid : str
+            Node ID of the test.
+        outcome : str
+            Outcome of the test (e.g. ``passed`` or ``failed``).
+        duration : float
+            Time in seconds to run the test.
+
+        Returns
+        -------
+        run : dict
+            Summary of the run.
+        """
+        run = self.runs.get(app_name) or self.start(app_name, None)
+        run['outcomes'][outcome] = run['outcomes'].get(outcome, 0) + 1
+        run['duration'] += duration
+        if outcome in ('failed', 'error'):
+            run['failed'].append(nodeid)
+        return run
+
+    def finish(self, app_name, exit_code, finished_at=None):
+        """
+        Finishes the current run of an app.
+
+        Parameters
+        ----------
+        app_name : str
+            App name.
+        exit_code : int
+            pytest exit code.
+        finished_at : float or None
+            UNIX time when the run was finished (default: now).
+
+        Returns
+        -------
+        run : dict
+            Summary of the run.
+        """
+        run = self.runs.get(app_name) or self.start(app_name, None)
+        run['exit_code'] = exit_code
+        run['finished_at'] = time.time() if finished_at is None else finished_at
+        return run
+
+    def remove_app(self, app_name):
+        """
+        Removes the run of an app.
+
+        Parameters
+        ----------
+        app_name : str
+            App name.
+        """
+        self.runs.pop(app_name, None)
+
+    def to_dict(self):
+        """
+        Returns the runs of all apps.
+
+        Returns
+        -------
+        runs : dict{str: dict}
+            Summaries of the last run by app name.
+        """
+        return {n: dict(r, failed=list(r['failed'])) for n, r in self.runs.items()}
+
+    @staticmethod
+    def format(run):
+        """
+        Formats a run summary like pytest's summary line.
+
+        Parameters
+        ----------
+        run : dict
+            Summary of a run.
+
+        Returns
+        -------
+        line : str
+            Summary line (e.g. ``1 failed, 3 passed in 0.52s``).
+        """
+        counts = ', '.join(
+            '{} {}'.format(run['outcomes'][o], o) for o in OUTCOMES if run['outcomes'].get(o)
+        ) or 'no tests ran'
+        if run['finished_at'] is None:
+            return '{} so far'.format(counts)
+        return '{} in {:.2f}s'.format(counts, run['finished_at'] - run['started_at'])
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+# Names of the files in the runtime directory. They are defined here without
+# any dependency so that `jaffle stop` can clean them up without importing
+# zmq, tornado and the apps.
+
+CONTROL_SOCKET_NAME = 'control.sock'
+
+APP_CONFIG_PREFIX = 'app-config-'
@@ -12,7 +12,9 @@ class JaffleStatus(object):
     """
     _LOCK_TIMEOUT = 5
 
-    def __init__(self, pid, raw_namespace, runtime_variables, sessions=None, apps=None):
+    def __init__(
+        self, pid, raw_namespace, runtime_variables, sessions=None, apps=None, control_url=None
+    ):
         """
         Initializes JaffleStatus.
 
@@ -20,12 +22,23 @@ class JaffleStatus(object):
         ----------
         pid : int
             Process ID.
+        raw_namespace : dict
+            Raw namespace for string interpolation.
+        runtime_variables : dict
+            Runtime variables.
+        sessions : dict{str: JaffleSession} or None
+            Jaffle sessions.
+        apps : dict{str: JaffleAppData} or None
+            Jaffle apps.
+        control_url : str or None
+            ZeroMQ endpoint of the server's control channel.
         """
         self.pid = pid
         self.raw_namespace = raw_namespace
         self.runtime_variables = runtime_variables
         self.sessions = sessions or {}
         self.apps = apps or {}
+        self.control_url = control_url
 
     def __repr__(self):
         """
@@ -64,7 +77,8 @@ class JaffleStatus(object):
                 for n, s in status_dict.get('sessions', {}).items()
             },
             apps={n: JaffleAppData.from_dict(a)
-                  for n, a in status_dict.get('apps', {}).items()}
+                  for n, a in status_dict.get('apps', {}).items()},
+            control_url=status_dict.get('control_url')
         )
 
     def add_session(self, id, name, kernel=None):
@@ -103,6 +117,28 @@ class JaffleStatus(object):
         app = JaffleAppData(name, session_name, class_name, start, options)
         self.apps[app.name] = app
 
+    def remove_session(self, name):
+        """
+        Removes a Jaffle session from a JaffleStatus.
+
+        Parameters
+        ----------
+        name : str
+            Jaffle session name (= kernel instance name defined in jaffle.hcl).
+        """
+        self.sessions.pop(name, None)
+
+    def remove_app(self, name):
+        """
+        Removes a Jaffle app data from a JaffleStatus.
+
+        Parameters
+        ----------
+        name : str
+            App name.
+        """
+        self.apps.pop(name, None)
+
     def to_dict(self):
         """
         Returns the dict representation of a JaffleStatus.
@@ -119,7 +155,8 @@ class JaffleStatus(object):
             'sessions': {n: s.to_dict()
                          for n, s in self.sessions.items()},
             'apps': {n: a.to_dict()
-                     for n, a in self.apps.items()}
+                     for n, a in self.apps.items()},
+            'control_url': self.control_url
         }
 
     @classmethod
@@ -174,7 +211,7 @@ class JaffleSession(object):
     Jaffle session.
     """
 
-    def __init__(self, id, name, kernel=None):
+    def __init__(self, id, name, kernel=None, restart_count=0, downtime=0.0):
         """
         Initializes JaffleSession.
 
@@ -186,10 +223,16 @@ class JaffleSession(object):
             Jaffle session name (= kernel instance name defined in jaffle.hcl).
         kernel : dict or None
             A dict of Kernel ID and name.
+        restart_count : int
+            Number of automatic restarts of the kernel.
+        downtime : float
+            Total downtime in seconds of the kernel.
         """
         self.id = id
         self.name = name
         self.kernel = JaffleKernelData.from_dict(kernel) if kernel else None
+        self.restart_count = restart_count
+        self.downtime = downtime
 
     def __repr__(self):
         """
@@ -219,7 +262,13 @@ class JaffleSession(object):
         session : JaffleSession.
             Jaffle session.
         """
-        return cls(id=data.get('id'), name=data.get('name'), kernel=data.get('kernel'))
+        return cls(
+            id=data.get('id'),
+            name=data.get('name'),
+            kernel=data.get('kernel'),
+            restart_count=data.get('restart_count', 0),
+            downtime=data.get('downtime', 0.0)
+        )
 
     def to_dict(self):
         """
@@ -230,7 +279,13 @@ class JaffleSession(object):
         session : dict
             Dict representation of a JaffleSession.
         """
-        return {'id': self.id, 'name': self.name, 'kernel': self.kernel.to_dict()}
+        return {
+            'id': self.id,
+            'name': self.name,
+            'kernel': self.kernel.to_dict(),
+            'restart_count': self.restart_count,
+            'downtime': self.downtime
+        }
 
 
 class JaffleKernelData(object):
@@ -1,22 +1,23 @@
 # -*- coding: utf-8 -*-
 
 import logging
-from unittest.mock import Mock, call, patch
+from unittest.mock import ANY, Mock, call, patch
 
 import pytest
 from tornado import gen
 
 from jaffle.app.base import app as base_app
 from jaffle.app.base.app import BaseJaffleApp
+from jaffle.config import ConfigDict
 
 
 @pytest.fixture(scope='module')
 def app_config1():
     return Mock(
         app_name='my_app',
-        conf={'logger': {
+        conf=ConfigDict({'logger': {
             'level': 'debug'
-        }},
+        }}),
         jaffle_port=123,
         jobs_conf={'my_job': {
             'command': 'my_job --debug'
@@ -26,7 +27,23 @@ def app_config1():
 
 @pytest.fixture(scope='module')
 def app_config2():
-    return Mock(app_name='my_app', conf={}, jaffle_port=123, jobs_conf={})
+    return Mock(app_name='my_app', conf=ConfigDict({}), jaffle_port=123, jobs_conf={})
+
+
+@pytest.fixture(scope='module')
+def app_config3():
+    return Mock(
+        app_name='my_app',
+        conf=ConfigDict({
+            'subscribe': {
+                'file_events': 'handle({event})',
+                'other': ['handle({event})', '1 / 0']
+            }
+        }),
+        jaffle_port=123,
+        jobs_conf={},
+        trace=False
+    )
 
 
 @pytest.mark.gen_test
@@ -88,6 +105,23 @@ def test_base_app(subprocess_mock, app_config1):
 
     app.ipython.run_cell.assert_called_once_with('code 1 foo')
 
+    app.ipython.user_ns = {'double': lambda x: x * 2}
+    execute = app.compile_code('double({x})', ['x'])
+    assert (yield execute(x=3)) == 6
+    app.ipython.run_cell.assert_called_once_with('code 1 foo')
+
+    with pytest.raises(ZeroDivisionError):
+        yield app.compile_code('{x} / 0', ['x'])(x=1)
+
+    execute = app.compile_code('%time double({x})', ['x'])
+    yield execute(x=3)
+    app.ipython.run_cell.assert_called_with('%time double(3)')
+
+    # interpolation in a string literal is formatted as before
+    execute = app.compile_code('print("changed: {x}")', ['x'])
+    yield execute(x={'path': 'a.py'})
+    app.ipython.run_cell.assert_called_with('print("changed: {\'path\': \'a.py\'}")')
+
     with patch('jaffle.app.base.app.Subprocess', return_value=subprocess_mock) as subproc:
         yield app.execute_command('foo --bar baz')
 
@@ -95,7 +129,9 @@ def test_base_app(subprocess_mock, app_config1):
                                     stdout=subproc.STREAM,
                                     stderr=subproc.STREAM)
 
-    app_logger.info.assert_has_calls([call('aaa'), call('bbb'), call('ccc')])
+    app_logger.info.assert_has_calls([
+        call('aaa', extra=None), call('bbb', extra=None), call('ccc', extra=None)
+    ])
 
     modules = {
         'aaa': True,
@@ -116,7 +152,21 @@ def test_base_app(subprocess_mock, app_config1):
         execute_command.return_value = future
         yield app.execute_job('my_job')
 
-    execute_command.assert_called_once_with(job.return_value.command, logger=job.return_value.log)
+    execute_command.assert_called_once_with(
+        job.return_value.command, logger=job.return_value.log, trace_id=None
+    )
+
+    histogram = app.metrics.histogram('jaffle_job_duration_seconds', labelnames=['job'])
+    assert histogram.get(job='my_job')['count'] == 1
+
+    app.send_metrics()
+    log_handler.return_value.send.assert_called_once_with('metrics', app.metrics.snapshot())
+
+    app.send_metrics()  # not updated
+    log_handler.return_value.send.assert_called_once()
+
+    app.shutdown()
+    assert not app.metrics_callback.is_running()
 
 
 @pytest.mark.gen_test
@@ -163,4 +213,47 @@ def test_default_log_and_job(subprocess_mock, app_config2):
                                     stdout=subproc.STREAM,
                                     stderr=subproc.STREAM)
 
-    logger.info.assert_has_calls([call('aaa'), call('bbb'), call('ccc')])
+    logger.info.assert_has_calls([
+        call('aaa', extra=None), call('bbb', extra=None), call('ccc', extra=None)
+    ])
+
+
+@pytest.mark.gen_test
+def test_event_bus(app_config3):
+    base_app.get_ipython = Mock()  # inject get_ipython()
+    handled = []
+    base_app.get_ipython.return_value.user_ns = {'handle': handled.append}
+
+    with patch('jaffle.app.base.app.JaffleAppLogHandler') as log_handler:
+        with patch('jaffle.app.base.app.AppConfig.from_dict', return_value=app_config3):
+            app = BaseJaffleApp({})
+    send = log_handler.return_value.send
+
+    assert sorted(c[0][1]['topic'] for c in send.call_args_list) == ['file_events', 'other']
+    assert all(c[0][0] == 'subscribe' for c in send.call_args_list)
+    send.reset_mock()
+
+    # messages published in an IO loop iteration are sent as a batch
+    app.publish('file_events', {'src_path': 'foo.py'})
+    app.publish('file_events', {'src_path': 'bar.py'})
+    yield gen.moment
+    yield gen.moment
+
+    send.assert_called_once_with('publish', {
+        'topic': 'file_events',
+        'messages': [{'src_path': 'foo.py'}, {'src_path': 'bar.py'}],
+        'published_at': ANY
+    })
+    assert app.published == {}
+
+    with patch.object(app.log, 'exception') as log_exception:
+        yield app._receive_messages('file_events', [{'src_path': 'foo.py'}], 0.0)
+        yield app._receive_messages('other', [1, 2], 0.0)
+        yield app._receive_messages('unknown', [3], 0.0)
+
+    assert handled == [{'src_path': 'foo.py'}, 1, 2]
+    assert log_exception.call_count == 2  # 1 / 0
+    histogram = app.metrics.histogram('jaffle_bus_delivery_latency_seconds', labelnames=['topic'])
+    assert histogram.get(topic='file_events')['count'] == 1
+
+    app.shutdown()
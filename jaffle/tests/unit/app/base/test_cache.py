@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from jaffle.app.base import find_root_packages
+
+
+def test_find_root_packages(tmpdir):
+    tmpdir.join('foo', '__init__.py').ensure()
+    tmpdir.join('foo', 'bar', '__init__.py').ensure()
+    tmpdir.join('docs', 'conf.py').ensure()
+    tmpdir.join('foo.egg-info', '__init__.py').ensure()
+    tmpdir.join('setup.py').ensure()
+
+    assert find_root_packages(str(tmpdir)) == ['foo']
+
+    tmpdir.join('baz', '__init__.py').ensure()
+    tmpdir.setmtime(tmpdir.mtime() + 10)
+    assert find_root_packages(str(tmpdir)) == ['baz', 'foo']
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from jaffle.app.base.code import CompiledCode
+
+
+def test_compiled_code():
+    namespace = {'handle': lambda event: event['src_path']}
+
+    code = CompiledCode('handle({event})', ['event'], namespace)
+    assert code.is_expression
+    assert code.source == 'handle(__jaffle_event__)'
+    assert code(event={'src_path': 'foo.py'}) == 'foo.py'
+    assert '__jaffle_event__' not in namespace
+
+    code = CompiledCode('result = {{"path": handle({event})}}', ['event'], namespace)
+    assert not code.is_expression
+    assert code(event={'src_path': 'bar.py'}) is None
+    assert namespace['result'] == {'path': 'bar.py'}
+
+    # nested execution restores the outer argument
+    namespace['inner'] = CompiledCode('{event}', ['event'], namespace)
+    code = CompiledCode('(inner(event=1), {event})', ['event'], namespace)
+    assert code(event=2) == (1, 2)
+    assert '__jaffle_event__' not in namespace
+
+    with pytest.raises(ZeroDivisionError):
+        CompiledCode('1 / 0', [], namespace)()
+
+
+def test_compiled_code_unsupported():
+    with pytest.raises(SyntaxError):
+        CompiledCode('%time handle({event})', ['event'], {})
+
+    for code in [
+        '{}', '{foo}', '{event!r}', '{event:>10}', '{event[src_path]}',
+        'print("changed: {event}")', "handle({event}, '{event}')"
+    ]:
+        with pytest.raises(ValueError):
+            CompiledCode(code, ['event'], {})
+
+    # a string literal without interpolation keywords is supported
+    code = CompiledCode('"{{}} " + str({event})', ['event'], {})
+    assert code(event=1) == '{} 1'
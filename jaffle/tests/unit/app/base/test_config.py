@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import os
+import stat
+
+from jaffle.app.base.config import AppConfig, AppConfigStore
+
+
+def test_app_config_store(tmpdir):
+    store = AppConfigStore(str(tmpdir))
+    shared = {
+        'raw_namespace': {'HOME': '/home/foo'},
+        'runtime_variables': {'port': '9000'},
+        'variables_conf': {'port': {'type': 'int', 'default': 8000}},
+        'jaffle_port': 1234,
+        'jobs_conf': {'lint': {'command': 'flake8 ${HOME}'}},
+        'trace': False,
+        'runtime_dir': str(tmpdir)
+    }
+    apps = {
+        'app1': {'class': 'foo.Foo', 'options': {'port': '${var.port}'}},
+        'app2': {'class': 'bar.Bar', 'options': {'home': '${HOME}'}}
+    }
+
+    path = store.write(apps, **shared)
+    assert store.write(apps, **shared) == path  # the same content
+    other_path = store.write({'app3': {'class': 'baz.Baz'}}, **shared)
+    assert other_path != path
+
+    app_conf1 = AppConfig.load(path, 'app1')
+    app_conf2 = AppConfig.load(path, 'app2')
+
+    assert app_conf1.app_name == 'app1'
+    assert app_conf1.conf.options.get_raw('port') == '9000'
+    assert app_conf2.conf.options.get_raw('home') == '/home/foo'
+    assert app_conf1.jaffle_port == 1234
+    assert app_conf1.runtime_dir == str(tmpdir)
+    # the jobs config is created once and shared
+    assert app_conf2.jobs_conf is app_conf1.jobs_conf
+    assert app_conf1.jobs_conf.lint.get_raw('command') == 'flake8 /home/foo'
+    assert AppConfig.from_dict(app_conf1.to_dict()).to_dict() == app_conf1.to_dict()
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    store.remove_unused([path])
+    assert [p.basename for p in tmpdir.listdir()] == [path.rsplit('/', 1)[1]]
+    store.remove_all()
+    assert tmpdir.listdir() == []
+
+
+def test_app_config_store_relative(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    store = AppConfigStore('runtime')
+    tmpdir.mkdir('runtime')
+
+    path = store.write({'app1': {'class': 'foo.Foo'}}, raw_namespace={})
+    assert path == str(tmpdir.join('runtime', path.rsplit('/', 1)[1]))
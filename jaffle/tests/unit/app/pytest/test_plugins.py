@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import json
+import sys
+import types
+from unittest.mock import patch
+
+from jaffle.app.pytest import plugins
+from jaffle.app.pytest.plugins import environment_key, find_entry_points, mark_dont_rewrite
+
+
+def test_environment_key(tmpdir, monkeypatch):
+    monkeypatch.setattr(sys, 'path', [str(tmpdir), str(tmpdir.join('not_exist'))])
+    key = environment_key()
+
+    assert [p for p, _ in key] == [str(tmpdir)]
+
+    tmpdir.join('foo-1.0.dist-info').ensure(dir=True)
+    tmpdir.setmtime(tmpdir.mtime() + 10)
+    assert environment_key() != key
+
+
+def test_find_entry_points(tmpdir, monkeypatch):
+    monkeypatch.setattr(plugins, '_entry_points_cache', {})
+    site_dir = tmpdir.join('site-packages').ensure(dir=True)
+    monkeypatch.setattr(sys, 'path', [str(site_dir)])
+    cache_path = tmpdir.join('entry-points.json')
+    found = [('cov', 'pytest_cov.plugin'), ('tornado', 'pytest_tornado.plugin')]
+
+    with patch.object(plugins, '_scan_entry_points', return_value=found) as scan:
+        assert find_entry_points('pytest11', str(cache_path)) == found
+        assert find_entry_points('pytest11', str(cache_path)) == found
+        assert scan.call_count == 1
+
+        # cached in the file across processes
+        plugins._entry_points_cache.clear()
+        assert find_entry_points('pytest11', str(cache_path)) == found
+        assert scan.call_count == 1
+
+        # invalidated when sys.path is modified
+        site_dir.join('foo-1.0.dist-info').ensure(dir=True)
+        site_dir.setmtime(site_dir.mtime() + 10)
+        assert find_entry_points('pytest11', str(cache_path)) == found
+        assert scan.call_count == 2
+
+    with cache_path.open() as f:
+        assert json.load(f)['groups'] == {'pytest11': [list(e) for e in found]}
+
+
+def test_scan_entry_points():
+    entry_points = plugins._scan_entry_points('pytest11')
+
+    assert ('tornado', 'pytest_tornado.plugin') in entry_points
+    assert len({n for n, _ in entry_points}) == len(entry_points)
+
+
+def test_mark_dont_rewrite(monkeypatch):
+    module = types.ModuleType('jaffle_imported_plugin', 'Plugin.')
+    monkeypatch.setitem(sys.modules, 'jaffle_imported_plugin', module)
+
+    mark_dont_rewrite(['jaffle_imported_plugin.plugin', 'jaffle_not_imported_plugin'])
+
+    assert module.__doc__ == 'PYTEST_DONT_REWRITE'
+    assert 'jaffle_not_imported_plugin' not in sys.modules
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+
+import pytest
+
+from jaffle.app.pytest.results import ResultReporter, RunHistory
+from jaffle.app.pytest.session import PyTestSession
+
+
+@pytest.fixture
+def test_file(tmpdir, monkeypatch):
+    path = tmpdir.join('test_jaffle_results_example.py')
+    path.write(
+        'import pytest\n\n'
+        'def test_a():\n    pass\n\n'
+        'def test_b():\n    assert 0\n\n'
+        '@pytest.mark.skip\ndef test_c():\n    pass\n\n'
+        '@pytest.fixture\ndef broken():\n    raise ValueError\n\n'
+        'def test_d(broken):\n    pass\n'
+    )
+    monkeypatch.chdir(tmpdir)
+    yield path
+    sys.modules.pop('test_jaffle_results_example', None)
+
+
+def test_run_history(tmpdir):
+    path = tmpdir.join('pytest.json')
+    history = RunHistory(str(path))
+    history.record('test_foo.py::test_a', 'passed', 0.5, ran_at=1000.0)
+    history.record('test_foo.py::test_b', 'failed', 0.5, ran_at=1000.0)
+    history.save()
+
+    history = RunHistory(str(path))
+    assert history.failed == ['test_foo.py::test_b']
+
+    test_foo = tmpdir.join('test_foo.py')
+    test_foo.write('')
+    os.utime(str(test_foo), (900.0, 900.0))
+    assert history.priority('test_foo.py::test_b', str(test_foo)) == 0
+    assert history.priority('test_foo.py::test_a', str(test_foo)) == 2
+    assert history.priority('test_foo.py::test_new', str(test_foo)) == 1
+    os.utime(str(test_foo), (1100.0, 1100.0))
+    assert history.priority('test_foo.py::test_a', str(test_foo)) == 1  # edited
+
+    # the oldest tests are dropped
+    history.max_size = 1
+    history.save()
+    with path.open() as f:
+        assert list(json.load(f)['tests']) == ['test_foo.py::test_b']
+
+    path.write('{broken')
+    assert RunHistory(str(path)).tests == {}
+    assert RunHistory().path is None
+
+
+def test_result_reporter(test_file):
+    history = RunHistory()
+    results = []
+    session = PyTestSession(['-q', '-p', 'no:cacheprovider'])
+
+    reporter = ResultReporter(history, lambda *args: results.append(args[:2]))
+    assert session.run(str(test_file), [reporter]) == 1
+    assert results == [
+        ('test_jaffle_results_example.py::test_a', 'passed'),
+        ('test_jaffle_results_example.py::test_b', 'failed'),
+        ('test_jaffle_results_example.py::test_c', 'skipped'),
+        ('test_jaffle_results_example.py::test_d', 'error'),
+    ]
+    assert reporter.outcomes == {'passed': 1, 'failed': 1, 'skipped': 1, 'error': 1}
+    assert history.failed == [
+        'test_jaffle_results_example.py::test_b', 'test_jaffle_results_example.py::test_d'
+    ]
+
+    # failed tests first
+    del results[:]
+    session.args.append('-x')
+    reporter = ResultReporter(history, lambda *args: results.append(args[:2]))
+    assert session.run(str(test_file), [reporter]) == 1
+    assert results == [('test_jaffle_results_example.py::test_b', 'failed')]
+
+    # collected order
+    del results[:]
+    reporter = ResultReporter(history, lambda *args: results.append(args[:2]), False)
+    session.run(str(test_file), [reporter])
+    assert results == [
+        ('test_jaffle_results_example.py::test_a', 'passed'),
+        ('test_jaffle_results_example.py::test_b', 'failed'),
+    ]
+
+
+def test_result_reporter_collect_error(test_file):
+    history = RunHistory()
+    test_file.write('import jaffle_unknown_module\n')
+    results = []
+
+    reporter = ResultReporter(history, lambda *args: results.append(args[:2]))
+    PyTestSession(['-q', '-p', 'no:cacheprovider']).run(str(test_file), [reporter])
+
+    assert results == [('test_jaffle_results_example.py', 'error')]
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+import pytest
+
+from jaffle.app.pytest.session import AUTOLOAD_ENV, PyTestSession, SessionRecorder
+
+
+@pytest.fixture
+def project(tmpdir, monkeypatch):
+    pkg = tmpdir.join('jaffle_session_example').ensure(dir=True)
+    pkg.join('__init__.py').write('')
+    pkg.join('conftest.py').write('import pytest\n\n@pytest.fixture\ndef value():\n    return 1\n')
+    pkg.join('test_example.py').write('def test_example(value):\n    assert value == 1\n')
+    tmpdir.join('jaffle_session_plugin.py').write(
+        'configured = []\n\ndef pytest_configure(config):\n    configured.append(config)\n'
+    )
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    monkeypatch.delenv(AUTOLOAD_ENV, raising=False)
+    yield pkg
+    for name in list(sys.modules):
+        if name.startswith('jaffle_session_'):
+            del sys.modules[name]
+
+
+def test_pytest_session(project):
+    session = PyTestSession(
+        ['-q', '-p', 'no:cacheprovider'], [('session_plugin', 'jaffle_session_plugin')]
+    )
+    target = str(project.join('test_example.py'))
+
+    assert session.run(target) == 0
+    assert session.runs == 1
+    assert sorted(session.timings) == ['collection', 'run', 'setup']
+    assert AUTOLOAD_ENV not in os.environ
+
+    plugin = sys.modules['jaffle_session_plugin']
+    assert len(plugin.configured) == 1
+    conftest = str(project.join('conftest.py'))
+    assert list(session.conftests) == [conftest]
+    module = sys.modules[session.conftests[conftest][0]]
+
+    # the entry point plugins and unchanged conftest.py are reused
+    assert session.run(target) == 0
+    assert session.invalidate_conftests() == []
+    assert sys.modules['jaffle_session_plugin'] is plugin
+    assert len(plugin.configured) == 2
+    assert sys.modules[session.conftests[conftest][0]] is module
+
+    # changed conftest.py is reloaded
+    project.join('conftest.py').write(
+        'import pytest\n\n@pytest.fixture\ndef value():\n    return 2\n'
+    )
+    os.utime(conftest, ns=(10 ** 18, 10 ** 18))
+    assert session.run(target) == 1
+    assert sys.modules[session.conftests[conftest][0]] is not module
+
+    # entry point plugins can be disabled by -p no:<name>
+    session.args += ['-p', 'no:session_plugin']
+    session.run(target)
+    assert len(plugin.configured) == 3
+
+
+def test_pytest_session_autoload(project, monkeypatch):
+    monkeypatch.setenv(AUTOLOAD_ENV, '')
+    session = PyTestSession(['-q', '-p', 'no:cacheprovider'], autoload=True)
+
+    assert session.run(str(project.join('test_example.py'))) == 0
+    assert session.load_plugins() == []
+    assert os.environ[AUTOLOAD_ENV] == ''
+
+
+def test_session_recorder_timings():
+    recorder = SessionRecorder([])
+
+    assert recorder.timings(10.0, 11.0) == {}
+
+    recorder.configured_at = 10.25
+    recorder.collected_at = 10.5
+    assert recorder.timings(10.0, 11.0) == {'setup': 0.25, 'collection': 0.25}
+
+    recorder.finished_at = 11.0
+    assert recorder.timings(10.0, 11.0) == {'setup': 0.25, 'collection': 0.25, 'run': 0.5}
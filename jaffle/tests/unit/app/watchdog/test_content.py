@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import os
+from unittest.mock import patch
+
+from watchdog.events import (
+    DirModifiedEvent, FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+)
+
+from jaffle.app.watchdog.content import ContentCache
+
+
+def touch(path, mtime_ns):
+    os.utime(str(path), ns=(mtime_ns, mtime_ns))
+
+
+def test_content_cache(tmpdir):
+    cache = ContentCache()
+    path = tmpdir.join('foo.py')
+    path.write('foo')
+    event = FileModifiedEvent(str(path))
+
+    assert not cache.is_unchanged(event)  # the first event
+    assert cache.is_unchanged(event)  # the same stat
+
+    touch(path, 10 ** 18)
+    assert cache.is_unchanged(event)  # the same content
+
+    path.write('bar')
+    touch(path, 2 * 10 ** 18)
+    assert not cache.is_unchanged(event)  # the same size but different content
+
+    path.write('foobar')
+    assert not cache.is_unchanged(event)
+    assert cache.is_unchanged(event)
+
+    # atomic save
+    tmp = tmpdir.join('.foo.py.tmp')
+    tmp.write('foobar')
+    assert not cache.is_unchanged(FileCreatedEvent(str(tmp)))
+    tmp.rename(path)
+    assert cache.is_unchanged(FileMovedEvent(str(tmp), str(path)))
+    assert len(cache) == 1
+
+    # directories and deleted files
+    assert not cache.is_unchanged(DirModifiedEvent(str(tmpdir)))
+    path.remove()
+    assert not cache.is_unchanged(FileDeletedEvent(str(path)))
+    assert not cache.is_unchanged(event)
+    assert len(cache) == 0
+
+    path.write('foobar')
+    assert not cache.is_unchanged(FileCreatedEvent(str(path)))
+
+
+def test_content_cache_max_size(tmpdir):
+    cache = ContentCache(max_size=2)
+    events = []
+    for name in ['a', 'b', 'c']:
+        tmpdir.join(name).write(name)
+        events.append(FileModifiedEvent(str(tmpdir.join(name))))
+        cache.is_unchanged(events[-1])
+
+    assert len(cache) == 2
+    assert not cache.is_unchanged(events[0])  # evicted
+    assert cache.is_unchanged(events[2])
+
+
+def test_content_cache_racy(tmpdir):
+    cache = ContentCache()
+    path = tmpdir.join('foo.py')
+    path.write('foo')
+    event = FileModifiedEvent(str(path))
+    mtime_ns = os.stat(str(path)).st_mtime_ns
+
+    assert not cache.is_unchanged(event)
+
+    # modified within the same tick of a coarse mtime
+    path.write('bar')
+    touch(path, mtime_ns)
+    assert not cache.is_unchanged(event)
+
+    # the hash is skipped only if the mtime was old enough when it was taken
+    touch(path, 10 ** 18)
+    assert cache.is_unchanged(event)
+    with patch.object(ContentCache, '_hash') as hash_mock:
+        assert cache.is_unchanged(event)
+    hash_mock.assert_not_called()
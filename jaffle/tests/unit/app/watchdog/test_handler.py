@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from unittest.mock import Mock
+
+from tornado import gen, ioloop
+from watchdog.events import FileModifiedEvent
+
+from jaffle.app.watchdog.handler import WatchdogHandler
+from jaffle.tracing import Tracer
+
+
+def handle(tmpdir, tracer):
+    callbacks = []
+    code_func = Mock(return_value=gen.maybe_future(None))
+    handler = WatchdogHandler(
+        Mock(ioloop.IOLoop, add_callback=Mock(side_effect=callbacks.append)),
+        Mock(),
+        Mock(),
+        Mock(logging.Logger),
+        compile_code=Mock(return_value=code_func),
+        tracer=tracer,
+        patterns=['*.py'],
+        code_blocks=['print({event})']
+    )
+
+    handler.on_any_event(FileModifiedEvent(str(tmpdir.join('foo.py'))))
+    while callbacks:
+        callbacks.pop(0)()
+    return code_func.call_args[1]['event']
+
+
+def test_handler_event(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    assert handle(tmpdir, None) == {
+        'event_type': 'modified', 'src_path': 'foo.py', 'is_directory': False
+    }
+    assert 'trace_id' in handle(tmpdir, Tracer(Mock()))
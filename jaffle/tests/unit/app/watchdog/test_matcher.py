@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import Mock
+
+from watchdog.events import DirModifiedEvent, FileModifiedEvent, FileMovedEvent
+
+from jaffle.app.watchdog.matcher import PatternMatcher
+
+
+def create_handler(patterns, ignore_patterns=None, ignore_directories=False, case_sensitive=False):
+    return Mock(
+        patterns=patterns,
+        ignore_patterns=ignore_patterns,
+        ignore_directories=ignore_directories,
+        case_sensitive=case_sensitive
+    )
+
+
+def test_pattern_matcher():
+    py = create_handler(['*.py'], ['*/tests/*.py'])
+    tests = create_handler(['*/tests/*.py', '*.PY'], case_sensitive=True)
+    js = create_handler(['*.js'], ignore_directories=True)
+    other = create_handler(['*.py'])
+
+    matcher = PatternMatcher()
+    matcher.add(py, '/src')
+    matcher.add(tests, '/src/')
+    matcher.add(js, '/src/frontend')
+    matcher.add(other, '/other')
+
+    assert len(matcher.patterns) == 5  # '*.py' is shared by py and other
+    assert len(matcher.include_regexes) == 2
+
+    assert matcher.match(FileModifiedEvent('/src/app/main.py')) == [py]
+    assert matcher.match(FileModifiedEvent('/src/app/MAIN.PY')) == [py, tests]
+    assert matcher.match(FileModifiedEvent('/src/app/tests/test_main.py')) == [tests]
+    assert matcher.match(FileModifiedEvent('/src/frontend/index.js')) == [js]
+    assert matcher.match(FileModifiedEvent('/src/index.js')) == []
+    assert matcher.match(DirModifiedEvent('/src/frontend/foo.js')) == []
+    assert matcher.match(FileModifiedEvent('/src/app/main.pyc')) == []
+    assert matcher.match(FileModifiedEvent('/other/main.py')) == [other]
+    assert matcher.match(FileModifiedEvent('/srcx/main.py')) == []
+
+    # either of the source and the destination paths matches
+    assert matcher.match(FileMovedEvent('/src/app/.main.py.swp', '/src/app/main.py')) == [py]
+    assert matcher.match(FileMovedEvent('/src/app/main.py', '/tmp/main.py')) == [py]
+
+
+def test_pattern_matcher_no_patterns():
+    matcher = PatternMatcher()
+    matcher.add(create_handler([]), '/src')
+
+    assert matcher.include_regexes == []
+    assert matcher.match(FileModifiedEvent('/src/main.py')) == []
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from unittest.mock import patch
+
+from watchdog.events import FileSystemEventHandler
+
+from jaffle.app.watchdog import polling
+from jaffle.app.watchdog.polling import DirectoryScanner, ScanIndex, ScanningObserver
+
+
+def describe(events):
+    return [
+        (e.event_type, e.is_directory, os.path.basename(e.src_path)) +
+        ((os.path.basename(e.dest_path), ) if e.event_type == 'moved' else ())
+        for e in events
+    ]
+
+
+def set_mtime(path, seconds_ago=60):
+    mtime = time.time() - seconds_ago
+    os.utime(str(path), (mtime, mtime))
+
+
+def test_directory_scanner(tmpdir):
+    tmpdir.join('app', 'foo.py').write('foo', ensure=True)
+    tmpdir.join('app', 'bar.py').write('bar')
+    tmpdir.join('docs').ensure(dir=True)
+    scanner = DirectoryScanner(str(tmpdir))
+
+    assert scanner.scan() == []
+
+    tmpdir.join('app', 'foo.py').write('foo = 1')
+    tmpdir.join('app', 'bar.py').rename(tmpdir.join('app', 'baz.py'))
+    tmpdir.join('docs', 'index.rst').write('Jaffle')
+    tmpdir.join('lib').ensure(dir=True)
+    tmpdir.join('docs', 'tmp').ensure()
+    tmpdir.join('docs', 'tmp').remove()
+
+    assert describe(scanner.scan()) == [
+        ('modified', False, 'foo.py'),
+        ('created', False, 'index.rst'),
+        ('moved', False, 'bar.py', 'baz.py'),
+        ('modified', True, os.path.basename(str(tmpdir))),
+        ('modified', True, 'app'),
+        ('modified', True, 'docs'),
+        ('created', True, 'lib'),
+    ]
+    assert scanner.scan() == []
+
+    tmpdir.join('docs').remove()
+    assert describe(scanner.scan()) == [
+        ('deleted', False, 'index.rst'),
+        ('deleted', True, 'docs'),
+        ('modified', True, os.path.basename(str(tmpdir))),
+    ]
+
+
+def test_directory_scanner_non_recursive(tmpdir):
+    tmpdir.join('foo.py').write('foo')
+    tmpdir.join('app', 'bar.py').write('bar', ensure=True)
+    scanner = DirectoryScanner(str(tmpdir), recursive=False)
+
+    assert scanner.scan() == []
+    assert sorted(scanner.snapshot['listings']) == [str(tmpdir)]
+
+    tmpdir.join('app', 'bar.py').write('bar = 1')
+    tmpdir.join('app', 'baz.py').write('baz')
+    tmpdir.join('lib').ensure(dir=True)
+
+    assert describe(scanner.scan()) == [
+        ('modified', True, os.path.basename(str(tmpdir))),
+        ('created', True, 'lib'),
+    ]
+
+
+def test_directory_scanner_skips_listing_unchanged_directories(tmpdir):
+    tmpdir.join('app', 'foo.py').write('foo', ensure=True)
+    set_mtime(tmpdir.join('app'))
+    set_mtime(tmpdir)
+    scanner = DirectoryScanner(str(tmpdir))
+    scanner.scan()
+
+    tmpdir.join('app', 'foo.py').write('foo = 1')
+    with patch.object(polling, '_list_dir', wraps=polling._list_dir) as list_dir:
+        assert describe(scanner.scan()) == [('modified', False, 'foo.py')]
+    list_dir.assert_not_called()
+
+    tmpdir.join('app', 'bar.py').write('bar')
+    with patch.object(polling, '_list_dir', wraps=polling._list_dir) as list_dir:
+        assert describe(scanner.scan()) == [
+            ('created', False, 'bar.py'), ('modified', True, 'app')
+        ]
+    list_dir.assert_called_once_with(str(tmpdir.join('app')))
+
+
+def test_scan_index(tmpdir):
+    tmpdir.join('src', 'foo.py').write('foo', ensure=True)
+    root = str(tmpdir.join('src'))
+    key = ScanIndex.key(root, True)
+    index = ScanIndex(tmpdir.join('index.json'))
+    assert index.get(key) is None
+
+    scanner = DirectoryScanner(root)
+    scanner.scan()
+    index.update(key, scanner.snapshot)
+    index.save()
+
+    # a change while not watching is detected by the restored snapshot
+    tmpdir.join('src', 'foo.py').write('foo = 1')
+    index = ScanIndex(tmpdir.join('index.json'))
+    scanner = DirectoryScanner(root, snapshot=index.get(key))
+    assert describe(scanner.scan()) == [('modified', False, 'foo.py')]
+
+    tmpdir.join('index.json').write('broken')
+    assert ScanIndex(tmpdir.join('index.json')).get(key) is None
+
+
+class RecordingHandler(FileSystemEventHandler):
+    def __init__(self):
+        self.events = []
+
+    def on_any_event(self, event):
+        self.events.append(event)
+
+
+def test_scanning_observer(tmpdir):
+    tmpdir.join('src').ensure(dir=True)
+    handler = RecordingHandler()
+    observer = ScanningObserver(0.05, 0.2, index_path=tmpdir.join('index.json'))
+    observer.schedule(handler, str(tmpdir.join('src')), recursive=True)
+    observer.start()
+    try:
+        time.sleep(0.2)
+        tmpdir.join('src', 'foo.py').write('foo')
+        for _ in range(100):
+            if handler.events:
+                break
+            time.sleep(0.05)
+    finally:
+        observer.stop()
+        observer.join()
+
+    assert ('created', False, 'foo.py') in describe(handler.events)
+    assert tmpdir.join('index.json').check()
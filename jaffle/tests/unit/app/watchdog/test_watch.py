@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from unittest.mock import Mock, patch
+
+from watchdog.events import (
+    DirCreatedEvent, DirDeletedEvent, DirMovedEvent, FileCreatedEvent, FileModifiedEvent
+)
+from watchdog.observers.api import ObservedWatch
+
+from jaffle.app.watchdog.watch import DirectoryPruner, SharedWatcher, WatchPlan, merge_watches
+
+
+def make_tree(tmpdir, *dirs):
+    for d in dirs:
+        tmpdir.join(*d.split('/')).ensure(dir=True)
+    return str(tmpdir)
+
+
+def test_directory_pruner():
+    pruner = DirectoryPruner('/src', ['node_modules', '.*', 'docs/_build/'])
+
+    assert pruner
+    assert pruner.is_pruned('/src/node_modules')
+    assert pruner.is_pruned('/src/app/NODE_MODULES')
+    assert pruner.is_pruned('/src/.git')
+    assert pruner.is_pruned('/src/docs/_build')
+    assert not pruner.is_pruned('/src/_build')
+    assert not pruner.is_pruned('/src/app')
+
+    assert pruner.is_ignored('/src/node_modules/foo/index.js')
+    assert pruner.is_ignored('/src/node_modules', is_directory=True)
+    assert not pruner.is_ignored('/src/node_modules')  # a file named node_modules
+    assert not pruner.is_ignored('/src/app/main.py')
+    assert not pruner.is_ignored('/other/node_modules/foo.js')
+
+    assert not DirectoryPruner('/src', ['node_modules'], case_sensitive=True).is_pruned(
+        '/src/NODE_MODULES'
+    )
+    assert not DirectoryPruner('/src')
+    assert not DirectoryPruner('/src').is_ignored('/src/node_modules/foo.js')
+
+
+def test_watch_plan(tmpdir):
+    root = make_tree(
+        tmpdir, 'app/models', 'app/node_modules/a/b', 'docs', 'node_modules/c', '.git'
+    )
+    plan = WatchPlan.create(root, DirectoryPruner(root, ['node_modules', '.git']))
+
+    assert plan.non_recursive == [root, str(tmpdir.join('app'))]
+    assert sorted(plan.recursive) == [str(tmpdir.join('app', 'models')), str(tmpdir.join('docs'))]
+    assert plan.directories == 4
+    assert sorted(plan.pruned) == [
+        str(tmpdir.join('.git')),
+        str(tmpdir.join('app', 'node_modules')),
+        str(tmpdir.join('node_modules'))
+    ]
+
+    plan = WatchPlan.create(root, DirectoryPruner(root, ['__pycache__']))
+
+    assert plan.recursive == [root]
+    assert plan.non_recursive == []
+    assert plan.directories == 10
+    assert plan.pruned == []
+
+    # the tree is not walked without patterns
+    with patch('jaffle.app.watchdog.watch.os.walk') as walk:
+        plan = WatchPlan.create(root, DirectoryPruner(root))
+    walk.assert_not_called()
+    assert plan.recursive == [root]
+    assert plan.directories is None
+
+
+def test_merge_watches():
+    plans = [
+        WatchPlan(['/src/app', '/src/docs'], ['/src'], 2, ['/src/node_modules']),
+        WatchPlan(['/src/app/models', '/src/node_modules/foo', '/lib'], ['/src/docs'], 3, []),
+        WatchPlan(['/src'], [], 1, []),
+    ]
+
+    assert merge_watches(plans[:2]) == [
+        ('/lib', True), ('/src', False), ('/src/app', True), ('/src/docs', True),
+        ('/src/node_modules/foo', True)
+    ]
+    assert merge_watches(plans) == [('/lib', True), ('/src', True)]
+
+
+def create_watcher(tmpdir, handlers):
+    observer = Mock(schedule=Mock(
+        side_effect=lambda h, p, recursive: ObservedWatch(p, recursive=recursive)
+    ))
+    watcher = SharedWatcher(observer, Mock(logging.Logger))
+    for root, ignore_dirs, patterns in handlers:
+        root = str(tmpdir.join(root))
+        handler = Mock(
+            patterns=patterns, ignore_patterns=[], ignore_directories=False, case_sensitive=False
+        )
+        watcher.add_handler(handler, root, DirectoryPruner(root, ignore_dirs))
+    return observer, watcher
+
+
+def test_shared_watcher(tmpdir):
+    make_tree(tmpdir, 'app/models', 'node_modules/foo', 'docs')
+    observer, watcher = create_watcher(
+        tmpdir, [('.', ['node_modules'], ['*.py']), ('app', [], ['*.py', '*.txt'])]
+    )
+    handlers = [h for h, _, _ in watcher.handlers]
+
+    plans = watcher.schedule()
+
+    assert [p.directories for p in plans] == [4, None]
+    assert sorted(watcher.watches) == [
+        str(tmpdir), str(tmpdir.join('app')), str(tmpdir.join('docs'))
+    ]
+    assert observer.schedule.call_count == 3
+    observer.schedule.assert_any_call(watcher, str(tmpdir), recursive=False)
+
+    # events are dispatched only to the matched handlers
+    watcher.dispatch(FileModifiedEvent(str(tmpdir.join('app', 'models', 'foo.py'))))
+    watcher.dispatch(FileModifiedEvent(str(tmpdir.join('docs', 'foo.txt'))))
+    watcher.dispatch(FileModifiedEvent(str(tmpdir.join('app', 'foo.txt'))))
+    watcher.dispatch(FileModifiedEvent(str(tmpdir.join('docs', 'foo.py'))))
+
+    assert [c[0][0].src_path for c in handlers[0].on_any_event.call_args_list] == [
+        str(tmpdir.join('app', 'models', 'foo.py')), str(tmpdir.join('docs', 'foo.py'))
+    ]
+    assert [c[0][0].src_path for c in handlers[1].on_any_event.call_args_list] == [
+        str(tmpdir.join('app', 'models', 'foo.py')), str(tmpdir.join('app', 'foo.txt'))
+    ]
+
+    # a new directory in a directory watched non-recursively is scheduled
+    observer.reset_mock()
+    lib = tmpdir.join('lib').ensure(dir=True)
+    watcher.dispatch(DirCreatedEvent(str(lib)))
+    observer.schedule.assert_called_once_with(watcher, str(lib), recursive=True)
+
+    # pruned directories, files and directories in recursive watches are not scheduled
+    observer.reset_mock()
+    watcher.dispatch(DirCreatedEvent(str(tmpdir.join('node_modules'))))
+    watcher.dispatch(FileCreatedEvent(str(tmpdir.join('main.py'))))
+    watcher.dispatch(DirCreatedEvent(str(tmpdir.join('app', 'models'))))
+    watcher.dispatch(DirCreatedEvent(str(tmpdir.join('removed'))))
+    observer.schedule.assert_not_called()
+
+    # watches of a deleted or moved directory are unscheduled
+    observer.reset_mock()
+    watch = watcher.watches[str(lib)]
+    watcher.dispatch(DirDeletedEvent(str(lib)))
+    observer.unschedule.assert_called_once_with(watch)
+    assert str(lib) not in watcher.watches
+
+    observer.reset_mock()
+    watch = watcher.watches[str(tmpdir.join('docs'))]
+    tmpdir.join('docs').rename(tmpdir.join('doc'))
+    watcher.dispatch(DirMovedEvent(str(tmpdir.join('docs')), str(tmpdir.join('doc'))))
+    observer.unschedule.assert_called_once_with(watch)
+    observer.schedule.assert_called_once_with(watcher, str(tmpdir.join('doc')), recursive=True)
+
+
+def test_shared_watcher_overlapping(tmpdir):
+    make_tree(tmpdir, 'app/models', 'node_modules/foo')
+    observer, watcher = create_watcher(
+        tmpdir, [('.', [], ['*.py']), ('app', [], ['*.py']), ('.', ['node_modules'], ['*.js'])]
+    )
+
+    watcher.schedule()
+
+    observer.schedule.assert_called_once_with(watcher, str(tmpdir), recursive=True)
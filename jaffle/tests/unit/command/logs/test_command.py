@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+
+import pytest
+
+from jaffle.command.logs import JaffleLogsCommand
+from jaffle.log_archive import LogArchiveHandler
+
+
+def test_start(tmpdir, capsys):
+    handler = LogArchiveHandler(str(tmpdir))
+    for i, (name, level) in enumerate([('pytest', logging.INFO), ('jaffle', logging.ERROR),
+                                       ('pytest', logging.WARNING)]):
+        record = logging.makeLogRecord({
+            'name': name,
+            'levelno': level,
+            'levelname': logging.getLevelName(level),
+            'msg': 'message {}'.format(i)
+        })
+        handler.handle(record)
+    handler.close()
+
+    command = JaffleLogsCommand()
+    command.initialize(
+        argv=['--archive-dir={}'.format(tmpdir), '--level=warning', '--disable-color']
+    )
+    command.start()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith('jaffle  E  message 1')
+    assert lines[1].endswith('pytest  W  message 2')
+
+    command = JaffleLogsCommand()
+    command.initialize(argv=['--archive-dir={}'.format(tmpdir), '--lines=1', '--json'])
+    command.start()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])['message'] == 'message 2'
+
+
+def test_start_error(tmpdir, capsys):
+    command = JaffleLogsCommand()
+    command.initialize(argv=['--archive-dir={}'.format(tmpdir / 'none')])
+    with pytest.raises(SystemExit):
+        command.start()
+    assert 'Log archive not found' in capsys.readouterr().err
+
+    command = JaffleLogsCommand()
+    command.initialize(argv=['--archive-dir={}'.format(tmpdir), '--since=yesterday'])
+    with pytest.raises(SystemExit):
+        command.start()
+    assert "Invalid time: 'yesterday'" in capsys.readouterr().err
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import json
 import logging
 import signal
 from pathlib import Path
@@ -13,14 +14,16 @@ from zmq.eventloop import zmqstream
 
 from jaffle.command.start import JaffleStartCommand
 from jaffle.config import ConfigValue, JaffleConfig
-from jaffle.process import Process
+from jaffle.control import JaffleControlError
+from jaffle.process import Process, ProcessSupervisor
 from jaffle.session import JaffleSessionManager
 from jaffle.status import JaffleSession, JaffleStatus
+from jaffle.tracing import TraceFileWriter, Tracer
 
 
 @pytest.fixture(scope='function')
-def command():
-    command = JaffleStartCommand()
+def command(tmpdir):
+    command = JaffleStartCommand(runtime_dir=str(tmpdir.join('runtime')))
     command.check_running = Mock()
     command.initialize(argv=[])
     command._init_job_loggers = Mock()
@@ -108,7 +111,10 @@ def test_start(command):
                 'jaffle.command.start.command.zmqstream.ZMQStream',
                 return_value=Mock(zmqstream.ZMQStream)
             ) as zmq_stream:
-                command.start()
+                with patch.object(command, 'init_control') as init_control:
+                    with patch.object(command, 'init_conf_watcher') as init_conf_watcher:
+                        with patch.object(command, 'init_log_summaries') as init_log_summaries:
+                            command.start()
 
     ioloop_current.assert_called_once_with()
 
@@ -128,6 +134,10 @@ def test_start(command):
     zmq_stream.assert_called_once_with(command.socket, command.io_loop)
     zmq_stream.return_value.on_recv.assert_called_once_with(command._on_recv_msg)
 
+    init_control.assert_called_once_with()
+    init_conf_watcher.assert_called_once_with()
+    init_log_summaries.assert_called_once_with()
+
     ioloop_current.return_value.start.assert_called_once_with()
 
 
@@ -148,14 +158,25 @@ def test_shutdown(command):
         list_sessions=Mock(
             return_value=[{
                 'id': 'session-1',
-                'name': 'Session 1'
+                'name': 'Session 1',
+                'kernel': {
+                    'id': 'kernel-1'
+                }
             }, {
                 'id': 'session-2',
-                'name': 'Session 2'
+                'name': 'Session 2',
+                'kernel': {
+                    'id': 'kernel-2'
+                }
             }]
         ),
         delete_session=delete_session
     )
+    kernels = {'kernel-1': Mock(is_alive=Mock(return_value=False)), 'kernel-2': Mock()}
+    # kernel-2 ignores the shutdown request and exits only by SIGKILL
+    kernels['kernel-2'].is_alive.side_effect = lambda: not kernels['kernel-2'].signal_kernel.called
+    command.kernel_manager = Mock(MappingKernelManager, get_kernel=Mock(side_effect=kernels.get))
+    command.shutdown_timeout = 0.5
     command.status = Mock(
         JaffleStatus,
         sessions={
@@ -164,8 +185,12 @@ def test_shutdown(command):
         }
     )
     command.kernel_connection_file_path = Mock(return_value=Mock())
-    command.procs = {'proc-1': Mock(Process), 'proc-2': Mock(Process)}
+    command.supervisors = {
+        'proc-1': Mock(ProcessSupervisor, stop=Mock(return_value=gen.maybe_future(None))),
+        'proc-2': Mock(ProcessSupervisor, stop=Mock(return_value=gen.Future()))  # never stops
+    }
     command.io_loop = Mock(ioloop.IOLoop)
+    command.log.handlers = []
 
     yield command.shutdown()
 
@@ -176,6 +201,11 @@ def test_shutdown(command):
 
     assert deleted_sessions == ['session-1', 'session-2']
 
+    for kernel in kernels.values():
+        kernel.request_shutdown.assert_called_once_with()
+    kernels['kernel-1'].signal_kernel.assert_not_called()
+    kernels['kernel-2'].signal_kernel.assert_called_once_with(signal.SIGKILL)
+
     command.kernel_connection_file_path.assert_has_calls([
         call(sess.kernel.id) for sess in command.status.sessions.values()
     ])
@@ -184,16 +214,168 @@ def test_shutdown(command):
         call.unlink()
     ])
 
-    command.procs['proc-1'].stop.assert_called_once_with()
-    command.procs['proc-2'].stop.assert_called_once_with()
+    command.supervisors['proc-1'].stop.assert_called_once_with(timeout=pytest.approx(0.4))
+    command.supervisors['proc-2'].stop.assert_called_once_with(timeout=pytest.approx(0.4))
+
+    command.log.error.assert_called_once_with(
+        'Shutdown timed out after %.1f seconds: %s', 0.5, 'process proc-2'
+    )
 
     command.status.destroy.assert_called_once_with(command.status_file_path)
 
     command.io_loop.stop.assert_called_once_with()
 
 
+def test_on_recv_msg(command):
+    records = []
+    logger = logging.getLogger('app_foo')
+    logger.setLevel(logging.DEBUG)
+    with patch.object(logger, 'handle', side_effect=records.append):
+        command._on_recv_msg([
+            json.dumps({
+                'app_name': 'app_foo',
+                'type': 'log',
+                'payload': {
+                    'logger': 'app_foo',
+                    'levelname': 'WARNING',
+                    'msg': '%s: %d',
+                    'args': ['count', 3],
+                    'created': 1000.5,
+                    'exc_text': 'Traceback',
+                    'extra': {
+                        'trace_id': 'abc'
+                    }
+                }
+            }).encode('utf-8')
+        ])
+
+    assert len(records) == 1
+    assert records[0].name == 'app_foo'
+    assert records[0].levelno == logging.WARNING
+    assert records[0].getMessage() == 'count: 3'
+    assert records[0].created == 1000.5
+    assert records[0].exc_text == 'Traceback'
+    assert records[0].trace_id == 'abc'
+
+
+def test_on_recv_msg_trace(command):
+    command.status = Mock(JaffleStatus, apps={'app_foo': Mock(session_name='kernel_foo')})
+    command.trace_writer = Mock(TraceFileWriter)
+    command.tracer = Mock(Tracer)
+    event = {'name': 'pytest.main', 'ph': 'X', 'pid': 10}
+    command._on_recv_msg([
+        json.dumps({'app_name': 'app_foo', 'type': 'trace', 'payload': event}).encode()
+    ])
+
+    command.trace_writer.write.assert_called_once_with(event, process_name='kernel kernel_foo')
+
+    with patch.object(logging.getLogger('app_foo'), 'handle'):
+        command._on_recv_msg([
+            json.dumps({
+                'app_name': 'app_foo',
+                'type': 'log',
+                'payload': {
+                    'logger': 'app_foo',
+                    'levelname': 'INFO',
+                    'msg': 'foo',
+                    'created': 1000.5,
+                    'extra': {'trace_id': 'abc'}
+                }
+            }).encode()
+        ])
+
+    command.tracer.add_span.assert_called_once()
+    args, kwargs = command.tracer.add_span.call_args
+    assert args[:2] == ('log', 1000.5)
+    assert kwargs == {'trace_id': 'abc', 'logger': 'app_foo'}
+
+
+def test_on_recv_msg_metrics(command):
+    command.status = Mock(JaffleStatus, apps={'app_foo': Mock()})
+    snapshot = [{
+        'name': 'foo_total',
+        'type': 'counter',
+        'help': 'Foo.',
+        'samples': [{'labels': {}, 'value': 3}]
+    }]
+    for app_name in ['app_foo', 'app_removed']:
+        command._on_recv_msg([
+            json.dumps({'app_name': app_name, 'type': 'metrics', 'payload': snapshot}).encode()
+        ])
+
+    assert command.app_metrics['app_foo'] == snapshot
+
+    command._control_metrics = Mock(return_value={
+        'uptime': 1.5, 'kernels': 1, 'apps': 1, 'processes': 0, 'running_processes': 0
+    })
+    text = command.render_metrics()
+
+    assert 'jaffle_uptime_seconds 1.5\n' in text
+    assert 'jaffle_messages_received_total{app="app_foo",type="metrics"} 1\n' in text
+    assert 'foo_total{app="app_foo"} 3\n' in text
+    assert 'app_removed"} 3' not in text
+
+
+def test_on_recv_msg_bus(command):
+    command.status = Mock(JaffleStatus, apps={
+        'watchdog': Mock(session_name='kernel_foo'),
+        'pytest': Mock(session_name='kernel_bar'),
+        'tornado': Mock(session_name='kernel_bar'),
+        'stopped': Mock(session_name='kernel_stopped')
+    })
+    command.clients = {'kernel_foo': Mock(), 'kernel_bar': Mock()}
+
+    def send(app_name, msg_type, payload):
+        command._on_recv_msg([
+            json.dumps({'app_name': app_name, 'type': msg_type, 'payload': payload}).encode()
+        ])
+
+    for app_name in ['pytest', 'tornado', 'stopped', 'removed']:
+        send(app_name, 'subscribe', {'topic': 'file_events'})
+    send('watchdog', 'publish', {
+        'topic': 'file_events',
+        'messages': [{'src_path': 'foo.py'}],
+        'published_at': 1000.5
+    })
+
+    command.clients['kernel_foo'].execute.assert_not_called()
+    command.clients['kernel_bar'].execute.assert_called_once_with(
+        'pytest._receive_messages(\'file_events\', '
+        '__import__("json").loads(\'[{"src_path": "foo.py"}]\'), 1000.5)\n'
+        'tornado._receive_messages(\'file_events\', '
+        '__import__("json").loads(\'[{"src_path": "foo.py"}]\'), 1000.5)',
+        silent=True
+    )
+
+    counter = command.metrics.counter(
+        'jaffle_bus_deliveries_total', labelnames=['topic', 'kernel']
+    )
+    assert counter.get(topic='file_events', kernel='kernel_bar') == 1
+
+
+def test_on_recv_msg_test_results(command):
+    def send(msg_type, payload):
+        command._on_recv_msg([
+            json.dumps({'app_name': 'pytest', 'type': msg_type, 'payload': payload}).encode()
+        ])
+
+    send('test_run', {'event': 'start', 'target': 'test_foo.py', 'started_at': 1000.0})
+    send('test_result', {'nodeid': 'test_foo.py::test_a', 'outcome': 'failed', 'duration': 0.5})
+
+    run = command.test_results.runs['pytest']
+    assert run['outcomes'] == {'failed': 1}
+    assert run['finished_at'] is None
+
+    send('test_run', {
+        'event': 'finish', 'target': 'test_foo.py', 'exit_code': 1, 'finished_at': 1001.0
+    })
+    assert run['exit_code'] == 1
+    assert run['failed'] == ['test_foo.py::test_a']
+
+
 @pytest.mark.gen_test
-def test_start_sessions(command):
+def test_start_sessions(command, tmpdir):
+    command.runtime_dir = str(tmpdir)
     created_sessions = []
 
     def create_session(**kwargs):
@@ -248,6 +430,8 @@ def test_start_sessions(command):
         MappingKernelManager, get_kernel=Mock(return_value=Mock(client=Mock(return_value=client)))
     )
 
+    command._start_monitor = Mock()
+
     logger = Mock()
     with patch(
         'jaffle.command.start.command.logging.getLogger', return_value=logger
@@ -263,6 +447,7 @@ def test_start_sessions(command):
     }]
 
     command.status.add_session.assert_called_once_with('sess-id', 'sess_name', 'sess_kernel')
+    command._start_monitor.assert_called_once_with('sess_name', command.conf.kernel['sess_name'])
 
     command._get_apps_for_session.assert_called_once_with('sess_name')
 
@@ -284,11 +469,231 @@ def test_start_sessions(command):
     assert len(client.execute.call_args_list) == 1
 
     exec_args = client.execute.call_args_list[0]
-    "from foo import Foo" in exec_args[0]
-    "app1 = Foo('app1', " in exec_args[0]
-    "**{'opt1': True}" in exec_args[0]
-    "app1.start()" in exec_args[0]
-    "from bar import Bar" in exec_args[0]
-    "app2 = Bar('app2', " in exec_args[0]
-    "**{}" in exec_args[0]
+    config_path = command.app_config_paths['app1']
+    assert command.app_config_paths['app2'] == config_path
+    assert exec_args[0][0].splitlines() == [
+        'from jaffle.app.base.config import AppConfig',
+        'from foo import Foo',
+        'app1 = Foo(AppConfig.load({!r}, {!r}))'.format(config_path, 'app1'),
+        'app1.start()',
+        'from jaffle.app.base.config import AppConfig',
+        'from bar import Bar',
+        'app2 = Bar(AppConfig.load({!r}, {!r}))'.format(config_path, 'app2'),
+    ]
+    with open(config_path) as f:
+        assert json.load(f)['apps'] == apps
     assert exec_args[1] == {'silent': True}
+
+
+@pytest.mark.gen_test
+def test_reload_conf(command):
+    conf1 = JaffleConfig(
+        {},
+        kernel={'k1': {'kernel_name': 'python3'}, 'k2': {'kernel_name': 'python3'}},
+        app={
+            'a1': {'class': 'A1', 'kernel': 'k1'},
+            'a2': {'class': 'A2', 'kernel': 'k1'},
+            'a3': {'class': 'A3', 'kernel': 'k2'}
+        },
+        process={'p1': {'command': 'p1'}, 'p2': {'command': 'p2'}}
+    )  # yapf: disable
+    conf2 = JaffleConfig(
+        {},
+        kernel={'k1': {'kernel_name': 'python3'}, 'k2': {'kernel_name': 'python2'}},
+        app={
+            'a1': {'class': 'A1', 'kernel': 'k1'},
+            'a2': {'class': 'A2', 'kernel': 'k1', 'options': {'foo': 1}},
+            'a3': {'class': 'A3', 'kernel': 'k2'}
+        },
+        process={'p1': {'command': 'p1'}, 'p2': {'command': 'p2', 'logger': {'level': 'debug'}}}
+    )  # yapf: disable
+
+    command.conf = conf1
+    command.status = JaffleStatus(1, {}, {})
+    command.status.add_session('s1', 'k1', {'id': 'kernel-1', 'name': 'python3'})
+    command.status.add_session('s2', 'k2', {'id': 'kernel-2', 'name': 'python3'})
+    for app_name, app_data in conf1.app.raw().items():
+        command.status.add_app(app_name, app_data['kernel'], app_data['class'], None, {})
+    command.procs = {'p1': Mock(Process), 'p2': Mock(Process, log=Mock())}
+    command.io_loop = Mock(ioloop.IOLoop)
+    command.log.handlers = []
+    command.status.save = Mock()
+    command._stop_apps = Mock(return_value=gen.maybe_future(None))
+    command._stop_session = Mock(return_value=gen.maybe_future(None))
+    command._start_session = Mock(return_value=gen.maybe_future(None))
+    command._init_apps = Mock()
+
+    with patch.object(JaffleConfig, 'load', return_value=conf2):
+        result = yield command.reload_conf()
+
+    assert command.conf is conf2
+    assert result == {'kernels': ['k2'], 'apps': ['a2', 'a3'], 'processes': []}
+
+    command._stop_apps.assert_called_once_with('k1', ['a2'])
+    command._stop_session.assert_called_once_with('k2')
+    command._start_session.assert_called_once_with('k2', conf2.kernel['k2'])
+    command._init_apps.assert_has_calls([
+        call(command.status.sessions['k1'], {'a2': conf2.app.raw()['a2']}),
+        call(command.status.sessions['k2'], {'a3': conf2.app.raw()['a3']})
+    ], any_order=True)
+
+    command.procs['p1'].stop.assert_not_called()
+    command.procs['p2'].stop.assert_not_called()
+    command.procs['p2'].log.setLevel.assert_called_once_with(logging.DEBUG)
+    command.io_loop.add_callback.assert_not_called()
+
+    command.status.save.assert_called_once_with(command.status_file_path)
+
+
+def setup_reload(command, conf):
+    command.conf = conf
+    command.status = JaffleStatus(1, {}, {})
+    command.status.add_session('s1', 'k1', {'id': 'kernel-1', 'name': 'python3'})
+    for app_name, app_data in conf.app.raw().items():
+        command.status.add_app(app_name, app_data['kernel'], app_data['class'], None, {})
+    command.procs = {'p1': Mock(Process)}
+    command.supervisors = {'p1': Mock(ProcessSupervisor, stop=Mock(return_value=None))}
+    command.io_loop = Mock(ioloop.IOLoop)
+    command.log.handlers = []
+    command.status.save = Mock()
+    command._stop_apps = Mock(return_value=gen.maybe_future(None))
+    command._stop_session = Mock(return_value=gen.maybe_future(None))
+    command._start_session = Mock(return_value=gen.maybe_future(None))
+    command._init_apps = Mock()
+    command._create_supervisor = Mock(return_value=False)
+
+
+@pytest.mark.gen_test
+def test_reload_conf_variable(command):
+    blocks = dict(
+        kernel={'k1': {'kernel_name': 'python3'}},
+        app={'a1': {'class': 'A1', 'kernel': 'k1', 'options': {'port': '${var.port}'}}},
+        process={'p1': {'command': 'serve ${var.port}'}}
+    )
+    conf1 = JaffleConfig({}, variable={'port': {'default': 8000}}, **blocks)
+    conf2 = JaffleConfig({}, variable={'port': {'default': 9000}}, **blocks)
+    setup_reload(command, conf1)
+
+    with patch.object(JaffleConfig, 'load', return_value=conf2):
+        result = yield command.reload_conf()
+
+    # the blocks rendered with the variables are restarted
+    assert result == {'kernels': [], 'apps': ['a1'], 'processes': ['p1']}
+    command._stop_apps.assert_called_once_with('k1', ['a1'])
+    command._init_apps.assert_called_once_with(
+        command.status.sessions['k1'], {'a1': conf2.app.raw()['a1']}
+    )
+    command._create_supervisor.assert_called_once_with('p1', conf2.process['p1'])
+
+
+@pytest.mark.gen_test
+def test_reload_conf_job(command):
+    blocks = dict(
+        kernel={'k1': {'kernel_name': 'python3'}},
+        app={'a1': {'class': 'A1', 'kernel': 'k1'}},
+        process={'p1': {'command': 'serve'}}
+    )
+    conf1 = JaffleConfig({}, job={'lint': {'command': 'flake8'}}, **blocks)
+    conf2 = JaffleConfig({}, job={'lint': {'command': 'flake8 --max-line-length=99'}}, **blocks)
+    setup_reload(command, conf1)
+
+    with patch.object(JaffleConfig, 'load', return_value=conf2):
+        result = yield command.reload_conf()
+
+    # apps receive the jobs config but processes do not
+    assert result == {'kernels': [], 'apps': ['a1'], 'processes': []}
+    command._stop_apps.assert_called_once_with('k1', ['a1'])
+    command._create_supervisor.assert_not_called()
+
+
+@pytest.mark.gen_test
+def test_control_reload(command):
+    command.conf_files = []
+    command.reload_conf = Mock(return_value=gen.maybe_future({'apps': []}))
+
+    command.reloading = True
+    with pytest.raises(JaffleControlError):
+        yield command._control_reload()
+    command.reload_conf.assert_not_called()
+
+    command.reloading = False
+    assert (yield command._control_reload()) == {'apps': []}
+    command.reload_conf.assert_called_once_with()
+    assert not command.reloading
+
+
+def test_check_conf_files(command, tmpdir):
+    conf_file = Path(str(tmpdir)) / 'jaffle.hcl'
+    conf_file.write_text('kernel "k1" {}')
+    command.conf_files = [conf_file]
+    command.conf_mtimes = command._get_conf_mtimes()
+    command.reload_conf = Mock(return_value=gen.maybe_future(None))
+
+    command._check_conf_files()
+    command.reload_conf.assert_not_called()
+
+    command.conf_mtimes = {str(conf_file): 0}
+    command._check_conf_files()
+    command.reload_conf.assert_called_once_with()
+    assert command.conf_mtimes == {str(conf_file): conf_file.stat().st_mtime}
+    assert not command.reloading
+
+
+@pytest.mark.gen_test
+def test_restart_kernel(command):
+    command.status = JaffleStatus(1, {}, {})
+    command.status.add_session('s1', 'k1', {'id': 'kernel-1', 'name': 'python3'})
+    command.status.add_app('a1', 'k1', 'A1', None, {})
+    command.status.add_app('a2', 'k2', 'A2', None, {})
+    command.status.save = Mock()
+    command.app_init_codes = {'a1': 'a1 = A1()', 'a2': 'a2 = A2()'}
+    command.clients = {'k1': Mock()}
+    command.conf = JaffleConfig({}, kernel={'k1': {}})
+    kernel_manager = Mock(is_ready=True)
+    command.kernel_manager = Mock(
+        MappingKernelManager, get_kernel=Mock(return_value=kernel_manager)
+    )
+    command._execute_in_kernel = Mock(return_value=gen.maybe_future({'status': 'ok'}))
+
+    with patch('jaffle.command.start.command.time.time', return_value=105.0):
+        yield command._restart_kernel('k1', 100.0)
+
+    command.kernel_manager.get_kernel.assert_called_once_with('kernel-1')
+    kernel_manager.restart_kernel.assert_called_once_with(now=True)
+    assert kernel_manager.is_ready is False
+    command._execute_in_kernel.assert_called_once_with('k1', 'a1 = A1()')
+
+    session = command.status.sessions['k1']
+    assert session.restart_count == 1
+    assert session.downtime == 5.0
+    command.status.save.assert_called_once_with(command.status_file_path)
+
+
+@pytest.mark.gen_test
+def test_control_restart(command):
+    class App(object):
+        instances = []
+
+        def __init__(self):
+            self.stopped = False
+            self.instances.append(self)
+
+        def shutdown(self):
+            self.stopped = True
+
+    namespace = {'App': App}
+
+    def execute_in_kernel(session_name, code):
+        exec(code, namespace)
+        return gen.maybe_future({'status': 'ok'})
+
+    command.status = JaffleStatus(1, {}, {})
+    command.status.add_app('a1', 'k1', 'App', None, {})
+    command.app_init_codes = {'a1': 'a1 = App()'}
+    command._execute_in_kernel = Mock(side_effect=execute_in_kernel)
+    exec(command.app_init_codes['a1'], namespace)
+
+    assert (yield command._control_restart('a1')) == 'App a1 restarted'
+    # the old app is shut down before it is re-initialized
+    assert [a.stopped for a in App.instances] == [True, False]
+    assert namespace['a1'] is App.instances[1]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import json
+import subprocess
+import sys
+
+import pytest
+from traitlets.utils.importstring import import_item
+
+from jaffle.command.main import JaffleMainCommand
+
+HEAVY_MODULES = [
+    'IPython', 'jupyter_client', 'jupyter_console', 'notebook', 'prompt_toolkit', 'pexpect',
+    'tornado', 'zmq', 'pyjq', 'yaml'
+]
+
+# Modules which must not be imported by each subcommand.
+FORBIDDEN_MODULES = {
+    'jaffle.command.main': HEAVY_MODULES + [
+        path.rsplit('.', 1)[0] for path, _ in JaffleMainCommand.subcommands.values()
+    ],
+    'jaffle.command.stop': [m for m in HEAVY_MODULES if m not in ['tornado']],
+    'jaffle.command.tty': [m for m in HEAVY_MODULES if m not in ['tornado', 'pexpect']],
+    'jaffle.command.logs': HEAVY_MODULES,
+    'jaffle.command.start': ['IPython', 'jupyter_console', 'notebook', 'prompt_toolkit'],
+    'jaffle.command.attach': ['notebook'],
+    'jaffle.command.console': ['notebook']
+}
+
+
+def _imported_modules(module):
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        'import json, sys, {0}; print(json.dumps(sorted(sys.modules)))'.format(module)
+    ])
+    return json.loads(output.decode('utf-8'))
+
+
+def test_subcommands():
+    for name, (path, help) in JaffleMainCommand.subcommands.items():
+        cls = import_item(path)
+        assert help == cls.description.strip().splitlines()[0]
+
+
+@pytest.mark.parametrize('module', sorted(FORBIDDEN_MODULES))
+def test_lazy_imports(module):
+    imported = set(_imported_modules(module))
+    for forbidden in FORBIDDEN_MODULES[module]:
+        assert forbidden not in imported, '{} imports {}'.format(module, forbidden)
+
+
+def test_stop_cleanup_imports(tmpdir):
+    # jaffle stop cleans up the runtime directory without the server dependencies.
+    tmpdir.join('jaffle.json').write('{}')
+    tmpdir.join('app-config-0123456789abcdef.json').write('{}')
+    output = subprocess.check_output([
+        sys.executable, '-c', '; '.join([
+            'import json, sys',
+            'from unittest.mock import Mock',
+            'from jaffle.command.stop import JaffleStopCommand',
+            'command = JaffleStopCommand(runtime_dir={!r})'.format(str(tmpdir)),
+            'command._cleanup_runtime_dir(Mock())',
+            'print(json.dumps(sorted(sys.modules)))'
+        ])
+    ])
+    imported = json.loads(output.decode('utf-8').splitlines()[-1])
+
+    assert tmpdir.join('app-config-0123456789abcdef.json').check() is False
+    assert sorted(m for m in imported if m.startswith('jaffle')) == [
+        'jaffle', 'jaffle._version', 'jaffle.ansi', 'jaffle.command', 'jaffle.command.base',
+        'jaffle.command.main', 'jaffle.command.stop', 'jaffle.command.stop.command',
+        'jaffle.display', 'jaffle.logging', 'jaffle.runtime', 'jaffle.status', 'jaffle.utils',
+        'jaffle.variables'
+    ]
+    for forbidden in ['zmq', 'tornado']:
+        assert forbidden not in imported
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+from jaffle.command.tty.command import OutputStream
+
+
+def test_output_stream():
+    with patch('jaffle.command.tty.command.sys') as sys:
+        stream = OutputStream(color=False)
+        stream.write('\x1b[32mfoo\x1b[0m\r\n\x1b[2K')
+        stream.write('progress\r')
+        stream.flush()
+        stream.write('\x1b[2Kdone')
+        stream.close()
+
+    assert ''.join(c[0][0] for c in sys.stdout.write.call_args_list) == 'foo\nprogress\ndone'
+    assert sys.stdout.flush.call_count == 2
+    assert stream.closed
@@ -99,6 +99,57 @@ def test_jaffle_config():
     assert pat_to.render() == 'global_pat_to FOO'
 
 
+def test_log_limits():
+    conf = JaffleConfig(
+        {'rate': '10'},
+        app={'my_app': {'class': 'my.app.MyApp', 'logger': {'collapse_repeats': True}}},
+        process={'my_proc': {'command': 'my_proc', 'logger': {'rate_limit': 5}}},
+        job={
+            'my_job': {
+                'command': 'my_job',
+                'logger': {'name': 'my_job_logger', 'rate_limit': '${rate}'}
+            },
+            'other_job': {'command': 'other_job'}
+        },
+        logger={'rate_limit': 100, 'collapse_repeats': 'true'}
+    )  # yapf: disable
+
+    assert conf.log_limits == {
+        'my_app': (0.0, True),
+        'my_proc': (5.0, False),
+        'my_job_logger': (10.0, False)
+    }
+    assert conf.global_log_limit == (100.0, True)
+
+    assert JaffleConfig({}).global_log_limit == (0.0, False)
+
+
+def test_diff():
+    conf1 = JaffleConfig(
+        {},
+        kernel={'k1': {'kernel_name': 'python3'}, 'k2': {'kernel_name': 'python3'}},
+        app={'a1': {'class': 'A1', 'kernel': 'k1'}, 'a2': {'class': 'A2', 'kernel': 'k2'}},
+        process={'p1': {'command': 'p1'}}
+    )  # yapf: disable
+    conf2 = JaffleConfig(
+        {},
+        kernel={'k1': {'kernel_name': 'python3'}, 'k3': {'kernel_name': 'python3'}},
+        app={'a1': {'class': 'A1', 'kernel': 'k1'}, 'a2': {'class': 'A2', 'kernel': 'k3'}},
+        process={'p1': {'command': 'p1 --debug'}},
+        logger={'level': 'debug'}
+    )  # yapf: disable
+
+    diff = conf1.diff(conf2)
+
+    assert diff['kernel'] == {'added': {'k3'}, 'removed': {'k2'}, 'changed': set()}
+    assert diff['app'] == {'added': set(), 'removed': set(), 'changed': {'a2'}}
+    assert diff['process'] == {'added': set(), 'removed': set(), 'changed': {'p1'}}
+    assert diff['job'] == {'added': set(), 'removed': set(), 'changed': set()}
+    assert diff['logger'] == {'added': {'level'}, 'removed': set(), 'changed': set()}
+
+    assert all(not names for d in conf1.diff(conf1).values() for names in d.values())
+
+
 def test_load():
     data1 = {'kernel': {'my_kernel': {'kernel_name': 'python3', 'pass_env': []}}}
     ns = {'HOME': '/home/foo'}
@@ -193,3 +244,46 @@ def test_load_file(tmpdir):
 
     data = JaffleConfig._load_file(str(tmp_file))
     assert data == {'kernel': {'my_kernel': {'kernel_name': 'python3'}}}
+
+
+def test_load_cache(tmpdir):
+    cache_dir = Path(str(tmpdir))
+    conf_file = cache_dir / 'jaffle.hcl'
+    with conf_file.open('w') as f:
+        f.write('kernel "my_kernel" {\n  kernel_name = "python3"\n}\n')
+
+    JaffleConfig._data_cache = {}
+    data = {'kernel': {'my_kernel': {'kernel_name': 'python3'}}}
+
+    with patch.object(JaffleConfig, 'create') as create:
+        JaffleConfig.load([conf_file], {}, {}, cache_dir=cache_dir)
+    create.assert_called_once_with(data, {}, {})
+    assert (cache_dir / 'config_cache.json').exists()
+
+    # in-process cache
+    with patch.object(JaffleConfig, '_load_file') as load_file:
+        with patch.object(JaffleConfig, 'create') as create:
+            JaffleConfig.load([conf_file], {}, {}, cache_dir=cache_dir)
+    load_file.assert_not_called()
+    create.assert_called_once_with(data, {}, {})
+
+    # cache file
+    JaffleConfig._data_cache = {}
+    with patch.object(JaffleConfig, '_load_file') as load_file:
+        with patch.object(JaffleConfig, 'create') as create:
+            JaffleConfig.load([conf_file], {}, {}, cache_dir=cache_dir)
+    load_file.assert_not_called()
+    create.assert_called_once_with(data, {}, {})
+
+    # runtime variables change the key
+    with patch.object(JaffleConfig, '_load_file', return_value=data) as load_file:
+        with patch.object(JaffleConfig, 'create'):
+            JaffleConfig.load([conf_file], {}, {'foo': 'bar'}, cache_dir=cache_dir)
+    load_file.assert_called_once_with(conf_file)
+
+    # file contents change the key
+    with conf_file.open('w') as f:
+        f.write('kernel "my_kernel" {\n  kernel_name = "python3"\n  invalid_param = true\n}\n')
+
+    with pytest.raises(ValidationError):
+        JaffleConfig.load([conf_file], {}, {'foo': 'bar'}, cache_dir=cache_dir)
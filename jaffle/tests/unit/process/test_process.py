@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import os
 import signal
-from subprocess import TimeoutExpired
+from pty import openpty
 from unittest.mock import Mock, call, patch
 
 import pytest
+from tornado import gen
+from tornado.iostream import StreamClosedError
 
-from jaffle.process.process import Process
+from jaffle.process.process import Process, PTYStream
 
 
 def test_init():
@@ -77,28 +80,46 @@ def test_start(subprocess_mock):
 
 @pytest.mark.gen_test
 def test_start_tty(subprocess_mock):
+    chunks = [b'\x1b[2Kaaa\r\n\x1b', b'[31mbbb\x1b[0m\r\n\xe3\x81', b'\x82\x1b[1Accc']
+
+    @gen.coroutine
+    def read_bytes(num_bytes, partial=False):
+        yield gen.sleep(0.01)
+        if not chunks:
+            raise StreamClosedError()
+        return chunks.pop(0)
+
     log = Mock(level=logging.INFO)
-    with patch('jaffle.process.process.os') as os:
+    with patch('jaffle.process.process.os') as os, \
+            patch('jaffle.process.process.pty') as pty, \
+            patch('jaffle.process.process.fcntl'), \
+            patch('jaffle.process.process.PTYStream') as pty_stream:
         os.environ = {'PATH': '/bin'}
+        pty.openpty.return_value = (10, 11)
+        pty_stream.return_value.read_bytes = read_bytes
         with patch('jaffle.process.process.Subprocess', return_value=subprocess_mock) as subproc:
             proc = Process(log, 'foo', 'foo --help', env={'BAR': 'bar'}, tty=True)
             yield proc.start()
 
-    subproc.assert_called_once_with(['jaffle', 'tty', 'foo --help'],
+    subproc.assert_called_once_with(['foo', '--help'],
                                     env={
                                         'PATH': '/bin',
                                         'BAR': 'bar'
                                     },
-                                    stdin=None,
-                                    stdout=subproc.STREAM,
-                                    stderr=subproc.STREAM,
-                                    preexec_fn=os.setpgrp)
+                                    stdin=11,
+                                    stdout=11,
+                                    stderr=11,
+                                    preexec_fn=Process._set_controlling_tty)
+
+    os.close.assert_called_once_with(11)
+    pty_stream.assert_called_once_with(10)
+    pty_stream.return_value.close.assert_called_once_with()
 
     log.info.assert_has_calls([
         call('Starting %s: %r', 'foo', 'foo --help'),
         call('aaa'),
-        call('bbb'),
-        call('ccc')
+        call('\x1b[31mbbb\x1b[0m'),
+        call('\u3042ccc')
     ])
 
     log.warning.assert_called_once_with('Process %s finished', 'foo')
@@ -106,6 +127,17 @@ def test_start_tty(subprocess_mock):
     log.error.assert_not_called()
 
 
+def test_pty_stream():
+    master_fd, slave_fd = openpty()
+    stream = PTYStream(master_fd)
+    os.write(slave_fd, b'foo\n')
+    os.close(slave_fd)
+
+    assert stream.read_from_fd() == b'foo\r\n'
+    assert stream.read_from_fd() is None  # EIO
+    assert stream.closed()
+
+
 @pytest.mark.gen_test
 def test_start_error(subprocess_mock):
     log = Mock()
@@ -130,14 +162,16 @@ def test_stop(subprocess_mock):
         with patch('jaffle.process.process.Subprocess', return_value=subprocess_mock):
             proc = Process(Mock(), 'foo', 'foo --help', env={'BAR': 'bar'})
             yield proc.start()
-            yield proc.stop()
+            subprocess_mock.proc.poll.return_value = -15
+            returncode = yield proc.stop()
 
     os.getpgid.assert_called_once_with(subprocess_mock.proc.pid)
     os.killpg.assert_called_once_with(os.getpgid.return_value, signal.SIGTERM)
 
-    subprocess_mock.proc.wait.assert_called_once_with(5)
+    subprocess_mock.proc.wait.assert_not_called()
 
-    subprocess_mock.proc is None
+    assert returncode == -15
+    assert proc.proc is None
 
 
 @pytest.mark.gen_test
@@ -154,26 +188,33 @@ def test_stop_already_dead(subprocess_mock):
 
     subprocess_mock.proc.wait.assert_not_called()
 
-    subprocess_mock.proc is None
+    assert proc.proc is None
 
 
 @pytest.mark.gen_test
 def test_stop_force(subprocess_mock):
     with patch('jaffle.process.process.os') as os:
         with patch('jaffle.process.process.Subprocess', return_value=subprocess_mock):
-            subprocess_mock.proc.wait.side_effect = TimeoutExpired(Mock(), 5)
-
             proc = Process(Mock(), 'foo', 'foo --help', env={'BAR': 'bar'})
             yield proc.start()
-            yield proc.stop()
 
-    os.getpgid.assert_has_calls([call(subprocess_mock.proc.pid), call(subprocess_mock.proc.pid)])
+            # the process ignores SIGTERM and exits only by SIGKILL
+            def poll():
+                if call(os.getpgid.return_value, signal.SIGKILL) in os.killpg.call_args_list:
+                    return -9
+                return None
+
+            subprocess_mock.proc.poll.side_effect = poll
+            returncode = yield proc.stop(timeout=0.1)
+
+    os.getpgid.assert_called_once_with(subprocess_mock.proc.pid)
 
     os.killpg.assert_has_calls([
         call(os.getpgid.return_value, signal.SIGTERM),
         call(os.getpgid.return_value, signal.SIGKILL)
     ])
 
-    subprocess_mock.proc.wait.assert_called_once_with(5)
+    subprocess_mock.proc.wait.assert_not_called()
 
-    subprocess_mock.proc is None
+    assert returncode == -9
+    assert proc.proc is None
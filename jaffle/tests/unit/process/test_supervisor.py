@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+from tornado import gen
+
+from jaffle.process.process import Process
+from jaffle.process.supervisor import ProcessSupervisor, check_dependencies, sample_process_group
+
+
+def process_mock(name, returncodes):
+    returncodes = list(returncodes)
+
+    def start():
+        return gen.maybe_future(returncodes.pop(0))
+
+    proc = Mock(Process, proc_name=name, proc=Mock(), line_handlers=[], is_running=True)
+    proc.start.side_effect = start
+    proc.stop.return_value = gen.maybe_future(None)
+    return proc
+
+
+def test_init():
+    proc = process_mock('foo', [])
+    supervisor = ProcessSupervisor(Mock(), proc)
+    assert supervisor.proc_name == 'foo'
+    assert supervisor.restart_policy == 'never'
+    assert supervisor.depends_on == []
+
+    with pytest.raises(ValueError) as e:
+        ProcessSupervisor(Mock(), proc, restart='sometimes')
+    assert "Invalid restart policy of foo: 'sometimes'" in str(e.value)
+
+
+@pytest.mark.gen_test
+def test_run_never():
+    proc = process_mock('foo', [1])
+    supervisor = ProcessSupervisor(Mock(logging.Logger), proc)
+
+    yield supervisor.run({})
+
+    assert proc.start.call_count == 1
+    assert supervisor.last_returncode == 1
+    assert supervisor.restart_count == 0
+    assert supervisor.ready.is_set()
+    assert supervisor.finished
+
+
+@pytest.mark.gen_test
+def test_run_on_failure():
+    proc = process_mock('foo', [1, 2, 0])
+    supervisor = ProcessSupervisor(
+        Mock(logging.Logger), proc, restart='on-failure', backoff=0.01
+    )
+
+    yield supervisor.run({})
+
+    assert proc.start.call_count == 3
+    assert supervisor.last_returncode == 0
+    assert supervisor.restart_count == 2
+
+
+@pytest.mark.gen_test
+def test_run_restart_limit():
+    proc = process_mock('foo', [0, 0, 0, 0])
+    log = Mock(logging.Logger)
+    supervisor = ProcessSupervisor(log, proc, restart='always', restart_limit=2, backoff=0.01)
+
+    yield supervisor.run({})
+
+    assert proc.start.call_count == 3
+    log.error.assert_called_once_with(
+        '%s exited with %s and reached the restart limit (%s)', 'foo', 0, 2
+    )
+
+
+@pytest.mark.gen_test
+def test_run_depends_on():
+    db = ProcessSupervisor(Mock(logging.Logger), process_mock('db', []))
+    web = ProcessSupervisor(
+        Mock(logging.Logger), process_mock('web', [0]), depends_on=['db', 'unknown']
+    )
+
+    future = web.run({'db': db, 'web': web})
+    yield gen.sleep(0.01)
+    web.process.start.assert_not_called()
+
+    db.ready.set()
+    yield future
+    web.process.start.assert_called_once_with()
+    web.log.warning.assert_called_once_with(
+        '%s depends on unknown process %s', 'web', 'unknown'
+    )
+
+
+@pytest.mark.gen_test
+def test_ready_pattern():
+    started = gen.Future()
+    proc = process_mock('foo', [])
+    proc.start.side_effect = lambda: started
+    supervisor = ProcessSupervisor(Mock(logging.Logger), proc, ready_pattern='^Listening')
+
+    future = supervisor.run({})
+    yield gen.sleep(0.01)
+    assert not supervisor.ready.is_set()
+
+    for handler in proc.line_handlers:
+        handler('Starting')
+    assert not supervisor.ready.is_set()
+
+    for handler in proc.line_handlers:
+        handler('Listening on port 8080')
+    assert supervisor.ready.is_set()
+
+    started.set_result(0)
+    yield future
+    assert proc.line_handlers == []
+
+
+@pytest.mark.gen_test
+def test_stop_and_restart():
+    proc = process_mock('foo', [0, 0])
+    supervisor = ProcessSupervisor(Mock(logging.Logger), proc)
+
+    supervisor.restart_requested = True
+    yield supervisor.stop(timeout=3.0)
+    proc.stop.assert_called_once_with(timeout=3.0)
+    assert supervisor.stopping
+
+    yield supervisor.run({})
+    proc.start.assert_not_called()
+
+    supervisor.stopping = False
+    proc.is_running = False
+    supervisor.restart()
+    yield gen.sleep(0.01)
+    proc.start.assert_called_once_with()
+
+
+def test_check_dependencies():
+    check_dependencies({'web': ['db', 'cache'], 'db': [], 'worker': ['db', 'unknown']})
+
+    with pytest.raises(ValueError) as e:
+        check_dependencies({'a': ['b'], 'b': ['c'], 'c': ['a']})
+    assert str(e.value) == 'Circular process dependency: a -> b -> c -> a'
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/stat'), reason='/proc is not available')
+def test_sample_process_group():
+    cpu_time, rss = sample_process_group(os.getpgid(os.getpid()))
+    assert cpu_time > 0
+    assert rss > 0
+
+    with patch('jaffle.process.supervisor.os.listdir', side_effect=OSError):
+        assert sample_process_group(1) is None
+
+
+def test_sample_usage_exited():
+    proc = process_mock('foo', [0])
+    supervisor = ProcessSupervisor(Mock(logging.Logger), proc)
+
+    with patch('jaffle.process.supervisor.os.getpgid', side_effect=ProcessLookupError):
+        assert supervisor.sample_usage() is None
+    assert supervisor.usage is None
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+import pytest
+
+from jaffle.ansi import EscapeSequenceFilter, TerminalOutputFilter
+
+
+@pytest.mark.parametrize('color,expected', [
+    (True, 'foo \x1b[1;31mbar\x1b[0m \x1bcbaz'),
+    (False, 'foo bar \x1bcbaz'),
+])
+def test_feed(color, expected):
+    esc_filter = EscapeSequenceFilter(color)
+    text = 'foo \x1b[2K\x1b[1;31mbar\x1b[0m\x9b1A \x1bcbaz\x1b[?25l'
+    assert esc_filter.feed(text) == expected
+    assert esc_filter.flush() == ''
+
+
+def test_feed_split():
+    esc_filter = EscapeSequenceFilter()
+    text = 'foo \x1b[2K\x1b[1;31mbar\x1b[0m\x9b1A baz'
+    output = ''.join(esc_filter.feed(c) for c in text)
+    assert output == 'foo \x1b[1;31mbar\x1b[0m baz'
+
+
+def test_feed_malformed():
+    esc_filter = EscapeSequenceFilter()
+    assert esc_filter.feed('\x1b[1 2Afoo') == '\x1b[1 2Afoo'
+    assert esc_filter.feed('\x1b\x1b[Kfoo') == '\x1bfoo'
+    assert esc_filter.feed('\x1b[12\nfoo') == '\x1b[12\nfoo'
+
+
+def test_flush():
+    esc_filter = EscapeSequenceFilter()
+    assert esc_filter.feed('foo\x1b[1') == 'foo'
+    assert esc_filter.flush() == '\x1b[1'
+    assert esc_filter.feed('2K') == '2K'
+
+
+def test_terminal_output_filter():
+    output_filter = TerminalOutputFilter(redraw_interval=-1)
+    assert output_filter.feed('\x1b[2Kfoo\r\n\x1b[1') == 'foo\n'
+    assert output_filter.feed('Abar\r') == ''
+    assert output_filter.feed('\nyarn [1/4] \x1b[2K\r[2/4]') == 'bar\n'
+    assert output_filter.feed('\r[3/4]\r[4/4]\r\n') == '[4/4]\n'
+    assert output_filter.feed('Done') == ''
+    assert output_filter.flush() == 'Done'
+
+
+def test_terminal_output_filter_redraw():
+    output_filter = TerminalOutputFilter(redraw_interval=1.0)
+    with patch('jaffle.ansi.time') as time:
+        time.monotonic.return_value = 100.0
+        assert output_filter.feed('10%\r20%') == '10%\n'
+        time.monotonic.return_value = 100.5
+        assert output_filter.feed('\r30%\r') == ''
+        time.monotonic.return_value = 101.0
+        assert output_filter.feed('40%\r40%\r') == '40%\n'
+        time.monotonic.return_value = 102.0
+        assert output_filter.feed('40%\r') == ''  # redundant redraw
+        assert output_filter.feed('\n') == ''
+        assert output_filter.feed('50%\r100%\n') == '100%\n'
+        assert output_filter.flush() == ''
+
+
+def test_terminal_output_filter_no_collapse():
+    output_filter = TerminalOutputFilter(color=False, collapse_cr=False)
+    assert output_filter.feed('\x1b[31mfoo\x1b[0m\rbar\r\n\x1b[') == 'foo\rbar\r\n'
+    assert output_filter.flush() == '\x1b['
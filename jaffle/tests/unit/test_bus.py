@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from jaffle.bus import EventBus
+
+
+def test_event_bus():
+    bus = EventBus()
+    bus.subscribe('file_events', 'pytest')
+    bus.subscribe('file_events', 'pytest')
+    bus.subscribe('file_events', 'tornado')
+    bus.subscribe('file_events', 'stopped')
+    bus.subscribe('reload', 'tornado')
+
+    sessions = {'pytest': 'kernel_a', 'tornado': 'kernel_b'}
+    deliveries = bus.route('file_events', [{'src_path': 'foo.py'}], 1000.5, sessions.get)
+
+    assert [s for s, _ in deliveries] == ['kernel_a', 'kernel_b']
+    calls = []
+    namespace = {
+        'pytest': type('App', (), {'_receive_messages': lambda *args: calls.append(args)})(),
+        'tornado': type('App', (), {'_receive_messages': lambda *args: calls.append(args)})()
+    }
+    for _, code in deliveries:
+        exec(code, namespace)
+    assert [c[1:] for c in calls] == [('file_events', [{'src_path': 'foo.py'}], 1000.5)] * 2
+
+    assert bus.route('unknown', [1], 1000.5, sessions.get) == []
+
+    bus.remove_app('tornado')
+    assert bus.subscriptions == {'file_events': {'pytest', 'stopped'}}
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+from tornado import gen, ioloop
+
+from jaffle.control import JaffleControlClient, JaffleControlError, JaffleControlServer
+
+
+@pytest.fixture(scope='function')
+def control_url(tmpdir):
+    return 'ipc://{}'.format(tmpdir.join('control.sock'))
+
+
+@pytest.mark.gen_test
+def test_control(control_url):
+    @gen.coroutine
+    def stop():
+        yield gen.sleep(0.01)
+        return 'stopped'
+
+    def fail():
+        raise ValueError('failed')
+
+    status = Mock(return_value={'pid': 1})
+    server = JaffleControlServer(
+        control_url, {
+            'status': status,
+            'stop': stop,
+            'fail': fail
+        }, Mock(logging.Logger), ioloop.IOLoop.current()
+    )
+    server.start()
+
+    client = JaffleControlClient(control_url, timeout=5)
+    executor = ThreadPoolExecutor(1)
+
+    try:
+        result = yield executor.submit(client.request, 'status', verbose=True)
+        assert result == {'pid': 1}
+        status.assert_called_once_with(verbose=True)
+
+        result = yield executor.submit(client.request, 'stop')
+        assert result == 'stopped'
+
+        with pytest.raises(JaffleControlError) as e:
+            yield executor.submit(client.request, 'fail')
+        assert str(e.value) == 'failed'
+
+        with pytest.raises(JaffleControlError) as e:
+            yield executor.submit(client.request, 'unknown')
+        assert 'Invalid request' in str(e.value)
+
+    finally:
+        server.close()
+        executor.shutdown()
+
+
+def test_control_timeout(control_url):
+    client = JaffleControlClient(control_url, timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        client.request('status')
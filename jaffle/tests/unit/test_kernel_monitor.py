@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from unittest.mock import Mock
+
+import pytest
+from tornado import gen
+
+from jaffle.kernel_monitor import KernelMonitor
+
+
+@pytest.fixture(scope='function')
+def restart():
+    return Mock(return_value=gen.maybe_future(None))
+
+
+@pytest.fixture(scope='function')
+def monitor(restart):
+    monitor = KernelMonitor(
+        Mock(logging.Logger),
+        'py_kernel',
+        Mock(is_alive=Mock(return_value=True)),
+        restart,
+        restart_limit=2,
+        max_missed=2,
+        backoff=0.01,
+        max_backoff=0.02
+    )
+    monitor.periodic_callback = Mock()
+    return monitor
+
+
+def test_is_alive(monitor):
+    assert monitor.is_alive()
+
+    monitor.client = Mock(hb_channel=Mock(is_beating=Mock(return_value=False)))
+    assert monitor.is_alive()
+    assert not monitor.is_alive()
+
+    monitor.client.hb_channel.is_beating.return_value = True
+    assert monitor.is_alive()
+    assert monitor.missed == 0
+
+    monitor.kernel_manager.is_alive.return_value = False
+    assert not monitor.is_alive()
+
+
+@pytest.mark.gen_test
+def test_check(monitor, restart):
+    yield monitor.check()
+    restart.assert_not_called()
+
+    monitor.kernel_manager.is_alive.return_value = False
+
+    yield monitor.check()
+    assert restart.call_count == 1
+    assert monitor.restarts == 1
+    assert not monitor.restarting
+
+    yield monitor.check()
+    assert restart.call_count == 2
+
+    yield monitor.check()  # restart limit
+    assert restart.call_count == 2
+    assert monitor.periodic_callback is None
+    monitor.log.error.assert_called_once_with(
+        'Kernel %s is dead and reached the restart limit (%s)', 'py_kernel', 2
+    )
+
+
+@pytest.mark.gen_test
+def test_check_reset_restarts(monitor, restart):
+    monitor.kernel_manager.is_alive.return_value = False
+    yield monitor.check()
+    assert monitor.restarts == 1
+
+    monitor.kernel_manager.is_alive.return_value = True
+    yield gen.sleep(0.03)
+    yield monitor.check()
+    assert monitor.restarts == 0
+    assert monitor.last_restarted_at is None
+
+
+@pytest.mark.gen_test
+def test_check_restart_error(monitor, restart):
+    restart.side_effect = RuntimeError('failed')
+    monitor.kernel_manager.is_alive.return_value = False
+
+    yield monitor.check()
+
+    monitor.log.error.assert_called_once_with(
+        'Failed to restart kernel %s: %s', 'py_kernel', restart.side_effect
+    )
+    assert not monitor.restarting
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import logging
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from jaffle.log_archive import (
+    INDEX_NAME, LogArchiveHandler, LogArchiveReader, get_codec, parse_time, read_index
+)
+
+
+def make_record(name, level, msg, created):
+    record = logging.makeLogRecord({
+        'name': name,
+        'levelno': level,
+        'levelname': logging.getLevelName(level),
+        'msg': msg
+    })
+    record.created = created
+    return record
+
+
+def write_records(archive_dir, records, **kwargs):
+    handler = LogArchiveHandler(archive_dir, **kwargs)
+    for record in records:
+        handler.handle(record)
+    handler.close()
+
+
+def test_write_and_read(tmpdir):
+    archive_dir = Path(str(tmpdir))
+    write_records(
+        archive_dir, [
+            make_record('pytest', logging.INFO, 'test {}'.format(i), 1000.0 + i)
+            for i in range(10)
+        ] + [make_record('jaffle', logging.WARNING, 'warning', 1010.0)],
+        block_records=4
+    )
+
+    entries = read_index(archive_dir / INDEX_NAME)
+    assert [e['count'] for e in entries] == [4, 4, 3]
+    assert entries[0]['segment'].startswith('segment-000001-')
+    assert entries[0]['segment'].endswith('.jsonl.gz')
+    assert entries[1]['offset'] == entries[0]['length']
+    assert entries[2]['loggers'] == ['jaffle', 'pytest']
+    assert entries[2]['max_level'] == logging.WARNING
+
+    with (archive_dir / entries[0]['segment']).open('rb') as f:
+        lines = gzip.decompress(f.read()).decode('utf-8').splitlines()  # multi-member gzip
+    assert len(lines) == 11
+
+    reader = LogArchiveReader(archive_dir)
+
+    messages = ['test {}'.format(i) for i in range(10)] + ['warning']
+    assert [r['message'] for r in reader.records()] == messages
+    records = reader.records(since=1003.0, until=1005.0)
+    assert [r['created'] for r in records] == [1003.0, 1004.0, 1005.0]
+    assert len(reader.blocks(since=1003.0, until=1005.0)) == 2
+    assert [r['message'] for r in reader.records(min_level=logging.WARNING)] == ['warning']
+    assert reader.blocks(min_level=logging.WARNING) == entries[2:]
+    assert [r['logger'] for r in reader.records(loggers=['jaffle'])] == ['jaffle']
+
+    assert [r['message'] for r in reader.tail(5)] == messages[-5:]
+    assert [r['message'] for r in reader.tail(2, loggers=['pytest'])] == ['test 8', 'test 9']
+    assert reader.tail(0) == []
+
+
+def test_rotation(tmpdir):
+    archive_dir = Path(str(tmpdir))
+    write_records(archive_dir, [make_record('a', logging.INFO, 'first', 1000.0)])
+    write_records(
+        archive_dir, [make_record('a', logging.INFO, str(i), 1001.0 + i) for i in range(6)],
+        max_bytes=1,
+        max_segments=3,
+        block_records=2
+    )
+
+    segments = sorted(p.name for p in archive_dir.glob('segment-*'))
+    assert [s[:14] for s in segments] == ['segment-000002', 'segment-000003', 'segment-000004']
+    assert [e['segment'] for e in read_index(archive_dir / INDEX_NAME)] == segments
+    assert [r['message'] for r in LogArchiveReader(archive_dir).records()] == [
+        '0', '1', '2', '3', '4', '5'
+    ]
+
+
+def test_flush_interval(tmpdir):
+    archive_dir = Path(str(tmpdir))
+    handler = LogArchiveHandler(archive_dir, flush_interval=0.01)
+    reader = LogArchiveReader(archive_dir)
+    after = reader.last_block_key()
+    handler.handle(make_record('a', logging.INFO, 'foo', 1000.0))
+
+    record = next(reader.follow(after=after, interval=0.01))
+    assert record['message'] == 'foo'
+
+    handler.close()
+
+
+def test_codec():
+    with pytest.raises(ValueError) as e:
+        get_codec('bz2')
+    assert "Invalid compression: 'bz2'" in str(e.value)
+
+    codec = get_codec('gzip')
+    assert codec.extension == 'gz'
+    assert codec.decompress(codec.compress(b'foo') + codec.compress(b'bar')) == b'foobar'
+
+
+def test_codec_zstd():
+    pytest.importorskip('zstandard')
+    codec = get_codec('zstd')
+    assert codec.extension == 'zst'
+    assert codec.decompress(codec.compress(b'foo')) == b'foo'
+
+
+def test_parse_time():
+    now = datetime(2018, 3, 1, 12, 0, 0).timestamp()
+    assert parse_time('30s', now) == now - 30
+    assert parse_time('1.5h', now) == now - 5400
+    assert parse_time('2d', now) == now - 172800
+    assert parse_time('2018-02-28T10:30', now) == datetime(2018, 2, 28, 10, 30).timestamp()
+    assert parse_time('2018-02-28', now) == datetime(2018, 2, 28).timestamp()
+    assert parse_time('09:15:30', now) == datetime(2018, 3, 1, 9, 15, 30).timestamp()
+
+    with pytest.raises(ValueError) as e:
+        parse_time('yesterday', now)
+    assert "Invalid time: 'yesterday'" in str(e.value)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import re
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+from jaffle.logging import (
+    JaffleCommandLogHandler, JSONLinesLogHandler, LogFormatter, LogLimiter, record_from_dict,
+    record_to_dict
+)
+
+
+def make_record(msg, args, exc_info=None, extra=None):
+    return logging.getLogger('foo').makeRecord(
+        'foo', logging.WARNING, '/src/foo.py', 10, msg, args, exc_info, func='bar', extra=extra
+    )
+
+
+def test_record_to_dict():
+    record = make_record('%s: %d', ('count', 3), extra={'trace_id': 'abc', 'path': Path('/a')})
+
+    data = json.loads(json.dumps(record_to_dict(record)))
+
+    assert data['logger'] == 'foo'
+    assert data['levelname'] == 'WARNING'
+    assert data['msg'] == '%s: %d'
+    assert data['args'] == ['count', 3]
+    assert data['created'] == record.created
+    assert data['msecs'] == record.msecs
+    assert data['funcName'] == 'bar'
+    assert data['exc_text'] is None
+    assert data['extra'] == {'trace_id': 'abc', 'path': repr(Path('/a'))}
+
+    restored = record_from_dict(data)
+
+    assert restored.name == 'foo'
+    assert restored.levelno == logging.WARNING
+    assert restored.getMessage() == 'count: 3'
+    assert restored.created == record.created
+    assert restored.msecs == record.msecs
+    assert restored.lineno == 10
+    assert restored.trace_id == 'abc'
+
+
+def test_record_to_dict_non_primitive_args():
+    record = make_record('path: %r', (Path('/a'), ))
+
+    data = record_to_dict(record)
+
+    assert data['msg'] == 'path: {!r}'.format(Path('/a'))
+    assert data['args'] is None
+
+    record = make_record('%(a)s-%(b)s', ({'a': 1, 'b': 'x'}, ))
+    assert record_from_dict(json.loads(json.dumps(record_to_dict(record)))).getMessage() == '1-x'
+
+
+def test_record_to_dict_exception():
+    try:
+        raise ValueError('Bad value')
+    except ValueError:
+        record = make_record('Failed', None, exc_info=sys.exc_info())
+
+    data = record_to_dict(record)
+
+    assert data['exc_text'].startswith('Traceback')
+    assert 'ValueError: Bad value' in data['exc_text']
+    assert record_from_dict(data).exc_text == data['exc_text']
+
+
+def test_command_log_handler():
+    conf = Mock(
+        app_log_suppress_patterns={'foo': [re.compile('^secret')]},
+        process_log_suppress_patterns={},
+        global_log_suppress_patterns=[],
+        app_log_replace_patterns={},
+        process_log_replace_patterns={},
+        global_log_replace_patterns=[(re.compile('^count: (.*)$'), 'total: \\1')],
+        log_limits={},
+        global_log_limit=(0.0, False)
+    )
+    handler = JaffleCommandLogHandler(conf)
+    handler.stream = Mock()
+
+    handler.handle(make_record('%s: %d', ('secret', 1)))
+    handler.stream.write.assert_not_called()
+
+    record = make_record('%s: %d', ('count', 3))
+    handler.handle(record)
+    assert ''.join(c[0][0] for c in handler.stream.write.call_args_list) == 'total: 3\n'
+    assert record.msg == 'total: 3'
+    assert record.args is None
+
+
+def test_command_log_handler_limit():
+    conf = Mock(
+        app_log_suppress_patterns={},
+        process_log_suppress_patterns={},
+        global_log_suppress_patterns=[],
+        app_log_replace_patterns={},
+        process_log_replace_patterns={},
+        global_log_replace_patterns=[],
+        log_limits={'bar': (0.0, False)},
+        global_log_limit=(0.0, True)
+    )
+    handler = JaffleCommandLogHandler(conf)
+    handler.setFormatter(logging.Formatter('%(name)s %(message)s'))
+    handler.stream = Mock()
+
+    for _ in range(3):
+        handler.handle(make_record('%s', ('spam', )))
+    handler.emit_summaries()
+    written = ''.join(c[0][0] for c in handler.stream.write.call_args_list)
+    assert written == 'foo spam\nfoo Last message repeated 2 times\n'
+
+    handler.stream.reset_mock()
+    record = make_record('%s', ('spam', ))
+    record.name = 'bar'
+    handler.handle(record)
+    handler.handle(record)
+    written = ''.join(c[0][0] for c in handler.stream.write.call_args_list)
+    assert written == 'bar spam\nbar spam\n'  # not limited
+    assert list(handler.limiters) == ['foo']
+
+    handler.stream.reset_mock()
+    conf.global_log_limit = (0.0, False)
+    handler.handle(make_record('%s', ('eggs', )))
+    written = ''.join(c[0][0] for c in handler.stream.write.call_args_list)
+    assert written == 'foo eggs\n'
+    assert handler.limiters == {}
+
+
+def test_log_limiter_collapse_repeats():
+    limiter = LogLimiter('foo', collapse_repeats=True)
+
+    assert limiter.filter(make_record('spam', None)) != []
+    assert limiter.filter(make_record('spam', None)) == []
+    assert limiter.filter(make_record('spam', None)) == []
+
+    records = limiter.filter(make_record('eggs', None))
+    assert [r.getMessage() for r in records] == ['Last message repeated 2 times', 'eggs']
+    assert records[0].name == 'foo'
+    assert records[0].levelno == logging.WARNING
+
+    assert limiter.summarize() == []
+
+
+def test_log_limiter_rate_limit(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('jaffle.logging.time.monotonic', lambda: now[0])
+    limiter = LogLimiter('foo', rate_limit=2.0)
+
+    passed = [limiter.filter(make_record('msg %d', (i, ))) for i in range(5)]
+    assert [len(r) for r in passed] == [1, 1, 0, 0, 0]
+    assert limiter.suppressed == 3
+
+    now[0] += 0.5  # 1 token
+    records = limiter.filter(make_record('msg %d', (5, )))
+    assert [r.getMessage() for r in records] == [
+        'Suppressed 3 messages (rate limit: 2/s)', 'msg 5'
+    ]
+    assert records[0].levelno == logging.WARNING
+
+    limiter.filter(make_record('msg %d', (6, )))
+    assert [r.getMessage() for r in limiter.summarize()] == [
+        'Suppressed 1 messages (rate limit: 2/s)'
+    ]
+
+
+def test_json_lines_log_handler(tmpdir):
+    file_path = Path(str(tmpdir)) / 'log.jsonl'
+    handler = JSONLinesLogHandler(file_path)
+    handler.handle(make_record('\x1b[31m%s\x1b[0m', ('red', ), extra={'trace_id': 'abc'}))
+    handler.close()
+
+    data = json.loads(file_path.read_text())
+    assert data['logger'] == 'foo'
+    assert data['levelname'] == 'WARNING'
+    assert data['message'] == 'red'
+    assert data['extra'] == {'trace_id': 'abc'}
+    assert data['time'].endswith('+00:00')
+
+
+def test_log_formatter_keeps_created():
+    record = make_record('%s', ('foo', ))
+    record.created = 0.5
+    record.msecs = 500.0
+
+    formatter = LogFormatter(fmt='%(created)s %(msecs)03d %(message)s', enable_color=False)
+    assert formatter.format(record) == '0.5 500 foo'
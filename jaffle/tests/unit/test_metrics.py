@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import socket
+from unittest.mock import Mock
+
+import pytest
+from tornado.httpclient import AsyncHTTPClient
+
+from jaffle.metrics import MetricsLogHandler, MetricsRegistry, MetricsServer, render_text
+
+
+def test_counter():
+    registry = MetricsRegistry()
+    counter = registry.counter('foo_total', 'Foo.', ['kind'])
+
+    assert registry.counter('foo_total', 'Foo.', ['kind']) is counter
+    assert counter.get(kind='a') is None
+
+    counter.inc(kind='a')
+    counter.inc(2, kind='a')
+    counter.inc(kind=1)
+
+    assert counter.get(kind='a') == 3
+    assert counter.get(kind='1') == 1
+
+    with pytest.raises(ValueError):
+        counter.inc(-1, kind='a')
+    with pytest.raises(ValueError):
+        counter.inc(other='a')
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        registry.gauge('foo_total')
+    with pytest.raises(ValueError):
+        registry.counter('foo_total', labelnames=['other'])
+    with pytest.raises(ValueError):
+        registry.counter('foo-total')
+
+
+def test_gauge():
+    gauge = MetricsRegistry().gauge('foo')
+
+    gauge.set(3)
+    gauge.inc()
+    gauge.dec(0.5)
+
+    assert gauge.get() == 3.5
+
+
+def test_histogram():
+    histogram = MetricsRegistry().histogram('foo_seconds', buckets=[1.0, 0.1, float('inf')])
+
+    assert histogram.buckets == (0.1, 1.0)
+
+    for value in [0.05, 0.1, 0.5, 3.0]:
+        histogram.observe(value)
+
+    value = histogram.get()
+    assert value == {'buckets': [2, 1], 'sum': 3.65, 'count': 4}
+
+    value['buckets'][0] = 100  # not shared
+    assert histogram.get()['buckets'] == [2, 1]
+
+
+def test_snapshot():
+    registry = MetricsRegistry()
+    registry.counter('foo_total', 'Foo.', ['kind']).inc(kind='a')
+    registry.histogram('bar_seconds', buckets=[1.0]).observe(0.5)
+
+    snapshot = json.loads(json.dumps(registry.snapshot()))
+
+    assert snapshot == [{
+        'name': 'foo_total',
+        'type': 'counter',
+        'help': 'Foo.',
+        'samples': [{'labels': {'kind': 'a'}, 'value': 1}]
+    }, {
+        'name': 'bar_seconds',
+        'type': 'histogram',
+        'help': '',
+        'buckets': [1.0],
+        'samples': [{'labels': {}, 'value': {'buckets': [1], 'sum': 0.5, 'count': 1}}]
+    }]  # yapf: disable
+
+
+def test_render_text():
+    server = MetricsRegistry()
+    server.gauge('up', 'Up.\nSecond line').set(1)
+    app1 = MetricsRegistry()
+    app1.counter('runs_total', 'Runs.', ['result']).inc(result='say "hi"\n')
+    app1.histogram('run_seconds', buckets=[0.5, 1.0]).observe(0.7)
+    app2 = MetricsRegistry()
+    app2.counter('runs_total', 'Runs.', ['result']).inc(3, result='ok')
+    app2.gauge('run_seconds').set(1)  # conflicting type
+
+    text = render_text([
+        (server.snapshot(), {}),
+        (app1.snapshot(), {'app': 'app1'}),
+        (app2.snapshot(), {'app': 'app2'})
+    ])
+
+    assert text == '\n'.join([
+        '# HELP up Up.\\nSecond line',
+        '# TYPE up gauge',
+        'up 1',
+        '# HELP runs_total Runs.',
+        '# TYPE runs_total counter',
+        'runs_total{result="say \\"hi\\"\\n",app="app1"} 1',
+        'runs_total{result="ok",app="app2"} 3',
+        '# TYPE run_seconds histogram',
+        'run_seconds_bucket{app="app1",le="0.5"} 0',
+        'run_seconds_bucket{app="app1",le="1.0"} 1',
+        'run_seconds_bucket{app="app1",le="+Inf"} 1',
+        'run_seconds_sum{app="app1"} 0.7',
+        'run_seconds_count{app="app1"} 1',
+        ''
+    ])
+
+
+def test_metrics_log_handler():
+    registry = MetricsRegistry()
+    logger = logging.getLogger('test_metrics_log_handler')
+    logger.propagate = False
+    logger.handlers = [MetricsLogHandler(registry)]
+
+    logger.warning('foo')
+    logger.warning('bar')
+
+    assert registry.counter(
+        'jaffle_log_records_total', labelnames=['logger', 'level']
+    ).get(logger='test_metrics_log_handler', level='warning') == 2
+
+
+@pytest.mark.gen_test
+def test_metrics_server(tmpdir):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    socket_path = str(tmpdir / 'metrics.sock')
+    server = MetricsServer(Mock(return_value='up 1\n'), Mock(), port=port, socket_path=socket_path)
+    server.start()
+    try:
+        response = yield AsyncHTTPClient().fetch('http://127.0.0.1:{}/metrics'.format(port))
+        assert response.body == b'up 1\n'
+        assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert (tmpdir / 'metrics.sock').exists()
+    finally:
+        server.close()
+
+    assert not (tmpdir / 'metrics.sock').exists()
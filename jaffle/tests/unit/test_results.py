@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from jaffle.results import ResultSummary
+
+
+def test_result_summary():
+    summary = ResultSummary()
+    summary.start('pytest', 'tests/test_foo.py', 1000.0)
+    summary.add('pytest', 'tests/test_foo.py::test_a', 'failed', 0.25)
+    run = summary.add('pytest', 'tests/test_foo.py::test_b', 'passed', 0.5)
+
+    assert run['outcomes'] == {'failed': 1, 'passed': 1}
+    assert run['failed'] == ['tests/test_foo.py::test_a']
+    assert summary.format(run) == '1 failed, 1 passed so far'
+
+    run = summary.finish('pytest', 1, 1001.5)
+    assert run['exit_code'] == 1
+    assert summary.format(run) == '1 failed, 1 passed in 1.50s'
+    assert summary.to_dict()['pytest']['duration'] == 0.75
+
+    # a new run replaces the last one
+    run = summary.start('pytest', 'tests/test_bar.py', 1002.0)
+    assert summary.format(run) == 'no tests ran so far'
+
+    # results without the start message
+    summary.add('other', 'tests/test_baz.py::test_c', 'skipped', 0.0)
+    assert summary.runs['other']['outcomes'] == {'skipped': 1}
+
+    summary.remove_app('pytest')
+    assert sorted(summary.runs) == ['other']
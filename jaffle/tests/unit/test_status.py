@@ -65,6 +65,20 @@ def test_status_add_session():
     assert bar.kernel is None
 
 
+def test_status_remove():
+    status = JaffleStatus(1, {}, {})
+    status.add_session('1', 'foo')
+    status.add_app('my_app', 'foo', 'my.app.MyApp', None, {})
+
+    status.remove_app('my_app')
+    status.remove_app('unknown')
+    assert status.apps == {}
+
+    status.remove_session('foo')
+    status.remove_session('unknown')
+    assert status.sessions == {}
+
+
 def test_session():
     with patch('jaffle.status.JaffleKernelData') as kernel:
         session = JaffleSession('1', 'foo', {'my_kernel': {}})
@@ -84,10 +98,15 @@ def test_session():
 
     kernel.from_dict.assert_called_once_with({'python3': {}})
 
+    assert session.restart_count == 0
+    assert session.downtime == 0.0
+
     assert session.to_dict() == {
         'id': '2',
         'name': 'bar',
-        'kernel': kernel.from_dict.return_value.to_dict.return_value
+        'kernel': kernel.from_dict.return_value.to_dict.return_value,
+        'restart_count': 0,
+        'downtime': 0.0
     }
 
     kernel.from_dict.return_value.to_dict.assert_called_once_with()
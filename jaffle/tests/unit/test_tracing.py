@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import threading
+from unittest.mock import Mock
+
+from jaffle.tracing import (
+    TraceFileWriter, TraceIdFilter, Tracer, current_trace_id, new_trace_id, trace_context
+)
+
+
+def test_trace_context():
+    assert current_trace_id() is None
+
+    with trace_context('abc'):
+        assert current_trace_id() == 'abc'
+        with trace_context(None):
+            assert current_trace_id() == 'abc'
+        with trace_context('def'):
+            assert current_trace_id() == 'def'
+        assert current_trace_id() == 'abc'
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(current_trace_id()))
+        thread.start()
+        thread.join()
+        assert other == [None]
+
+    assert current_trace_id() is None
+
+    assert len(new_trace_id()) == 16
+    assert new_trace_id() != new_trace_id()
+
+
+def test_tracer():
+    sink = Mock()
+    tracer = Tracer(sink)
+
+    with tracer.span('no_trace'):
+        pass
+    sink.assert_not_called()
+
+    with tracer.span('outer', trace_id='abc', foo=1):
+        assert current_trace_id() == 'abc'
+        with tracer.span('inner'):
+            pass
+
+    inner, outer = [c[0][0] for c in sink.call_args_list]
+    assert inner['name'] == 'inner'
+    assert inner['args'] == {'trace_id': 'abc'}
+    assert outer['name'] == 'outer'
+    assert outer['ph'] == 'X'
+    assert outer['args'] == {'trace_id': 'abc', 'foo': 1}
+    assert outer['ts'] <= inner['ts']
+    assert outer['ts'] + outer['dur'] >= inner['ts'] + inner['dur']
+
+    sink.reset_mock()
+    tracer.add_span('span', 1.0, 1.5, trace_id='abc', tid=3)
+    event = sink.call_args[0][0]
+    assert (event['ts'], event['dur'], event['tid']) == (1000000, 500000, 3)
+
+    sink.reset_mock()
+    disabled = Tracer(sink, enabled=False)
+    with disabled.span('span', trace_id='abc'):
+        assert current_trace_id() == 'abc'
+    sink.assert_not_called()
+
+
+def test_trace_id_filter():
+    record = logging.makeLogRecord({'msg': 'foo'})
+    TraceIdFilter().filter(record)
+    assert not hasattr(record, 'trace_id')
+
+    with trace_context('abc'):
+        TraceIdFilter().filter(record)
+        assert record.trace_id == 'abc'
+
+        record = logging.makeLogRecord({'msg': 'foo', 'trace_id': 'def'})
+        TraceIdFilter().filter(record)
+        assert record.trace_id == 'def'
+
+
+def test_trace_file_writer(tmpdir):
+    file_path = tmpdir / 'trace.json'
+    for _ in range(2):  # appended across restarts
+        writer = TraceFileWriter(file_path)
+        writer.write({'name': 'foo', 'pid': 1}, process_name='jaffle')
+        writer.write({'name': 'bar', 'pid': 1}, process_name='jaffle')
+        writer.write({'name': 'baz', 'pid': 2})
+        writer.close()
+
+    text = file_path.read_text('utf-8')
+    assert text.startswith('[\n')
+    # The closing bracket is optional in the Chrome trace event format.
+    events = json.loads(text.rstrip().rstrip(',') + ']')
+    assert [e['name'] for e in events] == ['process_name', 'foo', 'bar', 'baz'] * 2
+    assert events[0] == {'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'jaffle'}}
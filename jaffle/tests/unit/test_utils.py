@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from unittest.mock import Mock
+
 import pytest
 
-from jaffle.utils import bool_value, deep_merge
+from jaffle.utils import bool_value, deep_merge, float_value, int_value
 
 
 def test_deep_merge():
@@ -82,3 +84,27 @@ def test_bool_value():
     with pytest.raises(ValueError) as e:
         bool_value('2')
     assert 'Invalid bool value' in str(e)
+
+
+def test_int_value():
+    assert int_value(3) == 3
+    assert int_value('3') == 3
+    assert int_value(Mock(render=Mock(return_value='5'))) == 5
+
+    with pytest.raises(ValueError):
+        int_value('foo')
+
+    with pytest.raises(ValueError):
+        int_value(True)
+
+
+def test_float_value():
+    assert float_value(3) == 3.0
+    assert float_value('0.5') == 0.5
+    assert float_value(Mock(render=Mock(return_value='2.5'))) == 2.5
+
+    with pytest.raises(ValueError):
+        float_value('foo')
+
+    with pytest.raises(ValueError):
+        float_value(True)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+TRACE_FILE_NAME = 'trace.json'
+
+_local = threading.local()
+
+
+def new_trace_id():
+    """
+    Generates a new trace ID.
+
+    Returns
+    -------
+    trace_id : str
+        Trace ID (16 hex digits).
+    """
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id():
+    """
+    Returns the trace ID of the current thread.
+
+    Returns
+    -------
+    trace_id : str or None
+        Trace ID or None if no trace is active.
+    """
+    return getattr(_local, 'trace_id', None)
+
+
+@contextmanager
+def trace_context(trace_id):
+    """
+    Context manager which makes a trace ID current in the thread.
+    It must not wrap ``yield`` of a coroutine because other callbacks run on
+    the same thread while the coroutine is suspended.
+
+    Parameters
+    ----------
+    trace_id : str or None
+        Trace ID. The current trace ID is kept if it is None.
+    """
+    previous = current_trace_id()
+    _local.trace_id = trace_id or previous
+    try:
+        yield
+    finally:
+        _local.trace_id = previous
+
+
+class Tracer(object):
+    """
+    Tracer records spans as Chrome trace events (complete events) and passes
+    them to a sink. Spans without a trace ID are not recorded.
+    """
+
+    def __init__(self, sink=None, enabled=True):
+        """
+        Initializes Tracer.
+
+        Parameters
+        ----------
+        sink : function or None
+            Function to be called with each trace event (dict).
+        enabled : bool
+            Whether to record spans.
+        """
+        self.sink = sink
+        self.enabled = enabled and sink is not None
+
+    def __repr__(self):
+        """
+        Returns string representation of Tracer.
+
+        Returns
+        -------
+        repr : str
+            String representation of Tracer.
+        """
+        return '<%s {enabled: %s}>' % (type(self).__name__, self.enabled)
+
+    @contextmanager
+    def span(self, name, trace_id=None, **args):
+        """
+        Context manager which records the block as a span. The trace ID is
+        also made current in the thread during the block.
+
+        Parameters
+        ----------
+        name : str
+            Span name (e.g. ``pytest.main``).
+        trace_id : str or None
+            Trace ID (default: the current trace ID).
+        args : dict
+            Additional arguments of the span.
+        """
+        trace_id = trace_id or current_trace_id()
+        started_at = time.time()
+        with trace_context(trace_id):
+            try:
+                yield
+            finally:
+                self.add_span(name, started_at, time.time(), trace_id=trace_id, **args)
+
+    def add_span(self, name, start, end, trace_id=None, tid=None, **args):
+        """
+        Records a span which has finished.
+
+        Parameters
+        ----------
+        name : str
+            Span name.
+        start : float
+            Start time (UNIX time in seconds).
+        end : float
+            End time (UNIX time in seconds).
+        trace_id : str or None
+            Trace ID (default: the current trace ID).
+        tid : int or None
+            Thread ID (default: the current thread).
+        args : dict
+            Additional arguments of the span.
+        """
+        trace_id = trace_id or current_trace_id()
+        if not self.enabled or trace_id is None:
+            return
+        self.sink({
+            'name': name,
+            'cat': 'jaffle',
+            'ph': 'X',
+            'ts': int(start * 1e6),
+            'dur': max(int((end - start) * 1e6), 0),
+            'pid': os.getpid(),
+            'tid': tid or threading.get_ident(),
+            'args': dict(args, trace_id=trace_id)
+        })
+
+
+class TraceIdFilter(logging.Filter):
+    """
+    Log filter which attaches the current trace ID to log records as
+    ``trace_id``.
+    """
+
+    def filter(self, record):
+        """
+        Attaches the current trace ID to a log record.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Log record.
+
+        Returns
+        -------
+        passed : bool
+            Always True.
+        """
+        if getattr(record, 'trace_id', None) is None:
+            trace_id = current_trace_id()
+            if trace_id:
+                record.trace_id = trace_id
+        return True
+
+
+class TraceFileWriter(object):
+    """
+    TraceFileWriter appends trace events to a file in the Chrome trace event
+    JSON array format, which can be opened by ``chrome://tracing`` or
+    Perfetto UI. The closing bracket is omitted (it is optional in the format)
+    so that events can be appended across restarts.
+    """
+
+    def __init__(self, file_path):
+        """
+        Initializes TraceFileWriter.
+
+        Parameters
+        ----------
+        file_path : str or pathlib.Path
+            Trace file path.
+        """
+        self.file_path = str(file_path)
+
+        self.process_names = {}
+        self.file = open(self.file_path, 'a', encoding='utf-8')
+        if self.file.tell() == 0:
+            self.file.write('[\n')
+
+    def __repr__(self):
+        """
+        Returns string representation of TraceFileWriter.
+
+        Returns
+        -------
+        repr : str
+            String representation of TraceFileWriter.
+        """
+        return '<%s {file_path: %s}>' % (type(self).__name__, self.file_path)
+
+    def write(self, event, process_name=None):
+        """
+        Writes a trace event.
+
+        Parameters
+        ----------
+        event : dict
+            Trace event.
+        process_name : str or None
+            Name of the process which has recorded the event. It is written
+            as metadata on the first event of the process.
+        """
+        lines = []
+        pid = event.get('pid')
+        if process_name and self.process_names.get(pid) != process_name:
+            self.process_names[pid] = process_name
+            lines.append({
+                'name': 'process_name',
+                'ph': 'M',
+                'pid': pid,
+                'args': {'name': process_name}
+            })
+        lines.append(event)
+        self.file.write(''.join(json.dumps(e, ensure_ascii=False) + ',\n' for e in lines))
+        self.file.flush()
+
+    def close(self):
+        """
+        Closes the trace file.
+        """
+        self.file.close()
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import errno
+import os
 from copy import deepcopy
 from functools import reduce
 
@@ -68,6 +70,68 @@ def bool_value(value):
     raise ValueError('Invalid bool value: {!r}'.format(value))
 
 
+def int_value(value):
+    """
+    Converts the given object to an int if it is possible.
+
+    Parameters
+    ----------
+    value : object
+        Object to be converted to int.
+
+    Returns
+    -------
+    value : int
+        Int value.
+
+    Raises
+    ------
+    ValueError
+        If the object cannot be converted to int.
+    """
+    if isinstance(value, bool):
+        raise ValueError('Invalid int value: {!r}'.format(value))
+
+    if hasattr(value, 'render'):
+        value = value.render()
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid int value: {!r}'.format(value))
+
+
+def float_value(value):
+    """
+    Converts the given object to a float if it is possible.
+
+    Parameters
+    ----------
+    value : object
+        Object to be converted to float.
+
+    Returns
+    -------
+    value : float
+        Float value.
+
+    Raises
+    ------
+    ValueError
+        If the object cannot be converted to float.
+    """
+    if isinstance(value, bool):
+        raise ValueError('Invalid float value: {!r}'.format(value))
+
+    if hasattr(value, 'render'):
+        value = value.render()
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid float value: {!r}'.format(value))
+
+
 def str_value(value, match=None):
     """
     Converts the given object to a string with processing interpolation and
@@ -86,3 +150,28 @@ def str_value(value, match=None):
     if hasattr(value, 'render'):
         return value.render(match=match)
     return str(value)
+
+
+def check_pid(pid):
+    """
+    Checks whether the process is running.
+
+    Parameters
+    ----------
+    pid : int
+        Process ID.
+
+    Returns
+    -------
+    running : bool
+        Whether the process is running.
+    """
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        if e.errno == errno.ESRCH:
+            return False
+        elif e.errno == errno.EPERM:
+            return True  # the process exists but belongs to another user
+        raise
+    return True
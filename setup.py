@@ -114,7 +114,8 @@ setup(
     install_requires=requirements,
     extras_require={
         'dev': dev_requirements,
-        'pytest': ['pytest>=3.4.0']
+        'pytest': ['pytest>=3.4.0'],
+        'zstd': ['zstandard']
     },
     include_package_data=True,
     entry_points={